@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Archive Cold Data - Move old documents out of the hot collections
+Applies the retention policies in services/retention.py: notifications and
+read messages past their retention age are moved to `*_archive` collections,
+admin activities to gzip JSONL files under RETENTION_ARCHIVE_DIR, in bounded
+batches (copy, then delete). Tokens and OTPs are not handled here; they
+expire through TTL indexes. Safe to interrupt and re-run; meant for cron.
+
+Usage: python backend/archive_cold_data.py [--dry-run] [--max-batches N] [collection ...]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+os.environ["DB_ENSURE_INDEXES_ON_STARTUP"] = "false"
+
+# Add backend directory to path
+backend_dir = os.path.dirname(__file__)
+sys.path.insert(0, backend_dir)
+
+from database import database
+from services.retention import BATCH_SIZE, POLICIES
+
+
+async def main(args):
+    try:
+        await database.connect_to_mongo()
+        if not database.connected:
+            print("❌ Database unavailable; aborting")
+            return
+        if args.dry_run:
+            report = await database.get_retention_report()
+            for name, row in report["archive"].items():
+                if not args.collections or name in args.collections:
+                    print(f"Would archive {row['cold']} {name} older than {row['days']} days ({row['sink']})")
+            for name, row in report["ttl"].items():
+                print(f"{row['expired']} expired {name} awaiting TTL removal")
+            return
+        results = await database.retention.run(
+            args.collections or None, batch_size=args.batch_size, max_batches=args.max_batches
+        )
+        for result in results:
+            print(f"✅ {result['collection']}: moved {result['moved']} in {result['batches']} batches -> {result['sink']}")
+    except Exception as e:
+        print(f"❌ Archiving failed: {e}")
+    finally:
+        await database.close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move cold documents to archive storage")
+    parser.add_argument("collections", nargs="*", help=f"Policies to run: {', '.join(POLICIES)} (default all)")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be moved")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--max-batches", type=int, default=None, help="Stop each collection after N batches")
+    args = parser.parse_args()
+    unknown = [name for name in args.collections if name not in POLICIES]
+    if unknown:
+        parser.error(f"no retention policy for: {', '.join(unknown)}")
+    asyncio.run(main(args))
@@ -28,8 +28,11 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except HTTPException:
         raise
     
-    # If DB is connected, load from database
+    # If DB is connected, load from database (through the short-lived user cache)
     if getattr(database, "connected", False):
+        user = await database.user_cache.get(user_id, User)
+        if user is not None:
+            return user
         user_data = await database.get_user_by_id(user_id)
         if user_data is None:
             raise HTTPException(
@@ -37,7 +40,9 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
                 detail="User not found",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        return User(**user_data)
+        user = User(**user_data)
+        await database.user_cache.put(user)
+        return user
     
     # Degraded mode: synthesize user from token claims
     role = payload.get("role")
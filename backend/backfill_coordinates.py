@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Coordinate Backfill - Populate location_point/coords_source on existing data
+Jobs that only carry latitude/longitude are given a GeoJSON `location_point`
+for the 2dsphere index, then jobs and tradespeople that only have location
+text are resolved through the place table and geocoder.
+Safe to run repeatedly.
+"""
+
+import asyncio
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add backend directory to path
+backend_dir = os.path.dirname(__file__)
+sys.path.insert(0, backend_dir)
+
+from database import database
+
+
+async def main():
+    print("Starting coordinate backfill...")
+    try:
+        await database.connect_to_mongo()
+        if not database.connected:
+            print("❌ Database unavailable; aborting")
+            return
+        results = await database.backfill_all_coordinates()
+        print(f"✅ Backfill complete: {results}")
+    finally:
+        await database.close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Gazetteer Benchmark - token index vs. the legacy substring scanner
+Compares lookups per second and match coverage on a synthetic set of
+location strings built from the state/LGA models.
+
+Usage: python backend/benchmarks/bench_gazetteer.py [iterations]
+"""
+
+import os
+import random
+import sys
+import time
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.nigerian_lgas import NIGERIAN_LGAS
+from services.geocoding import normalize_location_text
+from utils.gazetteer import Gazetteer
+
+# The scanner that Database.resolve_coordinates_from_text used before the gazetteer
+LEGACY_CITY_COORDS = {
+    "lagos": (6.5244, 3.3792), "ikeja": (6.6018, 3.3515), "lekki": (6.4429, 3.4833),
+    "victoria island": (6.4281, 3.4219), "ajah": (6.4667, 3.6000), "surulere": (6.4940, 3.3490),
+    "yaba": (6.5170, 3.3830), "abuja": (9.0765, 7.3986), "gwagwalada": (8.9440, 7.0900),
+    "ibadan": (7.3775, 3.9470), "benin": (6.3350, 5.6037), "enugu": (6.5249, 7.5170),
+    "calabar": (4.9689, 8.3300), "asaba": (6.2019, 6.7319), "warri": (5.5540, 5.7930),
+    "uyo": (5.0333, 7.9330), "port harcourt": (4.8156, 7.0498), "ph": (4.8156, 7.0498),
+    "jos": (9.8965, 8.8580), "kaduna": (10.5060, 7.4273), "kano": (12.0000, 8.5167),
+    "ilorin": (8.4799, 4.5418), "owerri": (5.4836, 7.0333), "aba": (5.1066, 7.3667),
+    "onitsha": (6.1498, 6.7850),
+}
+LEGACY_STATE_COORDS = {
+    "rivers": (4.8156, 7.0498), "rivers state": (4.8156, 7.0498), "lagos": (6.5244, 3.3792),
+    "abuja": (9.0765, 7.3986), "fct": (9.0765, 7.3986), "delta": (6.2019, 6.7319),
+    "edo": (6.3350, 5.6037), "cross river": (4.9689, 8.3300), "bayelsa": (4.9247, 6.2649),
+    "enugu": (6.5249, 7.5170), "oyo": (7.3775, 3.9470), "kaduna": (10.5060, 7.4273),
+    "kano": (12.0000, 8.5167), "plateau": (9.8965, 8.8580), "kwara": (8.4799, 4.5418),
+    "anambra": (6.1498, 6.7850), "abia": (5.1066, 7.3667), "imo": (5.4836, 7.0333),
+}
+
+
+def legacy_scan(text):
+    t = normalize_location_text(text)
+    for key, (lat, lng) in LEGACY_CITY_COORDS.items():
+        if key in t:
+            return {"latitude": lat, "longitude": lng}
+    for key, (lat, lng) in LEGACY_STATE_COORDS.items():
+        if key in t:
+            return {"latitude": lat, "longitude": lng}
+    return None
+
+
+def build_corpus(size: int, seed: int = 7):
+    rng = random.Random(seed)
+    streets = ["Adeola Odeku Street", "Plot 12 Admiralty Way", "No. 5 Church Road", "Block C Flat 3",
+               "Off Aba Road", "Behind Shoprite", "Estate Phase 2", "12B Market Street"]
+    places = [(state, lga) for state, lgas in NIGERIAN_LGAS.items() for lga in lgas]
+    corpus = []
+    for _ in range(size):
+        state, lga = rng.choice(places)
+        shape = rng.randint(0, 3)
+        if shape == 0:
+            corpus.append(f"{rng.choice(streets)}, {lga}, {state}")
+        elif shape == 1:
+            corpus.append(f"{lga}")
+        elif shape == 2:
+            corpus.append(f"{rng.choice(streets)}, {state}")
+        else:
+            corpus.append(f"{rng.choice(streets)}")
+    return corpus
+
+
+def bench(label, fn, corpus, iterations):
+    start = time.perf_counter()
+    hits = 0
+    for _ in range(iterations):
+        for text in corpus:
+            if fn(text):
+                hits += 1
+    elapsed = time.perf_counter() - start
+    lookups = len(corpus) * iterations
+    print(f"{label:<22} {lookups / elapsed:>12,.0f} lookups/s   "
+          f"{elapsed / lookups * 1e6:>7.2f} µs/lookup   coverage {hits / lookups:.1%}")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    corpus = build_corpus(2000)
+    start = time.perf_counter()
+    gazetteer = Gazetteer.from_static()
+    print(f"Gazetteer build: {(time.perf_counter() - start) * 1000:.1f} ms, {len(gazetteer)} index entries")
+    bench("legacy substring scan", legacy_scan, corpus, iterations)
+    bench("gazetteer token index", gazetteer.resolve, corpus, iterations)
+
+
+if __name__ == "__main__":
+    main()
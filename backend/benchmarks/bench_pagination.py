@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Pagination Benchmark - keyset cursors vs. skip/limit at increasing page depth
+Loads a synthetic set of active jobs (default 200,000) into a scratch database
+on MONGO_URL with the registry's jobs indexes, then times the public job list
+query at pages 1, 50 and 500 (20 per page) with skip() and with a cursor from
+utils/pagination.py, plus the count_documents that used to accompany every
+page. Reports p50/p95 latency. The scratch database is dropped afterwards.
+
+Usage: python backend/benchmarks/bench_pagination.py [documents] [--keep]
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.index_registry import INDEXES
+from utils.pagination import keyset_filter, keyset_sort, next_cursor
+
+load_dotenv()
+
+BENCH_DB = "servicehub_bench_pagination"
+PAGE_SIZE = 20
+PAGES = [1, 50, 500]
+CATEGORIES = ["Plumbing", "Electrical", "Tiling", "Painting", "Carpentry", "Welding", "Generator Repair", "Cleaning"]
+
+
+def synthetic_job(i, rng, now):
+    # Bursts of jobs share a timestamp so the id tie-breaker is exercised
+    return {
+        "id": f"bench-{i:08d}",
+        "title": f"{rng.choice(CATEGORIES)} job {i}",
+        "category": rng.choice(CATEGORIES),
+        "status": "active",
+        "created_at": now - timedelta(seconds=i // 3),
+        "expires_at": now + timedelta(days=30),
+    }
+
+
+def timed(run, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[max(0, int(len(samples) * 0.95) - 1)]
+
+
+def cursor_for_page(jobs, query, page):
+    """The cursor a client holds when asking for `page`, found by walking the keyset"""
+    cursor = None
+    for _ in range(page - 1):
+        items = list(jobs.find(keyset_filter(query, cursor), {"created_at": 1, "id": 1})
+                     .sort(keyset_sort()).limit(PAGE_SIZE))
+        cursor = next_cursor(items, PAGE_SIZE)
+    return cursor
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else 200000
+    keep = "--keep" in sys.argv
+    url = os.environ.get("MONGO_URL") or os.environ.get("MONGODB_URL")
+    if not url:
+        print("Set MONGO_URL to a MongoDB server to run this benchmark")
+        return
+    client = MongoClient(url)
+    jobs = client[BENCH_DB].jobs
+    try:
+        if jobs.estimated_document_count() != n:
+            jobs.drop()
+            rng = random.Random(7)
+            now = datetime.utcnow()
+            for start in range(0, n, 5000):
+                jobs.insert_many([synthetic_job(i, rng, now) for i in range(start, min(start + 5000, n))])
+            for spec in INDEXES["jobs"]:
+                if "text" not in dict(spec["keys"]).values() and "2dsphere" not in dict(spec["keys"]).values():
+                    jobs.create_index(spec["keys"], **{k: v for k, v in spec.items() if k != "keys"})
+        query = {"status": "active", "expires_at": {"$gt": datetime.utcnow()}}
+        print(f"corpus: {n:,} active jobs, {PAGE_SIZE} per page\n")
+        print(f"{'page':>5}   {'skip p50':>9} {'p95':>8}   {'cursor p50':>10} {'p95':>8}")
+        for page in PAGES:
+            skip = (page - 1) * PAGE_SIZE
+            cursor = cursor_for_page(jobs, query, page)
+            by_skip = timed(lambda: list(jobs.find(query).sort(keyset_sort()).skip(skip).limit(PAGE_SIZE)), rounds=20)
+            by_cursor = timed(lambda: list(jobs.find(keyset_filter(query, cursor)).sort(keyset_sort()).limit(PAGE_SIZE)), rounds=20)
+            print(f"{page:>5}   {by_skip[0]:8.2f}ms {by_skip[1]:7.2f}ms   {by_cursor[0]:9.2f}ms {by_cursor[1]:7.2f}ms")
+        count = timed(lambda: jobs.count_documents(query), rounds=5)
+        print(f"\ncount_documents per page (now optional and cached): p50 {count[0]:.1f}ms, p95 {count[1]:.1f}ms")
+    finally:
+        if not keep:
+            client.drop_database(BENCH_DB)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Search Benchmark - weighted text index vs. the unanchored regex scan
+Loads a synthetic corpus of tradespeople (default 100,000) into a scratch
+database on MONGO_URL, then times the directory search both ways for a set of
+typical queries and reports p50/p95 latency and hit counts. The scratch
+database is dropped afterwards.
+
+Usage: python backend/benchmarks/bench_search.py [documents] [--keep]
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.nigerian_lgas import NIGERIAN_LGAS
+from models.trade_categories import NIGERIAN_TRADE_CATEGORIES
+from utils.index_registry import INDEXES
+from utils.search import regex_search_filter, text_search_string
+
+load_dotenv()
+
+BENCH_DB = "servicehub_bench_search"
+FIRST_NAMES = ["Adebayo", "Chinedu", "Emeka", "Funke", "Ibrahim", "Ngozi", "Tunde", "Yusuf", "Amaka", "Segun"]
+LAST_NAMES = ["Okafor", "Adeyemi", "Bello", "Eze", "Balogun", "Nwosu", "Olawale", "Musa", "Obi", "Lawal"]
+BIO_WORDS = ["reliable", "experienced", "licensed", "affordable", "quality", "fast", "certified", "repairs",
+             "installation", "maintenance", "residential", "commercial", "estate", "emergency", "weekend"]
+QUERIES = ["plumber", "generator repair", "A/C", "tiler lekki", "electrician ikeja", "solar inverter",
+           "vulcaniser", "Okafor", "pop ceiling", "welder abuja"]
+REGEX_FIELDS = ("name", "business_name", "bio", "profession")
+
+
+def synthetic_user(i, rng):
+    state = rng.choice(list(NIGERIAN_LGAS))
+    trade = rng.choice(NIGERIAN_TRADE_CATEGORIES)
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    return {
+        "id": f"bench-{i}",
+        "role": "tradesperson",
+        "name": name,
+        "business_name": f"{name.split()[1]} {trade} Services",
+        "profession": trade,
+        "trade_categories": [trade],
+        "bio": " ".join(rng.sample(BIO_WORDS, 6)),
+        "state": state,
+        "city": rng.choice(NIGERIAN_LGAS[state]),
+        "average_rating": round(rng.uniform(0, 5), 1),
+    }
+
+
+def timed(collection, query, rounds):
+    samples, hits = [], 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        hits = len(list(collection.find(query, {"_id": 1}).limit(20)))
+        collection.count_documents(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1], hits
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else 100000
+    keep = "--keep" in sys.argv
+    url = os.environ.get("MONGO_URL") or os.environ.get("MONGODB_URL")
+    if not url:
+        print("Set MONGO_URL to a MongoDB server to run this benchmark")
+        return
+    client = MongoClient(url)
+    users = client[BENCH_DB].users
+    try:
+        if users.estimated_document_count() != n:
+            users.drop()
+            rng = random.Random(7)
+            for start in range(0, n, 5000):
+                users.insert_many([synthetic_user(i, rng) for i in range(start, min(start + 5000, n))])
+            spec = next(s for s in INDEXES["users"] if s["name"] == "users_text_search")
+            users.create_index(spec["keys"], **{k: v for k, v in spec.items() if k != "keys"})
+            users.create_index([("role", 1), ("id", 1)])
+        print(f"corpus: {n:,} tradespeople\n")
+        print(f"{'query':<20} {'regex p50':>10} {'p95':>8} {'hits':>5}   {'text p50':>9} {'p95':>8} {'hits':>5}")
+        regex_total = text_total = 0.0
+        for q in QUERIES:
+            base = {"role": "tradesperson"}
+            regex = timed(users, {"$and": [base, regex_search_filter(q, REGEX_FIELDS)]}, rounds=5)
+            text = timed(users, {**base, "$text": {"$search": text_search_string(q)}}, rounds=20)
+            regex_total += regex[0]
+            text_total += text[0]
+            print(f"{q:<20} {regex[0]:9.1f}ms {regex[1]:7.1f}ms {regex[2]:5}   {text[0]:8.1f}ms {text[1]:7.1f}ms {text[2]:5}")
+        print(f"\nspeedup (sum of p50s over {len(QUERIES)} queries): {regex_total / text_total:.1f}x")
+    finally:
+        if not keep:
+            client.drop_database(BENCH_DB)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
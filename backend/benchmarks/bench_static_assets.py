@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Static Asset Benchmark - cached path lookup and streamed responses vs. per-request probing
+Writes a set of upload-sized images (default 200) to a scratch uploads tree
+whose first candidate roots are empty, then drives one in-process worker with
+requests (default 2,000) through three handlers: the old probe-then-serve
+route, the old base64 JSON route, and StaticAssetService (cold, and with
+browsers revalidating a cached copy). Reports requests/s and bytes sent.
+
+Usage: python backend/benchmarks/bench_static_assets.py [requests] [files]
+"""
+
+import asyncio
+import base64
+import os
+import sys
+import tempfile
+import time
+
+# Add repository root to path (services use package-relative imports)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse
+
+from backend.services.static_assets import StaticAssetService, IMMUTABLE_PUBLIC
+
+
+def build_app(roots, service):
+    app = FastAPI()
+
+    @app.get("/legacy/{filename}")
+    async def legacy(filename: str):
+        for root in roots:
+            fp = os.path.join(root, "portfolio", filename)
+            if os.path.exists(fp):
+                return FileResponse(fp, media_type="image/jpeg", headers={"Cache-Control": "public, max-age=3600"})
+        raise HTTPException(status_code=404)
+
+    @app.get("/legacy-base64/{filename}")
+    async def legacy_base64(filename: str):
+        for root in roots:
+            fp = os.path.join(root, "portfolio", filename)
+            if os.path.exists(fp):
+                with open(fp, "rb") as f:
+                    return {"image_base64": base64.b64encode(f.read()).decode("utf-8")}
+        raise HTTPException(status_code=404)
+
+    @app.get("/assets/{filename}")
+    async def assets(filename: str, request: Request):
+        response = await service.serve(request, "portfolio", filename, IMMUTABLE_PUBLIC)
+        if response is None:
+            raise HTTPException(status_code=404)
+        return response
+
+    return app
+
+
+async def drive(client, path, names, requests, revalidate=False):
+    etags = {}
+    sent = 0
+    start = time.perf_counter()
+    for i in range(requests):
+        name = names[i % len(names)]
+        headers = {"If-None-Match": etags[name]} if revalidate and name in etags else {}
+        response = await client.get(f"{path}/{name}", headers=headers)
+        assert response.status_code in (200, 304), response.status_code
+        etags.setdefault(name, response.headers.get("etag"))
+        sent += len(response.content)
+    return time.perf_counter() - start, sent
+
+
+async def run(requests, files):
+    with tempfile.TemporaryDirectory() as scratch:
+        # The file lives in the last root, as on hosts where only /app/uploads exists
+        roots = [os.path.join(scratch, f"root{i}") for i in range(5)]
+        os.makedirs(os.path.join(roots[-1], "portfolio"))
+        names = []
+        for i in range(files):
+            name = f"{i:032x}.jpg"
+            with open(os.path.join(roots[-1], "portfolio", name), "wb") as f:
+                f.write(os.urandom(150 * 1024))
+            names.append(name)
+        app = build_app(roots, StaticAssetService(roots))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            print(f"{requests:,} requests over {files} files of 150 KB, one worker\n")
+            print(f"{'handler':<34} {'req/s':>9} {'MB sent':>9}")
+            results = {}
+            for label, path, revalidate in [
+                ("probe + FileResponse (old)", "/legacy", False),
+                ("probe + base64 JSON (old)", "/legacy-base64", False),
+                ("StaticAssetService", "/assets", False),
+                ("StaticAssetService, revalidating", "/assets", True),
+            ]:
+                elapsed, sent = await drive(client, path, names, requests, revalidate)
+                results[label] = requests / elapsed
+                print(f"{label:<34} {requests / elapsed:9.0f} {sent / 1e6:9.1f}")
+            print(f"\nbase64 route -> streamed: {results['StaticAssetService'] / results['probe + base64 JSON (old)']:.1f}x")
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    files = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    asyncio.run(run(requests, files))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Template Rendering Benchmark - compiled templates vs. per-render escaping
+Renders the NEW_MATCHING_JOB email and SMS templates for a batch of
+notifications (default 10,000) and reports the cost of each approach.
+
+Usage: python backend/benchmarks/bench_templates.py [notifications]
+"""
+
+import os
+import re
+import sys
+import time
+
+# Add repository root to path (services use package-relative imports)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.models.notifications import NotificationChannel, NotificationType
+from backend.services.notifications import NotificationTemplateService
+
+
+def legacy_render(template, data):
+    """render_template as it was before templates were compiled"""
+    class _SafeDict(dict):
+        def __missing__(self, key):
+            return ""
+    subject = template.subject_template.format_map(_SafeDict(data))
+
+    def _escape_style(match):
+        css_body = match.group(2).replace('{', '{{').replace('}', '}}')
+        return f"{match.group(1)}{css_body}{match.group(3)}"
+
+    content_template = re.sub(r"(<style[^>]*>)(.*?)(</style>)", _escape_style, template.content_template,
+                              flags=re.DOTALL | re.IGNORECASE)
+    return subject, content_template.format_map(_SafeDict(data))
+
+
+def sample_data(i):
+    return {
+        "Name": f"Tradesperson {i}",
+        "trade_title": f"Fix kitchen sink #{i}",
+        "trade_category": "Plumbing",
+        "Location": "Ikeja, Lagos",
+        "miles": f"{i % 20} miles",
+        "logo_url": "https://servicehub.ng/Logo-Icon-Green.png",
+        "see_more_url": "https://servicehub.ng/browse-jobs",
+        "job_url": f"https://servicehub.ng/browse-jobs?job_id={i}",
+        "support_url": "https://servicehub.ng/help-faqs",
+        "preferences_url": "https://servicehub.ng/notifications/preferences",
+        "privacy_url": "https://servicehub.ng/policies/privacy",
+        "terms_url": "https://servicehub.ng/policies/terms",
+    }
+
+
+def timed(label, render, templates, batch):
+    start = time.perf_counter()
+    for data in batch:
+        for template in templates:
+            render(template, data)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed * 1000:9.1f} ms per {len(batch):,} notifications"
+          f"   {elapsed / len(batch) * 1e6:7.1f} µs/notification")
+    return elapsed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    service = NotificationTemplateService()
+    templates = [
+        service.get_template(NotificationType.NEW_MATCHING_JOB, NotificationChannel.EMAIL),
+        service.get_template(NotificationType.NEW_MATCHING_JOB, NotificationChannel.SMS),
+    ]
+    batch = [sample_data(i) for i in range(n)]
+    for template in templates:
+        assert service.render_template(template, batch[0]) == legacy_render(template, batch[0])
+
+    legacy = timed("legacy (escape per call)", legacy_render, templates, batch)
+    compiled = timed("compiled", service.render_template, templates, batch)
+    print(f"speedup: {legacy / compiled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
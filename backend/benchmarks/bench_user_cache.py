@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+User Cache Benchmark - get_current_user with and without the principal cache
+Inserts a set of users (default 2,000) into a scratch database on MONGO_URL,
+then resolves bearer tokens (default 5,000 per case) through
+auth.dependencies.get_current_user, once with USER_CACHE_TTL_SEC=0 and once
+with the cache, for tokens carrying the primary `id` and for tokens carrying
+a `public_id` (the third identifier get_user_by_id tries). Reports p50/p95
+latency per request. The scratch database is dropped afterwards.
+
+Usage: python backend/benchmarks/bench_user_cache.py [requests] [users]
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+# Add repository root to path (auth and services use package-relative imports)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+load_dotenv()
+os.environ["DB_ENSURE_INDEXES_ON_STARTUP"] = "false"
+
+from fastapi.security import HTTPAuthorizationCredentials
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from backend.auth.dependencies import get_current_user
+from backend.auth.security import create_access_token
+from backend.database import database
+from backend.utils.index_registry import INDEXES
+
+BENCH_DB = "servicehub_bench_user_cache"
+
+
+def synthetic_user(i):
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": f"{i:05d}",
+        "public_id": f"SH{i:06d}",
+        "name": f"Bench User {i}",
+        "email": f"bench{i}@example.com",
+        "phone": f"+23480{i:08d}",
+        "role": "tradesperson" if i % 2 else "homeowner",
+        "status": "active",
+        "location": "Lagos",
+        "postcode": "100001",
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+    }
+
+
+async def timed(tokens, requests):
+    rng = random.Random(7)
+    samples = []
+    for _ in range(requests):
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=rng.choice(tokens))
+        start = time.perf_counter()
+        await get_current_user(credentials)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+async def run(requests, n):
+    url = os.environ.get("MONGO_URL") or os.environ.get("MONGODB_URL")
+    if not url:
+        print("Set MONGO_URL to a MongoDB server to run this benchmark")
+        return
+    client = AsyncIOMotorClient(url)
+    db = client[BENCH_DB]
+    try:
+        users = [synthetic_user(i) for i in range(n)]
+        await db.users.drop()
+        await db.users.insert_many([dict(u) for u in users])
+        for spec in INDEXES["users"]:
+            if spec["name"] in ("users_id", "unique_user_id", "unique_public_id"):
+                await db.users.create_index(spec["keys"], **{k: v for k, v in spec.items() if k != "keys"})
+        database.database, database.connected = db, True
+
+        cases = {
+            "by id": [create_access_token({"sub": u["id"]}) for u in users],
+            "by public_id": [create_access_token({"sub": u["public_id"]}) for u in users],
+        }
+        print(f"{n:,} users, {requests:,} requests per case, one worker\n")
+        print(f"{'token':<14} {'uncached p50':>13} {'p95':>8}   {'cached p50':>11} {'p95':>8}")
+        for label, tokens in cases.items():
+            database.user_cache.ttl_seconds = 0
+            uncached = await timed(tokens, requests)
+            database.user_cache.ttl_seconds = 60
+            database.user_cache.clear()
+            cached = await timed(tokens, requests)
+            print(f"{label:<14} {uncached[0]:12.3f}ms {uncached[1]:7.3f}ms   {cached[0]:10.3f}ms {cached[1]:7.3f}ms")
+        print(f"\ncache: {database.user_cache.stats()}")
+    finally:
+        await client.drop_database(BENCH_DB)
+        client.close()
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    asyncio.run(run(requests, n))
+
+
+if __name__ == "__main__":
+    main()
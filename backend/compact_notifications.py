@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Compact Notifications - Replace stored email/SMS bodies with template references
+Existing notification documents carry the fully rendered body (several KB of
+HTML for emails). Bodies the current templates reproduce from the stored
+metadata are replaced by (template_id, template_version); the rest are kept
+as compressed snapshots. Prints the collection size before and after.
+WiredTiger reuses the freed space; run the `compact` command on the
+collection to return it to the operating system.
+
+Usage: python backend/compact_notifications.py [--dry-run] [--no-snapshots]
+"""
+
+import asyncio
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+os.environ["DB_ENSURE_INDEXES_ON_STARTUP"] = "false"
+
+# Add backend directory to path
+backend_dir = os.path.dirname(__file__)
+sys.path.insert(0, backend_dir)
+
+from database import database
+
+
+def _mb(size):
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+async def main():
+    dry_run = "--dry-run" in sys.argv
+    try:
+        await database.connect_to_mongo()
+        if not database.connected:
+            print("❌ Database unavailable; aborting")
+            return
+        before = await database.notifications_storage_stats()
+        print(f"Before: {before['count']} notifications, data {_mb(before['size'])}, "
+              f"storage {_mb(before['storage_size'])}, avg {before['avg_obj_size']} bytes")
+        result = await database.compact_stored_notifications(
+            snapshot_unmatched="--no-snapshots" not in sys.argv, dry_run=dry_run
+        )
+        print(f"{'Would compact' if dry_run else 'Compacted'}: {result['scanned']} scanned, "
+              f"{result['referenced']} now template references, {result['snapshotted']} snapshotted, "
+              f"{result['unchanged']} unchanged")
+        after = await database.notifications_storage_stats()
+        saved = before["size"] - after["size"]
+        print(f"After:  {after['count']} notifications, data {_mb(after['size'])}, "
+              f"storage {_mb(after['storage_size'])}, avg {after['avg_obj_size']} bytes "
+              f"({_mb(saved)} less data)")
+    finally:
+        await database.close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
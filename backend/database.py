@@ -1,48 +1,144 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
+import base64
 from datetime import datetime, timedelta, timezone
 import os
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Tuple
 import re
 import logging
 import uuid
+from pathlib import Path
 import certifi
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
 try:
     from .models.notifications import (
         Notification, NotificationPreferences, NotificationChannel,
-        NotificationType, NotificationStatus
+        NotificationType, NotificationStatus, NotificationTemplate
     )
     from .models.reviews import (
         Review, ReviewCreate, ReviewSummary, ReviewRequest, 
         ReviewStats, ReviewType, ReviewStatus
     )
     from .models.admin import AdminRole, AdminStatus, AdminActivityType
+    from .services.geocoding import GeocodingService, normalize_location_text
+    from .services.job_queue import JobQueue
+    from .services.blob_store import BlobStore, sniff_content_type
+    from .services.uploads import ResumableUploads, stream_upload
+    from .services.user_cache import UserCache
+    from .services.unread_counters import UnreadCounters
+    from .services.notification_rollups import NotificationRollups
+    from .services.retention import RetentionEngine
+    from .services.realtime import create_broker
+    from .services.notification_storage import compact_document, compress_snapshot, decompress_snapshot
+    from .utils.gazetteer import Gazetteer
+    from .utils.index_registry import apply_indexes, index_report
+    from .utils.dataloader import DataLoader, documents_by, counts_by
+    from .utils.search import SuggestionIndex, regex_search_filter, text_search_string
+    from .utils.pagination import InvalidCursor, keyset_filter, keyset_sort
+    from .utils.metrics import MongoCommandListener
 except ImportError:
     from models.notifications import (
         Notification, NotificationPreferences, NotificationChannel,
-        NotificationType, NotificationStatus
+        NotificationType, NotificationStatus, NotificationTemplate
     )
     from models.reviews import (
         Review, ReviewCreate, ReviewSummary, ReviewRequest, 
         ReviewStats, ReviewType, ReviewStatus
     )
     from models.admin import AdminRole, AdminStatus, AdminActivityType
+    from services.geocoding import GeocodingService, normalize_location_text
+    from services.job_queue import JobQueue
+    from services.blob_store import BlobStore, sniff_content_type
+    from services.uploads import ResumableUploads, stream_upload
+    from services.user_cache import UserCache
+    from services.unread_counters import UnreadCounters
+    from services.notification_rollups import NotificationRollups
+    from services.retention import RetentionEngine
+    from services.realtime import create_broker
+    from services.notification_storage import compact_document, compress_snapshot, decompress_snapshot
+    from utils.gazetteer import Gazetteer
+    from utils.index_registry import apply_indexes, index_report
+    from utils.dataloader import DataLoader, documents_by, counts_by
+    from utils.search import SuggestionIndex, regex_search_filter, text_search_string
+    from utils.pagination import InvalidCursor, keyset_filter, keyset_sort
+    from utils.metrics import MongoCommandListener
 
 logger = logging.getLogger(__name__)
 
+# Fields status-changing notification writes read back for the unread counters and rollups
+NOTIFICATION_STATUS_PROJECTION = {"user_id": 1, "status": 1, "type": 1, "channel": 1, "created_at": 1}
+
+# User fields shown next to jobs and transactions in admin listings
+ADMIN_USER_SUMMARY_PROJECTION = {
+    "id": 1, "user_id": 1, "public_id": 1, "name": 1, "email": 1, "phone": 1,
+    "verification_status": 1, "created_at": 1,
+}
+
+# Fields scanned by the regex fallback when a collection has no text index yet
+JOB_SEARCH_FIELDS = ("title", "description")
+ADMIN_USER_SEARCH_FIELDS = ("name", "email", "phone", "skills", "id")
+# Most text matches handed to the geo query when a job search also filters by distance
+SEARCH_CANDIDATE_LIMIT = int(os.getenv("SEARCH_CANDIDATE_LIMIT", "1000"))
+
+# Tradesperson verification file lists: blob references and the inline base64 they replaced
+TRADESPEOPLE_FILE_BLOB_FIELDS = {
+    "documents_blobs": "documents_base64",
+    "work_photos_blobs": "work_photos_base64",
+    "partner_id_documents_blobs": "partner_id_documents_base64",
+}
+
+# The admin dashboard's figures, kept in one document of `dashboard_metrics`
+ADMIN_DASHBOARD_METRICS_ID = "admin_dashboard"
+# Jobs without an access fee count at the default the dashboard has always assumed
+DASHBOARD_DEFAULT_ACCESS_FEE_NAIRA = 1500
+
+def _dashboard_access_fee(job: Dict[str, Any]) -> int:
+    """A job's fee as the dashboard recompute's $ifNull sees it: only a missing/None fee takes the default, not 0"""
+    fee = job.get("access_fee_naira")
+    return DASHBOARD_DEFAULT_ACCESS_FEE_NAIRA if fee is None else fee
+
+def _empty_tradesperson_stats() -> Dict[str, Any]:
+    return {
+        "portfolio_count": 0,
+        "reviews_count": 0,
+        "completed_jobs": 0,
+        "average_rating": 0.0,
+        "rating_histogram": {str(r): 0 for r in range(1, 6)},
+    }
+
+
+def _histogram_average(histogram: Optional[Dict[str, int]]) -> float:
+    histogram = histogram or {}
+    total = sum(histogram.values())
+    if total <= 0:
+        return 0.0
+    return round(sum(int(r) * n for r, n in histogram.items()) / total, 1)
+
 class Database:
     def __init__(self):
         self.client = None
         self.database = None
         self.connected = False
         self._memory = {"phone_otps": [], "email_otps": [], "users": {}}
-        self._geo_cache: Dict[str, Dict[str, Any]] = {}
-        self._geo_rate: Dict[str, Any] = {
-            "window_start": datetime.now(timezone.utc),
-            "count": 0,
-            "limit": int(os.getenv("GEOCODER_RATE_LIMIT_PER_MIN", "30")),
-            "window_seconds": 60,
-            "ttl_days": int(os.getenv("GEOCODER_CACHE_TTL_DAYS", "7")),
-        }
+        self.geocoder = GeocodingService(lambda: self.database)
+        self.gazetteer = Gazetteer.from_static()
+        self.job_queue = JobQueue(lambda: self.database)
+        self.blob_store = BlobStore(lambda: self.database)
+        self.uploads = ResumableUploads(lambda: self.database)
+        self.user_cache = UserCache()
+        self.unread_counters = UnreadCounters(lambda: self.database)
+        self.notification_rollups = NotificationRollups(lambda: self.database)
+        self.retention = RetentionEngine(lambda: self.database, hooks={"notifications": self._notifications_archived})
+        self.realtime = create_broker(lambda: self.database)
+        self._notification_rollups_checked = False
+        self._notification_rollups_build: Optional[asyncio.Future] = None
+        # "<template id>:<version>" -> stored template text (None when unknown)
+        self._template_versions: Dict[str, Optional[dict]] = {}
+        self.index_task = None
+        self.dashboard_metrics_max_age = float(os.getenv("DASHBOARD_METRICS_RECOMPUTE_SEC", "900"))
+        self._dashboard_refresh: Optional[asyncio.Task] = None
+        self.suggestion_index = None
 
     async def connect_to_mongo(self):
         mongo_url = (
@@ -84,6 +180,8 @@ class Database:
             client_kwargs = {
                 "serverSelectionTimeoutMS": timeout_ms,
                 "connectTimeoutMS": connect_timeout_ms,
+                # Per-command latency for /api/metrics
+                "event_listeners": [MongoCommandListener()],
             }
             if use_tls:
                 client_kwargs["tls"] = True
@@ -105,93 +203,58 @@ class Database:
             self.database = self.client[db_name]
             self.connected = True
             logger.info("Connected to MongoDB")
-            # Ensure required indexes at startup
+            # Build registered indexes in the background so startup isn't held up on large collections
+            if os.getenv("DB_ENSURE_INDEXES_ON_STARTUP", "true").lower() in ("1", "true", "yes"):
+                self.index_task = asyncio.create_task(self.ensure_indexes())
             try:
-                # Users: unique email index
-                await self.database.users.create_index(
-                    [("email", 1)],
-                    name="unique_email",
-                    unique=True,
-                    partialFilterExpression={"email": {"$type": "string"}}
-                )
-
-                # Users: unique public_id index for short shareable IDs
-                try:
-                    await self.database.users.create_index(
-                        [("public_id", 1)],
-                        name="unique_public_id",
-                        unique=True,
-                        partialFilterExpression={"public_id": {"$type": "string"}}
-                    )
-                except Exception as idx_err:
-                    logger.warning(f"Failed to ensure users public_id index: {idx_err}")
-                # Users: unique short numeric user_id index
-                try:
-                    await self.database.users.create_index(
-                        [("user_id", 1)],
-                        name="unique_user_id",
-                        unique=True,
-                        partialFilterExpression={"user_id": {"$type": "string"}}
-                    )
-                except Exception as idx_err:
-                    logger.warning(f"Failed to ensure users user_id index: {idx_err}")
-
-                # Jobs: compound indexes to optimize common queries and sorts
-                await self.database.jobs.create_index(
-                    [("status", 1), ("created_at", -1)],
-                    name="jobs_status_createdAt"
-                )
-                await self.database.jobs.create_index(
-                    [("homeowner_id", 1), ("created_at", -1)],
-                    name="jobs_homeownerId_createdAt"
-                )
-                await self.database.jobs.create_index(
-                    [("homeowner.id", 1), ("created_at", -1)],
-                    name="jobs_homeownerDotId_createdAt"
-                )
-                await self.database.jobs.create_index(
-                    [("category", 1), ("created_at", -1)],
-                    name="jobs_category_createdAt"
-                )
-
-                # Messages: indexes for conversation queries and read-status updates
-                await self.database.messages.create_index(
-                    [("conversation_id", 1), ("created_at", 1)],
-                    name="messages_conversation_createdAt"
-                )
-                await self.database.messages.create_index(
-                    [("conversation_id", 1), ("sender_type", 1), ("status", 1)],
-                    name="messages_conversation_sender_status"
-                )
-                await self.database.pending_jobs.create_index(
-                    [("user_id", 1), ("created_at", -1)],
-                    name="pending_jobs_user_createdAt"
-                )
-                await self.database.pending_jobs.create_index(
-                    [("expires_at", 1)],
-                    expireAfterSeconds=0,
-                    name="pending_jobs_expire"
-                )
-
-                # Newsletter subscribers: unique email index
-                try:
-                    await self.database.newsletter_subscribers.create_index(
-                        [("email", 1)],
-                        name="newsletter_unique_email",
-                        unique=True,
-                        partialFilterExpression={"email": {"$type": "string"}}
-                    )
-                except Exception as idx_err:
-                    logger.warning(f"Failed to ensure newsletter_subscribers index: {idx_err}")
-                logger.info("Database indexes ensured successfully")
+                await self.gazetteer.load_custom_locations(self.database)
             except Exception as e:
-                logger.error(f"Failed to ensure database indexes: {e}")
+                logger.warning(f"Failed to load custom locations into gazetteer: {e}")
+            try:
+                await self.load_notification_template_overrides()
+            except Exception as e:
+                logger.warning(f"Failed to load notification template overrides: {e}")
         except Exception as e:
             self.connected = False
             logger.error(f"MongoDB connection failed: {e}")
             # Allow app to continue running without database connection
 
+    async def ensure_indexes(self) -> Dict[str, Any]:
+        """Create every index in the registry (utils/index_registry.py)"""
+        try:
+            return await apply_indexes(self.database)
+        except Exception as e:
+            logger.error(f"Failed to ensure database indexes: {e}")
+            return {"ensured": 0, "failed": [{"error": str(e)}]}
+
+    async def get_retention_report(self) -> Dict[str, Any]:
+        """Cold documents per retention policy and expired tokens awaiting TTL removal"""
+        return await self.retention.report()
+
+    async def _notifications_archived(self, docs: List[dict]):
+        # Archived unread notifications no longer count towards the badge
+        await self.unread_counters.reset(d.get("user_id") for d in docs if d.get("status") != "read")
+
+    def _remember_otp(self, kind: str, otp_record: dict):
+        """Append to the in-memory OTP fallback, dropping records past expiry"""
+        now = datetime.utcnow()
+        self._memory[kind] = [
+            otp for otp in self._memory[kind]
+            if not otp.get("expires_at") or otp["expires_at"] > now
+        ]
+        self._memory[kind].append(otp_record)
+
+    async def get_index_report(self, explain: bool = True) -> Dict[str, Any]:
+        """Missing, unregistered and unused indexes plus query plans for hot queries"""
+        if self.database is None:
+            raise RuntimeError("Database unavailable: cannot build index report")
+        return await index_report(self.database, explain=explain)
+
     async def close_mongo_connection(self):
+        if self.index_task is not None and not self.index_task.done():
+            self.index_task.cancel()
+        await self.geocoder.aclose()
+        await self.realtime.close()
         if self.client:
             self.client.close()
             logger.info("MongoDB connection closed")
@@ -262,6 +325,12 @@ class Database:
                 user_data.setdefault("public_id", short_id)
         except Exception as e:
             logger.warning(f"Failed to generate user_id for user: {e}")
+        try:
+            user_data.update(await self.resolve_location_fields(user_data))
+        except Exception as e:
+            logger.warning(f"Coordinate resolution failed for new user: {e}")
+        if user_data.get("role") == "tradesperson":
+            user_data.setdefault("tradesperson_stats", _empty_tradesperson_stats())
         result = await self.database.users.insert_one(user_data)
         user_data['_id'] = str(result.inserted_id)
         return user_data
@@ -301,10 +370,12 @@ class Database:
         update_data['updated_at'] = datetime.utcnow()
         if self.database is None:
             raise RuntimeError("Database unavailable: cannot update user")
+        update_data.update(await self._location_update_fields(self.database.users, user_id, update_data))
         result = await self.database.users.update_one(
             {"id": user_id},
             {"$set": update_data}
         )
+        await self.user_cache.invalidate(user_id)
         return result.modified_count > 0
 
     async def update_user_last_login(self, user_id: str):
@@ -479,7 +550,7 @@ class Database:
                     "used": False,
                     "invalidated_at": None,
                 }
-                self._memory["phone_otps"].append(otp_record)
+                self._remember_otp("phone_otps", otp_record)
                 return True
             except Exception as e:
                 logger.error(f"Error creating phone verification OTP in memory: {e}")
@@ -512,7 +583,7 @@ class Database:
             logger.error(f"Error creating phone verification OTP: {e}")
             # Fallback to in-memory store even when DB is present
             try:
-                self._memory["phone_otps"].append(otp_record)
+                self._remember_otp("phone_otps", otp_record)
                 return True
             except Exception as e2:
                 logger.error(f"Fallback in-memory phone OTP failed: {e2}")
@@ -627,7 +698,7 @@ class Database:
                     "used": False,
                     "invalidated_at": None,
                 }
-                self._memory["email_otps"].append(otp_record)
+                self._remember_otp("email_otps", otp_record)
                 return True
             except Exception as e:
                 logger.error(f"Error creating email verification OTP in memory: {e}")
@@ -660,7 +731,7 @@ class Database:
             logger.error(f"Error creating email verification OTP: {e}")
             # Fallback to in-memory store even when DB is present
             try:
-                self._memory["email_otps"].append(otp_record)
+                self._remember_otp("email_otps", otp_record)
                 return True
             except Exception as e2:
                 logger.error(f"Fallback in-memory email OTP failed: {e2}")
@@ -892,30 +963,64 @@ class Database:
     async def create_job(self, job_data: dict) -> dict:
         # Set expiration date (30 days from now)
         job_data['expires_at'] = datetime.utcnow() + timedelta(days=30)
+        try:
+            job_data.update(await self.resolve_location_fields(job_data))
+        except Exception as e:
+            logger.warning(f"Coordinate resolution failed for new job: {e}")
         result = await self.database.jobs.insert_one(job_data)
         job_data['_id'] = str(result.inserted_id)
+        await self._inc_dashboard_metrics({
+            "total_jobs": 1,
+            "access_fee_naira_sum": _dashboard_access_fee(job_data),
+        })
         return job_data
     
     async def update_job(self, job_id: str, update_data: dict) -> bool:
         """Update a job by ID"""
         try:
-            result = await self.database.jobs.update_one(
-                {"id": job_id},
-                {"$set": update_data}
-            )
-            return result.modified_count > 0
+            update_data.update(await self._location_update_fields(self.database.jobs, job_id, update_data))
+            return await self._set_job_fields(job_id, update_data)
         except Exception as e:
             print(f"Error updating job: {e}")
             return False
 
+    async def _set_job_fields(self, job_id: str, update_data: dict) -> bool:
+        """$set job fields, keeping the assigned tradesperson's completed_jobs stat in step with status changes.
+
+        Returns True only when the job was modified, like update_one's modified_count.
+        """
+        if "status" not in update_data:
+            result = await self.database.jobs.update_one({"id": job_id}, {"$set": update_data})
+            return result.modified_count > 0
+        is_completed = getattr(update_data["status"], "value", update_data["status"]) == "completed"
+        while True:
+            before = await self.database.jobs.find_one(
+                {"id": job_id}, {"status": 1, "assigned_tradesperson_id": 1}
+            )
+            if before is None:
+                return False
+            # Conditional on the status just read, so a concurrent status change can't double-count
+            result = await self.database.jobs.update_one(
+                {"id": job_id, "status": before.get("status")}, {"$set": update_data}
+            )
+            if result.matched_count:
+                break
+        was_completed = before.get("status") == "completed"
+        if result.modified_count and was_completed != is_completed:
+            await self._inc_tradesperson_stats(
+                before.get("assigned_tradesperson_id"), {"completed_jobs": 1 if is_completed else -1}
+            )
+        return result.modified_count > 0
+
     async def get_job_by_id(self, job_id: str) -> Optional[dict]:
         job = await self.database.jobs.find_one({"id": job_id})
         if job:
             job['_id'] = str(job['_id'])
         return job
 
-    async def get_jobs(self, skip: int = 0, limit: int = 10, filters: dict = None) -> List[dict]:
-        query = filters or {}
+    @staticmethod
+    def _public_job_filters(filters: dict = None) -> dict:
+        query = dict(filters or {})
         
         # Only return active jobs by default for public queries
         # Don't apply default filters for homeowner's own jobs (My Jobs queries)
@@ -926,9 +1031,15 @@ class Database:
             if 'status' not in query:
                 query['status'] = 'active'
             query['expires_at'] = {'$gt': datetime.utcnow()}
+        return query
+
+    async def get_jobs(self, skip: int = 0, limit: int = 10, filters: dict = None, cursor: str = None) -> List[dict]:
+        """Newest jobs matching filters; pass `cursor` (utils/pagination.py) instead of skip to seek by keyset"""
+        query = self._public_job_filters(filters)
         
-        cursor = self.database.jobs.find(query).sort("created_at", -1).skip(skip).limit(limit)
-        jobs = await cursor.to_list(length=limit)
+        if cursor:
+            skip = 0
+        jobs = await self.database.jobs.find(keyset_filter(query, cursor)).sort(keyset_sort()).skip(skip).limit(limit).to_list(length=limit)
         
         for job in jobs:
             job['_id'] = str(job['_id'])
@@ -938,17 +1049,19 @@ class Database:
     # ADMIN JOB MANAGEMENT METHODS
     # ==========================================
 
-    async def get_all_jobs_admin(self, skip: int = 0, limit: int = 50, status: str = None) -> List[dict]:
+    async def get_all_jobs_admin(self, skip: int = 0, limit: int = 50, status: str = None, cursor: str = None) -> List[dict]:
         """Get all jobs for admin management with comprehensive details"""
         query = {}
         if status:
             query["status"] = status
         
         # Include soft-deleted jobs for admin (where deleted_at exists)
-        cursor = self.database.jobs.find(query).sort("created_at", -1).skip(skip).limit(limit)
+        if cursor:
+            skip = 0
+        page = self.database.jobs.find(keyset_filter(query, cursor)).sort(keyset_sort()).skip(skip).limit(limit)
         
         jobs = []
-        async for job in cursor:
+        async for job in page:
             job["_id"] = str(job["_id"])
             
             # Get homeowner details
@@ -995,35 +1108,32 @@ class Database:
         query = {"status": "pending_approval"}
         
         cursor = self.database.jobs.find(query).sort("created_at", -1).skip(skip).limit(limit)
-        
-        jobs = []
-        async for job in cursor:
+        page = await cursor.to_list(length=limit)
+
+        # Homeowners and their job counts are fetched once for the whole page
+        homeowners = documents_by(self.database.users, "id", projection=ADMIN_USER_SUMMARY_PROJECTION)
+        job_counts = counts_by(self.database.jobs, ["homeowner_id", "homeowner.id"])
+
+        async def enrich(job: dict) -> dict:
             job["_id"] = str(job["_id"])
             
             # Get homeowner details - check multiple possible sources
-            homeowner_id = None
             homeowner_info = None
             
             # First, check if homeowner_id exists at root level
             if "homeowner_id" in job:
                 homeowner_id = job["homeowner_id"]
-                homeowner = await self.database.users.find_one({"id": homeowner_id})
+                homeowner, total_jobs = await asyncio.gather(homeowners.load(homeowner_id), job_counts.load(homeowner_id))
                 if homeowner:
                     homeowner_info = {
                         "id": homeowner["id"],
                         "name": homeowner.get("name", "Unknown"),
                         "email": homeowner.get("email", ""),
-                        "phone": homeowner.get("phone", "")
+                        "phone": homeowner.get("phone", ""),
+                        "verification_status": homeowner.get("verification_status", "pending"),
+                        "join_date": homeowner.get("created_at"),
+                        "total_jobs": total_jobs,
                     }
-                    homeowner_info["verification_status"] = homeowner.get("verification_status", "pending")
-                    homeowner_info["join_date"] = homeowner.get("created_at")
-                    # Count total jobs for this homeowner
-                    homeowner_info["total_jobs"] = await self.database.jobs.count_documents({
-                        "$or": [
-                            {"homeowner_id": homeowner_id},
-                            {"homeowner.id": homeowner_id}
-                        ]
-                    })
             
             # If no homeowner_id at root, check if homeowner object exists
             elif "homeowner" in job and isinstance(job["homeowner"], dict):
@@ -1031,41 +1141,28 @@ class Database:
                 homeowner_id = homeowner_obj.get("id")
                 
                 if homeowner_id and homeowner_id != "unknown":
-                    # Try to get updated user info from users collection
-                    homeowner = await self.database.users.find_one({"id": homeowner_id})
+                    # Prefer up-to-date user info from the users collection
+                    homeowner, total_jobs = await asyncio.gather(homeowners.load(homeowner_id), job_counts.load(homeowner_id))
                     if homeowner:
                         homeowner_info = {
                             "id": homeowner["id"],
                             "name": homeowner.get("name", homeowner_obj.get("name", "Unknown")),
                             "email": homeowner.get("email", homeowner_obj.get("email", "")),
-                            "phone": homeowner.get("phone", homeowner_obj.get("phone", ""))
+                            "phone": homeowner.get("phone", homeowner_obj.get("phone", "")),
+                            "verification_status": homeowner.get("verification_status", "pending"),
+                            "join_date": homeowner.get("created_at"),
                         }
-                        homeowner_info["verification_status"] = homeowner.get("verification_status", "pending")
-                        homeowner_info["join_date"] = homeowner.get("created_at")
-                        # Count total jobs for this homeowner
-                        homeowner_info["total_jobs"] = await self.database.jobs.count_documents({
-                            "$or": [
-                                {"homeowner_id": homeowner_id},
-                                {"homeowner.id": homeowner_id}
-                            ]
-                        })
                     else:
                         # Use the embedded homeowner data
                         homeowner_info = {
                             "id": homeowner_obj.get("id", "unknown"),
                             "name": homeowner_obj.get("name", "Unknown"),
                             "email": homeowner_obj.get("email", ""),
-                            "phone": homeowner_obj.get("phone", "")
+                            "phone": homeowner_obj.get("phone", ""),
+                            "verification_status": "pending",
+                            "join_date": job.get("created_at"),
                         }
-                        homeowner_info["verification_status"] = "pending"
-                        homeowner_info["join_date"] = job.get("created_at")
-                        # Count total jobs for this homeowner
-                        homeowner_info["total_jobs"] = await self.database.jobs.count_documents({
-                            "$or": [
-                                {"homeowner_id": homeowner_id},
-                                {"homeowner.id": homeowner_id}
-                            ]
-                        })
+                    homeowner_info["total_jobs"] = total_jobs
                 else:
                     # Use the embedded homeowner data as fallback
                     homeowner_info = {
@@ -1092,10 +1189,9 @@ class Database:
             
             # Set the homeowner info in the job
             job["homeowner"] = homeowner_info
-            
-            jobs.append(job)
-        
-        return jobs
+            return job
+
+        return list(await asyncio.gather(*(enrich(job) for job in page)))
 
     async def get_pending_jobs_count(self) -> int:
         """Get count of jobs pending approval"""
@@ -1252,37 +1348,23 @@ class Database:
         if not update_data:
             return False
         
-        result = await self.database.jobs.update_one(
-            {"id": job_id},
-            {"$set": update_data}
-        )
-        
-        return result.modified_count > 0
+        update_data.update(await self._location_update_fields(self.database.jobs, job_id, update_data))
+        return await self._set_job_fields(job_id, update_data)
 
     async def update_job_status_admin(self, job_id: str, status: str) -> bool:
         """Update job status (admin only)"""
-        result = await self.database.jobs.update_one(
-            {"id": job_id},
-            {"$set": {
-                "status": status,
-                "updated_at": datetime.utcnow()
-            }}
-        )
-        
-        return result.modified_count > 0
+        return await self._set_job_fields(job_id, {
+            "status": status,
+            "updated_at": datetime.utcnow()
+        })
 
     async def soft_delete_job_admin(self, job_id: str) -> bool:
         """Soft delete job (admin only)"""
-        result = await self.database.jobs.update_one(
-            {"id": job_id},
-            {"$set": {
-                "status": "deleted",
-                "deleted_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
-            }}
-        )
-        
-        return result.modified_count > 0
+        return await self._set_job_fields(job_id, {
+            "status": "deleted",
+            "deleted_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow()
+        })
 
     async def get_jobs_statistics_admin(self) -> dict:
         """Get comprehensive job statistics for admin dashboard"""
@@ -1314,18 +1396,7 @@ class Database:
         }
 
     async def get_jobs_count(self, filters: dict = None) -> int:
-        query = filters or {}
-        
-        # Only return active jobs by default for public queries
-        # Don't apply default filters for homeowner's own jobs (My Jobs queries)
-        is_homeowner_query = 'homeowner.email' in query or 'homeowner_id' in query
-        
-        if not is_homeowner_query:
-            # For public job listings, only show active and non-expired jobs
-            if 'status' not in query:
-                query['status'] = 'active'
-            query['expires_at'] = {'$gt': datetime.utcnow()}
-            
+        query = self._public_job_filters(filters)
         return await self.database.jobs.count_documents(query)
 
     async def update_job_quotes_count(self, job_id: str):
@@ -1672,10 +1743,7 @@ class Database:
 
     async def update_job_status(self, job_id: str, status: str):
         """Update job status"""
-        await self.database.jobs.update_one(
-            {"id": job_id},
-            {"$set": {"status": status, "updated_at": datetime.utcnow()}}
-        )
+        await self._set_job_fields(job_id, {"status": status, "updated_at": datetime.utcnow()})
 
     async def get_quotes_count_by_job(self, job_id: str) -> int:
         return await self.database.quotes.count_documents({"job_id": job_id})
@@ -1686,10 +1754,11 @@ class Database:
         review_data['_id'] = str(result.inserted_id)
         return review_data
 
-    async def get_reviews(self, skip: int = 0, limit: int = 10, filters: dict = None) -> List[dict]:
+    async def get_reviews(self, skip: int = 0, limit: int = 10, filters: dict = None, cursor: str = None) -> List[dict]:
         query = filters or {}
-        cursor = self.database.reviews.find(query).sort("created_at", -1).skip(skip).limit(limit)
-        reviews = await cursor.to_list(length=limit)
+        if cursor:
+            skip = 0
+        reviews = await self.database.reviews.find(keyset_filter(query, cursor)).sort(keyset_sort()).skip(skip).limit(limit).to_list(length=limit)
         
         for review in reviews:
             review['_id'] = str(review['_id'])
@@ -1912,6 +1981,7 @@ class Database:
     async def create_portfolio_item(self, portfolio_data: dict) -> dict:
         """Create a new portfolio item"""
         await self.portfolio_collection.insert_one(portfolio_data)
+        await self._inc_tradesperson_stats(portfolio_data.get("tradesperson_id"), {"portfolio_count": 1})
         return portfolio_data
 
     async def get_portfolio_item_by_id(self, item_id: str) -> dict:
@@ -1976,8 +2046,105 @@ class Database:
 
     async def delete_portfolio_item(self, item_id: str) -> bool:
         """Delete portfolio item"""
-        result = await self.portfolio_collection.delete_one({"id": item_id})
-        return result.deleted_count > 0
+        deleted = await self.portfolio_collection.find_one_and_delete({"id": item_id}, projection={"tradesperson_id": 1})
+        if deleted is None:
+            return False
+        await self._inc_tradesperson_stats(deleted.get("tradesperson_id"), {"portfolio_count": -1})
+        return True
+
+    # Tradesperson Stats Methods
+    # Directory counters live on the user document under "tradesperson_stats" and
+    # are adjusted by the portfolio, review and job-status writes above and below.
+    async def _inc_tradesperson_stats(self, user_id: Optional[str], inc: Dict[str, int]):
+        """Apply counter deltas to a tradesperson's stats (users not built yet are left to the rebuild)"""
+        if not user_id or self.database is None:
+            return
+        try:
+            user = await self.database.users.find_one_and_update(
+                {"id": user_id, "tradesperson_stats": {"$exists": True}},
+                {
+                    "$inc": {f"tradesperson_stats.{field}": delta for field, delta in inc.items()},
+                    "$set": {"tradesperson_stats.updated_at": datetime.utcnow()},
+                },
+                projection={"tradesperson_stats": 1},
+                return_document=True
+            )
+            if user and any(field.startswith("rating_histogram.") for field in inc):
+                stats = user["tradesperson_stats"]
+                # Skip if another review landed in between; its own update writes the newer average
+                await self.database.users.update_one(
+                    {"id": user_id, "tradesperson_stats.reviews_count": stats.get("reviews_count")},
+                    {"$set": {"tradesperson_stats.average_rating": _histogram_average(stats.get("rating_histogram"))}}
+                )
+        except Exception as e:
+            logger.warning(f"Failed to update tradesperson stats for {user_id}: {e}")
+
+    async def _compute_tradesperson_stats(self, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Stats for many tradespeople from the source collections, three aggregations in total"""
+        stats = {user_id: _empty_tradesperson_stats() for user_id in user_ids}
+        async for row in self.portfolio_collection.aggregate([
+            {"$match": {"tradesperson_id": {"$in": user_ids}}},
+            {"$group": {"_id": "$tradesperson_id", "count": {"$sum": 1}}},
+        ]):
+            stats[row["_id"]]["portfolio_count"] = row["count"]
+        async for row in self.reviews_collection.aggregate([
+            {"$match": {"reviewee_id": {"$in": user_ids}}},
+            {"$group": {"_id": {"user": "$reviewee_id", "rating": "$rating"}, "count": {"$sum": 1}}},
+        ]):
+            user_stats = stats[row["_id"]["user"]]
+            user_stats["reviews_count"] += row["count"]
+            rating = row["_id"].get("rating")
+            if str(rating) in user_stats["rating_histogram"]:
+                user_stats["rating_histogram"][str(rating)] += row["count"]
+        async for row in self.database.jobs.aggregate([
+            {"$match": {"assigned_tradesperson_id": {"$in": user_ids}, "status": "completed"}},
+            {"$group": {"_id": "$assigned_tradesperson_id", "count": {"$sum": 1}}},
+        ]):
+            stats[row["_id"]]["completed_jobs"] = row["count"]
+        for user_stats in stats.values():
+            user_stats["average_rating"] = _histogram_average(user_stats["rating_histogram"])
+        return stats
+
+    async def fill_tradesperson_stats(self, users: List[dict], force: bool = False) -> int:
+        """Build tradesperson_stats for users that lack it (all of them when force), in place and in the database.
+
+        Returns how many user documents were written.
+        """
+        targets = [u for u in users if u.get("id") and (force or "tradesperson_stats" not in u)]
+        if not targets:
+            return 0
+        computed = await self._compute_tradesperson_stats([u["id"] for u in targets])
+        now = datetime.utcnow()
+        operations = []
+        for user in targets:
+            stats = computed[user["id"]]
+            current = user.get("tradesperson_stats")
+            if current is None or any(current.get(field) != value for field, value in stats.items()):
+                operations.append(UpdateOne({"id": user["id"]}, {"$set": {"tradesperson_stats": {**stats, "updated_at": now}}}))
+            user["tradesperson_stats"] = stats
+        if operations:
+            await self.database.users.bulk_write(operations, ordered=False)
+        return len(operations)
+
+    async def rebuild_tradesperson_stats(self, user_ids: Optional[List[str]] = None, batch_size: int = 500) -> Dict[str, int]:
+        """Recompute every tradesperson's stats (or just user_ids) and repair any that drifted"""
+        if self.database is None:
+            raise RuntimeError("Database unavailable: cannot rebuild tradesperson stats")
+        query: Dict[str, Any] = {"role": "tradesperson"}
+        if user_ids is not None:
+            query["id"] = {"$in": list(user_ids)}
+        scanned = repaired = 0
+        batch: List[dict] = []
+        async for user in self.database.users.find(query, {"id": 1, "tradesperson_stats": 1}):
+            batch.append(user)
+            if len(batch) >= batch_size:
+                scanned += len(batch)
+                repaired += await self.fill_tradesperson_stats(batch, force=True)
+                batch = []
+        if batch:
+            scanned += len(batch)
+            repaired += await self.fill_tradesperson_stats(batch, force=True)
+        return {"scanned": scanned, "repaired": repaired}
 
     def get_current_time(self):
         """Get current UTC time for timestamps"""
@@ -1999,10 +2166,12 @@ class Database:
         await self.interests_collection.insert_one(interest_data)
         
         # Update job's interests_count
-        await self.database.jobs.update_one(
+        result = await self.database.jobs.update_one(
             {"id": interest_data["job_id"]},
             {"$inc": {"interests_count": 1}}
         )
+        if result.modified_count:
+            await self._inc_dashboard_metrics({"total_interests": 1})
         
         return interest_data
 
@@ -2197,6 +2366,9 @@ class Database:
         review_dict["_id"] = review_dict["id"]
         
         await self.reviews_collection.insert_one(review_dict)
+        await self._inc_tradesperson_stats(
+            review.reviewee_id, {"reviews_count": 1, f"rating_histogram.{review.rating}": 1}
+        )
         
         # Update user's review summary
         await self._update_user_review_summary(review.reviewee_id)
@@ -2378,8 +2550,16 @@ class Database:
         return True
 
     async def delete_review(self, review_id: str) -> bool:
-        result = await self.reviews_collection.delete_one({"id": review_id})
-        return result.deleted_count > 0
+        deleted = await self.reviews_collection.find_one_and_delete(
+            {"id": review_id}, projection={"reviewee_id": 1, "rating": 1}
+        )
+        if deleted is None:
+            return False
+        inc = {"reviews_count": -1}
+        if str(deleted.get("rating")) in _empty_tradesperson_stats()["rating_histogram"]:
+            inc[f"rating_histogram.{deleted['rating']}"] = -1
+        await self._inc_tradesperson_stats(deleted.get("reviewee_id"), inc)
+        return True
 
     async def get_platform_review_stats(self) -> ReviewStats:
         """Get platform-wide review statistics"""
@@ -2563,14 +2743,188 @@ class Database:
         return self.database.reviews
 
     # Notification Management Methods
-    async def create_notification(self, notification: Notification) -> Notification:
-        """Create a new notification"""
+    async def _notification_document(self, notification: Notification) -> dict:
+        """Storage form of a notification: a template reference plus its data instead of the rendered body"""
         notification_dict = notification.dict()
         notification_dict["_id"] = notification_dict["id"]
+        if notification.template_id and notification.template_version:
+            await self._save_template_version(notification.template_id, notification.template_version)
+        return compact_document(notification_dict)
+
+    async def _save_template_version(self, template_id: str, version: str):
+        """Keep the text of each template version notifications were rendered from (written once)"""
+        key = f"{template_id}:{version}"
+        if key in self._template_versions:
+            return
+        template_service = self._template_service()
+        template = template_service.get_template_by_id(template_id)
+        if template is None or template_service.version_of(template) != version:
+            return
+        record = {
+            "template_id": template_id,
+            "version": version,
+            "type": getattr(template.type, "value", template.type),
+            "channel": getattr(template.channel, "value", template.channel),
+            "subject_template": template.subject_template,
+            "content_template": template.content_template,
+            "variables": template.variables,
+            "created_at": datetime.utcnow(),
+        }
+        await self.database.notification_template_versions.update_one(
+            {"_id": key}, {"$setOnInsert": record}, upsert=True
+        )
+        self._template_versions[key] = record
+
+    async def _template_version(self, template_id: str, version: str) -> Optional[NotificationTemplate]:
+        key = f"{template_id}:{version}"
+        template_service = self._template_service()
+        current = template_service.get_template_by_id(template_id)
+        if current is not None and template_service.version_of(current) == version:
+            return current
+        if key not in self._template_versions:
+            self._template_versions[key] = await self.database.notification_template_versions.find_one({"_id": key})
+        record = self._template_versions[key]
+        if record is None:
+            return None
+        return NotificationTemplate(
+            id=template_id, type=record["type"], channel=record["channel"],
+            subject_template=record["subject_template"], content_template=record["content_template"],
+            variables=record.get("variables") or [],
+        )
+
+    async def render_notification_content(self, doc: dict) -> str:
+        """Body of a stored notification: as stored, from its snapshot, or rendered from its template"""
+        if doc.get("content"):
+            return doc["content"]
+        if doc.get("content_snapshot") is not None:
+            try:
+                return decompress_snapshot(doc["content_snapshot"], doc.get("snapshot_codec", "zlib"))
+            except Exception as e:
+                logger.warning(f"Unreadable snapshot on notification {doc.get('_id')}: {e}")
+        if doc.get("template_id") and doc.get("template_version"):
+            template = await self._template_version(doc["template_id"], doc["template_version"])
+            if template is None:
+                # Version text lost; the current template is the closest rendering
+                template = self._template_service().get_template_by_id(doc["template_id"])
+            if template is not None:
+                _, content = self._template_service().render_template(template, doc.get("metadata") or {})
+                return content
+        return doc.get("content") or ""
+
+    async def notifications_storage_stats(self) -> Dict[str, int]:
+        stats = await self.database.command("collStats", "notifications")
+        return {
+            "count": int(stats.get("count", 0)),
+            "size": int(stats.get("size", 0)),
+            "storage_size": int(stats.get("storageSize", 0)),
+            "avg_obj_size": int(stats.get("avgObjSize", 0)),
+        }
+
+    async def compact_stored_notifications(self, batch_size: int = 500, snapshot_unmatched: bool = True,
+                                           dry_run: bool = False) -> Dict[str, int]:
+        """Replace rendered bodies of existing notifications with template references.
+
+        A body that the current email or SMS template reproduces exactly from
+        the stored metadata is dropped in favour of (template_id,
+        template_version). Other bodies (edited templates, custom messages)
+        are kept as compressed snapshots when `snapshot_unmatched` is set.
+        """
+        template_service = self._template_service()
+        result = {"scanned": 0, "referenced": 0, "snapshotted": 0, "unchanged": 0}
+        query = {"content": {"$exists": True, "$nin": ["", None]}, "template_id": {"$in": [None]}}
+        projection = {"type": 1, "content": 1, "metadata": 1}
+        last_id = None
+        while True:
+            batch_query = {**query, "_id": {"$gt": last_id}} if last_id is not None else query
+            docs = await self.notifications_collection.find(batch_query, projection) \
+                .sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+            if not docs:
+                break
+            last_id = docs[-1]["_id"]
+            updates = []
+            for doc in docs:
+                result["scanned"] += 1
+                update = None
+                for channel in (NotificationChannel.EMAIL, NotificationChannel.SMS):
+                    template = template_service.get_template(doc.get("type"), channel)
+                    if template is None:
+                        continue
+                    try:
+                        _, rendered = template_service.render_template(template, doc.get("metadata") or {})
+                    except Exception:
+                        continue
+                    if rendered == doc["content"]:
+                        version = template_service.version_of(template)
+                        if not dry_run:
+                            await self._save_template_version(template.id, version)
+                        update = {"$set": {"template_id": template.id, "template_version": version},
+                                  "$unset": {"content": ""}}
+                        result["referenced"] += 1
+                        break
+                if update is None and snapshot_unmatched:
+                    snapshot, codec = compress_snapshot(doc["content"])
+                    if len(snapshot) < len(doc["content"].encode("utf-8")):
+                        update = {"$set": {"content_snapshot": snapshot, "snapshot_codec": codec},
+                                  "$unset": {"content": ""}}
+                        result["snapshotted"] += 1
+                if update is None:
+                    result["unchanged"] += 1
+                else:
+                    updates.append(UpdateOne({"_id": doc["_id"]}, update))
+            if updates and not dry_run:
+                await self.notifications_collection.bulk_write(updates, ordered=False)
+        return result
+
+    async def create_notification(self, notification: Notification) -> Notification:
+        """Create a new notification"""
+        notification_dict = await self._notification_document(notification)
         
         await self.notifications_collection.insert_one(notification_dict)
+        if notification_dict.get("status") != NotificationStatus.READ:
+            await self.unread_counters.incr(notification.user_id, notifications=1)
+        await self.notification_rollups.status_changed(notification_dict, None, notification_dict.get("status"))
         return notification
 
+    async def create_notifications(self, notifications: List[Notification]) -> int:
+        """Insert many notification records in one round-trip"""
+        if not notifications:
+            return 0
+        docs = [await self._notification_document(notification) for notification in notifications]
+        result = await self.notifications_collection.insert_many(docs, ordered=False)
+        unread: Dict[str, int] = {}
+        for doc in docs:
+            if doc.get("status") != NotificationStatus.READ:
+                unread[doc["user_id"]] = unread.get(doc["user_id"], 0) + 1
+        await self.unread_counters.incr_many(unread)
+        await self.notification_rollups.record(
+            (doc.get("created_at"), doc.get("type"), doc.get("channel"), doc.get("status"), 1) for doc in docs
+        )
+        return len(result.inserted_ids)
+
+    async def get_notification_preferences_for_users(self, user_ids: List[str]) -> Dict[str, NotificationPreferences]:
+        """Preferences for many users in one query, creating defaults for users without any"""
+        user_ids = list(dict.fromkeys(uid for uid in user_ids if uid))
+        if not user_ids:
+            return {}
+        result: Dict[str, NotificationPreferences] = {}
+        async for preferences in self.notification_preferences_collection.find({"user_id": {"$in": user_ids}}):
+            preferences["id"] = str(preferences["_id"])
+            del preferences["_id"]
+            result[preferences["user_id"]] = NotificationPreferences(**preferences)
+        missing = [
+            NotificationPreferences(id=str(uuid.uuid4()), user_id=uid)
+            for uid in user_ids if uid not in result
+        ]
+        if missing:
+            docs = []
+            for preferences in missing:
+                preferences_dict = preferences.dict()
+                preferences_dict["_id"] = preferences_dict["id"]
+                docs.append(preferences_dict)
+            await self.notification_preferences_collection.insert_many(docs, ordered=False)
+            result.update({p.user_id: p for p in missing})
+        return result
+
     async def get_user_notification_preferences(self, user_id: str) -> NotificationPreferences:
         """Get user notification preferences, create defaults if not exist"""
         preferences = await self.notification_preferences_collection.find_one({"user_id": user_id})
@@ -2609,16 +2963,21 @@ class Database:
         
         return await self.get_user_notification_preferences(user_id)
 
-    async def get_user_notifications(self, user_id: str, limit: int = 50, offset: int = 0) -> List[Notification]:
-        """Get notifications for a user with pagination"""
-        cursor = self.notifications_collection.find(
-            {"user_id": user_id}
-        ).sort("created_at", -1).skip(offset).limit(limit)
+    async def get_user_notifications(self, user_id: str, limit: int = 50, offset: int = 0,
+                                     cursor: Optional[str] = None) -> List[Notification]:
+        """Get notifications for a user with pagination (by offset, or by keyset after `cursor`)"""
+        # Notifications are keyed by _id, which holds the notification id
+        if cursor:
+            offset = 0
+        page = self.notifications_collection.find(
+            keyset_filter({"user_id": user_id}, cursor, id_field="_id")
+        ).sort(keyset_sort(id_field="_id")).skip(offset).limit(limit)
         
         notifications = []
-        async for doc in cursor:
+        async for doc in page:
             doc["id"] = str(doc["_id"])
             del doc["_id"]
+            doc["content"] = await self.render_notification_content(doc)
             notifications.append(Notification(**doc))
         
         return notifications
@@ -2629,83 +2988,127 @@ class Database:
         if delivered_at:
             update_data["delivered_at"] = delivered_at
         
-        result = await self.notifications_collection.update_one(
+        before = await self.notifications_collection.find_one_and_update(
             {"_id": notification_id},
-            {"$set": update_data}
+            {"$set": update_data},
+            projection=NOTIFICATION_STATUS_PROJECTION
         )
-        
-        return result.modified_count > 0
+        if before is None:
+            return False
+        await self._notification_status_changed(before, getattr(status, "value", status))
+        return True
 
     async def mark_notification_as_read(self, notification_id: str, user_id: str) -> bool:
         """Mark a specific notification as read for a user"""
-        result = await self.notifications_collection.update_one(
-            {"_id": notification_id, "user_id": user_id},
-            {"$set": {"status": "read", "read_at": datetime.now(timezone.utc), "updated_at": datetime.now(timezone.utc)}}
+        before = await self.notifications_collection.find_one_and_update(
+            {"_id": notification_id, "user_id": user_id, "status": {"$ne": "read"}},
+            {"$set": {"status": "read", "read_at": datetime.now(timezone.utc), "updated_at": datetime.now(timezone.utc)}},
+            projection=NOTIFICATION_STATUS_PROJECTION
         )
-        return result.modified_count > 0
+        if before is not None:
+            await self._notification_status_changed(before, "read")
+            return True
+        # Already read is still success for the caller
+        return await self.notifications_collection.count_documents(
+            {"_id": notification_id, "user_id": user_id}, limit=1
+        ) > 0
 
     async def mark_all_notifications_as_read(self, user_id: str) -> int:
         """Mark all notifications as read for a user"""
+        query = {"user_id": user_id, "status": {"$ne": "read"}}
+        # Rollup buckets of what is about to change, grouped so a large backlog is a few rows
+        changing = await self.notifications_collection.aggregate([
+            {"$match": query},
+            {"$group": {
+                "_id": {
+                    "hour": {"$dateToString": {"format": "%Y-%m-%dT%H", "date": "$created_at"}},
+                    "type": "$type", "channel": "$channel", "status": "$status",
+                },
+                "created_at": {"$first": "$created_at"},
+                "count": {"$sum": 1},
+            }},
+        ]).to_list(length=None)
         result = await self.notifications_collection.update_many(
-            {"user_id": user_id, "status": {"$ne": "read"}},
+            query,
             {"$set": {"status": "read", "read_at": datetime.now(timezone.utc), "updated_at": datetime.now(timezone.utc)}}
         )
+        await self.unread_counters.incr(user_id, notifications=-result.modified_count)
+        for group in changing:
+            key = group["_id"]
+            await self.notification_rollups.status_changed(
+                {"created_at": group["created_at"], "type": key.get("type"), "channel": key.get("channel")},
+                key.get("status"), "read", count=group["count"]
+            )
         return result.modified_count
 
     async def delete_notification(self, notification_id: str, user_id: str) -> bool:
         """Delete a specific notification for a user"""
-        result = await self.notifications_collection.delete_one(
-            {"_id": notification_id, "user_id": user_id}
+        deleted = await self.notifications_collection.find_one_and_delete(
+            {"_id": notification_id, "user_id": user_id}, projection=NOTIFICATION_STATUS_PROJECTION
         )
-        return result.deleted_count > 0
+        if deleted is None:
+            return False
+        await self._notification_status_changed(deleted, None)
+        return True
+
+    async def get_unread_counts(self, user_id: str) -> Dict[str, int]:
+        """Badge counts for a user: unread notifications, unread messages and their total"""
+        if self.database is None:
+            raise RuntimeError("Database unavailable: unread counts not accessible")
+        return await self.unread_counters.get(user_id)
+
+    async def _notification_status_changed(self, before: Optional[dict], status: Optional[str]):
+        """Adjust the owner's unread counter and the analytics rollups after a status write.
+
+        `before` is the document as it was (NOTIFICATION_STATUS_PROJECTION
+        fields); `status` is the new status, or None when it was deleted.
+        """
+        if not before:
+            return
+        was_unread = before.get("status") != "read"
+        is_unread = status is not None and status != "read"
+        if was_unread != is_unread:
+            await self.unread_counters.incr(before.get("user_id"), notifications=1 if is_unread else -1)
+        await self.notification_rollups.status_changed(before, before.get("status"), status)
+
+    async def _ensure_notification_rollups(self):
+        """Start building the rollups from history the first time analytics are read on a database without them.
+
+        The build runs in the background (one at a time across workers), so
+        the request that noticed the gap isn't held up by it.
+        """
+        if self._notification_rollups_checked:
+            return
+        self._notification_rollups_checked = True
+        if await self.database.notification_rollups.estimated_document_count() == 0 \
+                and await self.notifications_collection.estimated_document_count() > 0:
+            self._notification_rollups_build = asyncio.ensure_future(self._build_notification_rollups())
+
+    async def _build_notification_rollups(self):
+        try:
+            result = await self.notification_rollups.rebuild()
+            if not result.get("in_progress"):
+                logger.info(f"Built notification rollups from history: {result['buckets']} buckets")
+        except Exception as e:
+            self._notification_rollups_checked = False
+            logger.warning(f"Building notification rollups failed: {e}")
 
     async def get_notification_stats(self) -> Dict[str, Any]:
-        """Get notification delivery statistics"""
-        pipeline = [
-            {
-                "$group": {
-                    "_id": "$status",
-                    "count": {"$sum": 1}
-                }
-            }
-        ]
-        
-        status_counts = {}
-        async for doc in self.notifications_collection.aggregate(pipeline):
-            status_counts[doc["_id"]] = doc["count"]
+        """Get notification delivery statistics (counts from the daily rollups)"""
+        await self._ensure_notification_rollups()
+        status_counts: Dict[str, int] = {}
+        by_type: Dict[str, int] = {}
+        by_channel: Dict[str, int] = {}
+        for row in await self.notification_rollups.counts(["type", "channel", "status"]):
+            status_counts[row["status"]] = status_counts.get(row["status"], 0) + row["count"]
+            by_type[row["type"]] = by_type.get(row["type"], 0) + row["count"]
+            by_channel[row["channel"]] = by_channel.get(row["channel"], 0) + row["count"]
         
         # Calculate delivery rate
         total_sent = status_counts.get("sent", 0) + status_counts.get("delivered", 0)
         total_attempts = sum(status_counts.values())
         delivery_rate = (total_sent / total_attempts * 100) if total_attempts > 0 else 0
         
-        # Get stats by type and channel
-        type_pipeline = [
-            {
-                "$group": {
-                    "_id": "$type",
-                    "count": {"$sum": 1}
-                }
-            }
-        ]
-        
-        channel_pipeline = [
-            {
-                "$group": {
-                    "_id": "$channel",
-                    "count": {"$sum": 1}
-                }
-            }
-        ]
-        
-        by_type = {}
-        async for doc in self.notifications_collection.aggregate(type_pipeline):
-            by_type[doc["_id"]] = doc["count"]
-        
-        by_channel = {}
-        async for doc in self.notifications_collection.aggregate(channel_pipeline):
-            by_channel[doc["_id"]] = doc["count"]
-        
         # Get recent failures
         recent_failures = []
         cursor = self.notifications_collection.find(
@@ -2806,16 +3209,24 @@ class Database:
         transaction_data["created_at"] = datetime.utcnow()
         
         await self.wallet_transactions_collection.insert_one(transaction_data)
+        if transaction_data.get("transaction_type") == "wallet_funding" and transaction_data.get("status") == "pending":
+            await self._inc_dashboard_metrics({
+                "pending_funding_requests": 1,
+                "pending_funding_naira": transaction_data.get("amount_naira", 0),
+                "pending_funding_coins": transaction_data.get("amount_coins", 0),
+            })
         return transaction_data
 
-    async def get_wallet_transactions(self, user_id: str, skip: int = 0, limit: int = 10) -> List[dict]:
+    async def get_wallet_transactions(self, user_id: str, skip: int = 0, limit: int = 10, cursor: str = None) -> List[dict]:
         """Get wallet transactions for user"""
-        cursor = self.wallet_transactions_collection.find(
-            {"user_id": user_id}
-        ).sort("created_at", -1).skip(skip).limit(limit)
+        if cursor:
+            skip = 0
+        page = self.wallet_transactions_collection.find(
+            keyset_filter({"user_id": user_id}, cursor), {"proof_image_base64": 0}
+        ).sort(keyset_sort()).skip(skip).limit(limit)
         
         transactions = []
-        async for transaction in cursor:
+        async for transaction in page:
             transaction["_id"] = str(transaction["_id"])
             transactions.append(transaction)
         
@@ -2826,20 +3237,40 @@ class Database:
         cursor = self.wallet_transactions_collection.find({
             "transaction_type": "wallet_funding",
             "status": "pending"
-        }).sort("created_at", -1).skip(skip).limit(limit)
-        
-        requests = []
-        async for request in cursor:
+        }, {"proof_image_base64": 0}).sort("created_at", -1).skip(skip).limit(limit)
+        requests = await cursor.to_list(length=limit)
+
+        # Get user details for the whole page in one query
+        users = DataLoader(self.get_users_by_any_id)
+        for request, user in zip(requests, await users.load_many(r.get("user_id") for r in requests)):
             request["_id"] = str(request["_id"])
-            # Get user details
-            user = await self.get_user_by_id(request["user_id"])
             if user:
                 request["user_name"] = user.get("name", "Unknown")
                 request["user_email"] = user.get("email", "Unknown")
-            requests.append(request)
         
         return requests
 
+    async def get_users_by_any_id(self, ids: List[str]) -> Dict[str, dict]:
+        """Batched get_user_by_id: match on id, then user_id, then public_id"""
+        ids = [i for i in ids if i]
+        if not ids:
+            return {}
+        by_field: Dict[str, Dict[str, dict]] = {"id": {}, "user_id": {}, "public_id": {}}
+        cursor = self.database.users.find(
+            {"$or": [{field: {"$in": ids}} for field in by_field]},
+            ADMIN_USER_SUMMARY_PROJECTION,
+        )
+        async for user in cursor:
+            for field, found in by_field.items():
+                if user.get(field) in ids:
+                    found.setdefault(user[field], user)
+        result = {}
+        for i in ids:
+            user = by_field["id"].get(i) or by_field["user_id"].get(i) or by_field["public_id"].get(i)
+            if user:
+                result[i] = user
+        return result
+
     async def confirm_wallet_funding(self, transaction_id: str, admin_id: str, admin_notes: str = "") -> bool:
         """Confirm wallet funding request"""
         # Get transaction
@@ -2847,9 +3278,9 @@ class Database:
         if not transaction or transaction["status"] != "pending":
             return False
         
-        # Update transaction status
+        # Update transaction status; only a still-pending request may be credited
         result = await self.wallet_transactions_collection.update_one(
-            {"id": transaction_id},
+            {"id": transaction_id, "status": "pending"},
             {
                 "$set": {
                     "status": "confirmed",
@@ -2861,6 +3292,7 @@ class Database:
         )
         
         if result.modified_count > 0:
+            await self._inc_dashboard_metrics(self._funding_resolved_inc(transaction))
             # Add coins to wallet
             coins_to_add = transaction["amount_coins"]
             await self.update_wallet_balance(transaction["user_id"], coins_to_add)
@@ -2870,7 +3302,7 @@ class Database:
 
     async def reject_wallet_funding(self, transaction_id: str, admin_id: str, admin_notes: str = "") -> bool:
         """Reject wallet funding request"""
-        result = await self.wallet_transactions_collection.update_one(
+        transaction = await self.wallet_transactions_collection.find_one_and_update(
             {"id": transaction_id, "status": "pending"},
             {
                 "$set": {
@@ -2879,9 +3311,22 @@ class Database:
                     "admin_notes": admin_notes,
                     "processed_at": datetime.utcnow()
                 }
-            }
+            },
+            projection={"amount_naira": 1, "amount_coins": 1},
         )
-        return result.modified_count > 0
+        if transaction is None:
+            return False
+        await self._inc_dashboard_metrics(self._funding_resolved_inc(transaction))
+        return True
+
+    @staticmethod
+    def _funding_resolved_inc(transaction: dict) -> Dict[str, Any]:
+        """Dashboard metric change for a funding request that is no longer pending"""
+        return {
+            "pending_funding_requests": -1,
+            "pending_funding_naira": -transaction.get("amount_naira", 0),
+            "pending_funding_coins": -transaction.get("amount_coins", 0),
+        }
 
     async def deduct_access_fee(self, user_id: str, job_id: str, access_fee_coins: int) -> bool:
         """Deduct access fee from wallet and create transaction record"""
@@ -2911,6 +3356,79 @@ class Database:
         await self.create_wallet_transaction(transaction_data)
         return True
 
+    # ==========================================
+    # ADMIN DASHBOARD METRICS
+    # ==========================================
+    # Writes that move a dashboard figure $inc the metrics document in place.
+    # It is rebuilt from the source collections by $group aggregations when
+    # missing or older than DASHBOARD_METRICS_RECOMPUTE_SEC, which also repairs
+    # drift from writes made outside these methods (seed scripts, manual edits).
+
+    async def _inc_dashboard_metrics(self, inc: Dict[str, Any]):
+        inc = {field: delta for field, delta in inc.items() if delta}
+        if not inc or self.database is None:
+            return
+        try:
+            # No upsert: until the document is first computed there is nothing to keep in step
+            await self.database.dashboard_metrics.update_one(
+                {"_id": ADMIN_DASHBOARD_METRICS_ID},
+                {"$inc": inc, "$set": {"updated_at": datetime.utcnow()}},
+            )
+        except Exception as e:
+            logger.warning(f"Failed to update dashboard metrics {inc}: {e}")
+
+    async def recompute_dashboard_metrics(self) -> dict:
+        """Rebuild the dashboard metrics document from the source collections"""
+        if self.database is None:
+            raise RuntimeError("Database unavailable: cannot compute dashboard metrics")
+        funding, jobs, pending_verifications = await asyncio.gather(
+            self.wallet_transactions_collection.aggregate([
+                {"$match": {"transaction_type": "wallet_funding", "status": "pending"}},
+                {"$group": {"_id": None, "count": {"$sum": 1},
+                            "naira": {"$sum": "$amount_naira"}, "coins": {"$sum": "$amount_coins"}}},
+            ]).to_list(length=1),
+            self.database.jobs.aggregate([
+                {"$group": {"_id": None, "count": {"$sum": 1},
+                            "interests": {"$sum": {"$ifNull": ["$interests_count", 0]}},
+                            "fees": {"$sum": {"$ifNull": ["$access_fee_naira", DASHBOARD_DEFAULT_ACCESS_FEE_NAIRA]}}}},
+            ]).to_list(length=1),
+            self.user_verifications_collection.count_documents({"status": "pending"}),
+        )
+        funding = funding[0] if funding else {}
+        jobs = jobs[0] if jobs else {}
+        now = datetime.utcnow()
+        metrics = {
+            "pending_funding_requests": funding.get("count", 0),
+            "pending_funding_naira": funding.get("naira", 0),
+            "pending_funding_coins": funding.get("coins", 0),
+            "total_jobs": jobs.get("count", 0),
+            "total_interests": jobs.get("interests", 0),
+            "access_fee_naira_sum": jobs.get("fees", 0),
+            "pending_verifications": pending_verifications,
+            "computed_at": now,
+            "updated_at": now,
+        }
+        await self.database.dashboard_metrics.replace_one({"_id": ADMIN_DASHBOARD_METRICS_ID}, metrics, upsert=True)
+        return {"_id": ADMIN_DASHBOARD_METRICS_ID, **metrics}
+
+    async def _refresh_dashboard_metrics(self):
+        try:
+            await self.recompute_dashboard_metrics()
+        except Exception as e:
+            logger.warning(f"Dashboard metrics recompute failed: {e}")
+
+    async def get_dashboard_metrics(self) -> dict:
+        """The dashboard metrics document; computed on first use, refreshed in the background once stale"""
+        if self.database is None:
+            raise RuntimeError("Database unavailable: cannot read dashboard metrics")
+        metrics = await self.database.dashboard_metrics.find_one({"_id": ADMIN_DASHBOARD_METRICS_ID})
+        if metrics is None:
+            return await self.recompute_dashboard_metrics()
+        age = (datetime.utcnow() - metrics["computed_at"]).total_seconds()
+        if age > self.dashboard_metrics_max_age and (self._dashboard_refresh is None or self._dashboard_refresh.done()):
+            self._dashboard_refresh = asyncio.create_task(self._refresh_dashboard_metrics())
+        return metrics
+
     # ==========================================
     # JOB ACCESS FEE METHODS  
     # ==========================================
@@ -2919,7 +3437,7 @@ class Database:
         """Update job access fee (admin only)"""
         access_fee_coins = access_fee_naira // 100  # Convert to coins
         
-        result = await self.database.jobs.update_one(
+        previous = await self.database.jobs.find_one_and_update(
             {"id": job_id},
             {
                 "$set": {
@@ -2927,9 +3445,13 @@ class Database:
                     "access_fee_coins": access_fee_coins,
                     "updated_at": datetime.utcnow()
                 }
-            }
+            },
+            projection={"access_fee_naira": 1},
         )
-        return result.modified_count > 0
+        if previous is None:
+            return False
+        await self._inc_dashboard_metrics({"access_fee_naira_sum": access_fee_naira - _dashboard_access_fee(previous)})
+        return True
 
     async def get_jobs_with_access_fees(self, skip: int = 0, limit: int = 20) -> List[dict]:
         """Get all jobs with access fees for admin management"""
@@ -3116,172 +3638,259 @@ class Database:
     # Fallback geocoding from location text
     # ------------------------------------------
     def _normalize_text(self, s: Optional[str]) -> str:
-        t = (s or "").lower()
-        # Replace non-alphanumeric with spaces, collapse spaces
-        cleaned = "".join(ch if (ch.isalnum() or ch.isspace()) else " " for ch in t)
-        return " ".join(cleaned.split())
+        return normalize_location_text(s)
 
-    def resolve_coordinates_from_text(self, text: Optional[str]) -> Optional[Dict[str, float]]:
-        if not text:
-            return None
-        t = self._normalize_text(text)
-        city_coords: Dict[str, tuple] = {
-            "lagos": (6.5244, 3.3792),
-            "ikeja": (6.6018, 3.3515),
-            "lekki": (6.4429, 3.4833),
-            "victoria island": (6.4281, 3.4219),
-            "ajah": (6.4667, 3.6000),
-            "surulere": (6.4940, 3.3490),
-            "yaba": (6.5170, 3.3830),
-            "abuja": (9.0765, 7.3986),
-            "gwagwalada": (8.9440, 7.0900),
-            "ibadan": (7.3775, 3.9470),
-            "benin": (6.3350, 5.6037),
-            "enugu": (6.5249, 7.5170),
-            "calabar": (4.9689, 8.3300),
-            "asaba": (6.2019, 6.7319),
-            "warri": (5.5540, 5.7930),
-            "uyo": (5.0333, 7.9330),
-            "port harcourt": (4.8156, 7.0498),
-            "ph": (4.8156, 7.0498),
-            "jos": (9.8965, 8.8580),
-            "kaduna": (10.5060, 7.4273),
-            "kano": (12.0000, 8.5167),
-            "ilorin": (8.4799, 4.5418),
-            "owerri": (5.4836, 7.0333),
-            "aba": (5.1066, 7.3667),
-            "onitsha": (6.1498, 6.7850),
-        }
-        state_capital_coords: Dict[str, tuple] = {
-            "rivers": (4.8156, 7.0498),
-            "rivers state": (4.8156, 7.0498),
-            "lagos": (6.5244, 3.3792),
-            "abuja": (9.0765, 7.3986),
-            "fct": (9.0765, 7.3986),
-            "delta": (6.2019, 6.7319),
-            "edo": (6.3350, 5.6037),
-            "cross river": (4.9689, 8.3300),
-            "bayelsa": (4.9247, 6.2649),
-            "enugu": (6.5249, 7.5170),
-            "oyo": (7.3775, 3.9470),
-            "kaduna": (10.5060, 7.4273),
-            "kano": (12.0000, 8.5167),
-            "plateau": (9.8965, 8.8580),
-            "kwara": (8.4799, 4.5418),
-            "anambra": (6.1498, 6.7850),
-            "abia": (5.1066, 7.3667),
-            "imo": (5.4836, 7.0333),
-        }
-        for key, (lat, lng) in city_coords.items():
-            if key in t:
-                return {"latitude": lat, "longitude": lng}
-        for key, (lat, lng) in state_capital_coords.items():
-            if key in t:
-                return {"latitude": lat, "longitude": lng}
-        coords = self.geocode_location_text(text)
-        return coords
-
-    def geocode_location_text(self, text: str) -> Optional[Dict[str, float]]:
+    def _lookup_coordinates(self, text: Optional[str]) -> Optional[Dict[str, float]]:
+        """Match location text against the gazetteer of known places (no network)"""
+        return self.gazetteer.resolve(text)
+
+    async def resolve_coordinates_from_text(self, text: Optional[str]) -> Optional[Dict[str, float]]:
+        return self._lookup_coordinates(text) or await self.geocode_location_text(text)
+
+    async def geocode_location_text(self, text: str, wait: bool = False) -> Optional[Dict[str, float]]:
+        """Geocode free-form location text via the shared async geocoder (cached, rate limited)"""
         if not text:
             return None
-        key = self._normalize_text(text)
-        now = datetime.utcnow()
-        ttl = self._geo_rate.get("ttl_days", 7)
-        cached = self._geo_cache.get(key)
-        if cached:
-            ts = cached.get("ts")
-            if ts and now - ts < timedelta(days=int(ttl)):
-                return {
-                    "latitude": float(cached.get("lat")),
-                    "longitude": float(cached.get("lng")),
+        return await self.geocoder.geocode(text, wait=wait)
+
+    # Fields that describe where a job or user is, most specific first
+    LOCATION_TEXT_FIELDS = ("town", "lga", "city", "location", "state", "address", "address_text")
+    # Explicit coordinates and these text fields trigger re-resolution on update
+    LOCATION_FIELDS = ("latitude", "longitude") + LOCATION_TEXT_FIELDS
+
+    async def resolve_location_fields(self, entity: Dict[str, Any], wait: bool = False) -> Dict[str, Any]:
+        """Resolve the coordinates to persist on a job or user document.
+
+        Returns `location_point` plus a `coords_source` marker ("explicit" for
+        latitude/longitude, "lookup" for the built-in place table, "geocoder"
+        for Nominatim), or {} when nothing resolved. Runs on writes only, so
+        read paths never have to geocode text.
+        """
+        return (await self._resolve_location(entity, wait=wait))[1]
+
+    async def _resolve_location(self, entity: Dict[str, Any], wait: bool = False) -> Tuple[bool, Dict[str, Any]]:
+        """resolve_location_fields() plus whether an empty result is definitive (False: geocoder unavailable)"""
+        point = self._location_point(entity.get("latitude"), entity.get("longitude"))
+        if point:
+            return True, {"location_point": point, "coords_source": "explicit"}
+        texts = []
+        for field in self.LOCATION_TEXT_FIELDS:
+            value = entity.get(field)
+            if isinstance(value, str) and value.strip() and value.strip() not in texts:
+                texts.append(value.strip())
+        for text in texts:
+            coords = self._lookup_coordinates(text)
+            if coords:
+                return True, {
+                    "location_point": self._location_point(coords["latitude"], coords["longitude"]),
+                    "coords_source": "lookup",
                 }
-        win_start = self._geo_rate.get("window_start")
-        window_seconds = int(self._geo_rate.get("window_seconds", 60))
-        limit = int(self._geo_rate.get("limit", 30))
-        if not win_start or (now - win_start).total_seconds() >= window_seconds:
-            self._geo_rate["window_start"] = now
-            self._geo_rate["count"] = 0
-        if int(self._geo_rate.get("count", 0)) >= limit:
-            return None
-        self._geo_rate["count"] = int(self._geo_rate.get("count", 0)) + 1
+        if texts:
+            definitive, coords = await self.geocoder.lookup(", ".join(texts), wait=wait)
+            if coords:
+                return True, {
+                    "location_point": self._location_point(coords["latitude"], coords["longitude"]),
+                    "coords_source": "geocoder",
+                }
+            return definitive, {}
+        return True, {}
+
+    async def _location_update_fields(self, collection, entity_id: str, update_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Re-resolve coordinates when an update touches location fields"""
+        if not any(field in update_data for field in self.LOCATION_FIELDS):
+            return {}
         try:
-            import requests
-            params = {
-                "q": text,
-                "format": "json",
-                "limit": 1,
-                "countrycodes": "ng",
-            }
-            headers = {"User-Agent": os.getenv("GEOCODER_UA", "ServiceHub/1.0")}
-            r = requests.get(
-                "https://nominatim.openstreetmap.org/search",
-                params=params,
-                headers=headers,
-                timeout=5,
-            )
-            if r.status_code == 200:
-                data = r.json()
-                if isinstance(data, list) and data:
-                    item = data[0]
-                    lat = float(item.get("lat"))
-                    lng = float(item.get("lon"))
-                    self._geo_cache[key] = {"lat": lat, "lng": lng, "ts": now}
-                    return {"latitude": lat, "longitude": lng}
-        except Exception:
-            return None
-        return None
+            existing = await collection.find_one({"id": entity_id}, {f: 1 for f in self.LOCATION_FIELDS}) or {}
+            resolved = await self.resolve_location_fields({**existing, **update_data})
+            if not resolved:
+                # Drop the stale point; the background backfill retries documents without a source
+                return {"location_point": None, "coords_source": None}
+            return resolved
+        except Exception as e:
+            logger.warning(f"Coordinate resolution failed for {entity_id}: {e}")
+            return {}
+
+    async def backfill_coordinates(self, collection_name: str, batch_size: int = 200) -> Dict[str, int]:
+        """Resolve and store coordinates for legacy jobs/users that have none yet.
+
+        Waits on the geocoder rate limiter, so it is meant to run in the
+        background. Documents the geocoder definitively cannot place are
+        marked coords_source="unresolved" and skipped on later runs; lookups
+        refused or failed (rate limit, timeout, HTTP error) leave the document
+        untouched so the next run retries it.
+        """
+        if self.database is None:
+            raise RuntimeError("Database unavailable: cannot backfill coordinates")
+        collection = self.database[collection_name]
+        query = {"$or": [{"coords_source": {"$exists": False}}, {"coords_source": None}]}
+        if collection_name == "users":
+            query = {"$and": [query, {"role": "tradesperson"}]}
+        projection = {"_id": 1, **{f: 1 for f in self.LOCATION_FIELDS}}
+        stats = {"resolved": 0, "unresolved": 0, "retry": 0}
+        ops: List[UpdateOne] = []
+        async for doc in collection.find(query, projection):
+            definitive, resolved = await self._resolve_location(doc, wait=True)
+            if resolved:
+                stats["resolved"] += 1
+            elif definitive:
+                resolved = {"coords_source": "unresolved"}
+                stats["unresolved"] += 1
+            else:
+                stats["retry"] += 1
+                continue
+            resolved["coords_resolved_at"] = datetime.utcnow()
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": resolved}))
+            if len(ops) >= batch_size:
+                await collection.bulk_write(ops, ordered=False)
+                ops = []
+        if ops:
+            await collection.bulk_write(ops, ordered=False)
+        logger.info(f"Coordinate backfill for {collection_name}: {stats}")
+        return stats
 
-    def resolve_coordinates_from_entity(self, entity: Dict[str, Any]) -> Optional[Dict[str, float]]:
+    def _location_point(self, latitude: Any, longitude: Any) -> Optional[Dict[str, Any]]:
+        """Build the GeoJSON point stored in `location_point` (coordinates are [lng, lat])"""
         try:
-            jlat = entity.get("latitude")
-            jlng = entity.get("longitude")
-            if jlat is not None and jlng is not None:
-                return {"latitude": float(jlat), "longitude": float(jlng)}
-            for field in ("location", "city", "state", "address", "address_text"):
-                v = entity.get(field)
-                coords = self.resolve_coordinates_from_text(v)
-                if coords:
-                    return coords
-        except Exception:
-            pass
-        return None
+            lat = float(latitude)
+            lng = float(longitude)
+        except (TypeError, ValueError):
+            return None
+        if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+            return None
+        return {"type": "Point", "coordinates": [lng, lat]}
 
-    async def get_jobs_near_location(self, latitude: float, longitude: float, max_distance_km: int = 25, skip: int = 0, limit: int = 50) -> List[dict]:
-        """Get jobs within specified distance from a location"""
-        # Get all active jobs with location data
-        cursor = self.database.jobs.find({
-            "status": "active",
+    async def backfill_job_location_points(self, batch_size: int = 500) -> int:
+        """Populate `location_point` for jobs that only carry latitude/longitude.
+
+        Safe to run repeatedly: only jobs without a point are touched.
+        """
+        if self.database is None:
+            raise RuntimeError("Database unavailable: cannot backfill job location points")
+        query = {
+            "location_point": {"$exists": False},
             "latitude": {"$exists": True, "$ne": None},
-            "longitude": {"$exists": True, "$ne": None}
-        }).skip(skip).limit(limit * 2)  # Get more to filter by distance
-        
-        jobs_with_distance = []
-        
+            "longitude": {"$exists": True, "$ne": None},
+        }
+        cursor = self.database.jobs.find(query, {"_id": 1, "latitude": 1, "longitude": 1})
+        updated = 0
+        ops: List[UpdateOne] = []
         async for job in cursor:
+            point = self._location_point(job.get("latitude"), job.get("longitude"))
+            if not point:
+                continue
+            ops.append(UpdateOne(
+                {"_id": job["_id"], "location_point": {"$exists": False}},
+                {"$set": {"location_point": point, "coords_source": "explicit"}}
+            ))
+            if len(ops) >= batch_size:
+                result = await self.database.jobs.bulk_write(ops, ordered=False)
+                updated += result.modified_count
+                ops = []
+        if ops:
+            result = await self.database.jobs.bulk_write(ops, ordered=False)
+            updated += result.modified_count
+        logger.info(f"Backfilled location_point on {updated} jobs")
+        return updated
+
+    async def backfill_all_coordinates(self) -> Dict[str, Any]:
+        """Background job: points for lat/lng docs first, then text-only jobs and tradespeople"""
+        results: Dict[str, Any] = {}
+        try:
+            results["job_location_points"] = await self.backfill_job_location_points()
+            results["jobs"] = await self.backfill_coordinates("jobs")
+            results["users"] = await self.backfill_coordinates("users")
+        except Exception as e:
+            logger.error(f"Coordinate backfill failed: {e}")
+        return results
+
+    async def _geo_near_jobs(self, latitude: float, longitude: float, max_distance_km: float,
+                             query: Dict[str, Any], skip: int = 0, limit: int = 50,
+                             precision: int = 2) -> List[dict]:
+        """Jobs within `max_distance_km`, nearest first, paginated by MongoDB via $geoNear"""
+        if limit <= 0:
+            return []
+        pipeline = [
+            {
+                "$geoNear": {
+                    "near": {"type": "Point", "coordinates": [float(longitude), float(latitude)]},
+                    "key": "location_point",
+                    "distanceField": "distance_m",
+                    "maxDistance": float(max_distance_km) * 1000.0,
+                    "spherical": True,
+                    "query": query,
+                }
+            },
+            {"$skip": skip},
+            {"$limit": limit},
+        ]
+        jobs = await self.database.jobs.aggregate(pipeline).to_list(length=limit)
+        for job in jobs:
             job["_id"] = str(job["_id"])
-            
-            # Calculate distance
-            distance = self.calculate_distance(
-                latitude, longitude,
-                job["latitude"], job["longitude"]
-            )
-            
-            # Only include jobs within max distance
-            if distance <= max_distance_km:
-                job["distance_km"] = round(distance, 1)
-                jobs_with_distance.append(job)
-        
-        # Sort by distance (closest first)
-        jobs_with_distance.sort(key=lambda x: x["distance_km"])
-        
-        # Limit to requested number
-        return jobs_with_distance[:limit]
+            job["distance_km"] = round(job.pop("distance_m", 0.0) / 1000.0, precision)
+        return jobs
+
+    async def _count_jobs_within_radius(self, latitude: float, longitude: float,
+                                        max_distance_km: float, query: Dict[str, Any]) -> int:
+        """Count jobs matching `query` whose location_point lies inside the radius"""
+        within = {
+            "location_point": {
+                "$geoWithin": {
+                    "$centerSphere": [[float(longitude), float(latitude)], float(max_distance_km) / 6378.1]
+                }
+            }
+        }
+        return await self.database.jobs.count_documents({"$and": [query, within]})
+
+    async def _near_jobs_with_fallback(self, latitude: float, longitude: float, max_distance_km: float,
+                                       query: Dict[str, Any], skip: int = 0, limit: int = 50) -> List[dict]:
+        """Jobs within radius (nearest first) followed by jobs without coordinates (newest first).
+
+        Both segments are sorted and paginated server-side, so results stay correct at any
+        page depth. Jobs with coordinates outside the radius are excluded.
+        """
+        near_jobs = await self._geo_near_jobs(latitude, longitude, max_distance_km, query, skip, limit)
+        if len(near_jobs) >= limit:
+            return near_jobs
+
+        # The geo segment ran out on this page; work out how far into the fallback segment we are
+        if near_jobs:
+            within_total = skip + len(near_jobs)
+        else:
+            within_total = await self._count_jobs_within_radius(latitude, longitude, max_distance_km, query)
+        fallback_skip = max(0, skip - within_total)
+        remaining = limit - len(near_jobs)
+
+        fallback_query = {"$and": [query, {"location_point": None}]}
+        cursor = (
+            self.database.jobs
+            .find(fallback_query)
+            .sort("created_at", -1)
+            .skip(fallback_skip)
+            .limit(remaining)
+        )
+        fallback_jobs = await cursor.to_list(length=remaining)
+        for job in fallback_jobs:
+            job["_id"] = str(job["_id"])
+            job["distance_km"] = None
+        return near_jobs + fallback_jobs
+
+    async def get_jobs_near_location(self, latitude: float, longitude: float, max_distance_km: int = 25, skip: int = 0, limit: int = 50) -> List[dict]:
+        """Get jobs within specified distance from a location, closest first"""
+        return await self._geo_near_jobs(
+            latitude, longitude, max_distance_km,
+            query={"status": "active"},
+            skip=skip,
+            limit=limit,
+            precision=1,
+        )
 
     async def update_user_location(self, user_id: str, latitude: float, longitude: float, travel_distance_km: int = None) -> bool:
         """Update user's location and travel distance"""
         update_data = {
             "latitude": latitude,
             "longitude": longitude,
+            "location_point": self._location_point(latitude, longitude),
+            "coords_source": "explicit",
             "updated_at": datetime.utcnow()
         }
         
@@ -3303,6 +3912,8 @@ class Database:
                 "$set": {
                     "latitude": latitude,
                     "longitude": longitude,
+                    "location_point": self._location_point(latitude, longitude),
+                    "coords_source": "explicit",
                     "updated_at": datetime.utcnow()
                 }
             }
@@ -3392,55 +4003,9 @@ class Database:
             # Combine filters
             combined_filter = {"$and": [base_filter, skills_filter]} if skills_filter else base_filter
 
-            # Fetch extra to allow distance filtering and fallback composition
-            fetch_limit = max(limit * 3 + skip, limit)
-            cursor = (
-                self.database.jobs
-                .find(combined_filter)
-                .sort("created_at", -1)
-                .skip(0)
-                .limit(fetch_limit)
+            return await self._near_jobs_with_fallback(
+                latitude, longitude, max_distance_km, combined_filter, skip=skip, limit=limit
             )
-            raw_jobs = await cursor.to_list(length=None)
-
-            jobs_within_distance: List[Dict[str, Any]] = []
-            jobs_without_coords: List[Dict[str, Any]] = []
-
-            for job in raw_jobs:
-                jlat = job.get("latitude")
-                jlng = job.get("longitude")
-                if jlat is not None and jlng is not None:
-                    try:
-                        dist = self.calculate_distance(latitude, longitude, jlat, jlng)
-                    except Exception:
-                        dist = None
-                    if dist is not None and dist <= float(max_distance_km):
-                        job["_id"] = str(job.get("_id")) if job.get("_id") else None
-                        job["distance_km"] = round(dist, 2)
-                        jobs_within_distance.append(job)
-                else:
-                    fallback = self.resolve_coordinates_from_entity(job)
-                    if fallback:
-                        try:
-                            dist = self.calculate_distance(latitude, longitude, fallback["latitude"], fallback["longitude"])
-                        except Exception:
-                            dist = None
-                        if dist is not None and dist <= float(max_distance_km):
-                            job["_id"] = str(job.get("_id")) if job.get("_id") else None
-                            job["distance_km"] = round(dist, 2)
-                            jobs_within_distance.append(job)
-                            continue
-                    job["_id"] = str(job.get("_id")) if job.get("_id") else None
-                    job["distance_km"] = None
-                    jobs_without_coords.append(job)
-
-            # Sort: closest first, then most recent for no-coordinate jobs
-            jobs_within_distance.sort(key=lambda x: x.get("distance_km", float("inf")))
-            jobs_without_coords.sort(key=lambda x: x.get("created_at", datetime.min), reverse=True)
-
-            combined = jobs_within_distance + jobs_without_coords
-            sliced = combined[skip: skip + limit]
-            return sliced
 
         except Exception as e:
             logger.error(f"Error in get_jobs_near_location_with_skills: {e}")
@@ -3469,16 +4034,6 @@ class Database:
                 "expires_at": {"$gt": datetime.utcnow()},
             }
 
-            # Text search on title/description
-            text_filter: Dict[str, Any] = {}
-            if search_query:
-                text_filter = {
-                    "$or": [
-                        {"title": {"$regex": search_query, "$options": "i"}},
-                        {"description": {"$regex": search_query, "$options": "i"}},
-                    ]
-                }
-
             # Category filter (case-insensitive exact match)
             category_filter: Dict[str, Any] = {}
             if category:
@@ -3488,65 +4043,32 @@ class Database:
 
             # Combine filters (do NOT require coordinate presence)
             combined_filters: List[Dict[str, Any]] = [base_filter]
-            if text_filter:
-                combined_filters.append(text_filter)
             if category_filter:
                 combined_filters.append(category_filter)
 
             filters: Dict[str, Any] = {"$and": combined_filters} if len(combined_filters) > 1 else base_filter
 
+            # Text search on title/description, ranked by relevance unless sorted by distance
+            if search_query and not use_location:
+                jobs, _ = await self.text_search(
+                    self.database.jobs, search_query, filters, JOB_SEARCH_FIELDS,
+                    skip=skip, limit=limit, sort=[("created_at", -1)], substring_fallback=True
+                )
+                return jobs
+
             # Location-aware search
             if use_location:
+                if search_query:
+                    # $geoNear can't be combined with $text, so narrow to the best text matches first
+                    matches, _ = await self.text_search(
+                        self.database.jobs, search_query, filters, JOB_SEARCH_FIELDS,
+                        limit=SEARCH_CANDIDATE_LIMIT, projection={"id": 1}, substring_fallback=True
+                    )
+                    filters = {"$and": [filters, {"id": {"$in": [job["id"] for job in matches if job.get("id")]}}]}
                 radius_km = max_distance_km if (isinstance(max_distance_km, (int, float)) and max_distance_km is not None) else 25
-                # Fetch extra to allow distance filtering and composition
-                fetch_limit = max(limit * 3 + skip, limit)
-                cursor = (
-                    self.database.jobs
-                    .find(filters)
-                    .sort("created_at", -1)
-                    .skip(0)
-                    .limit(fetch_limit)
+                return await self._near_jobs_with_fallback(
+                    user_latitude, user_longitude, radius_km, filters, skip=skip, limit=limit
                 )
-                raw_jobs = await cursor.to_list(length=None)
-
-                jobs_within_distance: List[Dict[str, Any]] = []
-                jobs_without_coords: List[Dict[str, Any]] = []
-
-                for job in raw_jobs:
-                    jlat = job.get("latitude")
-                    jlng = job.get("longitude")
-                    if jlat is None or jlng is None:
-                        fallback = self.resolve_coordinates_from_entity(job)
-                        if fallback:
-                            try:
-                                dist = self.calculate_distance(user_latitude, user_longitude, fallback["latitude"], fallback["longitude"])
-                            except Exception:
-                                dist = None
-                            if dist is not None and dist <= float(radius_km):
-                                job["_id"] = str(job.get("_id")) if job.get("_id") else None
-                                job["distance_km"] = round(dist, 2)
-                                jobs_within_distance.append(job)
-                                continue
-                        job["_id"] = str(job.get("_id")) if job.get("_id") else None
-                        job["distance_km"] = None
-                        jobs_without_coords.append(job)
-                        continue
-                    try:
-                        dist = self.calculate_distance(user_latitude, user_longitude, jlat, jlng)
-                    except Exception:
-                        continue
-                    if dist <= float(radius_km):
-                        job["_id"] = str(job.get("_id")) if job.get("_id") else None
-                        job["distance_km"] = round(dist, 2)
-                        jobs_within_distance.append(job)
-
-                # Sort and paginate combined results
-                jobs_within_distance.sort(key=lambda x: x.get("distance_km", float("inf")))
-                jobs_without_coords.sort(key=lambda x: x.get("created_at", datetime.min), reverse=True)
-
-                combined = jobs_within_distance + jobs_without_coords
-                sliced = combined[skip: skip + limit]
-                return sliced
 
             # No location filtering: regular query sorted by recency
             cursor = (
@@ -3569,6 +4091,94 @@ class Database:
             print(f"Error getting jobs near location with skills: {str(e)}")
             return []
 
+    # Search Methods
+    async def text_search(
+        self,
+        collection,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        regex_fields: Iterable[str] = (),
+        skip: int = 0,
+        limit: int = 20,
+        sort: Optional[List[Tuple[str, int]]] = None,
+        rank: bool = True,
+        projection: Optional[Dict[str, Any]] = None,
+        substring_fallback: bool = False,
+    ) -> Tuple[List[dict], int]:
+        """Relevance-ranked, paginated search over a collection's text index.
+
+        The query is tokenized and expanded with trade synonyms by utils/search.py
+        and matched with `$text` on top of `filters`. Results are ordered by
+        textScore and then `sort`, or by `sort` alone when rank is False. If the
+        text index doesn't exist yet the unindexed regex scan over `regex_fields`
+        is used instead; with substring_fallback it is also used when the text
+        search finds nothing, so partial words ("joh", "gmail") still match.
+        Returns (documents, total matches).
+        """
+        filters = dict(filters or {})
+        order = list(sort or [])
+        search = text_search_string(query)
+        if search:
+            text_query = {**filters, "$text": {"$search": search}}
+            if rank:
+                order = [("search_score", {"$meta": "textScore"})] + order
+            try:
+                docs = await self._search_page(
+                    collection, text_query, {**(projection or {}), "search_score": {"$meta": "textScore"}},
+                    order, skip, limit
+                )
+                total = await collection.count_documents(text_query)
+                if total or not substring_fallback:
+                    return docs, total
+            except OperationFailure as e:
+                logger.warning(f"Text search unavailable on {collection.name}, using regex scan: {e}")
+            order = list(sort or [])
+        if query and query.strip():
+            conditions = [filters, regex_search_filter(query, regex_fields)] if filters else [regex_search_filter(query, regex_fields)]
+            filters = {"$and": conditions} if len(conditions) > 1 else conditions[0]
+        docs = await self._search_page(collection, filters, projection, order, skip, limit)
+        return docs, await collection.count_documents(filters)
+
+    async def _search_page(self, collection, query, projection, order, skip: int, limit: int) -> List[dict]:
+        cursor = collection.find(query, projection)
+        if order:
+            cursor = cursor.sort(order)
+        docs = await cursor.skip(skip).limit(limit).to_list(length=limit)
+        for doc in docs:
+            doc.pop("search_score", None)
+            if "_id" in doc:
+                doc["_id"] = str(doc["_id"])
+        return docs
+
+    async def search_jobs_text(self, query: str, filters: Optional[Dict[str, Any]] = None,
+                               skip: int = 0, limit: int = 10) -> Tuple[List[dict], int]:
+        """Jobs matching `query`, best matches first and newest first among equals; same default filters as get_jobs"""
+        return await self.text_search(
+            self.database.jobs, query, self._public_job_filters(filters), JOB_SEARCH_FIELDS, skip=skip, limit=limit,
+            sort=[("created_at", -1)], substring_fallback=True
+        )
+
+    def _suggestion_index(self) -> SuggestionIndex:
+        if self.suggestion_index is None:
+            self.suggestion_index = SuggestionIndex.from_static()
+        return self.suggestion_index
+
+    async def suggest_search_terms(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Autocomplete trades and places for a search box prefix, including admin-added trades"""
+        suggestions = self._suggestion_index().suggest(prefix, limit)
+        if len(suggestions) < limit:
+            try:
+                custom = await self.get_custom_trades()
+            except Exception:
+                custom = None
+            known = {s["text"].lower() for s in suggestions}
+            extra = SuggestionIndex()
+            for trade in (custom or {}).get("trades", []):
+                if isinstance(trade, str) and trade.lower() not in known:
+                    extra.add(trade, "trade")
+            suggestions += extra.suggest(prefix, limit - len(suggestions))
+        return suggestions
+
     async def _process_job_data(self, job: dict) -> dict:
         """Process and enrich job data with additional information"""
         try:
@@ -3727,7 +4337,7 @@ class Database:
         
         return True
 
-    async def submit_verification_documents(self, user_id: str, document_type: str, document_url: str, full_name: str, document_number: str = None, document_image_base64: str = None) -> str:
+    async def submit_verification_documents(self, user_id: str, document_type: str, document_url: str, full_name: str, document_number: str = None, document_image_blob: dict = None) -> str:
         """Submit verification documents"""
         if self.database is None:
             raise RuntimeError("Database unavailable: cannot submit verification documents")
@@ -3736,7 +4346,7 @@ class Database:
             "user_id": user_id,
             "document_type": document_type,
             "document_url": document_url,
-            "document_image_base64": document_image_base64,
+            "document_image_blob": document_image_blob,
             "full_name": full_name,
             "document_number": document_number,
             "status": "pending",
@@ -3745,6 +4355,7 @@ class Database:
         }
         
         await self.user_verifications_collection.insert_one(verification_data)
+        await self._inc_dashboard_metrics({"pending_verifications": 1})
         
         # Update user status
         await self.users_collection.update_one(
@@ -3771,9 +4382,9 @@ class Database:
         
         status = "verified" if approved else "rejected"
         
-        # Update verification record
+        # Update verification record, unless another admin reviewed it meanwhile
         result = await self.user_verifications_collection.update_one(
-            {"id": verification_id},
+            {"id": verification_id, "status": verification.get("status")},
             {
                 "$set": {
                     "status": status,
@@ -3787,6 +4398,8 @@ class Database:
         
         if result.modified_count == 0:
             return False
+        if verification.get("status") == "pending":
+            await self._inc_dashboard_metrics({"pending_verifications": -1})
         
         # Update user's identity verification flag regardless of role
         try:
@@ -4177,11 +4790,11 @@ class Database:
                 "tin": payload.get("tin") or existing.get("tin"),
                 "designated_partners": payload.get("designated_partners") or existing.get("designated_partners"),
                 "documents": merged_docs,
-                "documents_base64": payload.get("documents_base64") or existing.get("documents_base64") or [],
+                "documents_blobs": payload.get("documents_blobs") or existing.get("documents_blobs") or [],
                 "work_photos": merged_work_photos,
-                "work_photos_base64": payload.get("work_photos_base64") or existing.get("work_photos_base64") or [],
+                "work_photos_blobs": payload.get("work_photos_blobs") or existing.get("work_photos_blobs") or [],
                 "partner_id_documents": merged_partner_ids,
-                "partner_id_documents_base64": payload.get("partner_id_documents_base64") or existing.get("partner_id_documents_base64") or [],
+                "partner_id_documents_blobs": payload.get("partner_id_documents_blobs") or existing.get("partner_id_documents_blobs") or [],
                 "updated_at": datetime.utcnow(),
             }
             await self.tradespeople_verifications_collection.update_one(
@@ -4212,11 +4825,11 @@ class Database:
             "tin": payload.get("tin"),
             "designated_partners": payload.get("designated_partners"),
             "documents": payload.get("documents", {}),
-            "documents_base64": payload.get("documents_base64", []),
+            "documents_blobs": payload.get("documents_blobs", []),
             "work_photos": payload.get("work_photos", []),
-            "work_photos_base64": payload.get("work_photos_base64", []),
+            "work_photos_blobs": payload.get("work_photos_blobs", []),
             "partner_id_documents": payload.get("partner_id_documents", []),
-            "partner_id_documents_base64": payload.get("partner_id_documents_base64", []),
+            "partner_id_documents_blobs": payload.get("partner_id_documents_blobs", []),
             "status": "pending",
             "submitted_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
@@ -4233,26 +4846,116 @@ class Database:
             pass
         return record["id"]
 
-    async def get_tradespeople_file_base64(self, filename: str) -> Optional[dict]:
-        """Return stored base64 for a tradespeople verification file by filename.
-        Searches documents_base64, work_photos_base64, partner_id_documents_base64.
+    async def get_tradespeople_file(self, filename: str) -> Optional[dict]:
+        """Return the stored entry for a tradespeople verification file by filename.
+
+        Blob references ({"sha256", "content_type", ...}) are preferred; records
+        not yet migrated off inline base64 return their {"base64", ...} entry.
+        The indexed blob fields are queried first and the unindexed legacy
+        fields only on a miss, so the common lookup never scans.
         """
         if self.database is None:
             raise RuntimeError("Database unavailable: cannot query tradespeople verifications")
-        cursor = self.tradespeople_verifications_collection.find({
-            "status": {"$in": ["pending", "verified"]}
-        }).sort("submitted_at", -1)
-        async for v in cursor:
-            for key in ("documents_base64", "work_photos_base64", "partner_id_documents_base64"):
-                items = v.get(key) or []
-                for item in items:
-                    try:
-                        if item and item.get("filename") == filename and item.get("base64"):
+        for fields in (list(TRADESPEOPLE_FILE_BLOB_FIELDS), list(TRADESPEOPLE_FILE_BLOB_FIELDS.values())):
+            cursor = self.tradespeople_verifications_collection.find(
+                {"status": {"$in": ["pending", "verified"]}, "$or": [{f"{key}.filename": filename} for key in fields]},
+                {key: 1 for key in fields},
+            ).sort("submitted_at", -1).limit(1)
+            async for v in cursor:
+                for key in fields:
+                    for item in v.get(key) or []:
+                        if isinstance(item, dict) and item.get("filename") == filename and (item.get("sha256") or item.get("base64")):
                             return item
-                    except Exception:
-                        continue
         return None
 
+    async def _inline_to_blob(self, encoded: Optional[str], content_type: Optional[str], filename: Optional[str],
+                              stats: Dict[str, int], dry_run: bool, owner_id: Optional[str] = None) -> Optional[dict]:
+        data = base64.b64decode(encoded.split(",")[-1])
+        stats["inline_bytes"] += len(encoded)
+        if dry_run:
+            return {"sha256": None, "size": len(data), "content_type": content_type, "filename": filename}
+        stored_before = self.blob_store.counters["stored"]
+        ref = await self.blob_store.put(data, content_type or sniff_content_type(data), filename, owner_id=owner_id)
+        stats["blobs_stored" if self.blob_store.counters["stored"] > stored_before else "blobs_deduplicated"] += 1
+        return ref
+
+    async def migrate_inline_blobs(self, batch_size: int = 100, dry_run: bool = False) -> Dict[str, int]:
+        """Move base64 images stored inside documents into the blob store.
+
+        Covers wallet_transactions.proof_image_base64,
+        user_verifications.document_image_base64 and the tradespeople
+        verification file arrays. Each document gets a blob reference in place
+        of the inline copy; identical files are stored once. Safe to re-run:
+        migrated documents no longer match. Entries that fail to decode are
+        counted and left in place.
+        """
+        if self.database is None:
+            raise RuntimeError("Database unavailable: cannot migrate inline blobs")
+        stats = {"documents": 0, "blobs_stored": 0, "blobs_deduplicated": 0, "failed": 0, "inline_bytes": 0}
+
+        async def apply(collection, doc_id, update):
+            stats["documents"] += 1
+            if not dry_run:
+                await collection.update_one({"_id": doc_id}, update)
+
+        present = {"$exists": True, "$nin": [None, ""]}
+        txns = self.wallet_transactions_collection
+        async for txn in txns.find({"proof_image_base64": present}, {"user_id": 1, "proof_image": 1, "proof_image_base64": 1}).batch_size(batch_size):
+            try:
+                ref = await self._inline_to_blob(
+                    txn["proof_image_base64"], None, txn.get("proof_image"), stats, dry_run, txn.get("user_id")
+                )
+            except Exception as e:
+                stats["failed"] += 1
+                logger.warning(f"Could not migrate proof image of transaction {txn['_id']}: {e}")
+                continue
+            await apply(txns, txn["_id"], {"$set": {"proof_image_blob": ref}, "$unset": {"proof_image_base64": ""}})
+
+        verifications = self.user_verifications_collection
+        async for doc in verifications.find({"document_image_base64": present}, {"user_id": 1, "document_url": 1, "document_image_base64": 1}).batch_size(batch_size):
+            try:
+                ref = await self._inline_to_blob(
+                    doc["document_image_base64"], None, doc.get("document_url"), stats, dry_run, doc.get("user_id")
+                )
+            except Exception as e:
+                stats["failed"] += 1
+                logger.warning(f"Could not migrate verification document {doc['_id']}: {e}")
+                continue
+            await apply(verifications, doc["_id"], {"$set": {"document_image_blob": ref}, "$unset": {"document_image_base64": ""}})
+        if not dry_run:
+            # Submissions without an image carried an explicit null
+            await verifications.update_many({"document_image_base64": None}, {"$unset": {"document_image_base64": ""}})
+
+        tradespeople = self.tradespeople_verifications_collection
+        legacy_fields = list(TRADESPEOPLE_FILE_BLOB_FIELDS.values())
+        query = {"$or": [{field: {"$exists": True}} for field in legacy_fields]}
+        projection = {field: 1 for field in ["user_id"] + list(TRADESPEOPLE_FILE_BLOB_FIELDS) + legacy_fields}
+        async for doc in tradespeople.find(query, projection).batch_size(batch_size):
+            update: Dict[str, Any] = {"$set": {}, "$unset": {}}
+            for blob_field, legacy_field in TRADESPEOPLE_FILE_BLOB_FIELDS.items():
+                if legacy_field not in doc:
+                    continue
+                refs, kept = list(doc.get(blob_field) or []), []
+                for item in doc.get(legacy_field) or []:
+                    if not isinstance(item, dict) or not item.get("base64"):
+                        continue
+                    try:
+                        refs.append(await self._inline_to_blob(
+                            item["base64"], item.get("content_type"), item.get("filename"), stats, dry_run,
+                            doc.get("user_id")
+                        ))
+                    except Exception as e:
+                        stats["failed"] += 1
+                        kept.append(item)
+                        logger.warning(f"Could not migrate {legacy_field} entry of {doc['_id']}: {e}")
+                update["$set"][blob_field] = refs
+                if kept:
+                    update["$set"][legacy_field] = kept
+                else:
+                    update["$unset"][legacy_field] = ""
+            await apply(tradespeople, doc["_id"], {k: v for k, v in update.items() if v})
+        return stats
+
     async def get_user_tradesperson_verification_status(self, user_id: str) -> dict:
         """Return latest tradesperson verification status for a user.
         Status values: not_submitted | pending | verified | rejected
@@ -4391,8 +5094,9 @@ class Database:
     # USER MANAGEMENT METHODS (Admin)
     # ==========================================
     
-    async def get_all_users_for_admin(self, skip: int = 0, limit: int = 50, role: str = None, status: str = None, search: str = None):
-        """Get all users with filtering for admin dashboard"""
+    async def get_all_users_for_admin(self, skip: int = 0, limit: int = 50, role: str = None, status: str = None, search: str = None,
+                                      cursor: str = None):
+        """Get all users with filtering for admin dashboard (newest first; `cursor` seeks by keyset instead of skip)"""
         
         # Build query filter
         query = {}
@@ -4406,24 +5110,30 @@ class Database:
             # Default to active users if no status specified
             query["status"] = {"$ne": "deleted"}
             
-        if search:
-            query["$or"] = [
-                {"name": {"$regex": search, "$options": "i"}},
-                {"email": {"$regex": search, "$options": "i"}},
-                {"phone": {"$regex": search, "$options": "i"}},
-                {"skills": {"$regex": search, "$options": "i"}},
-                {"user_id": {"$regex": f"^{search}$", "$options": "i"}},
-                {"public_id": {"$regex": f"^{search}$", "$options": "i"}},
-                {"id": {"$regex": search, "$options": "i"}}
-            ]
-        
         # Get users with pagination
-        users_cursor = self.users_collection.find(query).skip(skip).limit(limit).sort("created_at", -1)
-        users = await users_cursor.to_list(length=limit)
+        if cursor:
+            skip = 0
+        if search and search.strip():
+            exact = await self._admin_user_identifier_query(query, search)
+            if exact:
+                users = await self.users_collection.find(keyset_filter(exact, cursor)).skip(skip).limit(limit).sort(keyset_sort()).to_list(length=limit)
+            else:
+                # Relevance order has no stable key to seek on, so cursor pages are by date
+                users, _ = await self.text_search(
+                    self.users_collection, search, keyset_filter(query, cursor), ADMIN_USER_SEARCH_FIELDS,
+                    skip=skip, limit=limit, sort=keyset_sort(), rank=not cursor, substring_fallback=True
+                )
+        else:
+            users_cursor = self.users_collection.find(keyset_filter(query, cursor)).skip(skip).limit(limit).sort(keyset_sort())
+            users = await users_cursor.to_list(length=limit)
         
+        # Wallets and activity counts are fetched once per relation for the whole page
+        wallets = documents_by(self.wallets_collection, "user_id", projection={"user_id": 1, "balance_coins": 1})
+        jobs_posted = counts_by(self.database.jobs, ["homeowner.id"])
+        interests_shown = counts_by(self.database.interests, ["tradesperson_id"])
+
         # Process users to add activity info and remove sensitive data
-        processed_users = []
-        for user in users:
+        async def process(user: dict) -> dict:
             user["_id"] = str(user["_id"])
             user.pop("password_hash", None)  # Remove password hash
             
@@ -4432,21 +5142,19 @@ class Database:
             user["is_verified"] = user.get("is_verified", False)
             user["wallet_balance"] = 0
             
-            # Get wallet balance if tradesperson
+            # Wallet balance and interests for tradespeople, jobs for homeowners
             if user.get("role") == "tradesperson":
-                wallet = await self.wallets_collection.find_one({"user_id": user["id"]})
+                wallet, user["interests_shown"] = await asyncio.gather(
+                    wallets.load(user["id"]), interests_shown.load(user["id"])
+                )
                 if wallet:
                     user["wallet_balance"] = wallet.get("balance_coins", 0)
+            elif user.get("role") == "homeowner":
+                user["jobs_posted"] = await jobs_posted.load(user["id"])
             
-            # Count jobs/interests based on role
-            if user.get("role") == "homeowner":
-                user["jobs_posted"] = await self.database.jobs.count_documents({"homeowner.id": user["id"]})
-            elif user.get("role") == "tradesperson":
-                user["interests_shown"] = await self.database.interests.count_documents({"tradesperson_id": user["id"]})
-            
-            processed_users.append(user)
+            return user
         
-        return processed_users
+        return list(await asyncio.gather(*(process(user) for user in users)))
 
     async def get_users_total_count_filtered(self, role: str = None, status: str = None, search: str = None):
         """Get total count of users matching filters for admin dashboard pagination"""
@@ -4457,17 +5165,30 @@ class Database:
             query["status"] = status
         else:
             query["status"] = {"$ne": "deleted"}
-        if search:
-            query["$or"] = [
-                {"name": {"$regex": search, "$options": "i"}},
-                {"email": {"$regex": search, "$options": "i"}},
-                {"phone": {"$regex": search, "$options": "i"}},
-                {"skills": {"$regex": search, "$options": "i"}},
-                {"user_id": {"$regex": f"^{search}$", "$options": "i"}},
-                {"public_id": {"$regex": f"^{search}$", "$options": "i"}},
-                {"id": {"$regex": search, "$options": "i"}},
-            ]
+        if search and search.strip():
+            exact = await self._admin_user_identifier_query(query, search)
+            if exact:
+                return await self.users_collection.count_documents(exact)
+            _, total = await self.text_search(
+                self.users_collection, search, query, ADMIN_USER_SEARCH_FIELDS, limit=1, rank=False, projection={"_id": 1},
+                substring_fallback=True
+            )
+            return total
         return await self.users_collection.count_documents(query)
+
+    async def _admin_user_identifier_query(self, query: Dict[str, Any], search: str) -> Optional[Dict[str, Any]]:
+        """Indexed lookup by id, short id, email or phone prefix; None when nothing matches"""
+        search = search.strip()
+        identifiers: List[Dict[str, Any]] = [
+            {"id": search}, {"user_id": search}, {"public_id": search},
+            {"email": search}, {"email": search.lower()},
+        ]
+        if re.fullmatch(r"\+?[\d\s-]{4,}", search):
+            identifiers.append({"phone": {"$regex": "^" + re.escape(search)}})
+        exact = {"$and": [query, {"$or": identifiers}]}
+        if await self.users_collection.find_one(exact, {"_id": 1}) is None:
+            return None
+        return exact
     
     async def get_total_users_count(self):
         """Get total number of registered users"""
@@ -4566,6 +5287,7 @@ class Database:
         }
 
         result = await self.users_collection.update_one(filter_query, {"$set": update_data})
+        await self.user_cache.invalidate(user_id)
         return result.modified_count > 0
     
     async def _get_average_job_budget(self, homeowner_id: str):
@@ -4754,8 +5476,11 @@ class Database:
                 ("reviews", {"reviewee_id": user_id}),
                 ("conversations", {"participants": user_id}),
                 ("messages", {"sender_id": user_id}),
+                ("messages_archive", {"sender_id": user_id}),
                 ("notifications", {"user_id": user_id}),
+                ("notifications_archive", {"user_id": user_id}),
                 ("notification_preferences", {"user_id": user_id}),
+                ("unread_counters", {"_id": user_id}),
                 ("user_verifications", {"user_id": user_id})
             ]
             
@@ -4778,6 +5503,7 @@ class Database:
             else:
                 result = await self.users_collection.delete_one({"id": user_id})
 
+            await self.user_cache.invalidate(user.get("id") or user_id)
             if result.deleted_count > 0:
                 logger.info(f"Successfully deleted user account(s) for {email or user_id}: count={result.deleted_count}")
                 return True
@@ -4793,6 +5519,12 @@ class Database:
     # LOCATION MANAGEMENT METHODS (Admin)
     # ==========================================
     
+    async def _rebuild_gazetteer(self):
+        """Rebuild the place index after renames/cascading deletes (adds are applied incrementally)"""
+        gazetteer = Gazetteer.from_static()
+        await gazetteer.load_custom_locations(self.database)
+        self.gazetteer = gazetteer
+
     async def get_custom_lgas(self):
         """Get custom LGAs added by admin, organized by state"""
         try:
@@ -4841,6 +5573,7 @@ class Database:
                 return False
             
             await self.database.system_locations.insert_one(state_doc)
+            self.gazetteer.add_place(state_name, "state", state=state_name)
             return True
         except Exception as e:
             print(f"Error adding state: {e}")
@@ -4867,6 +5600,7 @@ class Database:
                     {"state": old_name, "type": "lga"},
                     {"$set": {"state": new_name}}
                 )
+                await self._rebuild_gazetteer()
             
             return result.modified_count > 0
         except Exception as e:
@@ -4884,6 +5618,7 @@ class Database:
             
             # Delete the state
             result = await self.database.system_locations.delete_one({"name": state_name, "type": "state"})
+            await self._rebuild_gazetteer()
             
             return result.deleted_count > 0
         except Exception as e:
@@ -4926,6 +5661,7 @@ class Database:
                 return False
             
             await self.database.system_locations.insert_one(lga_doc)
+            self.gazetteer.add_place(lga_name, "lga", state=state_name, lga=lga_name)
             return True
         except Exception as e:
             print(f"Error adding LGA: {e}")
@@ -4951,6 +5687,7 @@ class Database:
                     {"lga": old_name, "state": state_name, "type": "town"},
                     {"$set": {"lga": new_name}}
                 )
+                await self._rebuild_gazetteer()
             
             return result.modified_count > 0
         except Exception as e:
@@ -4973,6 +5710,7 @@ class Database:
                 "state": state_name, 
                 "type": "lga"
             })
+            self.gazetteer.remove_place(lga_name, "lga", state=state_name, lga=lga_name)
             
             return result.deleted_count > 0
         except Exception as e:
@@ -5037,6 +5775,7 @@ class Database:
             }
             
             await self.database.system_locations.insert_one(town_doc)
+            self.gazetteer.add_place(town_name, "town", state=state_name, lga=lga_name)
             return True
         except Exception as e:
             print(f"Error adding town: {e}")
@@ -5051,6 +5790,7 @@ class Database:
                 "lga": lga_name,
                 "type": "town"
             })
+            self.gazetteer.remove_place(town_name, "town", state=state_name, lga=lga_name)
             
             return result.deleted_count > 0
         except Exception as e:
@@ -5187,6 +5927,9 @@ class Database:
             
             conversation_data["created_at"] = datetime.now(timezone.utc)
             conversation_data["updated_at"] = datetime.now(timezone.utc)
+            # Conversation lists page on last_message_at, so it is never left unset
+            if conversation_data.get("last_message_at") is None:
+                conversation_data["last_message_at"] = conversation_data["created_at"]
             conversation_data["unread_count_homeowner"] = 0
             conversation_data["unread_count_tradesperson"] = 0
             
@@ -5209,21 +5952,28 @@ class Database:
             print(f"Error getting conversation: {e}")
             return None
     
-    async def get_user_conversations(self, user_id: str, user_type: str, skip: int = 0, limit: int = 20) -> List[dict]:
-        """Get all conversations for a user"""
+    async def get_user_conversations(self, user_id: str, user_type: str, skip: int = 0, limit: int = 20,
+                                     cursor: Optional[str] = None) -> List[dict]:
+        """Get all conversations for a user, most recently active first"""
         try:
             if user_type == "homeowner":
                 query = {"homeowner_id": user_id}
             else:
                 query = {"tradesperson_id": user_id}
             
-            cursor = self.database.conversations.find(query).sort("last_message_at", -1).skip(skip).limit(limit)
-            conversations = await cursor.to_list(length=limit)
+            if cursor:
+                skip = 0
+            page = self.database.conversations.find(
+                keyset_filter(query, cursor, sort_field="last_message_at", nullable=True)
+            ).sort(keyset_sort("last_message_at")).skip(skip).limit(limit)
+            conversations = await page.to_list(length=limit)
             
             for conv in conversations:
                 conv['_id'] = str(conv['_id'])
             
             return conversations
+        except InvalidCursor:
+            raise
         except Exception as e:
             print(f"Error getting user conversations: {e}")
             return []
@@ -5251,49 +6001,90 @@ class Database:
             print(f"Error creating message: {e}")
             return None
     
-    async def get_conversation_messages(self, conversation_id: str, skip: int = 0, limit: int = 50) -> List[dict]:
-        """Get messages for a conversation"""
+    async def get_conversation_messages(self, conversation_id: str, skip: int = 0, limit: int = 50,
+                                        cursor: Optional[str] = None) -> List[dict]:
+        """Get messages for a conversation, oldest first.
+
+        Old read messages are moved to `messages_archive` by the retention
+        policy (services/retention.py), so both collections are paged and
+        merged; a message caught in both mid-move is returned once.
+        """
         try:
-            cursor = self.database.messages.find(
-                {"conversation_id": conversation_id}
-            ).sort("created_at", 1).skip(skip).limit(limit)
-            
-            messages = await cursor.to_list(length=limit)
+            if cursor:
+                skip = 0
+            query = keyset_filter({"conversation_id": conversation_id}, cursor, descending=False)
+            merged: Dict[Any, dict] = {}
+            for collection in (self.database.messages_archive, self.database.messages):
+                page = collection.find(query).sort(keyset_sort(descending=False)).limit(skip + limit)
+                for msg in await page.to_list(length=skip + limit):
+                    merged.setdefault(msg["_id"], msg)
+            messages = sorted(merged.values(), key=lambda m: (m.get("created_at") or datetime.min, str(m.get("id") or "")))
+            messages = messages[skip:skip + limit]
             
             for msg in messages:
                 msg['_id'] = str(msg['_id'])
             
             return messages
+        except InvalidCursor:
+            raise
         except Exception as e:
             print(f"Error getting conversation messages: {e}")
             return []
     
     async def mark_messages_as_read(self, conversation_id: str, user_type: str) -> bool:
         """Mark all messages in a conversation as read for a user"""
+        return await self.read_conversation(conversation_id, user_type) is not None
+
+    async def read_conversation(self, conversation_id: str, user_type: str) -> Optional[int]:
+        """Mark the other participant's messages as read; returns how many were unread (None on error)"""
+        user_type = getattr(user_type, "value", user_type)
         try:
-            # Update message status to read for messages not sent by this user
+            # The conversation's unread count tells whether there is anything to mark,
+            # so re-reading an already read conversation is a single indexed update
+            unread_field = f"unread_count_{user_type}"
             other_type = "homeowner" if user_type == "tradesperson" else "tradesperson"
+            unread_messages = {
+                "conversation_id": conversation_id,
+                "sender_type": other_type,
+                "status": {"$ne": "read"}
+            }
+            before = await self.database.conversations.find_one_and_update(
+                {"id": conversation_id, unread_field: {"$gt": 0}},
+                {"$set": {unread_field: 0}},
+                projection={unread_field: 1, f"{user_type}_id": 1}
+            )
+            if not before:
+                # A drifted or pre-counter conversation can read 0 with unread messages
+                # left, which would then never be marked read (nor archived)
+                if await self.database.messages.find_one(unread_messages, {"_id": 1}) is None:
+                    return 0
+                result = await self.database.messages.update_many(
+                    unread_messages, {"$set": {"status": "read", "updated_at": datetime.now(timezone.utc)}}
+                )
+                return result.modified_count
+            unread = int(before.get(unread_field) or 0)
+            await self.unread_counters.incr(before.get(f"{user_type}_id"), messages=-unread)
             
+            # Update message status to read for messages not sent by this user
             await self.database.messages.update_many(
-                {
-                    "conversation_id": conversation_id,
-                    "sender_type": other_type,
-                    "status": {"$ne": "read"}
-                },
+                unread_messages,
                 {"$set": {"status": "read", "updated_at": datetime.now(timezone.utc)}}
             )
             
-            # Reset unread count for this user type
-            unread_field = f"unread_count_{user_type}"
-            await self.database.conversations.update_one(
-                {"id": conversation_id},
-                {"$set": {unread_field: 0}}
-            )
-            
-            return True
+            return unread
         except Exception as e:
             print(f"Error marking messages as read: {e}")
-            return False
+            return None
+    
+    async def get_unread_conversation_counts(self, user_id: str, user_type: str) -> Dict[str, int]:
+        """Unread message count per conversation for a user, only conversations with unread messages"""
+        user_type = getattr(user_type, "value", user_type)
+        unread_field = f"unread_count_{user_type}"
+        cursor = self.database.conversations.find(
+            {f"{user_type}_id": user_id, unread_field: {"$gt": 0}},
+            {"id": 1, unread_field: 1}
+        )
+        return {conv["id"]: int(conv[unread_field]) async for conv in cursor}
     
     async def get_conversation_by_job_and_users(self, job_id: str, homeowner_id: str, tradesperson_id: str) -> Optional[dict]:
         """Get conversation by job and user IDs"""
@@ -5317,7 +6108,7 @@ class Database:
             # Increment unread count for the recipient
             recipient_unread_field = "unread_count_homeowner" if sender_type == "tradesperson" else "unread_count_tradesperson"
             
-            await self.database.conversations.update_one(
+            conversation = await self.database.conversations.find_one_and_update(
                 {"id": conversation_id},
                 {
                     "$set": {
@@ -5326,8 +6117,12 @@ class Database:
                         "updated_at": datetime.now(timezone.utc)
                     },
                     "$inc": {recipient_unread_field: 1}
-                }
+                },
+                projection={"homeowner_id": 1, "tradesperson_id": 1}
             )
+            if conversation:
+                recipient_id = conversation.get("homeowner_id" if sender_type == "tradesperson" else "tradesperson_id")
+                await self.unread_counters.incr(recipient_id, messages=1)
         except Exception as e:
             print(f"Error updating conversation last message: {e}")
 
@@ -6346,6 +7141,7 @@ We may update this Cookie Policy to reflect changes in technology or regulations
         async for doc in cursor:
             # Get user info for each notification
             user = await self.get_user_by_id(doc["user_id"])
+            content = await self.render_notification_content(doc)
             
             notification = {
                 "id": str(doc["_id"]),
@@ -6358,7 +7154,7 @@ We may update this Cookie Policy to reflect changes in technology or regulations
                 "channel": doc["channel"],
                 "status": doc["status"],
                 "subject": doc.get("subject", ""),
-                "content": doc.get("content", "")[:100] + "..." if len(doc.get("content", "")) > 100 else doc.get("content", ""),
+                "content": content[:100] + "..." if len(content) > 100 else content,
                 "recipient_email": doc.get("recipient_email"),
                 "recipient_phone": doc.get("recipient_phone"),
                 "created_at": doc["created_at"],
@@ -6423,7 +7219,7 @@ We may update this Cookie Policy to reflect changes in technology or regulations
                     "channel": doc["channel"],
                     "status": doc["status"],
                     "subject": doc.get("subject", ""),
-                    "content": doc.get("content", ""),
+                    "content": await self.render_notification_content(doc),
                     "recipient_email": doc.get("recipient_email"),
                     "recipient_phone": doc.get("recipient_phone"),
                     "created_at": doc["created_at"],
@@ -6462,12 +7258,14 @@ We may update this Cookie Policy to reflect changes in technology or regulations
                 # If not an ObjectId, try as string (UUID)
                 query = {"_id": notification_id}
             
-            result = await self.notifications_collection.update_one(query, {"$set": update_data})
+            before = await self.notifications_collection.find_one_and_update(
+                query, {"$set": update_data}, projection=NOTIFICATION_STATUS_PROJECTION
+            )
             # Consider success if a document was matched, even if no fields changed
-            try:
-                return bool(getattr(result, "matched_count", 0) > 0)
-            except Exception:
-                return bool(getattr(result, "modified_count", 0) > 0)
+            if before is None:
+                return False
+            await self._notification_status_changed(before, status)
+            return True
         except Exception as e:
             logger.error(f"Error updating notification status: {str(e)}")
             return False
@@ -6593,19 +7391,26 @@ We may update this Cookie Policy to reflect changes in technology or regulations
                     recipient_phone=recipient_phone
                 )
                 # Update original record with latest content/status/timestamps and increment resend_count
+                resent = await self._notification_document(notification)
+                content_fields = {k: resent[k] for k in (
+                    "content", "template_id", "template_version", "content_snapshot", "snapshot_codec",
+                ) if k in resent}
+                stale_fields = {k: "" for k in ("content", "content_snapshot", "snapshot_codec") if k not in resent}
                 await self.notifications_collection.update_one(
                     {"_id": doc["_id"]},
                     {
                         "$set": {
                             "status": getattr(notification.status, "value", notification.status),
                             "subject": notification.subject,
-                            "content": notification.content,
+                            **content_fields,
                             "updated_at": datetime.utcnow(),
                             "sent_at": notification.sent_at,
                         },
+                        **({"$unset": stale_fields} if stale_fields else {}),
                         "$inc": {"resend_count": 1}
                     }
                 )
+                await self._notification_status_changed(doc, getattr(notification.status, "value", notification.status))
                 return True
             except Exception as send_error:
                 logger.error(f"Error during resend delivery for {notification_id}: {str(send_error)}")
@@ -6620,6 +7425,7 @@ We may update this Cookie Policy to reflect changes in technology or regulations
                         "$inc": {"resend_count": 1}
                     }
                 )
+                await self._notification_status_changed(doc, "failed")
                 return False
         except Exception as e:
             logger.error(f"Error resending notification: {str(e)}")
@@ -6637,8 +7443,13 @@ We may update this Cookie Policy to reflect changes in technology or regulations
             except (InvalidId, ValueError, TypeError):
                 # If not an ObjectId, try as string (UUID)
                 query = {"_id": notification_id}
-            result = await self.notifications_collection.delete_one(query)
-            return result.deleted_count > 0
+            deleted = await self.notifications_collection.find_one_and_delete(
+                query, projection=NOTIFICATION_STATUS_PROJECTION
+            )
+            if deleted is None:
+                return False
+            await self._notification_status_changed(deleted, None)
+            return True
         except Exception as e:
             logger.error(f"Error deleting notification: {str(e)}")
             return False
@@ -6647,13 +7458,30 @@ We may update this Cookie Policy to reflect changes in technology or regulations
     # NOTIFICATION TEMPLATES MANAGEMENT
     # ==========================================
     
+    def _template_service(self):
+        """The template service used for sending, so admin edits reach its compiled cache"""
+        try:
+            from .services.notifications import notification_service
+        except ImportError:
+            from services.notifications import notification_service
+        return notification_service.template_service
+
+    async def load_notification_template_overrides(self) -> int:
+        """Apply admin-edited templates stored in `notification_templates`"""
+        template_service = self._template_service()
+        count = 0
+        async for doc in self.database.notification_templates.find({}):
+            if template_service.update_template(
+                doc.get("type"), doc.get("channel"),
+                doc["subject_template"], doc["content_template"], doc.get("variables"),
+            ):
+                count += 1
+        return count
+
     async def get_all_notification_templates(self) -> List[dict]:
         """Get all notification templates for admin management"""
-        # For now, return the built-in templates from the service
-        # In production, these could be stored in database for dynamic editing
         try:
-            from services.notifications import NotificationTemplateService
-            template_service = NotificationTemplateService()
+            template_service = self._template_service()
             
             templates = []
             # Include additional built-in templates supported by NotificationTemplateService
@@ -6692,10 +7520,27 @@ We may update this Cookie Policy to reflect changes in technology or regulations
         return next((t for t in templates if t["id"] == template_id), None)
     
     async def update_notification_template(self, template_id: str, template_data: dict) -> bool:
-        """Update notification template (for now, just validate - templates are built-in)"""
-        # In production, templates could be stored in database for dynamic editing
+        """Store an edited template and swap it into the template service"""
         template = await self.get_notification_template_by_id(template_id)
-        return template is not None
+        if template is None:
+            return False
+        override = {
+            "type": template["type"],
+            "channel": template["channel"],
+            "subject_template": template_data["subject_template"],
+            "content_template": template_data["content_template"],
+            "variables": template_data.get("variables", template["variables"]),
+            "updated_at": datetime.utcnow(),
+        }
+        if self.database is not None:
+            await self.database.notification_templates.update_one(
+                {"_id": template_id}, {"$set": override}, upsert=True
+            )
+        updated = self._template_service().update_template(
+            template["type"], template["channel"],
+            override["subject_template"], override["content_template"], override["variables"],
+        )
+        return updated is not None
     
     async def create_notification_template(self, template_data: dict) -> Optional[str]:
         """Create notification template (for now, return generated ID)"""
@@ -6705,15 +7550,17 @@ We may update this Cookie Policy to reflect changes in technology or regulations
     async def test_notification_template(self, template_id: str, test_data: dict) -> dict:
         """Test notification template with sample data"""
         try:
-            from services.notifications import NotificationTemplateService
-            template_service = NotificationTemplateService()
+            template_service = self._template_service()
             
             template = await self.get_notification_template_by_id(template_id)
             if not template:
                 raise Exception("Template not found")
             
             # Create template object for testing
-            from models.notifications import NotificationTemplate, NotificationType, NotificationChannel
+            try:
+                from .models.notifications import NotificationTemplate
+            except ImportError:
+                from models.notifications import NotificationTemplate
             test_template = NotificationTemplate(
                 id=template["id"],
                 type=NotificationType(template["type"]),
@@ -6828,107 +7675,48 @@ We may update this Cookie Policy to reflect changes in technology or regulations
     # ==========================================
     
     async def get_notification_analytics(self, date_from: str = None, date_to: str = None) -> dict:
-        """Get comprehensive notification analytics"""
-        match_stage = {}
-        
-        if date_from or date_to:
-            date_filter = {}
-            if date_from:
-                date_filter["$gte"] = datetime.fromisoformat(date_from)
-            if date_to:
-                date_filter["$lte"] = datetime.fromisoformat(date_to)
-            match_stage["created_at"] = date_filter
-        
-        pipeline = [
-            {"$match": match_stage},
-            {
-                "$group": {
-                    "_id": None,
-                    "total_notifications": {"$sum": 1},
-                    "sent_count": {"$sum": {"$cond": [{"$eq": ["$status", "sent"]}, 1, 0]}},
-                    "delivered_count": {"$sum": {"$cond": [{"$eq": ["$status", "delivered"]}, 1, 0]}},
-                    "failed_count": {"$sum": {"$cond": [{"$eq": ["$status", "failed"]}, 1, 0]}},
-                    "pending_count": {"$sum": {"$cond": [{"$eq": ["$status", "pending"]}, 1, 0]}},
-                    "email_count": {"$sum": {"$cond": [{"$eq": ["$channel", "email"]}, 1, 0]}},
-                    "sms_count": {"$sum": {"$cond": [{"$eq": ["$channel", "sms"]}, 1, 0]}},
-                    "both_count": {"$sum": {"$cond": [{"$eq": ["$channel", "both"]}, 1, 0]}}
-                }
-            }
-        ]
-        
-        result = await self.notifications_collection.aggregate(pipeline).to_list(1)
+        """Get comprehensive notification analytics (from the rollups; dates resolve to the hour)"""
+        await self._ensure_notification_rollups()
+        rows = await self.notification_rollups.counts(
+            ["channel", "status"],
+            date_from=datetime.fromisoformat(date_from) if date_from else None,
+            date_to=datetime.fromisoformat(date_to) if date_to else None,
+        )
         
-        if result:
-            analytics = result[0]
-            # Calculate delivery rate
-            total_sent = analytics["sent_count"] + analytics["delivered_count"]
-            analytics["delivery_rate"] = (total_sent / analytics["total_notifications"] * 100) if analytics["total_notifications"] > 0 else 0
-            return analytics
-        else:
-            return {
-                "total_notifications": 0,
-                "sent_count": 0,
-                "delivered_count": 0,
-                "failed_count": 0,
-                "pending_count": 0,
-                "email_count": 0,
-                "sms_count": 0,
-                "both_count": 0,
-                "delivery_rate": 0
-            }
+        def total(field: str, value: str) -> int:
+            return sum(row["count"] for row in rows if row[field] == value)
+        
+        analytics = {
+            "total_notifications": sum(row["count"] for row in rows),
+            "sent_count": total("status", "sent"),
+            "delivered_count": total("status", "delivered"),
+            "failed_count": total("status", "failed"),
+            "pending_count": total("status", "pending"),
+            "email_count": total("channel", "email"),
+            "sms_count": total("channel", "sms"),
+            "both_count": total("channel", "both"),
+        }
+        # Calculate delivery rate
+        total_sent = analytics["sent_count"] + analytics["delivered_count"]
+        analytics["delivery_rate"] = (total_sent / analytics["total_notifications"] * 100) if analytics["total_notifications"] > 0 else 0
+        return analytics
     
     async def get_notification_delivery_report(self, notification_type: str = None, date_from: str = None, date_to: str = None) -> dict:
-        """Get detailed delivery report for notifications"""
-        match_stage = {}
-        
-        if notification_type:
-            match_stage["type"] = notification_type
-        
-        if date_from or date_to:
-            date_filter = {}
-            if date_from:
-                date_filter["$gte"] = datetime.fromisoformat(date_from)  
-            if date_to:
-                date_filter["$lte"] = datetime.fromisoformat(date_to)
-            match_stage["created_at"] = date_filter
-        
-        # Group by type and status
-        pipeline = [
-            {"$match": match_stage},
-            {
-                "$group": {
-                    "_id": {
-                        "type": "$type",
-                        "status": "$status",
-                        "channel": "$channel"
-                    },
-                    "count": {"$sum": 1}
-                }
-            },
-            {
-                "$group": {
-                    "_id": "$_id.type",
-                    "channels": {
-                        "$push": {
-                            "channel": "$_id.channel",
-                            "status": "$_id.status",
-                            "count": "$count"
-                        }
-                    }
-                }
-            }
-        ]
-        
-        results = await self.notifications_collection.aggregate(pipeline).to_list(length=None)
+        """Get detailed delivery report for notifications (from the rollups; dates resolve to the hour)"""
+        await self._ensure_notification_rollups()
+        rows = await self.notification_rollups.counts(
+            ["type", "status", "channel"],
+            date_from=datetime.fromisoformat(date_from) if date_from else None,
+            date_to=datetime.fromisoformat(date_to) if date_to else None,
+            match={"type": notification_type} if notification_type else None,
+        )
         
         # Format results
         report = {}
-        for result in results:
-            notification_type = result["_id"]
-            report[notification_type] = {
-                "channels": result["channels"],
-                "total": sum(channel["count"] for channel in result["channels"])
-            }
+        for row in rows:
+            entry = report.setdefault(row["type"], {"channels": [], "total": 0})
+            entry["channels"].append({"channel": row["channel"], "status": row["status"], "count": row["count"]})
+            entry["total"] += row["count"]
         
         return report
     
@@ -7482,29 +8270,20 @@ We may update this Cookie Policy to reflect changes in technology or regulations
         query = filters or {}
         return await self.database.media_files.count_documents(query)
 
-    async def save_uploaded_file(self, file, folder: str = "general") -> str:
-        """Save uploaded file and return URL (placeholder implementation)"""
-        # This is a placeholder implementation
-        # In a real system, you would save to cloud storage (S3, etc.)
-        import os
-        import uuid
-        
-        # Create uploads directory if it doesn't exist
-        upload_dir = f"/app/uploads/{folder}"
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # Generate unique filename
-        file_extension = file.filename.split('.')[-1]
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
-        file_path = os.path.join(upload_dir, unique_filename)
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        # Return URL (in production, this would be a CDN URL)
-        return f"/uploads/{folder}/{unique_filename}"
+    async def save_uploaded_file(self, file, folder: str = "general", max_bytes: Optional[int] = None,
+                                 allowed_types: Optional[Iterable[str]] = None) -> str:
+        """Stream an uploaded file to disk under /app/uploads/<folder> and return its URL.
+
+        The type is sniffed from the file's first bytes and must be one of
+        `allowed_types` when given; UploadRejected/UploadTooLarge propagate.
+        """
+        # In production this would be cloud storage (S3, etc.) behind a CDN URL
+        max_bytes = max_bytes or int(os.getenv("MEDIA_UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+        stored = await stream_upload(
+            file, Path("/app/uploads") / folder, str(uuid.uuid4()), max_bytes,
+            allowed_types=allowed_types, declared_type=file.content_type, filename=file.filename,
+        )
+        return f"/uploads/{folder}/{stored['filename']}"
 
     async def log_admin_activity(self, admin_id: str, admin_username: str, activity_type: str, 
                                 description: str, target_id: str = None, target_type: str = None, 
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Index Audit - Compare database indexes with the registry in utils/index_registry.py
+Lists registered indexes that are missing, indexes that exist but are not
+registered, indexes never used since the last server restart ($indexStats),
+and the winning plan (index or collection scan) of the hottest queries.
+
+Usage: python backend/index_audit.py [--apply] [--no-explain]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+# Report on the database as it is; indexes are only created with --apply
+os.environ["DB_ENSURE_INDEXES_ON_STARTUP"] = "false"
+
+# Add backend directory to path
+backend_dir = os.path.dirname(__file__)
+sys.path.insert(0, backend_dir)
+
+from database import database
+
+
+def print_report(report):
+    print(f"\n=== Missing indexes ({len(report['missing'])}) ===")
+    for item in report["missing"]:
+        print(f"  - {item['collection']}.{item['index']} {item['keys']}")
+    print(f"\n=== Unregistered indexes ({len(report['unregistered'])}) ===")
+    for item in report["unregistered"]:
+        print(f"  - {item['collection']}.{item['index']} {item['keys']}")
+    print(f"\n=== Unused indexes since restart ({len(report['unused'])}) ===")
+    for item in report["unused"]:
+        print(f"  - {item['collection']}.{item['index']} (since {item['since']})")
+    if "queries" in report:
+        print("\n=== Hot query plans ===")
+        for plan in report["queries"]:
+            if plan.get("error"):
+                print(f"  ? {plan['name']}: {plan['error']}")
+                continue
+            flag = "❌" if plan["collection_scan"] else ("⚠️" if plan["in_memory_sort"] else "✅")
+            used = ", ".join(plan["indexes"]) or "no index"
+            print(f"  {flag} {plan['name']} ({plan['collection']}): {' <- '.join(plan['stages'])} [{used}]")
+
+
+async def main(apply: bool, explain: bool):
+    try:
+        await database.connect_to_mongo()
+        if not database.connected:
+            print("❌ Database unavailable; aborting")
+            return
+        if apply:
+            result = await database.ensure_indexes()
+            print(f"✅ Indexes ensured: {result}")
+        print_report(await database.get_index_report(explain=explain))
+    finally:
+        await database.close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report missing and unused MongoDB indexes")
+    parser.add_argument("--apply", action="store_true", help="Create missing registered indexes before reporting")
+    parser.add_argument("--no-explain", action="store_true", help="Skip explain() of hot queries")
+    args = parser.parse_args()
+    asyncio.run(main(args.apply, not args.no_explain))
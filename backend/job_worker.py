@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Job Queue Worker - Runs background tasks from the `job_queue` collection
+(currently the NEW_MATCHING_JOB notification fan-out).
+
+Run from the repository root:
+    python -m backend.job_worker [--concurrency N]
+
+Deploy this next to the API with JOB_QUEUE_WORKER_IN_WEB=false so that
+fan-out work stays off the web workers. Stops cleanly on SIGINT/SIGTERM;
+an interrupted task is picked up again when its lease expires.
+"""
+
+import argparse
+import asyncio
+import logging
+import signal
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from .database import database
+# Importing the handler modules registers their task kinds
+from .services import job_alerts  # noqa: F401
+from .services.transport import close_provider_clients
+
+logger = logging.getLogger(__name__)
+
+
+async def main(concurrency: int):
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+    try:
+        await database.connect_to_mongo()
+        if not database.connected:
+            print("❌ Database unavailable; aborting")
+            return
+        await database.job_queue.run_worker(stop, concurrency=concurrency)
+    finally:
+        await close_provider_clients()
+        await database.close_mongo_connection()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Run the background job queue worker")
+    parser.add_argument("--concurrency", type=int, default=2, help="Tasks processed in parallel")
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency))
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Migrate Inline Blobs - Move base64 images out of Mongo documents into the blob store
+Extracts wallet payment proofs, user verification documents and tradespeople
+verification files, stores each once by SHA-256 and leaves a reference in
+the document. Safe to re-run.
+
+Usage: python backend/migrate_blobs.py [--dry-run] [--batch-size N]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+os.environ["DB_ENSURE_INDEXES_ON_STARTUP"] = "false"
+
+# Add backend directory to path
+backend_dir = os.path.dirname(__file__)
+sys.path.insert(0, backend_dir)
+
+from database import database
+
+
+async def main(dry_run: bool, batch_size: int):
+    try:
+        await database.connect_to_mongo()
+        if not database.connected:
+            print("❌ Database unavailable; aborting")
+            return
+        stats = await database.migrate_inline_blobs(batch_size=batch_size, dry_run=dry_run)
+        prefix = "🔎 Would migrate" if dry_run else "✅ Migrated"
+        print(f"{prefix} {stats['documents']} documents, {stats['inline_bytes'] / 1e6:.1f} MB of inline base64")
+        if not dry_run:
+            print(f"   {stats['blobs_stored']} blobs stored, {stats['blobs_deduplicated']} duplicates reused")
+        if stats["failed"]:
+            print(f"⚠️ {stats['failed']} entries could not be decoded and were left in place")
+    finally:
+        await database.close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move inline base64 uploads into the blob store")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be migrated without writing")
+    parser.add_argument("--batch-size", type=int, default=100, help="Documents fetched per cursor batch")
+    args = parser.parse_args()
+    asyncio.run(main(args.dry_run, args.batch_size))
@@ -304,6 +304,8 @@ class PortfolioItem(BaseModel):
     category: PortfolioItemCategory
     image_url: str
     image_filename: str
+    # Resized copies by name (thumb/medium/full): width, height and a jpeg/webp URL each
+    renditions: Optional[Dict[str, Dict[str, Any]]] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     is_public: bool = True
@@ -405,7 +407,7 @@ class WalletTransaction(BaseModel):
     description: str
     reference: Optional[str] = None  # Payment reference/proof
     proof_image: Optional[str] = None  # Payment proof screenshot
-    proof_image_base64: Optional[str] = None  # Stored base64-encoded proof image
+    proof_image_blob: Optional[Dict[str, Any]] = None  # Blob store reference of the proof image
     admin_notes: Optional[str] = None
     processed_by: Optional[str] = None  # Admin who processed
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -469,7 +471,7 @@ class UserVerification(BaseModel):
     user_id: str
     document_type: DocumentType
     document_url: str             # Path to uploaded document image
-    document_image_base64: Optional[str] = None  # Base64 of uploaded document image
+    document_image_blob: Optional[Dict[str, Any]] = None  # Blob store reference of the document image
     full_name: str                # Full name as shown on document
     document_number: Optional[str] = None  # ID number, license number, etc.
     status: VerificationStatus = VerificationStatus.PENDING
@@ -531,6 +533,7 @@ class VerificationSubmission(BaseModel):
     message: str
     verification_id: str
     status: str
+    renditions: Optional[Dict[str, Dict[str, Any]]] = None
 
 # Updated Wallet Response to include referral coins
 class WalletResponseWithReferrals(BaseModel):
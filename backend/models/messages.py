@@ -55,11 +55,13 @@ class ConversationCreate(BaseModel):
 class ConversationList(BaseModel):
     conversations: List[Conversation]
     total: int
+    next_cursor: Optional[str] = None
 
 class MessageList(BaseModel):
     messages: List[Message]
     total: int
     has_more: bool
+    next_cursor: Optional[str] = None
 
 class ConversationSummary(BaseModel):
     id: str
@@ -0,0 +1,158 @@
+# Approximate coordinates (latitude, longitude) for Nigerian places
+# Offline data for the location gazetteer; values are town/LGA headquarters, not boundaries
+
+# State coordinates (state capital). Keys match NIGERIAN_STATES where supported.
+STATE_COORDINATES = {
+    "Abuja": (9.0765, 7.3986),
+    "Lagos": (6.5244, 3.3792),
+    "Delta": (6.2019, 6.7319),
+    "Rivers State": (4.8156, 7.0498),
+    "Benin": (6.3350, 5.6037),
+    "Bayelsa": (4.9247, 6.2649),
+    "Enugu": (6.5249, 7.5170),
+    "Cross Rivers": (4.9689, 8.3300),
+    # States outside current service coverage (still matched in free text)
+    "Oyo": (7.3775, 3.9470),
+    "Kaduna": (10.5060, 7.4273),
+    "Kano": (12.0000, 8.5167),
+    "Plateau": (9.8965, 8.8580),
+    "Kwara": (8.4799, 4.5418),
+    "Anambra": (6.1498, 6.7850),
+    "Abia": (5.1066, 7.3667),
+    "Imo": (5.4836, 7.0333),
+}
+
+# Alternative spellings people use for the supported states
+STATE_ALIASES = {
+    "Abuja": ["FCT", "Federal Capital Territory"],
+    "Rivers State": ["Rivers"],
+    "Benin": ["Edo", "Edo State"],
+    "Cross Rivers": ["Cross River", "Cross River State"],
+    "Delta": ["Delta State"],
+    "Lagos": ["Lagos State"],
+    "Bayelsa": ["Bayelsa State"],
+    "Enugu": ["Enugu State"],
+}
+
+# LGA headquarters, keyed by state then LGA name as spelled in NIGERIAN_LGAS.
+# LGAs missing here fall back to their state's coordinates.
+LGA_COORDINATES = {
+    "Abuja": {
+        "Abaji": (8.4750, 6.9430),
+        "Bwari": (9.2830, 7.3800),
+        "Gwagwalada": (8.9440, 7.0900),
+        "Kuje": (8.8790, 7.2270),
+        "Kwali": (8.8850, 7.0160),
+        "Municipal Area Council (AMAC)": (9.0579, 7.4951),
+    },
+    "Lagos": {
+        "Agege": (6.6180, 3.3209),
+        "Ajeromi-Ifelodun": (6.4550, 3.3340),
+        "Alimosho": (6.6100, 3.2960),
+        "Amuwo-Odofin": (6.4660, 3.2840),
+        "Apapa": (6.4490, 3.3590),
+        "Badagry": (6.4150, 2.8810),
+        "Epe": (6.5840, 3.9830),
+        "Eti-Osa": (6.4590, 3.6010),
+        "Ibeju-Lekki": (6.4700, 3.9200),
+        "Ifako-Ijaiye": (6.6460, 3.3260),
+        "Ikeja": (6.6018, 3.3515),
+        "Ikorodu": (6.6194, 3.5105),
+        "Kosofe": (6.5870, 3.3900),
+        "Lagos Island": (6.4549, 3.3947),
+        "Lagos Mainland": (6.4930, 3.3800),
+        "Mushin": (6.5270, 3.3540),
+        "Ojo": (6.4620, 3.1800),
+        "Oshodi-Isolo": (6.5370, 3.3180),
+        "Shomolu": (6.5390, 3.3840),
+        "Surulere": (6.4940, 3.3490),
+    },
+    "Delta": {
+        "Aniocha North": (6.3300, 6.5200),
+        "Aniocha South": (6.1800, 6.5300),
+        "Ethiope West": (5.9480, 5.6670),
+        "Ika South": (6.2500, 6.2000),
+        "Isoko North": (5.5380, 6.2160),
+        "Isoko South": (5.4620, 6.2050),
+        "Ndokwa West": (5.7070, 6.4340),
+        "Oshimili South": (6.2019, 6.7319),
+        "Sapele": (5.8940, 5.6760),
+        "Udu": (5.4830, 5.8330),
+        "Ughelli North": (5.4900, 5.9900),
+        "Uvwie": (5.5560, 5.7830),
+        "Warri South": (5.5167, 5.7500),
+    },
+    "Rivers State": {
+        "Bonny": (4.4500, 7.1700),
+        "Degema": (4.7500, 6.7667),
+        "Eleme": (4.7900, 7.1200),
+        "Obio/Akpor": (4.8450, 7.0000),
+        "Okrika": (4.7400, 7.0800),
+        "Oyigbo": (4.8800, 7.1500),
+        "Port Harcourt": (4.8156, 7.0498),
+    },
+    "Benin": {
+        "Akoko-Edo": (7.2800, 6.1000),
+        "Egor": (6.3700, 5.5700),
+        "Esan Central": (6.7400, 6.2200),
+        "Esan West": (6.7430, 6.1400),
+        "Etsako West": (7.0700, 6.2700),
+        "Ikpoba-Okha": (6.3000, 5.6500),
+        "Oredo": (6.3350, 5.6037),
+    },
+    "Bayelsa": {
+        "Brass": (4.3150, 6.2420),
+        "Nembe": (4.5400, 6.4000),
+        "Ogbia": (4.6870, 6.3120),
+        "Sagbama": (5.1600, 6.2000),
+        "Yenagoa": (4.9247, 6.2649),
+    },
+    "Enugu": {
+        "Awgu": (6.0700, 7.4800),
+        "Enugu East": (6.5300, 7.5500),
+        "Enugu North": (6.4500, 7.5000),
+        "Enugu South": (6.4100, 7.4900),
+        "Nkanu West": (6.3000, 7.5500),
+        "Nsukka": (6.8567, 7.3958),
+        "Oji River": (6.2600, 7.2700),
+        "Udenu": (6.9200, 7.5200),
+        "Udi": (6.3167, 7.4167),
+    },
+    "Cross Rivers": {
+        "Akamkpa": (5.3200, 8.3500),
+        "Calabar Municipal": (4.9800, 8.3400),
+        "Calabar South": (4.9500, 8.3200),
+        "Ikom": (5.9600, 8.7100),
+        "Obubra": (6.0800, 8.3300),
+        "Obudu": (6.6700, 9.1700),
+        "Odukpani": (5.1000, 8.3400),
+        "Ogoja": (6.6600, 8.8000),
+        "Yakuur": (5.8100, 8.0800),
+    },
+}
+
+# Well-known cities, districts and short forms that are not LGA names
+CITY_COORDINATES = {
+    "Lekki": ("Lagos", 6.4429, 3.4833),
+    "Victoria Island": ("Lagos", 6.4281, 3.4219),
+    "Ajah": ("Lagos", 6.4667, 3.6000),
+    "Yaba": ("Lagos", 6.5170, 3.3830),
+    "Benin City": ("Benin", 6.3350, 5.6037),
+    "Calabar": ("Cross Rivers", 4.9689, 8.3300),
+    "Asaba": ("Delta", 6.2019, 6.7319),
+    "Warri": ("Delta", 5.5540, 5.7930),
+    "Effurun": ("Delta", 5.5560, 5.7830),
+    "Agbor": ("Delta", 6.2500, 6.2000),
+    "Ughelli": ("Delta", 5.4900, 5.9900),
+    "PH": ("Rivers State", 4.8156, 7.0498),
+    "Ekpoma": ("Benin", 6.7430, 6.1400),
+    "Auchi": ("Benin", 7.0700, 6.2700),
+    "Ugep": ("Cross Rivers", 5.8100, 8.0800),
+    "Ibadan": ("Oyo", 7.3775, 3.9470),
+    "Uyo": (None, 5.0333, 7.9330),
+    "Jos": ("Plateau", 9.8965, 8.8580),
+    "Ilorin": ("Kwara", 8.4799, 4.5418),
+    "Owerri": ("Imo", 5.4836, 7.0333),
+    "Aba": ("Abia", 5.1066, 7.3667),
+    "Onitsha": ("Anambra", 6.1498, 6.7850),
+}
@@ -78,6 +78,8 @@ class Notification(BaseModel):
     content: str = Field(..., description="Notification content")
     status: NotificationStatus = Field(default=NotificationStatus.PENDING)
     metadata: Dict[str, Any] = Field(default={}, description="Additional data")
+    template_id: Optional[str] = Field(None, description="Template the content was rendered from")
+    template_version: Optional[str] = Field(None, description="Version of that template's text")
     sent_at: Optional[datetime] = Field(None, description="When notification was sent")
     delivered_at: Optional[datetime] = Field(None, description="When notification was delivered")
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -101,6 +103,7 @@ class NotificationHistory(BaseModel):
     notifications: List[Notification] = Field(default=[], description="List of notifications")
     total: int = Field(..., description="Total notifications count")
     unread: int = Field(..., description="Unread notifications count")
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to get the next page")
 
 # Request/Response models for API endpoints
 class UpdatePreferencesRequest(BaseModel):
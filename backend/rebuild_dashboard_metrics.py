@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Rebuild Dashboard Metrics - Recompute the materialized admin dashboard figures
+Aggregates pending funding requests, jobs, interests, access fees and pending
+verifications from their source collections and rewrites the metrics document.
+The web process already does this when the document is stale; run it from a
+scheduler to keep the figures exact between dashboard visits.
+
+Usage: python backend/rebuild_dashboard_metrics.py
+"""
+
+import asyncio
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+os.environ["DB_ENSURE_INDEXES_ON_STARTUP"] = "false"
+
+# Add backend directory to path
+backend_dir = os.path.dirname(__file__)
+sys.path.insert(0, backend_dir)
+
+from database import database
+
+
+async def main():
+    try:
+        await database.connect_to_mongo()
+        if not database.connected:
+            print("❌ Database unavailable; aborting")
+            return
+        metrics = await database.recompute_dashboard_metrics()
+        print(f"✅ Dashboard metrics rebuilt: {metrics['pending_funding_requests']} pending funding requests, "
+              f"{metrics['total_jobs']} jobs, {metrics['pending_verifications']} pending verifications")
+    finally:
+        await database.close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
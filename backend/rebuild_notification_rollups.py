@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Rebuild Notification Rollups - Recompute hourly and daily notification counts
+Groups the notifications collection and its archive by created_at hour,
+type, channel and status, and rewrites the `notification_rollups` buckets
+the admin analytics read. Writes keep the buckets current; run this after bulk edits or deletes
+of notifications (e.g. account removals) to bring them back in line.
+
+Usage: python backend/rebuild_notification_rollups.py
+"""
+
+import asyncio
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+os.environ["DB_ENSURE_INDEXES_ON_STARTUP"] = "false"
+
+# Add backend directory to path
+backend_dir = os.path.dirname(__file__)
+sys.path.insert(0, backend_dir)
+
+from database import database
+
+
+async def main():
+    try:
+        await database.connect_to_mongo()
+        if not database.connected:
+            print("❌ Database unavailable; aborting")
+            return
+        result = await database.notification_rollups.rebuild()
+        if result.get("in_progress"):
+            print("⏳ Another rebuild is running; try again when it finishes")
+            return
+        print(f"✅ Notification rollups rebuilt: {result['buckets']} buckets written, {result['removed']} stale removed")
+    finally:
+        await database.close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
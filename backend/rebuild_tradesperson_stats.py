@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Rebuild Tradesperson Stats - Recompute the denormalized tradesperson_stats on user documents
+Counts portfolio items, reviews (with the rating histogram) and completed jobs
+from their source collections and rewrites any user whose stats have drifted.
+
+Usage: python backend/rebuild_tradesperson_stats.py [--user-id ID ...] [--batch-size N]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+os.environ["DB_ENSURE_INDEXES_ON_STARTUP"] = "false"
+
+# Add backend directory to path
+backend_dir = os.path.dirname(__file__)
+sys.path.insert(0, backend_dir)
+
+from database import database
+
+
+async def main(user_ids, batch_size: int):
+    try:
+        await database.connect_to_mongo()
+        if not database.connected:
+            print("❌ Database unavailable; aborting")
+            return
+        result = await database.rebuild_tradesperson_stats(user_ids, batch_size=batch_size)
+        print(f"✅ Scanned {result['scanned']} tradespeople, repaired {result['repaired']}")
+    finally:
+        await database.close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute denormalized tradesperson stats")
+    parser.add_argument("--user-id", action="append", dest="user_ids", help="Only rebuild this tradesperson (repeatable)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Tradespeople per batch of aggregations")
+    args = parser.parse_args()
+    asyncio.run(main(args.user_ids, args.batch_size))
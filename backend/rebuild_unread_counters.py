@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Rebuild Unread Counters - Recompute notification and message badge counts
+Counts unread notifications and the per-conversation unread messages of every
+user in one aggregation and rewrites the `unread_counters` documents, zeroing
+users with nothing unread. The counters are kept up to date incrementally;
+run this from a scheduler to repair any drift (e.g. after bulk edits).
+
+Usage: python backend/rebuild_unread_counters.py
+"""
+
+import asyncio
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+os.environ["DB_ENSURE_INDEXES_ON_STARTUP"] = "false"
+
+# Add backend directory to path
+backend_dir = os.path.dirname(__file__)
+sys.path.insert(0, backend_dir)
+
+from database import database
+
+
+async def main():
+    try:
+        await database.connect_to_mongo()
+        if not database.connected:
+            print("❌ Database unavailable; aborting")
+            return
+        result = await database.unread_counters.reconcile()
+        print(f"✅ Unread counters rebuilt: {result['users']} users, {result['zeroed']} reset to zero")
+    finally:
+        await database.close_mongo_connection()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,6 +5,10 @@ import uuid
 import logging
 
 from ..database import database
+from ..utils.pagination import InvalidCursor, cached_total, next_cursor
+from ..services.image_pipeline import media_type_for
+from ..services.blob_store import blob_url
+from ..services.static_assets import static_assets, IMMUTABLE_PRIVATE, REVALIDATE_PRIVATE
 from ..models.base import JobAccessFeeUpdate, TransactionStatus
 from ..models.admin import AdminPermission
 from ..auth.dependencies import require_permission, get_current_admin_account
@@ -255,18 +259,25 @@ async def update_job_access_fee(
 # ==========================================
 
 @router.get("/jobs/all")
-async def get_all_jobs_for_admin(skip: int = 0, limit: int = 50, status: str = None):
+async def get_all_jobs_for_admin(skip: int = 0, limit: int = 50, status: str = None,
+                                 cursor: Optional[str] = None, include_total: bool = True):
     """Get all jobs with comprehensive details for admin management"""
     
-    jobs = await database.get_all_jobs_admin(skip=skip, limit=limit, status=status)
-    total_count = await database.get_jobs_count_admin(status=status)
+    try:
+        jobs = await database.get_all_jobs_admin(skip=skip, limit=limit, status=status, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    total_count = None
+    if include_total:
+        total_count = await cached_total("admin_jobs", {"status": status}, lambda: database.get_jobs_count_admin(status=status))
     
     return {
         "jobs": jobs,
         "pagination": {
             "skip": skip,
             "limit": limit,
-            "total": total_count
+            "total": total_count,
+            "next_cursor": next_cursor(jobs, limit)
         }
     }
 
@@ -603,19 +614,27 @@ async def approve_job(
 async def get_all_jobs_admin(
     skip: int = 0,
     limit: int = 50,
-    status: Optional[str] = None
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = True
 ):
     """Get all jobs for admin management (all statuses)"""
     
-    jobs = await database.get_all_jobs_admin(skip=skip, limit=limit, status=status)
-    total_count = await database.get_jobs_count_admin(status=status)
+    try:
+        jobs = await database.get_all_jobs_admin(skip=skip, limit=limit, status=status, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    total_count = None
+    if include_total:
+        total_count = await cached_total("admin_jobs", {"status": status}, lambda: database.get_jobs_count_admin(status=status))
     
     return {
         "jobs": jobs,
         "pagination": {
             "skip": skip,
             "limit": limit,
-            "total": total_count
+            "total": total_count,
+            "next_cursor": next_cursor(jobs, limit)
         },
         "filters": {
             "status": status
@@ -755,6 +774,34 @@ async def get_job_details_admin(job_id: str):
     
     return {"job": job_details}
 
+@router.get("/jobs/{job_id}/notification-progress")
+async def get_job_notification_progress(
+    job_id: str,
+    admin: dict = Depends(require_permission(AdminPermission.MANAGE_NOTIFICATIONS))
+):
+    """Progress of the queued NEW_MATCHING_JOB fan-out for a job"""
+    from ..services.job_alerts import get_new_matching_job_progress
+    return {"job_id": job_id, "tasks": await get_new_matching_job_progress(job_id)}
+
+@router.get("/system/indexes")
+async def get_index_report(
+    explain: bool = True,
+    admin: dict = Depends(require_permission(AdminPermission.VIEW_SYSTEM_STATS))
+):
+    """Missing/unused database indexes and query plans for the hottest queries"""
+    try:
+        return await database.get_index_report(explain=explain)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@router.get("/system/retention")
+async def get_retention_report(admin: dict = Depends(require_permission(AdminPermission.VIEW_SYSTEM_STATS))):
+    """Documents due for archiving per retention policy and expired tokens awaiting TTL removal"""
+    try:
+        return await database.get_retention_report()
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
 # ==========================================
 # ADMIN DASHBOARD STATS
 # ==========================================
@@ -762,44 +809,25 @@ async def get_job_details_admin(job_id: str):
 @router.get("/dashboard/stats")
 async def get_admin_dashboard_stats():
     """Get admin dashboard statistics"""
-    
-    # Get pending funding requests count
-    pending_requests = await database.get_pending_funding_requests(limit=1000)  # Get all
-    pending_count = len(pending_requests)
-    
-    # Calculate total pending amount
-    total_pending_naira = sum(req["amount_naira"] for req in pending_requests)
-    total_pending_coins = sum(req["amount_coins"] for req in pending_requests)
-    
-    # Get total jobs count
-    jobs = await database.get_jobs_with_access_fees(limit=1000)  # Get all
-    total_jobs = len(jobs)
-    
-    # Calculate total interests and potential revenue
-    total_interests = sum(job.get("interests_count", 0) for job in jobs)
-    
-    # Average access fee
-    access_fees = [job.get("access_fee_naira", 1500) for job in jobs]
-    avg_access_fee = sum(access_fees) / len(access_fees) if access_fees else 1500
-    
-    # Get pending verifications count
-    pending_verifications = await database.get_pending_verifications(limit=1000)
-    pending_verifications_count = len(pending_verifications)
+    # One read of the materialized metrics instead of loading and summing every row
+    metrics = await database.get_dashboard_metrics()
+    total_jobs = metrics["total_jobs"]
+    avg_access_fee = metrics["access_fee_naira_sum"] / total_jobs if total_jobs else 1500
     
     return {
         "wallet_stats": {
-            "pending_funding_requests": pending_count,
-            "total_pending_amount_naira": total_pending_naira,
-            "total_pending_amount_coins": total_pending_coins
+            "pending_funding_requests": metrics["pending_funding_requests"],
+            "total_pending_amount_naira": metrics["pending_funding_naira"],
+            "total_pending_amount_coins": metrics["pending_funding_coins"]
         },
         "job_stats": {
             "total_jobs": total_jobs,
-            "total_interests": total_interests,
+            "total_interests": metrics["total_interests"],
             "average_access_fee_naira": round(avg_access_fee, 0),
             "average_access_fee_coins": round(avg_access_fee / 100, 0)
         },
         "verification_stats": {
-            "pending_verifications": pending_verifications_count
+            "pending_verifications": metrics["pending_verifications"]
         },
         "system_stats": {
             "coin_conversion_rate": "1 coin = ₦100",
@@ -814,48 +842,31 @@ async def get_admin_dashboard_stats():
 # ==========================================
 
 @router.get("/wallet/payment-proof/{filename}")
-async def view_payment_proof(filename: str, admin: dict = Depends(require_permission(AdminPermission.VIEW_PAYMENT_PROOFS))):
+async def view_payment_proof(filename: str, request: Request, admin: dict = Depends(require_permission(AdminPermission.VIEW_PAYMENT_PROOFS))):
     """View payment proof image (admin only)"""
-    from fastapi.responses import FileResponse
-    import os
-    
-    base_dir = os.environ.get("UPLOADS_DIR", os.path.join(os.getcwd(), "uploads"))
-    project_root_uploads = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "uploads")
-    candidates = [
-        os.path.join(base_dir, "payment_proofs", filename),
-        os.path.join(project_root_uploads, "payment_proofs", filename),
-        os.path.join(os.getcwd(), "uploads", "payment_proofs", filename),
-        os.path.join("/app", "uploads", "payment_proofs", filename),
-    ]
-    for fp in candidates:
-        if os.path.exists(fp):
-            return FileResponse(fp, media_type="image/jpeg")
-    raise HTTPException(status_code=404, detail="Payment proof not found")
+    response = await static_assets.serve(request, "payment_proofs", filename, IMMUTABLE_PRIVATE)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Payment proof not found")
+    return response
 
-@router.get("/wallet/payment-proof-base64/{filename}")
+@router.get("/wallet/payment-proof-base64/{filename}", deprecated=True)
 async def view_payment_proof_base64(filename: str, admin: dict = Depends(require_permission(AdminPermission.VIEW_PAYMENT_PROOFS))):
-    import os, base64
-    # Prefer DB-stored base64 if available
+    """Deprecated: use /wallet/payment-proof/{filename}, which streams the image and supports caching"""
+    import base64
+    # Prefer the blob store (or inline base64 on records not yet migrated)
     try:
         txn = await database.get_wallet_transaction_by_proof_image(filename)
+        data = await database.blob_store.get(txn["proof_image_blob"]["sha256"]) if txn and txn.get("proof_image_blob") else None
+        if data is not None:
+            return {"image_base64": base64.b64encode(data).decode("utf-8"), "url": blob_url(txn["proof_image_blob"])}
         if txn and txn.get("proof_image_base64"):
             return {"image_base64": txn["proof_image_base64"]}
     except Exception:
         pass
-    base_dir = os.environ.get("UPLOADS_DIR", os.path.join(os.getcwd(), "uploads"))
-    project_root_uploads = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "uploads")
-    candidates = [
-        os.path.join(base_dir, "payment_proofs", filename),
-        os.path.join(project_root_uploads, "payment_proofs", filename),
-        os.path.join(os.getcwd(), "uploads", "payment_proofs", filename),
-        os.path.join("/app", "uploads", "payment_proofs", filename),
-    ]
-    for fp in candidates:
-        if os.path.exists(fp):
-            with open(fp, "rb") as f:
-                data = f.read()
-            return {"image_base64": base64.b64encode(data).decode("utf-8")}
-    raise HTTPException(status_code=404, detail="Payment proof not found")
+    data = await static_assets.read("payment_proofs", filename)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Payment proof not found")
+    return {"image_base64": base64.b64encode(data).decode("utf-8")}
 
 # ==========================================
 # USER MANAGEMENT
@@ -1256,40 +1267,55 @@ async def get_all_users(
     limit: int = 50,
     role: Optional[str] = None,
     status: Optional[str] = None,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = True
 ):
     """Get all registered users with filtering options"""
     
-    users = await database.get_all_users_for_admin(
-        skip=skip, 
-        limit=limit, 
-        role=role, 
-        status=status,
-        search=search
-    )
-    
-    # Get user statistics
-    total_users = await database.get_total_users_count()
-    active_users = await database.get_active_users_count()
-    homeowners_count = await database.get_users_count_by_role("homeowner")
-    tradespeople_count = await database.get_users_count_by_role("tradesperson")
-    
-    filtered_total = await database.get_users_total_count_filtered(role=role, status=status, search=search)
-    pages = (filtered_total + limit - 1) // limit
+    try:
+        users = await database.get_all_users_for_admin(
+            skip=skip, 
+            limit=limit, 
+            role=role, 
+            status=status,
+            search=search,
+            cursor=cursor
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # User statistics and the filtered total are counts over the whole collection; reuse them briefly
+    total_users = await cached_total("admin_users", {"stat": "total"}, database.get_total_users_count)
+    active_users = await cached_total("admin_users", {"stat": "active"}, database.get_active_users_count)
+    homeowners_count = await cached_total("admin_users", {"role": "homeowner"}, lambda: database.get_users_count_by_role("homeowner"))
+    tradespeople_count = await cached_total("admin_users", {"role": "tradesperson"}, lambda: database.get_users_count_by_role("tradesperson"))
+    verified_users = await cached_total("admin_users", {"stat": "verified"}, database.get_verified_users_count)
+    
+    filtered_total = pages = None
+    if include_total:
+        filtered_total = await cached_total(
+            "admin_users", {"role": role, "status": status, "search": search},
+            lambda: database.get_users_total_count_filtered(role=role, status=status, search=search)
+        )
+        pages = (filtered_total + limit - 1) // limit
+    # A search's first page is ordered by relevance, which a date cursor can't continue; page it with skip
+    ranked = bool(search and search.strip()) and not cursor
     return {
         "users": users,
         "pagination": {
             "skip": skip,
             "limit": limit,
             "total": filtered_total,
-            "pages": pages
+            "pages": pages,
+            "next_cursor": None if ranked else next_cursor(users, limit)
         },
         "stats": {
             "total_users": total_users,
             "active_users": active_users,
             "homeowners": homeowners_count,
             "tradespeople": tradespeople_count,
-            "verified_users": await database.get_verified_users_count()
+            "verified_users": verified_users
         }
     }
 
@@ -1818,7 +1844,7 @@ async def delete_notification(notification_id: str):
 # ==========================================
 
 @router.get("/notifications/templates")
-async def get_notification_templates():
+async def get_notification_templates(admin: dict = Depends(require_permission(AdminPermission.MANAGE_NOTIFICATIONS))):
     """Get all notification templates for admin management"""
     
     templates = await database.get_all_notification_templates()
@@ -1842,7 +1868,10 @@ async def get_notification_templates():
     }
 
 @router.get("/notifications/templates/{template_id}")
-async def get_notification_template(template_id: str):
+async def get_notification_template(
+    template_id: str,
+    admin: dict = Depends(require_permission(AdminPermission.MANAGE_NOTIFICATIONS))
+):
     """Get specific notification template by ID"""
     
     template = await database.get_notification_template_by_id(template_id)
@@ -1855,7 +1884,8 @@ async def get_notification_template(template_id: str):
 @router.put("/notifications/templates/{template_id}")
 async def update_notification_template(
     template_id: str,
-    template_data: dict
+    template_data: dict,
+    admin: dict = Depends(require_permission(AdminPermission.MANAGE_NOTIFICATIONS))
 ):
     """Update notification template"""
     
@@ -1883,7 +1913,10 @@ async def update_notification_template(
     }
 
 @router.post("/notifications/templates")
-async def create_notification_template(template_data: dict):
+async def create_notification_template(
+    template_data: dict,
+    admin: dict = Depends(require_permission(AdminPermission.MANAGE_NOTIFICATIONS))
+):
     """Create a new notification template"""
     
     # Validate required fields
@@ -1913,7 +1946,8 @@ async def create_notification_template(template_data: dict):
 @router.post("/notifications/templates/{template_id}/test")
 async def test_notification_template(
     template_id: str,
-    test_data: dict
+    test_data: dict,
+    admin: dict = Depends(require_permission(AdminPermission.MANAGE_NOTIFICATIONS))
 ):
     """Test a notification template with sample data"""
     
@@ -2244,124 +2278,62 @@ async def get_verification_details(verification_id: str):
     return verification
 
 @router.get("/verifications/document/{filename}")
-async def view_verification_document(filename: str, admin: dict = Depends(require_permission(AdminPermission.VERIFY_USERS))):
+async def view_verification_document(filename: str, request: Request, admin: dict = Depends(require_permission(AdminPermission.VERIFY_USERS))):
     """View verification document image (admin only)"""
-    from fastapi.responses import FileResponse
-    import os
-    
-    base_dir = os.environ.get("UPLOADS_DIR", os.path.join(os.getcwd(), "uploads"))
-    file_path = os.path.join(base_dir, "verification_documents", filename)
-    
-    if not os.path.exists(file_path):
+    response = await static_assets.serve(request, "verification_documents", filename, IMMUTABLE_PRIVATE)
+    if response is None:
         raise HTTPException(status_code=404, detail="Verification document not found")
-    
-    return FileResponse(file_path, media_type="image/jpeg")
+    return response
 
-@router.get("/verifications/document-base64/{filename}")
+@router.get("/verifications/document-base64/{filename}", deprecated=True)
 async def view_verification_document_base64(filename: str, admin: dict = Depends(require_permission(AdminPermission.VERIFY_USERS))):
-    """Return base64 for verification document, preferring DB-stored base64"""
-    import os, base64
-    # Prefer DB base64
+    """Deprecated: use /verifications/document/{filename}, which streams the image and supports caching"""
+    import base64
     try:
         doc = await database.get_verification_by_document_filename(filename)
+        data = await database.blob_store.get(doc["document_image_blob"]["sha256"]) if doc and doc.get("document_image_blob") else None
+        if data is not None:
+            return {"image_base64": base64.b64encode(data).decode("utf-8"), "url": blob_url(doc["document_image_blob"])}
         if doc and doc.get("document_image_base64"):
             return {"image_base64": doc["document_image_base64"]}
     except Exception:
         pass
-    # Fallback to disk
-    base_dir = os.environ.get("UPLOADS_DIR", os.path.join(os.getcwd(), "uploads"))
-    candidates = [
-        os.path.join(base_dir, "verification_documents", filename),
-        os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "uploads", "verification_documents", filename),
-        os.path.join(os.getcwd(), "uploads", "verification_documents", filename),
-        os.path.join("/app", "uploads", "verification_documents", filename),
-    ]
-    for fp in candidates:
-        if os.path.exists(fp):
-            with open(fp, "rb") as f:
-                data = f.read()
-            return {"image_base64": base64.b64encode(data).decode("utf-8")}
-    raise HTTPException(status_code=404, detail="Verification document not found")
+    data = await static_assets.read("verification_documents", filename)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Verification document not found")
+    return {"image_base64": base64.b64encode(data).decode("utf-8")}
 
 @router.get("/tradespeople-verifications/document/{filename}")
-async def view_tradespeople_verification_file(filename: str, admin: dict = Depends(require_permission(AdminPermission.VERIFY_USERS))):
+async def view_tradespeople_verification_file(filename: str, request: Request, admin: dict = Depends(require_permission(AdminPermission.VERIFY_USERS))):
     """Serve tradespeople verification files (images or PDFs) for admin review"""
-    from fastapi.responses import FileResponse
-    import os
-
-    # Resolve common locations where uploads may be stored across environments
-    base_dir = os.environ.get("UPLOADS_DIR", os.path.join(os.getcwd(), "uploads"))
-    # Project root uploads (when running from backend directory)
-    project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-    project_uploads = os.path.join(project_root, "uploads")
-
-    # Also check backend/uploads to cover cases where app was launched from backend dir
-    backend_uploads = os.path.join(project_root, "backend", "uploads")
-
-    candidates = [
-        os.path.join(base_dir, "tradespeople_verifications", filename),
-        os.path.join(project_uploads, "tradespeople_verifications", filename),
-        os.path.join(backend_uploads, "tradespeople_verifications", filename),
-        os.path.join(os.getcwd(), "uploads", "tradespeople_verifications", filename),
-        os.path.join("/app", "uploads", "tradespeople_verifications", filename),
-    ]
+    # Stored under the uploader's own file name, which a later upload may overwrite
+    response = await static_assets.serve(request, "tradespeople_verifications", filename, REVALIDATE_PRIVATE)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Tradespeople verification file not found")
+    return response
 
-    for fp in candidates:
-        if os.path.exists(fp):
-            ext = os.path.splitext(fp)[1].lower()
-            media_type = "application/octet-stream"
-            if ext in (".jpg", ".jpeg"):
-                media_type = "image/jpeg"
-            elif ext == ".png":
-                media_type = "image/png"
-            elif ext == ".pdf":
-                media_type = "application/pdf"
-            return FileResponse(fp, media_type=media_type)
-
-    raise HTTPException(status_code=404, detail="Tradespeople verification file not found")
-
-@router.get("/tradespeople-verifications/document-base64/{filename}")
+@router.get("/tradespeople-verifications/document-base64/{filename}", deprecated=True)
 async def view_tradespeople_verification_file_base64(filename: str, admin: dict = Depends(require_permission(AdminPermission.VERIFY_USERS))):
-    """Return base64 for tradespeople verification file, preferring DB-stored base64.
-    Falls back to reading the file from disk if not stored in DB.
+    """Deprecated: use /tradespeople-verifications/document/{filename}, which streams the file.
+    Returns base64 for tradespeople verification file, preferring the blob store over disk.
     """
-    import os, base64
-    # Prefer DB base64
+    import base64
     try:
-        item = await database.get_tradespeople_file_base64(filename)
-        if item and item.get("base64"):
+        item = await database.get_tradespeople_file(filename)
+        data = await database.blob_store.get(item["sha256"]) if item and item.get("sha256") else None
+        b64 = base64.b64encode(data).decode("utf-8") if data is not None else (item or {}).get("base64")
+        if b64:
             ct = item.get("content_type") or "application/octet-stream"
-            data_url = f"data:{ct};base64,{item['base64']}"
-            return {"filename": filename, "content_type": ct, "image_base64": item["base64"], "data_url": data_url}
+            data_url = f"data:{ct};base64,{b64}"
+            return {"filename": filename, "content_type": ct, "image_base64": b64, "data_url": data_url, "url": blob_url(item)}
     except Exception:
         pass
-    # Fallback to disk
-    base_dir = os.environ.get("UPLOADS_DIR", os.path.join(os.getcwd(), "uploads"))
-    project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-    project_uploads = os.path.join(project_root, "uploads")
-    backend_uploads = os.path.join(project_root, "backend", "uploads")
-    candidates = [
-        os.path.join(base_dir, "tradespeople_verifications", filename),
-        os.path.join(project_uploads, "tradespeople_verifications", filename),
-        os.path.join(backend_uploads, "tradespeople_verifications", filename),
-        os.path.join(os.getcwd(), "uploads", "tradespeople_verifications", filename),
-        os.path.join("/app", "uploads", "tradespeople_verifications", filename),
-    ]
-    for fp in candidates:
-        if os.path.exists(fp):
-            ext = os.path.splitext(fp)[1].lower()
-            media_type = "application/octet-stream"
-            if ext in (".jpg", ".jpeg"):
-                media_type = "image/jpeg"
-            elif ext == ".png":
-                media_type = "image/png"
-            elif ext == ".pdf":
-                media_type = "application/pdf"
-            with open(fp, "rb") as f:
-                data = f.read()
-            b64 = base64.b64encode(data).decode("utf-8")
-            return {"filename": filename, "content_type": media_type, "image_base64": b64, "data_url": f"data:{media_type};base64,{b64}"}
-    raise HTTPException(status_code=404, detail="Tradespeople verification file not found")
+    data = await static_assets.read("tradespeople_verifications", filename)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Tradespeople verification file not found")
+    media_type = media_type_for(filename)
+    b64 = base64.b64encode(data).decode("utf-8")
+    return {"filename": filename, "content_type": media_type, "image_base64": b64, "data_url": f"data:{media_type};base64,{b64}"}
 
 # ==========================================
 # TRADESPEOPLE REFERENCES VERIFICATION (ADMIN)
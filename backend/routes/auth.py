@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Query, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, status, Query, UploadFile, File, Form, Request
 from datetime import timedelta
 from ..models.auth import (
     UserLogin, LoginResponse, HomeownerRegistration, TradespersonRegistration,
@@ -16,6 +16,7 @@ from ..auth.security import (
 )
 from ..auth.dependencies import get_current_user, get_current_active_user, get_current_tradesperson
 from ..database import database
+from ..services.static_assets import static_assets, IMMUTABLE_PUBLIC
 from ..models.trade_categories import NIGERIAN_TRADE_CATEGORIES, validate_trade_category
 from ..models.nigerian_states import NIGERIAN_STATES, validate_nigerian_state
 from datetime import datetime, timedelta
@@ -884,35 +885,12 @@ async def upload_certification_image(
         raise HTTPException(status_code=500, detail=f"Failed to upload certification image: {str(e)}")
 
 @router.get("/certifications/image/{filename}")
-async def get_certification_image(filename: str):
+async def get_certification_image(filename: str, request: Request):
     try:
-        from fastapi.responses import FileResponse
-        import os
-        base_dir = os.environ.get("UPLOADS_DIR", os.path.join(os.getcwd(), "uploads"))
-        project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-        project_uploads = os.path.join(project_root, "uploads")
-        backend_uploads = os.path.join(project_root, "backend", "uploads")
-        candidates = [
-            os.path.join(base_dir, "certifications", filename),
-            os.path.join(project_uploads, "certifications", filename),
-            os.path.join(backend_uploads, "certifications", filename),
-            os.path.join(os.getcwd(), "uploads", "certifications", filename),
-            os.path.join("/app", "uploads", "certifications", filename),
-        ]
-        for fp in candidates:
-            if os.path.exists(fp):
-                ext = os.path.splitext(fp)[1].lower()
-                media_type = (
-                    "application/pdf" if ext == ".pdf" else (
-                        "image/jpeg" if ext in (".jpg", ".jpeg") else (
-                            "image/png" if ext == ".png" else (
-                                "image/webp" if ext == ".webp" else "application/octet-stream"
-                            )
-                        )
-                    )
-                )
-                return FileResponse(fp, media_type=media_type, headers={"Cache-Control": "public, max-age=3600"})
-        raise HTTPException(status_code=404, detail="Image not found")
+        response = await static_assets.serve(request, "certifications", filename, IMMUTABLE_PUBLIC)
+        if response is None:
+            raise HTTPException(status_code=404, detail="Image not found")
+        return response
     except HTTPException:
         raise
     except Exception as e:
@@ -1728,101 +1706,102 @@ async def submit_tradesperson_verification(
         with open(fp, "wb") as out:
             out.write(data)
         try:
-            import base64
-            b64 = base64.b64encode(data).decode("utf-8")
-        except Exception:
-            b64 = None
-        return {"filename": fn, "base64": b64, "content_type": f.content_type or "application/octet-stream"}
+            return await database.blob_store.put(
+                data, f.content_type or "application/octet-stream", fn, owner_id=current_user.id
+            )
+        except Exception as e:
+            logger.warning(f"Could not store verification file {fn} in blob store: {e}")
+            return {"filename": fn, "sha256": None, "content_type": f.content_type or "application/octet-stream"}
     docs: Dict[str, Any] = {}
-    documents_base64: List[Dict[str, Any]] = []
+    documents_blobs: List[Dict[str, Any]] = []
     if id_document:
         saved = await _save_file(id_document)
         if saved:
             docs["id_document"] = saved["filename"]
-            if saved.get("base64"):
-                documents_base64.append(saved)
+            if saved.get("sha256"):
+                documents_blobs.append(saved)
     if id_selfie:
         saved = await _save_file(id_selfie)
         if saved:
             docs["id_selfie"] = saved["filename"]
-            if saved.get("base64"):
-                documents_base64.append(saved)
+            if saved.get("sha256"):
+                documents_blobs.append(saved)
     if proof_of_address:
         saved = await _save_file(proof_of_address)
         if saved:
             docs["proof_of_address"] = saved["filename"]
-            if saved.get("base64"):
-                documents_base64.append(saved)
+            if saved.get("sha256"):
+                documents_blobs.append(saved)
     if trade_certificate:
         saved = await _save_file(trade_certificate)
         if saved:
             docs["trade_certificate"] = saved["filename"]
-            if saved.get("base64"):
-                documents_base64.append(saved)
+            if saved.get("sha256"):
+                documents_blobs.append(saved)
     if cac_certificate:
         saved = await _save_file(cac_certificate)
         if saved:
             docs["cac_certificate"] = saved["filename"]
-            if saved.get("base64"):
-                documents_base64.append(saved)
+            if saved.get("sha256"):
+                documents_blobs.append(saved)
     if cac_status_report:
         saved = await _save_file(cac_status_report)
         if saved:
             docs["cac_status_report"] = saved["filename"]
-            if saved.get("base64"):
-                documents_base64.append(saved)
+            if saved.get("sha256"):
+                documents_blobs.append(saved)
     if director_id_document:
         saved = await _save_file(director_id_document)
         if saved:
             docs["director_id_document"] = saved["filename"]
-            if saved.get("base64"):
-                documents_base64.append(saved)
+            if saved.get("sha256"):
+                documents_blobs.append(saved)
     if business_logo:
         saved = await _save_file(business_logo)
         if saved:
             docs["business_logo"] = saved["filename"]
-            if saved.get("base64"):
-                documents_base64.append(saved)
+            if saved.get("sha256"):
+                documents_blobs.append(saved)
     if bn_certificate:
         saved = await _save_file(bn_certificate)
         if saved:
             docs["bn_certificate"] = saved["filename"]
-            if saved.get("base64"):
-                documents_base64.append(saved)
+            if saved.get("sha256"):
+                documents_blobs.append(saved)
     if partnership_agreement:
         saved = await _save_file(partnership_agreement)
         if saved:
             docs["partnership_agreement"] = saved["filename"]
-            if saved.get("base64"):
-                documents_base64.append(saved)
+            if saved.get("sha256"):
+                documents_blobs.append(saved)
     if llp_certificate:
         saved = await _save_file(llp_certificate)
         if saved:
             docs["llp_certificate"] = saved["filename"]
-            if saved.get("base64"):
-                documents_base64.append(saved)
+            if saved.get("sha256"):
+                documents_blobs.append(saved)
     if llp_agreement:
         saved = await _save_file(llp_agreement)
         if saved:
             docs["llp_agreement"] = saved["filename"]
-            if saved.get("base64"):
-                documents_base64.append(saved)
+            if saved.get("sha256"):
+                documents_blobs.append(saved)
     work_files: List[str] = []
-    work_photos_base64: List[Dict[str, Any]] = []
+    work_photos_blobs: List[Dict[str, Any]] = []
     for wf in work_photos or []:
         saved = await _save_file(wf)
         if saved:
             work_files.append(saved["filename"])
-            if saved.get("base64"):
-                work_photos_base64.append(saved)
+            if saved.get("sha256"):
+                work_photos_blobs.append(saved)
     partner_files: List[str] = []
-    partner_id_documents_base64: List[Dict[str, Any]] = []
+    partner_id_documents_blobs: List[Dict[str, Any]] = []
     for pf in partner_id_documents or []:
         saved = await _save_file(pf)
         if saved:
             partner_files.append(saved["filename"])
-            if saved.get("base64"):
-                partner_id_documents_base64.append(saved)
+            if saved.get("sha256"):
+                partner_id_documents_blobs.append(saved)
     payload = {
         "user_id": current_user.id,
         "business_type": (business_type or "").strip(),
@@ -1835,11 +1814,11 @@ async def submit_tradesperson_verification(
         "tin": tin,
         "designated_partners": designated_partners,
         "documents": docs,
-        "documents_base64": documents_base64,
+        "documents_blobs": documents_blobs,
         "work_photos": work_files,
-        "work_photos_base64": work_photos_base64,
+        "work_photos_blobs": work_photos_blobs,
         "partner_id_documents": partner_files,
-        "partner_id_documents_base64": partner_id_documents_base64,
+        "partner_id_documents_blobs": partner_id_documents_blobs,
     }
     bt = payload["business_type"].lower()
     if bt.startswith("self") or bt.startswith("sole"):
@@ -0,0 +1,43 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from ..auth.dependencies import get_current_admin_account, get_current_user
+from ..database import database
+from ..models.auth import UserRole
+from ..services.static_assets import static_assets, IMMUTABLE_PRIVATE
+
+router = APIRouter(prefix="/api/blobs", tags=["blobs"])
+
+async def get_blob_viewer(credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer())) -> Optional[str]:
+    """Id of the requesting user, or None for an admin (admin account or admin user), who may read any blob"""
+    try:
+        await get_current_admin_account(credentials)
+        return None
+    except HTTPException:
+        pass
+    user = await get_current_user(credentials)
+    return None if user.role == UserRole.ADMIN else user.id
+
+@router.get("/{sha256}")
+async def serve_blob(sha256: str, request: Request, viewer_id: Optional[str] = Depends(get_blob_viewer)):
+    """Serve an uploaded file by its SHA-256 to its uploaders and admins, with the hash as a strong ETag"""
+    meta = await database.blob_store.stat(sha256.lower())
+    # Someone else's blob looks the same as a missing one
+    if not meta or (viewer_id is not None and not database.blob_store.is_owner(meta, viewer_id)):
+        raise HTTPException(status_code=404, detail="File not found")
+    etag = f'"{meta["_id"]}"'
+    content_type = meta.get("content_type") or "application/octet-stream"
+    # A blob's bytes never change for its hash, so clients may keep it indefinitely
+    path = database.blob_store.local_path(meta["_id"])
+    if path is not None:
+        response = await static_assets.serve_file(request, str(path), IMMUTABLE_PRIVATE, content_type, etag)
+        if response is not None:
+            return response
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_PRIVATE}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    data = await database.blob_store.get(meta["_id"])
+    if data is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    return Response(content=data, media_type=content_type, headers=headers)
@@ -5,6 +5,7 @@ from datetime import datetime
 import logging
 
 from ..database import database
+from ..services.uploads import UploadRejected
 from ..models.content import (
     ContentItem, ContentCreate, ContentUpdate, ContentAnalytics, 
     ContentComment, MediaFile, ContentTemplate, ContentWorkflow,
@@ -405,7 +406,10 @@ async def upload_media_file(
             raise HTTPException(status_code=400, detail="File type not allowed")
         
         # Save file and create media record
-        file_url = await database.save_uploaded_file(file, folder)
+        try:
+            file_url = await database.save_uploaded_file(file, folder, allowed_types=allowed_types)
+        except UploadRejected as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e) if e.status_code == 413 else "File type not allowed")
         
         media_file = MediaFile(
             filename=file.filename,
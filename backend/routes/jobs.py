@@ -3,7 +3,7 @@ from pydantic import BaseModel, Field
 from typing import Optional
 from ..models import JobCreate, JobUpdate, JobCloseRequest, Job, JobsResponse
 from ..models.base import JobStatus
-from ..models.notifications import NotificationType, NotificationChannel, NotificationPreferences, Notification, NotificationStatus
+from ..models.notifications import NotificationType
 from ..auth.dependencies import (
     get_current_homeowner,
     get_current_tradesperson,
@@ -23,6 +23,8 @@ from ..auth.security import (
 from ..models.auth import User, UserRole, UserStatus
 from ..database import database
 from ..services.notifications import notification_service
+from ..services.job_alerts import enqueue_new_matching_job
+from ..utils.pagination import InvalidCursor, cached_total, next_cursor
 try:
     from ..services.notifications import SendGridEmailService, MockEmailService
 except Exception:
@@ -31,7 +33,6 @@ from datetime import datetime, timedelta
 import uuid
 import logging
 import os
-import re
 
 logger = logging.getLogger(__name__)
 
@@ -319,7 +320,9 @@ async def get_jobs(
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=50),
     category: Optional[str] = None,
-    location: Optional[str] = None
+    location: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces page"),
+    include_total: bool = Query(True, description="Count matching jobs (cached briefly)")
 ):
     """Get jobs with pagination and filters"""
     try:
@@ -333,14 +336,16 @@ async def get_jobs(
             filters['location'] = {'$regex': location, '$options': 'i'}
         
         # Get jobs and total count
-        jobs = await database.get_jobs(skip=skip, limit=limit, filters=filters)
-        total_jobs = await database.get_jobs_count(filters=filters)
+        jobs = await database.get_jobs(skip=skip, limit=limit, filters=filters, cursor=cursor)
+        total_jobs = None
+        if include_total:
+            total_jobs = await cached_total("jobs", filters, lambda: database.get_jobs_count(filters=dict(filters)))
         
         # Convert to Job objects
         job_objects = [Job(**job) for job in jobs]
         
         # Calculate pagination
-        total_pages = (total_jobs + limit - 1) // limit
+        total_pages = (total_jobs + limit - 1) // limit if total_jobs is not None else None
         
         return JobsResponse(
             jobs=job_objects,
@@ -348,10 +353,13 @@ async def get_jobs(
                 "page": page,
                 "limit": limit,
                 "total": total_jobs,
-                "pages": total_pages
+                "pages": total_pages,
+                "next_cursor": next_cursor(jobs, limit)
             }
         )
         
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -370,22 +378,18 @@ async def search_jobs(
         # Build search filters
         filters = {}
         
-        if q:
-            # Text search on title and description
-            filters['$or'] = [
-                {'title': {'$regex': q, '$options': 'i'}},
-                {'description': {'$regex': q, '$options': 'i'}}
-            ]
-        
         if category:
             filters['category'] = category
             
         if location:
             filters['location'] = {'$regex': location, '$options': 'i'}
         
-        # Get jobs and count
-        jobs = await database.get_jobs(skip=skip, limit=limit, filters=filters)
-        total_jobs = await database.get_jobs_count(filters=filters)
+        # Get jobs and count, ranked by relevance when there is a text query
+        if q:
+            jobs, total_jobs = await database.search_jobs_text(q, filters=filters, skip=skip, limit=limit)
+        else:
+            jobs = await database.get_jobs(skip=skip, limit=limit, filters=filters)
+            total_jobs = await database.get_jobs_count(filters=filters)
         
         # Convert to Job objects
         job_objects = [Job(**job) for job in jobs]
@@ -411,7 +415,9 @@ async def get_my_jobs(
     current_user: User = Depends(get_current_homeowner),
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=50),
-    status: Optional[str] = Query(None, description="Filter by job status")
+    status: Optional[str] = Query(None, description="Filter by job status"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces page"),
+    include_total: bool = True
 ):
     """Get jobs posted by current homeowner"""
     try:
@@ -423,14 +429,14 @@ async def get_my_jobs(
             filters["status"] = status
         
         # Get jobs and total count
-        jobs = await database.get_jobs(skip=skip, limit=limit, filters=filters)
-        total_jobs = await database.get_jobs_count(filters=filters)
+        jobs = await database.get_jobs(skip=skip, limit=limit, filters=filters, cursor=cursor)
+        total_jobs = await database.get_jobs_count(filters=filters) if include_total else None
         
         # Convert to Job objects
         job_objects = [Job(**job) for job in jobs]
         
         # Calculate pagination
-        total_pages = (total_jobs + limit - 1) // limit
+        total_pages = (total_jobs + limit - 1) // limit if total_jobs is not None else None
         
         return JobsResponse(
             jobs=job_objects,
@@ -438,10 +444,13 @@ async def get_my_jobs(
                 "page": page,
                 "limit": limit,
                 "total": total_jobs,
-                "pages": total_pages
+                "pages": total_pages,
+                "next_cursor": next_cursor(jobs, limit)
             }
         )
         
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -955,178 +964,15 @@ async def notify_job_cancellation(job_id: str, job: dict, homeowner: User, reaso
         logger.error("Error in job cancellation notification: %s", str(e))
 
 async def notify_matching_tradespeople_new_job(job: dict):
+    """Queue NEW_MATCHING_JOB alerts; the fan-out runs on a job queue worker"""
     try:
-        category = job.get("category", "")
-        if not category:
-            return
-        normalized_cat = category.strip().lower()
-        synonyms_map = {
-            "plumbing": ["plumber", "plumbing", "pipe", "leak", "sanitary"],
-            "electrical repairs": ["electrician", "electrical", "wiring", "power"],
-            "tiling": ["tiler", "tiling", "tiles"],
-            "painting": ["painter", "painting", "paint"],
-            "carpentry": ["carpenter", "carpentry"],
-            "furniture making": ["furniture", "furniture maker"],
-            "interior design": ["interior", "design", "interior designer"],
-            "air conditioning & refrigeration": ["air conditioning", "ac", "hvac", "refrigeration"],
-            "generator services": ["generator", "gen", "genset"],
-            "solar & inverter installation": ["solar", "inverter", "pv", "solar panel"],
-            "cctv & security systems": ["cctv", "security", "surveillance"],
-            "locksmithing": ["locksmith", "locks"],
-            "roofing": ["roofer", "roofing", "roof"],
-            "plastering/pop": ["plaster", "pop"],
-            "door & window installation": ["door", "window", "installer"],
-            "bathroom fitting": ["bathroom", "toilet", "sanitary"],
-            "flooring": ["floor", "flooring"],
-            "welding": ["welder", "welding"],
-            "cleaning": ["cleaner", "cleaning"],
-            "relocation/moving": ["relocation", "moving", "mover"],
-            "waste disposal": ["waste", "disposal", "trash"],
-            "recycling": ["recycle", "recycling"],
-            "building": ["builder", "building", "construction"],
-            "concrete works": ["concrete", "masonry", "cement"]
-        }
-        synonyms = set([category])
-        synonyms.update(synonyms_map.get(normalized_cat, []))
-        alternation = "|".join(sorted({re.escape(s) for s in synonyms}))
-        pattern = f"({alternation})"
-        filters = {
-            "role": "tradesperson",
-            "status": {"$ne": "deleted"},
-            "$or": [
-                {"trade_categories": {"$regex": pattern, "$options": "i"}},
-                {"profession": {"$regex": pattern, "$options": "i"}},
-            ],
-        }
-        cursor = database.users_collection.find(filters)
-        tradespeople = await cursor.to_list(length=None)
-        logger.info(
-            "NEW_MATCHING_JOB: found %s tradespeople for category '%s' (synonyms: %s)",
-            len(tradespeople),
-            category,
-            ", ".join(sorted(synonyms)),
-        )
-        frontend_url = os.environ.get("FRONTEND_URL", "https://servicehub.ng")
-        for tp in tradespeople:
-            try:
-                tp_id = tp.get("id")
-                if not tp_id:
-                    continue
-                preferences = await database.get_user_notification_preferences(tp_id)
-                name = tp.get("business_name") or tp.get("name", "Tradesperson")
-                miles = None
-                jlat = job.get("latitude")
-                jlng = job.get("longitude")
-                tlat = tp.get("latitude")
-                tlng = tp.get("longitude")
-                # Attempt to compute distance using explicit coordinates or fall back to location text
-                try:
-                    job_coords = None
-                    tp_coords = None
-                    if jlat is not None and jlng is not None:
-                        job_coords = {"latitude": float(jlat), "longitude": float(jlng)}
-                    else:
-                        job_coords = database.resolve_coordinates_from_entity(job)
-                    if tlat is not None and tlng is not None:
-                        tp_coords = {"latitude": float(tlat), "longitude": float(tlng)}
-                    else:
-                        tp_coords = database.resolve_coordinates_from_entity(tp)
-                    if job_coords and tp_coords:
-                        km = database.calculate_distance(tp_coords["latitude"], tp_coords["longitude"], job_coords["latitude"], job_coords["longitude"])
-                        max_km = tp.get("travel_distance_km", 25)
-                        if km > float(max_km):
-                            logger.info(
-                                "NEW_MATCHING_JOB: skipped tradesperson %s due to distance %.1f km > max %.1f km",
-                                tp_id,
-                                km,
-                                float(max_km),
-                            )
-                            continue
-                        miles = round(km * 0.621, 1)
-                except Exception:
-                    miles = None
-                # Determine available contact methods (do not override preferences here)
-                recipient_email = tp.get("email")
-                recipient_phone = tp.get("phone")
-                if not recipient_email and not recipient_phone:
-                    logger.info("Skipping tradesperson %s: no contact info for NEW_MATCHING_JOB", tp_id)
-                    continue
-                template_data = {
-                    "Name": name,
-                    "trade_title": job.get("title", "Job"),
-                    "trade_category": job.get("category", ""),
-                    "Location": job.get("location", ""),
-                    "miles": f"{miles} miles" if miles is not None else "",
-                    "logo_url": f"{frontend_url}/Logo-Icon-Green.png",
-                    "see_more_url": f"{frontend_url}/browse-jobs",
-                    "job_url": f"{frontend_url}/browse-jobs?job_id={job.get('id')}",
-                    "support_url": f"{frontend_url}/help-faqs",
-                    "preferences_url": f"{frontend_url}/notifications/preferences",
-                    "privacy_url": f"{frontend_url}/policies/privacy",
-                    "terms_url": f"{frontend_url}/policies/terms"
-                }
-                notification = await notification_service.send_notification(
-                    user_id=tp_id,
-                    notification_type=NotificationType.NEW_MATCHING_JOB,
-                    template_data=template_data,
-                    user_preferences=preferences,
-                    recipient_email=recipient_email,
-                    recipient_phone=recipient_phone
-                )
-                await database.create_notification(notification)
-                logger.info(f"✅ Successfully sent NEW_MATCHING_JOB notification to tradesperson {tp_id} (email: {recipient_email}, phone: {recipient_phone}) for job {job.get('id')}")
-            except Exception as e:
-                import traceback
-                error_details = {
-                    "tradesperson_id": tp.get("id"),
-                    "tradesperson_name": name,
-                    "tradesperson_email": recipient_email,
-                    "tradesperson_phone": recipient_phone,
-                    "job_id": job.get("id"),
-                    "job_title": job.get("title"),
-                    "preference_channel": getattr(preferences, "new_matching_job", "unknown") if 'preferences' in locals() else "unknown",
-                    "error": str(e),
-                    "error_type": type(e).__name__
-                }
-                logger.error(
-                    "❌ FAILED to send matching job notification to tradesperson %s (email: %s, phone: %s) for job %s. "
-                    "Preference channel: %s. Error: %s",
-                    tp.get("id"),
-                    recipient_email,
-                    recipient_phone,
-                    job.get("id"),
-                    error_details["preference_channel"],
-                    str(e)
-                )
-                logger.error(f"Full error details: {error_details}")
-                logger.error(f"Error traceback:\n{traceback.format_exc()}")
-                # Store failed notification record for tracking
-                try:
-                    failed_notification = Notification(
-                        id=str(uuid.uuid4()),
-                        user_id=tp_id,
-                        type=NotificationType.NEW_MATCHING_JOB,
-                        channel=getattr(preferences, "new_matching_job", NotificationChannel.EMAIL) if 'preferences' in locals() else NotificationChannel.EMAIL,
-                        recipient_email=recipient_email,
-                        recipient_phone=recipient_phone,
-                        subject=f"New Job: {job.get('title', 'Job')}",
-                        content=f"Failed to send: {str(e)}",
-                        status=NotificationStatus.FAILED,
-                        metadata={"error": str(e), "error_type": type(e).__name__, "job_id": job.get("id"), **template_data}
-                    )
-                    await database.create_notification(failed_notification)
-                except Exception as save_err:
-                    logger.error(f"Failed to save failed notification record: {str(save_err)}")
-                continue
+        await enqueue_new_matching_job(job)
     except Exception as e:
-        import traceback
         logger.error(
-            "❌ CRITICAL ERROR in notify_matching_tradespeople_new_job for job %s: %s",
+            "❌ Failed to queue NEW_MATCHING_JOB notifications for job %s: %s",
             job.get("id", "unknown"),
             str(e)
         )
-        logger.error(f"Error traceback:\n{traceback.format_exc()}")
-        # Re-raise to ensure the error is visible in logs and monitoring
         raise
 
 @router.post("/create-sample-data")
@@ -1,19 +1,30 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, UploadFile, File, Request, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.security import HTTPAuthorizationCredentials
 from ..models.messages import (
     Conversation, ConversationCreate, Message, MessageCreate,
     ConversationList, MessageList
 )
 from ..models.auth import User
 from ..models.notifications import NotificationType
-from ..auth.dependencies import get_current_active_user, get_current_homeowner
+from ..auth.dependencies import get_current_active_user, get_current_homeowner, get_current_user
 from ..database import database
 from ..services.notifications import notification_service
+from ..services.image_pipeline import image_pipeline, ImageProcessingError
+from ..services.static_assets import static_assets, IMMUTABLE_PRIVATE
+from ..services.uploads import EXTENSIONS, UploadRejected, stream_upload
+from ..services.realtime import connections as realtime_connections, user_channel
+from ..utils.pagination import InvalidCursor, next_cursor
 from datetime import datetime
+import asyncio
+import json
+import time
 import uuid
 import logging
 import os
+import shutil
 from pathlib import Path
+from typing import Dict, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -22,43 +33,74 @@ router = APIRouter(prefix="/api/messages", tags=["messages"])
 attachments_dir = Path(__file__).resolve().parent.parent / "uploads" / "messages"
 attachments_dir.mkdir(parents=True, exist_ok=True)
 
+PREVIEW_IMAGE_TYPES = {"image/jpeg", "image/png", "image/webp"}
+
+ATTACHMENT_TYPES = {
+    "image/jpeg",
+    "image/png",
+    "image/webp",
+    "image/gif",
+    "application/pdf",
+    "application/msword",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+ATTACHMENT_MAX_BYTES = int(os.getenv("MESSAGE_ATTACHMENT_MAX_BYTES", "10485760"))
+
+async def _attachment_result(stored: dict, stem: str) -> dict:
+    name = stored["filename"]
+    result = {"filename": name, "content_type": stored["content_type"], "size": stored["size"],
+              "url": f"/api/messages/attachments/{name}"}
+    # Still images get preview renditions; the original is kept as sent
+    if stored["content_type"] in PREVIEW_IMAGE_TYPES:
+        try:
+            data = await asyncio.to_thread(Path(stored["path"]).read_bytes)
+            saved = await image_pipeline.save(
+                data, attachments_dir, "/api/messages/attachments/", stem, renditions=("thumb", "medium")
+            )
+            result["renditions"] = saved["renditions"]
+        except ImageProcessingError as e:
+            logger.warning(f"Could not render previews for attachment {name}: {e}")
+    return result
+
+async def _finalize_resumable_attachment(path: Path, upload: dict) -> dict:
+    """Move a completed resumable upload into the attachments directory"""
+    stem = uuid.uuid4().hex
+    dest = attachments_dir / f"{stem}{EXTENSIONS.get(upload['content_type'], '')}"
+    await asyncio.to_thread(shutil.move, str(path), str(dest))
+    return await _attachment_result({**upload, "path": dest, "filename": dest.name}, stem)
+
+database.uploads.register("message_attachment", ATTACHMENT_MAX_BYTES, ATTACHMENT_TYPES, _finalize_resumable_attachment)
+
 @router.post("/attachments")
 async def upload_attachment(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_active_user)
 ):
-    allowed_types = {
-        "image/jpeg",
-        "image/png",
-        "image/webp",
-        "image/gif",
-        "application/pdf",
-        "application/msword",
-        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-    }
-    if file.content_type not in allowed_types:
+    if file.content_type not in ATTACHMENT_TYPES:
         raise HTTPException(status_code=400, detail="Unsupported file type")
-    data = await file.read()
-    max_bytes = int(os.getenv("MESSAGE_ATTACHMENT_MAX_BYTES", "10485760"))
-    if len(data) > max_bytes:
-        raise HTTPException(status_code=413, detail="File too large")
-    ext = os.path.splitext(file.filename or "")[1].lower()
-    name = f"{uuid.uuid4().hex}{ext}"
-    dest = attachments_dir / name
-    with open(dest, "wb") as f:
-        f.write(data)
-    url_path = f"/api/messages/attachments/{name}"
-    return {"filename": name, "content_type": file.content_type, "size": len(data), "url": url_path}
+    # Streamed to disk in chunks; the type is checked against the file's own bytes
+    stem = uuid.uuid4().hex
+    try:
+        stored = await stream_upload(
+            file, attachments_dir, stem, ATTACHMENT_MAX_BYTES, ATTACHMENT_TYPES,
+            declared_type=file.content_type, filename=file.filename,
+        )
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    return await _attachment_result(stored, stem)
 
 @router.get("/attachments/{filename}")
 async def get_attachment(
     filename: str,
+    request: Request,
     current_user: User = Depends(get_current_active_user)
 ):
-    path = attachments_dir / filename
-    if not path.exists():
+    response = None
+    if filename == Path(filename).name:
+        response = await static_assets.serve_file(request, str(attachments_dir / filename), IMMUTABLE_PRIVATE)
+    if response is None:
         raise HTTPException(status_code=404, detail="Attachment not found")
-    return FileResponse(path)
+    return response
 
 @router.post("/conversations", response_model=Conversation)
 async def create_conversation(
@@ -128,6 +170,7 @@ async def create_conversation(
 async def get_conversations(
     skip: int = 0,
     limit: int = 20,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_active_user)
 ):
     """Get user's conversations"""
@@ -136,16 +179,20 @@ async def get_conversations(
             user_id=current_user.id,
             user_type=current_user.role,
             skip=skip,
-            limit=limit
+            limit=limit,
+            cursor=cursor
         )
         
         conversation_objects = [Conversation(**conv) for conv in conversations]
         
         return ConversationList(
             conversations=conversation_objects,
-            total=len(conversation_objects)
+            total=len(conversation_objects),
+            next_cursor=next_cursor(conversations, limit, sort_field="last_message_at")
         )
         
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting conversations: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to get conversations")
@@ -155,6 +202,7 @@ async def get_conversation_messages(
     conversation_id: str,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_active_user)
 ):
     """Get messages for a conversation"""
@@ -171,22 +219,28 @@ async def get_conversation_messages(
         messages = await database.get_conversation_messages(
             conversation_id=conversation_id,
             skip=skip,
-            limit=limit
+            limit=limit,
+            cursor=cursor
         )
         
         # Mark messages as read
-        await database.mark_messages_as_read(conversation_id, current_user.role)
+        read = await database.read_conversation(conversation_id, current_user.role)
+        if read:
+            await _publish_read(conversation, current_user, read)
         
         message_objects = [Message(**msg) for msg in messages]
         
         return MessageList(
             messages=message_objects,
             total=len(message_objects),
-            has_more=len(message_objects) == limit
+            has_more=len(message_objects) == limit,
+            next_cursor=next_cursor(messages, limit)
         )
         
     except HTTPException:
         raise
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting conversation messages: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to get messages")
@@ -238,7 +292,15 @@ async def send_message(
             message_content=message_data.content
         )
         
-        return Message(**result)
+        message_obj = Message(**result)
+        # Both participants: the sender's other sessions show it too
+        await database.realtime.notify_users(_participants(conversation), {
+            "type": "message.new",
+            "conversation_id": conversation_id,
+            "message": jsonable_encoder(message_obj),
+        })
+        
+        return message_obj
         
     except HTTPException:
         raise
@@ -262,9 +324,11 @@ async def mark_conversation_as_read(
             current_user.id != conversation["tradesperson_id"]):
             raise HTTPException(status_code=403, detail="Access denied")
         
-        success = await database.mark_messages_as_read(conversation_id, current_user.role)
-        if not success:
+        read = await database.read_conversation(conversation_id, current_user.role)
+        if read is None:
             raise HTTPException(status_code=500, detail="Failed to mark messages as read")
+        if read:
+            await _publish_read(conversation, current_user, read)
         
         return {"message": "Messages marked as read"}
         
@@ -274,6 +338,132 @@ async def mark_conversation_as_read(
         logger.error(f"Error marking messages as read: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to mark messages as read")
 
+@router.get("/unread-count")
+async def get_unread_message_count(current_user: User = Depends(get_current_active_user)):
+    """Total unread messages for the user and the count per conversation"""
+    try:
+        counts, conversations = await asyncio.gather(
+            database.get_unread_counts(current_user.id),
+            database.get_unread_conversation_counts(current_user.id, current_user.role),
+        )
+        return {"total": counts["messages"], "conversations": conversations}
+    except Exception as e:
+        logger.error(f"Error getting unread message count: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get unread message count")
+
+TYPING_RELAY_INTERVAL_SEC = 2.0
+
+def _participants(conversation: dict):
+    return [conversation.get("homeowner_id"), conversation.get("tradesperson_id")]
+
+async def _publish_read(conversation: dict, reader: User, count: int):
+    """Read receipt for the sender, and for the reader's other sessions to clear their badges"""
+    await database.realtime.notify_users(_participants(conversation), {
+        "type": "message.read",
+        "conversation_id": conversation["id"],
+        "reader_id": reader.id,
+        "count": count,
+        "read_at": datetime.utcnow().isoformat(),
+    })
+
+async def _socket_user(websocket: WebSocket, token: Optional[str]) -> Optional[User]:
+    """User for the access token in ?token= (browsers can't set headers on a WebSocket) or the Authorization header"""
+    if not token:
+        scheme, _, credentials = websocket.headers.get("authorization", "").partition(" ")
+        token = credentials if scheme.lower() == "bearer" else None
+    if not token:
+        return None
+    try:
+        user = await get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+        return await get_current_active_user(user)
+    except HTTPException:
+        return None
+
+@router.websocket("/ws")
+async def messages_socket(websocket: WebSocket, token: Optional[str] = None):
+    """Push channel replacing message polling.
+
+    Server -> client: {"type": "message.new" | "message.read" | "typing", "conversation_id", ...}
+    for every conversation of the user. Client -> server:
+    {"type": "typing", "conversation_id", "typing": bool},
+    {"type": "read", "conversation_id"} and {"type": "ping"}.
+    Messages are still sent with POST /conversations/{id}/messages.
+    """
+    user = await _socket_user(websocket, token)
+    if user is None:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    subscription = await database.realtime.subscribe([user_channel(user.id)])
+    realtime_connections.inc()
+    # Conversations this socket has acted on, checked for membership once
+    conversations: Dict[str, dict] = {}
+    typing_relayed: Dict[str, float] = {}
+
+    async def conversation_for(conversation_id) -> Optional[dict]:
+        if conversation_id not in conversations:
+            conversation = await database.get_conversation_by_id(conversation_id) if isinstance(conversation_id, str) else None
+            if not conversation or user.id not in _participants(conversation):
+                return None
+            conversations[conversation_id] = conversation
+        return conversations[conversation_id]
+
+    async def push():
+        while True:
+            payload = await subscription.get()
+            if subscription.overflowed:
+                # Fell too far behind; the client reconnects and refetches over REST
+                await websocket.close(code=1013)
+                return
+            await websocket.send_text(payload)
+
+    async def receive():
+        while True:
+            try:
+                frame = json.loads(await websocket.receive_text())
+                kind = frame.get("type")
+            except (ValueError, AttributeError):
+                await websocket.send_json({"type": "error", "detail": "Frames must be JSON objects"})
+                continue
+            if kind == "ping":
+                await websocket.send_json({"type": "pong"})
+                continue
+            if kind not in ("typing", "read"):
+                await websocket.send_json({"type": "error", "detail": f"Unknown frame type: {kind}"})
+                continue
+            conversation = await conversation_for(frame.get("conversation_id"))
+            if conversation is None:
+                await websocket.send_json({"type": "error", "detail": "Conversation not found",
+                                           "conversation_id": frame.get("conversation_id")})
+                continue
+            if kind == "typing":
+                typing = bool(frame.get("typing", True))
+                now = time.monotonic()
+                # Clients send typing on every keystroke; relay "started" at most every couple of seconds
+                if typing and now - typing_relayed.get(conversation["id"], 0.0) < TYPING_RELAY_INTERVAL_SEC:
+                    continue
+                typing_relayed[conversation["id"]] = now if typing else 0.0
+                await database.realtime.notify_users(
+                    [p for p in _participants(conversation) if p != user.id],
+                    {"type": "typing", "conversation_id": conversation["id"], "user_id": user.id, "typing": typing},
+                )
+            else:
+                read = await database.read_conversation(conversation["id"], user.role)
+                if read:
+                    await _publish_read(conversation, user, read)
+
+    tasks = [asyncio.create_task(push()), asyncio.create_task(receive())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not task.cancelled() and task.exception() is not None and not isinstance(task.exception(), WebSocketDisconnect):
+                logger.warning(f"Message socket for {user.id} failed: {task.exception()}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        subscription.close()
+        realtime_connections.dec()
+
 @router.get("/conversations/job/{job_id}")
 async def get_or_create_conversation_for_job(
     job_id: str,
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from ..auth.dependencies import get_current_user
 from ..models.auth import User
 from ..models.notifications import (
@@ -13,7 +13,9 @@ from ..models.notifications import (
     NotificationChannel,
 )
 from ..database import database
+from ..utils.pagination import InvalidCursor, next_cursor
 from ..services.notifications import notification_service
+import asyncio
 import logging
 import os
 
@@ -55,27 +57,42 @@ async def update_notification_preferences(
 async def get_notification_history(
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
-    """Get user's notification history with pagination"""
+    """Get user's notification history with pagination (by offset, or by `cursor` from the previous page)"""
     try:
         notifications = await database.get_user_notifications(
-            current_user.id, limit=limit, offset=offset
+            current_user.id, limit=limit, offset=offset, cursor=cursor
         )
         
-        # Count unread notifications (assuming notifications are "unread" until explicitly marked)
-        all_notifications = await database.get_user_notifications(current_user.id, limit=1000)
-        unread_count = len([n for n in all_notifications if n.status in ["sent", "pending"]])
+        # Unread comes from the badge counter (notifications are unread until marked read)
+        total, unread_counts = await asyncio.gather(
+            database.get_notifications_count({"user_id": current_user.id}),
+            database.get_unread_counts(current_user.id),
+        )
         
         return NotificationHistory(
             notifications=notifications,
-            total=len(all_notifications),
-            unread=unread_count
+            total=total,
+            unread=unread_counts["notifications"],
+            next_cursor=next_cursor(notifications, limit)
         )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting notification history: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to get notification history")
 
+@router.get("/unread-count")
+async def get_unread_count(current_user: User = Depends(get_current_user)):
+    """Badge counts: unread notifications, unread conversation messages and their total"""
+    try:
+        return await database.get_unread_counts(current_user.id)
+    except Exception as e:
+        logger.error(f"Error getting unread count: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get unread count")
+
 @router.post("/send", response_model=NotificationResponse)
 async def send_notification(
     request: NotificationRequest,
@@ -1,18 +1,18 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, status
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, Request, status
 from typing import List, Optional
 import base64
 import os
 import uuid
 import shutil
 from pathlib import Path
-from PIL import Image
-import io
 
 from models import PortfolioItemCreate, PortfolioItem, PortfolioResponse, PortfolioItemCategory
 from ..models.auth import User
 from ..auth.dependencies import get_current_tradesperson, get_current_active_user
 from ..database import database
+from ..services.image_pipeline import image_pipeline, ImageProcessingError
+from ..services.static_assets import static_assets, IMMUTABLE_PUBLIC
+from ..services.uploads import UploadRejected, read_upload
 
 router = APIRouter(prefix="/api/portfolio", tags=["portfolio"])
 
@@ -24,6 +24,7 @@ UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 # Allowed file extensions and max file size
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+PORTFOLIO_IMAGE_TYPES = {"image/jpeg", "image/png", "image/webp"}
 
 def validate_image_file(file: UploadFile) -> bool:
     """Validate uploaded image file"""
@@ -38,29 +39,12 @@ def validate_image_file(file: UploadFile) -> bool:
     
     return True
 
-def resize_image(image_data: bytes, max_width: int = 1200, max_height: int = 1200, quality: int = 85) -> bytes:
-    """Resize and optimize image"""
-    try:
-        # Open image
-        image = Image.open(io.BytesIO(image_data))
-        
-        # Convert RGBA to RGB if necessary
-        if image.mode == 'RGBA':
-            background = Image.new('RGB', image.size, (255, 255, 255))
-            background.paste(image, mask=image.split()[-1])
-            image = background
-        
-        # Resize if necessary
-        if image.width > max_width or image.height > max_height:
-            image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-        
-        # Save optimized image
-        output = io.BytesIO()
-        image.save(output, format='JPEG', quality=quality, optimize=True)
-        return output.getvalue()
-    
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid image file: {str(e)}")
+def _remove_image_files(filename: str):
+    """Delete an uploaded image and the renditions saved alongside it"""
+    stem = Path(filename).stem
+    for path in [UPLOAD_DIR / filename, *UPLOAD_DIR.glob(f"{stem}_*")]:
+        if path.exists():
+            path.unlink()
 
 @router.post("/upload", response_model=PortfolioItem)
 async def upload_portfolio_image(
@@ -83,18 +67,19 @@ async def upload_portfolio_image(
         if image_base64:
             b64 = image_base64.split(",")[-1]
             raw = base64.b64decode(b64)
-            optimized_content = resize_image(raw)
         else:
-            file_content = await file.read()
-            optimized_content = resize_image(file_content)
-        
-        # Generate unique filename
-        unique_filename = f"{uuid.uuid4()}.jpg"
-        file_path = UPLOAD_DIR / unique_filename
+            try:
+                raw = (await read_upload(file, MAX_FILE_SIZE, PORTFOLIO_IMAGE_TYPES, file.content_type))["data"]
+            except UploadRejected as e:
+                raise HTTPException(status_code=e.status_code, detail=str(e))
         
-        # Save file
-        with open(file_path, "wb") as f:
-            f.write(optimized_content)
+        # Resize and save every rendition under a unique name (off the event loop)
+        stem = str(uuid.uuid4())
+        try:
+            saved = await image_pipeline.save(raw, UPLOAD_DIR, "/api/portfolio/images/", stem)
+        except ImageProcessingError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        unique_filename = saved["filename"]
         
         # Create portfolio item data
         portfolio_data = {
@@ -103,8 +88,9 @@ async def upload_portfolio_image(
             "title": title,
             "description": description,
             "category": category,
-            "image_url": f"/api/portfolio/images/{unique_filename}",
+            "image_url": saved["url"],
             "image_filename": unique_filename,
+            "renditions": saved["renditions"],
             "created_at": database.get_current_time(),
             "updated_at": database.get_current_time(),
             "is_public": True
@@ -118,50 +104,21 @@ async def upload_portfolio_image(
     except HTTPException:
         raise
     except Exception as e:
-        # Clean up file if database save fails
-        if 'file_path' in locals() and file_path.exists():
-            file_path.unlink()
+        # Clean up files if database save fails
+        if 'saved' in locals():
+            _remove_image_files(unique_filename)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload image: {str(e)}"
         )
 
 @router.get("/images/{filename}")
-async def get_portfolio_image(filename: str):
+async def get_portfolio_image(filename: str, request: Request):
     """Serve portfolio images"""
-    # Resolve common locations where uploads may be stored across environments
-    base_dir = os.environ.get("UPLOADS_DIR", os.path.join(os.getcwd(), "uploads"))
-    # Project root uploads (when running from backend directory)
-    project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-    project_uploads = os.path.join(project_root, "uploads")
-
-    # Also check backend/uploads to cover cases where app was launched from backend dir
-    backend_uploads = os.path.join(project_root, "backend", "uploads")
-
-    candidates = [
-        os.path.join(base_dir, "portfolio", filename),
-        os.path.join(project_uploads, "portfolio", filename),
-        os.path.join(backend_uploads, "portfolio", filename),
-        os.path.join(os.getcwd(), "uploads", "portfolio", filename),
-        os.path.join("/app", "uploads", "portfolio", filename),
-    ]
-
-    for fp in candidates:
-        if os.path.exists(fp):
-            # Determine media type by extension; default to JPEG as images are saved as .jpg
-            ext = os.path.splitext(fp)[1].lower()
-            media_type = "image/jpeg" if ext in (".jpg", ".jpeg") else (
-                "image/png" if ext == ".png" else (
-                    "image/webp" if ext == ".webp" else "application/octet-stream"
-                )
-            )
-            return FileResponse(
-                path=fp,
-                media_type=media_type,
-                headers={"Cache-Control": "public, max-age=3600"}
-            )
-
-    raise HTTPException(status_code=404, detail="Image not found")
+    response = await static_assets.serve(request, "portfolio", filename, IMMUTABLE_PUBLIC)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return response
 
 @router.get("/my-portfolio", response_model=PortfolioResponse)
 async def get_my_portfolio(
@@ -262,10 +219,8 @@ async def delete_portfolio_item(
         if existing_item["tradesperson_id"] != current_user.id:
             raise HTTPException(status_code=403, detail="Not authorized to delete this item")
         
-        # Delete image file
-        image_path = UPLOAD_DIR / existing_item["image_filename"]
-        if image_path.exists():
-            image_path.unlink()
+        # Delete image file and its renditions
+        _remove_image_files(existing_item["image_filename"])
         
         # Delete from database
         await database.delete_portfolio_item(item_id)
@@ -1,14 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Request
 from typing import List, Optional
 from datetime import datetime
 import os
 import uuid
-from PIL import Image
 import base64
-import io
+import logging
 
 from ..auth.dependencies import get_current_user, get_current_tradesperson
 from ..database import database
+from ..services.image_pipeline import image_pipeline, ImageProcessingError
+from ..services.static_assets import static_assets, IMMUTABLE_PRIVATE
+from ..services.uploads import IMAGE_TYPES, UploadTooLarge, read_upload
 from ..models.base import (
     ReferralStats, DocumentUpload, VerificationSubmission,
     DocumentType, WithdrawalRequest, WalletResponseWithReferrals
@@ -18,6 +20,10 @@ try:
 except ImportError:
     from services.notifications import SendGridEmailService, MockEmailService
 
+logger = logging.getLogger(__name__)
+
+DOCUMENT_IMAGE_MAX_BYTES = int(os.getenv("DOCUMENT_IMAGE_MAX_BYTES", str(10 * 1024 * 1024)))
+
 router = APIRouter(prefix="/api/referrals", tags=["referrals"])
 
 @router.get("/my-stats", response_model=ReferralStats)
@@ -82,31 +88,27 @@ async def submit_verification_documents(
     upload_dir = os.path.join(base_dir, "verification_documents")
     os.makedirs(upload_dir, exist_ok=True)
     
-    filename = f"{current_user.id}_{document_type}_{uuid.uuid4().hex}.jpg"
-    file_path = os.path.join(upload_dir, filename)
-    
-    # Save and optimize image
+    # Save and optimize image (max 1920x1920 for document clarity) with its renditions
     try:
         if document_image_base64:
             b64 = document_image_base64.split(",")[-1]
             raw = base64.b64decode(b64)
-            image = Image.open(io.BytesIO(raw))
         else:
-            image_data = await document_image.read()
-            image = Image.open(io.BytesIO(image_data))
-        
-        # Convert to RGB if necessary
-        if image.mode in ("RGBA", "P"):
-            image = image.convert("RGB")
-        
-        # Resize if too large (max 1920x1920 for document clarity)
-        if image.width > 1920 or image.height > 1920:
-            image.thumbnail((1920, 1920), Image.Resampling.LANCZOS)
-        
-        image.save(file_path, "JPEG", quality=90, optimize=True)
-        
-    except Exception as e:
+            raw = (await read_upload(document_image, DOCUMENT_IMAGE_MAX_BYTES, IMAGE_TYPES, document_image.content_type))["data"]
+        saved = await image_pipeline.save(
+            raw, upload_dir, "/api/referrals/verification-document/",
+            f"{current_user.id}_{document_type}_{uuid.uuid4().hex}", max_size=1920, quality=90
+        )
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except (ImageProcessingError, ValueError):
         raise HTTPException(status_code=400, detail="Invalid image file")
+    filename = saved["filename"]
+    try:
+        document_blob = await database.blob_store.put(saved["bytes"], "image/jpeg", filename, owner_id=current_user.id)
+    except Exception as e:
+        logger.warning(f"Could not store verification document {filename} in blob store: {e}")
+        document_blob = None
     
     # Submit verification
     verification_id = await database.submit_verification_documents(
@@ -114,13 +116,15 @@ async def submit_verification_documents(
         document_type=document_type,
         document_url=filename,
         full_name=full_name,
-        document_number=document_number
+        document_number=document_number,
+        document_image_blob=document_blob
     )
     
     return VerificationSubmission(
         message="Verification documents submitted successfully. You will be notified within 2-3 business days.",
         verification_id=verification_id,
-        status="pending"
+        status="pending",
+        renditions=saved["renditions"]
     )
 
 # Tradespeople references submission
@@ -313,22 +317,12 @@ async def check_withdrawal_eligibility(current_user = Depends(get_current_user))
 
 # Serve verification document images
 @router.get("/verification-document/{filename}")
-async def serve_verification_document(filename: str):
+async def serve_verification_document(filename: str, request: Request):
     """Serve verification document images (admin only)"""
-    from fastapi.responses import FileResponse
-    import os
-    base_dir = os.environ.get("UPLOADS_DIR", os.path.join(os.getcwd(), "uploads"))
-    project_root_uploads = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "uploads")
-    candidates = [
-        os.path.join(base_dir, "verification_documents", filename),
-        os.path.join(project_root_uploads, "verification_documents", filename),
-        os.path.join(os.getcwd(), "uploads", "verification_documents", filename),
-        os.path.join("/app", "uploads", "verification_documents", filename),
-    ]
-    for fp in candidates:
-        if os.path.exists(fp):
-            return FileResponse(fp, media_type="image/jpeg")
-    raise HTTPException(status_code=404, detail="Document not found")
+    response = await static_assets.serve(request, "verification_documents", filename, IMMUTABLE_PRIVATE)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return response
 
 @router.post("/process-signup-referral")
 async def process_signup_referral(
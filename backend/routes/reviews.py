@@ -8,6 +8,7 @@ sys.path.insert(0, backend_dir)
 import models
 from ..models.reviews import Review as AdvancedReview
 from ..database import database
+from ..utils.pagination import InvalidCursor, cached_total, next_cursor
 from datetime import datetime
 import uuid
 from ..auth.dependencies import get_current_user
@@ -63,7 +64,9 @@ async def get_reviews(
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=50),
     min_rating: Optional[int] = Query(None, ge=1, le=5),
-    tradesperson_id: Optional[str] = None
+    tradesperson_id: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces page"),
+    include_total: bool = Query(True, description="Count matching reviews (cached briefly)")
 ):
     """Get reviews with pagination and filters"""
     try:
@@ -77,14 +80,16 @@ async def get_reviews(
             filters['tradesperson_id'] = tradesperson_id
         
         # Get reviews and total count
-        reviews = await database.get_reviews(skip=skip, limit=limit, filters=filters)
-        total_reviews = await database.get_reviews_count(filters=filters)
+        reviews = await database.get_reviews(skip=skip, limit=limit, filters=filters, cursor=cursor)
+        total_reviews = None
+        if include_total:
+            total_reviews = await cached_total("reviews", filters, lambda: database.get_reviews_count(filters=filters))
         
         # Convert to Review objects
         review_objects = [models.Review(**review) for review in reviews]
         
         # Calculate pagination
-        total_pages = (total_reviews + limit - 1) // limit
+        total_pages = (total_reviews + limit - 1) // limit if total_reviews is not None else None
         
         return models.ReviewsResponse(
             reviews=review_objects,
@@ -92,10 +97,13 @@ async def get_reviews(
                 "page": page,
                 "limit": limit,
                 "total": total_reviews,
-                "pages": total_pages
+                "pages": total_pages,
+                "next_cursor": next_cursor(reviews, limit)
             }
         )
         
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
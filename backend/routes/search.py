@@ -0,0 +1,15 @@
+from fastapi import APIRouter, HTTPException, Query
+from ..database import database
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+@router.get("/suggest")
+async def suggest_search_terms(
+    q: str = Query(..., min_length=1, max_length=100, description="What the user has typed so far"),
+    limit: int = Query(10, ge=1, le=25)
+):
+    """Autocomplete trades, states, cities and LGAs for a search box prefix"""
+    try:
+        return {"query": q, "suggestions": await database.suggest_search_terms(q, limit=limit)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -7,6 +7,9 @@ import uuid
 
 router = APIRouter(prefix="/api/tradespeople", tags=["tradespeople"])
 
+# Fields scanned by the regex fallback when the users text index is missing
+TRADESPERSON_SEARCH_FIELDS = ("name", "business_name", "bio", "profession")
+
 @router.post("/", response_model=models.Tradesperson)
 async def create_tradesperson(tradesperson_data: models.TradespersonCreate):
     """Register a new tradesperson"""
@@ -44,9 +47,9 @@ async def get_tradespeople(
     trade: Optional[str] = None,
     location: Optional[str] = None,
     min_rating: Optional[float] = Query(None, ge=0, le=5),
-    sort_by: Optional[str] = Query("rating", regex="^(rating|reviews|experience|recent)$")
+    sort_by: Optional[str] = Query(None, regex="^(relevance|rating|reviews|experience|recent)$")
 ):
-    """Get tradespeople with filters and search"""
+    """Get tradespeople with filters and search (ranked by relevance when searching, else by rating)"""
     try:
         # Gracefully handle degraded mode when database is not connected
         if not getattr(database, "connected", False) or getattr(database, "database", None) is None:
@@ -65,16 +68,6 @@ async def get_tradespeople(
         # Build filters for users collection where role is tradesperson
         filters = {"role": "tradesperson"}  # Removed status filter to show all tradespeople
         
-        # Search across name, business_name, bio, profession fields
-        if search:
-            search_pattern = {"$regex": search, "$options": "i"}
-            filters["$or"] = [
-                {"name": search_pattern},
-                {"business_name": search_pattern},
-                {"bio": search_pattern},
-                {"profession": search_pattern}
-            ]
-        
         # Filter by trade/profession
         if trade:
             filters["profession"] = {"$regex": trade, "$options": "i"}
@@ -82,7 +75,7 @@ async def get_tradespeople(
         # Filter by location (check city, state, location fields)
         if location:
             location_pattern = {"$regex": location, "$options": "i"}
-            filters["$or"] = filters.get("$or", []) + [
+            filters["$or"] = [
                 {"city": location_pattern},
                 {"state": location_pattern}, 
                 {"location": location_pattern}
@@ -93,8 +86,12 @@ async def get_tradespeople(
             filters["average_rating"] = {"$gte": min_rating}
         
         # Build sort criteria
+        if not sort_by:
+            sort_by = "relevance" if search else "rating"
         sort_criteria = []
-        if sort_by == "rating":
+        if sort_by == "relevance":
+            sort_criteria = [("average_rating", -1)]
+        elif sort_by == "rating":
             sort_criteria = [("average_rating", -1), ("total_reviews", -1)]
         elif sort_by == "reviews":
             sort_criteria = [("total_reviews", -1), ("average_rating", -1)]
@@ -105,43 +102,36 @@ async def get_tradespeople(
         else:
             sort_criteria = [("average_rating", -1)]
         
-        # Get tradespeople from users collection using guarded accessor
+        # Get tradespeople from users collection using guarded accessor; search
+        # across name, business, profession, skills, bio and location is ranked
         users_collection = database.users_collection
-        cursor = users_collection.find(filters)
-        
-        # Apply sorting
-        for field, direction in sort_criteria:
-            cursor = cursor.sort(field, direction)
+        if search:
+            tradespeople_raw, total_count = await database.text_search(
+                users_collection, search, filters, TRADESPERSON_SEARCH_FIELDS,
+                skip=skip, limit=limit, sort=sort_criteria, rank=(sort_by == "relevance"), substring_fallback=True
+            )
+        else:
+            cursor = users_collection.find(filters)
             
-        # Apply pagination
-        cursor = cursor.skip(skip).limit(limit)
-        tradespeople_raw = await cursor.to_list(length=limit)
+            # Apply sorting
+            if sort_criteria:
+                cursor = cursor.sort(sort_criteria)
+                
+            # Apply pagination
+            cursor = cursor.skip(skip).limit(limit)
+            tradespeople_raw = await cursor.to_list(length=limit)
+            
+            # Get total count
+            total_count = await users_collection.count_documents(filters)
         
-        # Get total count
-        total_count = await users_collection.count_documents(filters)
+        # Counters come from the denormalized stats; only users never built are computed here
+        await database.fill_tradesperson_stats(tradespeople_raw)
         
         # Transform data to match frontend expectations
         tradespeople = []
         for tp in tradespeople_raw:
-            # Calculate additional stats if needed
-            portfolio_count = await database.portfolio_collection.count_documents({"tradesperson_id": tp.get("id", "")})
-            reviews_count = await database.reviews_collection.count_documents({"reviewee_id": tp.get("id", "")})
-            completed_jobs = await database.database.jobs.count_documents({
-                "assigned_tradesperson_id": tp.get("id", ""),
-                "status": "completed"
-            })
-            
-            # Get average rating from reviews if not stored in user document
-            avg_rating = tp.get("average_rating", 0)
-            if avg_rating == 0 and reviews_count > 0:
-                # Calculate average rating from reviews
-                reviews_pipeline = [
-                    {"$match": {"reviewee_id": tp.get("id", "")}},
-                    {"$group": {"_id": None, "avg_rating": {"$avg": "$rating"}}}
-                ]
-                rating_result = await database.reviews_collection.aggregate(reviews_pipeline).to_list(length=1)
-                if rating_result:
-                    avg_rating = round(rating_result[0]["avg_rating"], 1)
+            stats = tp.get("tradesperson_stats") or {}
+            avg_rating = tp.get("average_rating", 0) or stats.get("average_rating", 0)
             
             # Transform to expected format
             tradesperson_data = {
@@ -161,9 +151,10 @@ async def get_tradespeople(
                 "company_name": tp.get("company_name", ""),
                 "profile_image": tp.get("profile_image", ""),
                 "average_rating": avg_rating,
-                "total_reviews": reviews_count,
-                "completed_jobs": completed_jobs,
-                "portfolio_items": portfolio_count,
+                "total_reviews": stats.get("reviews_count", 0),
+                "completed_jobs": stats.get("completed_jobs", 0),
+                "portfolio_items": stats.get("portfolio_count", 0),
+                "rating_histogram": stats.get("rating_histogram", {}),
                 "is_verified": tp.get("is_verified", False),
                 "created_at": tp.get("created_at"),
                 "response_time": 2,  # Default response time in hours
@@ -202,25 +193,9 @@ async def get_tradesperson(tradesperson_id: str):
         if not user or user.get("role") != "tradesperson":
             raise HTTPException(status_code=404, detail="Tradesperson not found")
         
-        # Calculate additional stats
-        portfolio_count = await database.portfolio_collection.count_documents({"tradesperson_id": tradesperson_id})
-        reviews_count = await database.reviews_collection.count_documents({"reviewee_id": tradesperson_id})
-        completed_jobs = await database.database.jobs.count_documents({
-            "assigned_tradesperson_id": tradesperson_id,
-            "status": "completed"
-        })
-        
-        # Get average rating from reviews if not stored in user document
-        avg_rating = user.get("average_rating", 0)
-        if avg_rating == 0 and reviews_count > 0:
-            # Calculate average rating from reviews
-            reviews_pipeline = [
-                {"$match": {"reviewee_id": tradesperson_id}},
-                {"$group": {"_id": None, "avg_rating": {"$avg": "$rating"}}}
-            ]
-            rating_result = await database.reviews_collection.aggregate(reviews_pipeline).to_list(length=1)
-            if rating_result:
-                avg_rating = round(rating_result[0]["avg_rating"], 1)
+        await database.fill_tradesperson_stats([user])
+        stats = user.get("tradesperson_stats") or {}
+        avg_rating = user.get("average_rating", 0) or stats.get("average_rating", 0)
         
         # Get recent portfolio items (limit 6 for preview)
         portfolio_items = await database.portfolio_collection.find(
@@ -243,10 +218,11 @@ async def get_tradesperson(tradesperson_id: str):
             {"reviewee_id": tradesperson_id}
         ).sort("created_at", -1).limit(5).to_list(length=5)
         
-        # Transform reviews
+        # Transform reviews, looking up all reviewers at once
+        reviewers = await database.get_users_by_any_id([r.get("reviewer_id", "") for r in recent_reviews])
         reviews_preview = []
         for review in recent_reviews:
-            reviewer = await database.get_user_by_id(review.get("reviewer_id", ""))
+            reviewer = reviewers.get(review.get("reviewer_id", ""))
             reviews_preview.append({
                 "id": str(review.get("_id", "")),
                 "rating": review.get("rating", 0),
@@ -273,9 +249,10 @@ async def get_tradesperson(tradesperson_id: str):
             "company_name": user.get("company_name", ""),
             "profile_image": user.get("profile_image", ""),
             "average_rating": avg_rating,
-            "total_reviews": reviews_count,
-            "completed_jobs": completed_jobs,
-            "portfolio_items": portfolio_count,
+            "total_reviews": stats.get("reviews_count", 0),
+            "completed_jobs": stats.get("completed_jobs", 0),
+            "portfolio_items": stats.get("portfolio_count", 0),
+            "rating_histogram": stats.get("rating_histogram", {}),
             "is_verified": user.get("is_verified", False),
             "created_at": user.get("created_at"),
             "response_time": 2,
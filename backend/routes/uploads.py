@@ -0,0 +1,81 @@
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, status
+from pydantic import BaseModel
+from typing import Optional
+from ..auth.dependencies import get_current_active_user
+from ..database import database
+from ..models.auth import User
+from ..services.uploads import UploadRejected, UploadOffsetMismatch
+
+router = APIRouter(prefix="/api/uploads", tags=["uploads"])
+
+class UploadSessionCreate(BaseModel):
+    purpose: str
+    size: int
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+
+def _session_view(session: dict) -> dict:
+    return {
+        "id": session["_id"],
+        "purpose": session["purpose"],
+        "size": session["size"],
+        "offset": session["offset"],
+        "status": session["status"],
+        "chunk_max_bytes": database.uploads.chunk_max_bytes,
+        "expires_at": session["expires_at"],
+        "result": session.get("result"),
+    }
+
+def _rejected(e: UploadRejected) -> HTTPException:
+    if isinstance(e, UploadOffsetMismatch):
+        return HTTPException(status_code=e.status_code, detail={"message": str(e), "offset": e.offset},
+                             headers={"Upload-Offset": str(e.offset)})
+    return HTTPException(status_code=e.status_code, detail=str(e))
+
+async def _get_session(upload_id: str, user: User) -> dict:
+    session = await database.uploads.get(upload_id, user.id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return session
+
+@router.post("", status_code=status.HTTP_201_CREATED)
+async def create_upload(body: UploadSessionCreate, current_user: User = Depends(get_current_active_user)):
+    """Open a resumable upload; send the bytes with PUT /api/uploads/{id} in one or more chunks"""
+    try:
+        session = await database.uploads.create(current_user.id, body.purpose, body.filename, body.size, body.content_type)
+    except UploadRejected as e:
+        raise _rejected(e)
+    return _session_view(session)
+
+@router.get("/{upload_id}")
+async def get_upload(upload_id: str, response: Response, current_user: User = Depends(get_current_active_user)):
+    """Where to resume: the number of bytes stored so far is `offset` (also the Upload-Offset header)"""
+    session = await _get_session(upload_id, current_user)
+    response.headers["Upload-Offset"] = str(session["offset"])
+    return _session_view(session)
+
+@router.put("/{upload_id}")
+async def upload_chunk(upload_id: str, request: Request, response: Response, offset: Optional[int] = None,
+                       current_user: User = Depends(get_current_active_user)):
+    """Append the request body at `offset` (query parameter or Upload-Offset header)"""
+    session = await _get_session(upload_id, current_user)
+    if offset is None:
+        header = request.headers.get("upload-offset", "")
+        if not header.isdigit():
+            raise HTTPException(status_code=400, detail="Upload-Offset is required")
+        offset = int(header)
+    try:
+        new_offset = await database.uploads.append(session, offset, request.stream())
+    except UploadRejected as e:
+        raise _rejected(e)
+    response.headers["Upload-Offset"] = str(new_offset)
+    return {"id": upload_id, "offset": new_offset, "size": session["size"]}
+
+@router.post("/{upload_id}/complete")
+async def complete_upload(upload_id: str, current_user: User = Depends(get_current_active_user)):
+    """Check the assembled file and store it; safe to retry"""
+    session = await _get_session(upload_id, current_user)
+    try:
+        return await database.uploads.complete(session)
+    except UploadRejected as e:
+        raise _rejected(e)
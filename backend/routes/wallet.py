@@ -1,24 +1,31 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Request
 from typing import List, Optional
 from datetime import datetime
 import base64
 import uuid
 import os
-from PIL import Image
-import io
+import logging
 
 from ..auth.dependencies import get_current_user, get_current_tradesperson
 from ..database import database
+from ..services.image_pipeline import image_pipeline, ImageProcessingError
+from ..services.blob_store import blob_url
+from ..services.static_assets import static_assets, IMMUTABLE_PRIVATE
+from ..services.uploads import IMAGE_TYPES, UploadTooLarge, read_upload
+from ..utils.pagination import InvalidCursor, next_cursor
 from ..models.base import (
     Wallet, WalletTransaction, WalletFundingRequest, WalletResponse,
     TransactionType, TransactionStatus, BankDetails
 )
 from ..models.auth import User
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/wallet", tags=["wallet"])
 
 # Bank details constant
 BANK_DETAILS = BankDetails()
+PROOF_IMAGE_MAX_BYTES = int(os.getenv("PROOF_IMAGE_MAX_BYTES", str(10 * 1024 * 1024)))
 
 @router.get("/balance", response_model=WalletResponse)
 async def get_wallet_balance(current_user: User = Depends(get_current_user)):
@@ -64,40 +71,22 @@ async def fund_wallet(
     upload_dir = os.path.join(base_dir, "payment_proofs")
     os.makedirs(upload_dir, exist_ok=True)
     
-    filename = f"{current_user.id}_{uuid.uuid4().hex}.jpg"
-    file_path = os.path.join(upload_dir, filename)
-    
-    # Save and optimize image
+    # Save and optimize image (max 1024x1024) with its thumb/medium renditions
     try:
-        optimized_bytes = None
         if proof_image_base64:
             b64 = proof_image_base64.split(",")[-1]
             raw = base64.b64decode(b64)
-            image = Image.open(io.BytesIO(raw))
         else:
-            image_data = await proof_image.read()
-            image = Image.open(io.BytesIO(image_data))
-        
-        # Convert to RGB if necessary
-        if image.mode in ("RGBA", "P"):
-            image = image.convert("RGB")
-        
-        # Resize if too large (max 1024x1024)
-        if image.width > 1024 or image.height > 1024:
-            image.thumbnail((1024, 1024), Image.Resampling.LANCZOS)
-        
-        # Save optimized image
-        image.save(file_path, "JPEG", quality=85, optimize=True)
-
-        # Read optimized bytes for DB storage as base64
-        try:
-            with open(file_path, "rb") as f:
-                optimized_bytes = f.read()
-        except Exception:
-            optimized_bytes = None
-        
-    except Exception as e:
+            raw = (await read_upload(proof_image, PROOF_IMAGE_MAX_BYTES, IMAGE_TYPES, proof_image.content_type))["data"]
+        saved = await image_pipeline.save(
+            raw, upload_dir, "/api/wallet/payment-proof/", f"{current_user.id}_{uuid.uuid4().hex}", max_size=1024
+        )
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except (ImageProcessingError, ValueError):
         raise HTTPException(status_code=400, detail="Invalid image file")
+    filename = saved["filename"]
+    optimized_bytes = saved["bytes"]
     
     # Calculate coins
     amount_coins = amount_naira // 100
@@ -114,19 +103,17 @@ async def fund_wallet(
         "amount_naira": amount_naira,
         "status": TransactionStatus.PENDING,
         "description": f"Wallet funding request - ₦{amount_naira:,} ({amount_coins} coins)",
-        "proof_image": filename
+        "proof_image": filename,
+        "proof_image_renditions": saved["renditions"]
     }
 
-    # Store base64 alongside transaction to avoid disk dependency
+    # Keep a copy in the blob store so the proof survives without this server's disk
     try:
-        if optimized_bytes is not None:
-            transaction_data["proof_image_base64"] = base64.b64encode(optimized_bytes).decode("utf-8")
-        elif proof_image_base64:
-            # Fallback to original provided base64 if optimized bytes couldn't be read
-            transaction_data["proof_image_base64"] = proof_image_base64.split(",")[-1]
-    except Exception:
-        # Silently ignore base64 storage failures; file path remains available
-        pass
+        transaction_data["proof_image_blob"] = await database.blob_store.put(
+            optimized_bytes, "image/jpeg", filename, owner_id=current_user.id
+        )
+    except Exception as e:
+        logger.warning(f"Could not store payment proof {filename} in blob store: {e}")
     
     transaction = await database.create_wallet_transaction(transaction_data)
     
@@ -136,6 +123,8 @@ async def fund_wallet(
         "amount_naira": amount_naira,
         "amount_coins": amount_coins,
         "status": "pending",
+        "proof_image_renditions": saved["renditions"],
+        "proof_image_url": blob_url(transaction_data.get("proof_image_blob")),
         "note": "Your funding request will be reviewed by admin within 24 hours"
     }
 
@@ -143,20 +132,25 @@ async def fund_wallet(
 async def get_wallet_transactions(
     skip: int = 0,
     limit: int = 20,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
     """Get user's wallet transaction history"""
     
-    transactions = await database.get_wallet_transactions(
-        current_user.id, skip=skip, limit=limit
-    )
+    try:
+        transactions = await database.get_wallet_transactions(
+            current_user.id, skip=skip, limit=limit, cursor=cursor
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
         "transactions": transactions,
         "pagination": {
             "skip": skip,
             "limit": limit,
-            "total": len(transactions)
+            "total": len(transactions),
+            "next_cursor": next_cursor(transactions, limit)
         }
     }
 
@@ -182,43 +176,27 @@ async def check_sufficient_balance(
     }
 
 @router.get("/payment-proof/{filename}")
-async def serve_payment_proof(filename: str):
-    from fastapi.responses import FileResponse
-    base_dir = os.environ.get("UPLOADS_DIR", os.path.join(os.getcwd(), "uploads"))
-    project_root_uploads = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "uploads")
-    candidates = [
-        os.path.join(base_dir, "payment_proofs", filename),
-        os.path.join(project_root_uploads, "payment_proofs", filename),
-        os.path.join(os.getcwd(), "uploads", "payment_proofs", filename),
-        os.path.join("/app", "uploads", "payment_proofs", filename),
-    ]
-    for fp in candidates:
-        if os.path.exists(fp):
-            return FileResponse(fp, media_type="image/jpeg")
-    raise HTTPException(status_code=404, detail="Image not found")
+async def serve_payment_proof(filename: str, request: Request):
+    response = await static_assets.serve(request, "payment_proofs", filename, IMMUTABLE_PRIVATE)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return response
 
-@router.get("/payment-proof-base64/{filename}")
+@router.get("/payment-proof-base64/{filename}", deprecated=True)
 async def serve_payment_proof_base64(filename: str):
-    # Prefer DB-stored base64 if available
+    """Deprecated: use /payment-proof/{filename}, which streams the image and supports caching"""
+    # Prefer the blob store (or inline base64 on records not yet migrated)
     try:
         txn = await database.get_wallet_transaction_by_proof_image(filename)
+        data = await database.blob_store.get(txn["proof_image_blob"]["sha256"]) if txn and txn.get("proof_image_blob") else None
+        if data is not None:
+            return {"image_base64": base64.b64encode(data).decode("utf-8")}
         if txn and txn.get("proof_image_base64"):
             return {"image_base64": txn["proof_image_base64"]}
     except Exception:
         pass
 
-    project_root_uploads = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "uploads")
-    base_dir = os.environ.get("UPLOADS_DIR", os.path.join(os.getcwd(), "uploads"))
-    candidates = [
-        os.path.join(base_dir, "payment_proofs", filename),
-        os.path.join(project_root_uploads, "payment_proofs", filename),
-        os.path.join(os.getcwd(), "uploads", "payment_proofs", filename),
-        os.path.join("/app", "uploads", "payment_proofs", filename),
-    ]
-    for fp in candidates:
-        if os.path.exists(fp):
-            with open(fp, "rb") as f:
-                data = f.read()
-            b64 = base64.b64encode(data).decode("utf-8")
-            return {"image_base64": b64}
-    raise HTTPException(status_code=404, detail="Image not found")
\ No newline at end of file
+    data = await static_assets.read("payment_proofs", filename)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return {"image_base64": base64.b64encode(data).decode("utf-8")}
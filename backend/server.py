@@ -12,6 +12,9 @@ import asyncio
 # Import database and routes (support both package and script execution)
 try:
     from .database import database
+    from .services.transport import close_provider_clients
+    from .services.image_pipeline import image_pipeline
+    from .services.uploads import UploadLimitMiddleware
     from .routes import jobs, tradespeople, quotes, reviews, stats, auth
     from .routes.admin_management import router as admin_management_router
     from .routes.content import router as content_router
@@ -19,6 +22,9 @@ try:
     from .routes.jobs_management import router as jobs_management_router
 except ImportError:
     from database import database
+    from services.transport import close_provider_clients
+    from services.image_pipeline import image_pipeline
+    from services.uploads import UploadLimitMiddleware
     from routes import jobs, tradespeople, quotes, reviews, stats, auth
     from routes.admin_management import router as admin_management_router
     from routes.content import router as content_router
@@ -27,13 +33,15 @@ except ImportError:
 
 # Add database inspection endpoint
 from fastapi import HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
 # Import production logging system
 try:
     from .utils.logger import get_logger, log_request
+    from .utils import metrics
 except ImportError:
     from utils.logger import get_logger, log_request
+    from utils import metrics
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -60,8 +68,29 @@ async def lifespan(app: FastAPI):
             logger.warning("Database connection unavailable; running in degraded mode")
     except Exception as e:
         logger.error(f"Database connect failed during startup: {e}")
+    # Resolve coordinates for legacy jobs/users in the background (rate limited by the geocoder).
+    # Off by default: every web worker would run the same backfill; use backfill_coordinates.py
+    # or enable it on a single instance.
+    backfill_task = None
+    if getattr(database, 'connected', False) and os.getenv("COORDS_BACKFILL_ON_STARTUP", "false").lower() in ("1", "true", "yes"):
+        backfill_task = asyncio.create_task(database.backfill_all_coordinates())
+    # Run a job queue worker in the web process unless a separate `python -m backend.job_worker` is deployed
+    queue_stop = asyncio.Event()
+    queue_task = None
+    if getattr(database, 'connected', False) and os.getenv("JOB_QUEUE_WORKER_IN_WEB", "true").lower() in ("1", "true", "yes"):
+        queue_task = asyncio.create_task(database.job_queue.run_worker(queue_stop))
     yield
     # Shutdown
+    if backfill_task is not None and not backfill_task.done():
+        backfill_task.cancel()
+    if queue_task is not None:
+        queue_stop.set()
+        try:
+            await asyncio.wait_for(queue_task, timeout=float(os.getenv("JOB_QUEUE_SHUTDOWN_TIMEOUT_SEC", "10")))
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            pass
+    await close_provider_clients()
+    image_pipeline.shutdown()
     try:
         await database.close_mongo_connection()
         logger.info("MongoDB connection closed")
@@ -74,9 +103,9 @@ app = FastAPI(lifespan=lifespan, redirect_slashes=False)
 # Add request logging middleware
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    """Log all HTTP requests with timing and response status."""
+    """Log all HTTP requests with timing and response status, and record their latency."""
     request_id = str(uuid.uuid4())
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     # Get user ID from token if available
     user_id = None
@@ -86,10 +115,22 @@ async def log_requests(request: Request, call_next):
         # For now, we'll just log that authentication was present
         pass
     
-    response = await call_next(request)
+    metrics.http_requests_in_flight.inc(method=request.method)
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        metrics.http_requests_in_flight.dec(method=request.method)
+        metrics.http_request_duration.observe(
+            time.perf_counter() - start_time,
+            method=request.method,
+            route=metrics.route_label(request.scope),
+            status=str(status_code),
+        )
     
     # Calculate request duration
-    duration = (time.time() - start_time) * 1000  # Convert to milliseconds
+    duration = (time.perf_counter() - start_time) * 1000  # Convert to milliseconds
     
     # Log the request
     log_request(
@@ -106,6 +147,17 @@ async def log_requests(request: Request, call_next):
 # Create a router without prefix for health endpoints
 api_router = APIRouter()
 
+# Refuse oversized uploads before their bodies are read (added before CORS so 413s still carry CORS headers)
+# Image routes that also take a base64 form field allow for its extra third
+app.add_middleware(UploadLimitMiddleware, limits={
+    "/api/messages/attachments": int(os.getenv("MESSAGE_ATTACHMENT_MAX_BYTES", "10485760")),
+    "/api/portfolio/upload": 5 * 1024 * 1024 * 4 // 3,
+    "/api/wallet/fund": int(os.getenv("PROOF_IMAGE_MAX_BYTES", str(10 * 1024 * 1024))) * 4 // 3,
+    "/api/referrals/verify-documents": int(os.getenv("DOCUMENT_IMAGE_MAX_BYTES", str(10 * 1024 * 1024))) * 4 // 3,
+    "/api/auth/profile/certification-image": int(os.getenv("CERT_IMAGE_MAX_BYTES", "5242880")),
+    "/api/uploads/": int(os.getenv("UPLOAD_CHUNK_MAX_BYTES", str(8 * 1024 * 1024))),
+})
+
 # Add CORS middleware (configurable via environment variable)
 # ALLOWED_ORIGINS can be a comma-separated list of origins, e.g.
 # "https://my-servicehub.vercel.app, http://localhost:3001"
@@ -175,42 +227,36 @@ async def health_history():
         logger.error("Health history retrieval failed", extra={"error": str(e)})
         raise HTTPException(status_code=500, detail="Health history retrieval failed")
 
-@api_router.get("/api/metrics")
-async def get_metrics():
-    """Get system metrics in Prometheus-compatible format."""
+_asset_cache_stats = metrics.registry.gauge(
+    f"{metrics.PREFIX}_email_asset_cache", "Email asset cache counters", ["stat"])
+_user_cache_stats = metrics.registry.gauge(
+    f"{metrics.PREFIX}_user_cache", "Authenticated user cache counters", ["stat"])
+_database_up = metrics.registry.gauge(f"{metrics.PREFIX}_database_up", "1 while MongoDB is connected")
+
+
+def _collect_service_metrics():
     try:
-        from .utils.health_monitor import health_monitor
+        from .services.asset_cache import asset_cache
     except ImportError:
-        from utils.health_monitor import health_monitor
+        from services.asset_cache import asset_cache
+    for name, value in asset_cache.stats().items():
+        _asset_cache_stats.set(value, stat=name)
+    for name, value in database.user_cache.stats().items():
+        _user_cache_stats.set(value, stat=name)
+    _database_up.set(1 if getattr(database, "connected", False) else 0)
+
+
+metrics.registry.add_collector(_collect_service_metrics)
+
+@api_router.get("/api/metrics")
+async def get_metrics():
+    """Process metrics in the Prometheus text exposition format.
+
+    Rendered from in-memory counters only; a scrape never samples the CPU
+    for a second or queries the database.
+    """
     try:
-        health_data = await health_monitor.get_system_health()
-        
-        # Convert to Prometheus-style metrics
-        metrics = []
-        
-        # System metrics
-        if "system" in health_data:
-            system = health_data["system"]
-            if "cpu" in system:
-                metrics.append(f"servicehub_cpu_usage_percent {system['cpu'].get('usage_percent', 0)}")
-            if "memory" in system:
-                metrics.append(f"servicehub_memory_usage_percent {system['memory'].get('usage_percent', 0)}")
-                metrics.append(f"servicehub_memory_total_bytes {system['memory'].get('total_gb', 0) * 1024**3}")
-            if "disk" in system:
-                metrics.append(f"servicehub_disk_usage_percent {system['disk'].get('usage_percent', 0)}")
-        
-        # Database metrics
-        if "database" in health_data and health_data["database"].get("status") == "healthy":
-            db = health_data["database"]
-            metrics.append(f"servicehub_database_connection_time_ms {db.get('connection_time_ms', 0)}")
-            metrics.append(f"servicehub_database_size_bytes {db.get('database_size_mb', 0) * 1024**2}")
-        
-        # Uptime
-        if "uptime" in health_data:
-            metrics.append(f"servicehub_uptime_seconds {health_data['uptime'].get('seconds', 0)}")
-        
-        return {"metrics": metrics, "format": "prometheus"}
-        
+        return Response(metrics.registry.render(), media_type=metrics.PROMETHEUS_CONTENT_TYPE)
     except Exception as e:
         logger.error("Metrics retrieval failed", extra={"error": str(e)})
         raise HTTPException(status_code=500, detail="Metrics retrieval failed")
@@ -364,7 +410,7 @@ async def get_jobs_summary():
         raise HTTPException(status_code=500, detail=str(e))
 
 # Include route modules
-from .routes import auth, jobs, tradespeople, quotes, reviews, stats, portfolio, interests, notifications, reviews_advanced, wallet, admin, referrals, messages
+from .routes import auth, jobs, tradespeople, quotes, reviews, stats, portfolio, interests, notifications, reviews_advanced, wallet, admin, referrals, messages, search, blobs, uploads
 
 app.include_router(auth.router)
 app.include_router(jobs.router)
@@ -384,6 +430,9 @@ app.include_router(public_content_router)
 app.include_router(jobs_management_router)
 app.include_router(referrals.router)
 app.include_router(messages.router)
+app.include_router(search.router)
+app.include_router(blobs.router)
+app.include_router(uploads.router)
 
 # Include the main api router
 app.include_router(api_router)
@@ -0,0 +1,139 @@
+import asyncio
+import base64
+import hashlib
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from sendgrid.helpers.mail import Attachment, ContentId, Disposition, FileContent, FileName, FileType
+
+from .transport import get_provider_client
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_ASSET_DIR = Path(__file__).resolve().parents[2] / "frontend" / "public"
+
+
+class AssetCache:
+    """Process-wide cache of email template assets (e.g. the inline logo).
+
+    Each asset is read from a local directory when a file with the same name
+    exists (EMAIL_ASSET_DIRS, default frontend/public), otherwise fetched once
+    over HTTP. The base64 payload and a prebuilt inline SendGrid Attachment are
+    kept in memory and shared by every send. After EMAIL_ASSET_TTL_SEC the
+    asset is revalidated with If-None-Match / If-Modified-Since; a failed
+    revalidation keeps serving the cached copy.
+    """
+
+    def __init__(self):
+        self.ttl_seconds = float(os.getenv("EMAIL_ASSET_TTL_SEC", "3600"))
+        dirs = os.getenv("EMAIL_ASSET_DIRS")
+        self.asset_dirs: List[Path] = [Path(d) for d in dirs.split(os.pathsep) if d] if dirs else [_DEFAULT_ASSET_DIR]
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.counters = {"hits": 0, "misses": 0, "revalidated": 0, "not_modified": 0, "errors": 0}
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.counters, "entries": len(self._entries)}
+
+    def clear(self):
+        self._entries.clear()
+
+    async def get_inline_attachment(self, url: str, content_id: str = "logo") -> Optional[Attachment]:
+        """Shared inline Attachment for `url`, or None if the asset can't be loaded"""
+        entry = await self.get(url)
+        if entry is None:
+            return None
+        attachment = entry["attachments"].get(content_id)
+        if attachment is None:
+            attachment = Attachment()
+            attachment.file_content = FileContent(entry["encoded"])
+            attachment.file_type = FileType(entry["content_type"])
+            attachment.file_name = FileName(entry["file_name"])
+            attachment.disposition = Disposition("inline")
+            attachment.content_id = ContentId(content_id)
+            entry["attachments"][content_id] = attachment
+        return attachment
+
+    async def get(self, url: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(url)
+        if entry is not None and entry["expires_at"] > time.time():
+            self.counters["hits"] += 1
+            return entry
+        lock = self._locks.setdefault(url, asyncio.Lock())
+        async with lock:
+            # Another caller may have loaded it while we waited
+            entry = self._entries.get(url)
+            if entry is not None and entry["expires_at"] > time.time():
+                self.counters["hits"] += 1
+                return entry
+            if entry is None:
+                self.counters["misses"] += 1
+            else:
+                self.counters["revalidated"] += 1
+            try:
+                entry = self._load_local(url) or await self._fetch(url, entry)
+            except Exception as e:
+                self.counters["errors"] += 1
+                logger.warning(f"Email asset load failed for {url}: {e}")
+                if entry is not None:
+                    entry["expires_at"] = time.time() + min(self.ttl_seconds, 60.0)
+            if entry is not None:
+                self._entries[url] = entry
+            return entry
+
+    def _local_path(self, url: str) -> Optional[Path]:
+        name = os.path.basename(urlparse(url).path)
+        if not name:
+            return None
+        for directory in self.asset_dirs:
+            path = directory / name
+            if path.is_file():
+                return path
+        return None
+
+    def _load_local(self, url: str) -> Optional[Dict[str, Any]]:
+        path = self._local_path(url)
+        if path is None:
+            return None
+        data = path.read_bytes()
+        content_type = "image/png" if path.suffix.lower() == ".png" else "application/octet-stream"
+        return self._entry(url, data, content_type, etag=hashlib.sha256(data).hexdigest(), last_modified=None)
+
+    async def _fetch(self, url: str, cached: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        headers = {}
+        if cached is not None:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        resp = await get_provider_client("assets").get(url, headers=headers)
+        if resp.status_code == 304 and cached is not None:
+            self.counters["not_modified"] += 1
+            cached["expires_at"] = time.time() + self.ttl_seconds
+            return cached
+        if resp.status_code != 200:
+            raise RuntimeError(f"HTTP {resp.status_code}")
+        content_type = resp.headers.get("Content-Type", "image/png").split(";")[0].strip() or "image/png"
+        return self._entry(url, resp.content, content_type,
+                           etag=resp.headers.get("ETag"), last_modified=resp.headers.get("Last-Modified"))
+
+    def _entry(self, url: str, data: bytes, content_type: str, etag: Optional[str],
+               last_modified: Optional[str]) -> Dict[str, Any]:
+        return {
+            "url": url,
+            "encoded": base64.b64encode(data).decode("ascii"),
+            "content_type": content_type,
+            "file_name": os.path.basename(urlparse(url).path) or "asset",
+            "size": len(data),
+            "etag": etag,
+            "last_modified": last_modified,
+            "expires_at": time.time() + self.ttl_seconds,
+            "attachments": {},
+        }
+
+
+asset_cache = AssetCache()
@@ -0,0 +1,192 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SHA256_HEX = re.compile(r"^[0-9a-f]{64}$")
+
+# Magic numbers of the file types users upload; anything else is served as octet-stream
+_SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"%PDF", "application/pdf"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/msword"),
+    (b"PK\x03\x04", "application/zip"),
+]
+
+
+def sniff_content_type(data: bytes, default: Optional[str] = "application/octet-stream") -> Optional[str]:
+    for signature, content_type in _SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return default
+
+
+def blob_url(ref: Optional[Dict[str, Any]]) -> Optional[str]:
+    return f"/api/blobs/{ref['sha256']}" if ref and ref.get("sha256") else None
+
+
+class LocalBlobBackend:
+    """Blobs as files under `root`, fanned out as ab/cd/<sha256>"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4] / key
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(self.path_for(key).exists)
+
+    async def write(self, key: str, data: bytes):
+        await asyncio.to_thread(self._write, key, data)
+
+    def _write(self, key: str, data: bytes):
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so a concurrent reader never sees a partial blob
+        tmp = path.with_name(f".{key}.{uuid.uuid4().hex}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    async def read(self, key: str) -> Optional[bytes]:
+        path = self.path_for(key)
+        try:
+            return await asyncio.to_thread(path.read_bytes)
+        except FileNotFoundError:
+            return None
+
+    async def delete(self, key: str):
+        try:
+            await asyncio.to_thread(self.path_for(key).unlink)
+        except FileNotFoundError:
+            pass
+
+
+class GridFSBlobBackend:
+    """Blobs in a GridFS bucket of the application database, stored under their hash as filename"""
+
+    def __init__(self, database_getter: Callable[[], Any], bucket_name: str = "blob_data"):
+        self._get_db = database_getter
+        self.bucket_name = bucket_name
+
+    def path_for(self, key: str) -> Optional[Path]:
+        return None
+
+    def _bucket(self):
+        from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+        db = self._get_db()
+        if db is None:
+            raise RuntimeError("Database unavailable: blob store not accessible")
+        return AsyncIOMotorGridFSBucket(db, bucket_name=self.bucket_name)
+
+    async def exists(self, key: str) -> bool:
+        db = self._get_db()
+        if db is None:
+            raise RuntimeError("Database unavailable: blob store not accessible")
+        return await db[f"{self.bucket_name}.files"].find_one({"filename": key}, {"_id": 1}) is not None
+
+    async def write(self, key: str, data: bytes):
+        await self._bucket().upload_from_stream(key, data)
+
+    async def read(self, key: str) -> Optional[bytes]:
+        from gridfs.errors import NoFile
+        try:
+            stream = await self._bucket().open_download_stream_by_name(key)
+        except NoFile:
+            return None
+        return await stream.read()
+
+    async def delete(self, key: str):
+        db = self._get_db()
+        if db is None:
+            raise RuntimeError("Database unavailable: blob store not accessible")
+        bucket = self._bucket()
+        async for f in db[f"{self.bucket_name}.files"].find({"filename": key}, {"_id": 1}):
+            await bucket.delete(f["_id"])
+
+
+class BlobStore:
+    """Content-addressed storage for uploaded files.
+
+    Blobs are keyed by the SHA-256 of their bytes, so identical uploads are
+    stored once and a key never changes meaning, which lets them be served
+    with the hash as a strong ETag and cached forever. Bytes live in a
+    backend chosen by BLOB_STORE_BACKEND: `local` (files under
+    BLOB_STORE_DIR, default uploads/blobs) or `gridfs`. Size, content type
+    and upload count of each blob are kept in the `blobs` collection, with
+    the ids of the users who uploaded it (`owners`); only they and admins
+    may read it back through /api/blobs. Documents hold only the reference
+    returned by `put()`.
+    """
+
+    def __init__(self, database_getter: Callable[[], Any], backend=None):
+        self._get_db = database_getter
+        if backend is None:
+            if os.getenv("BLOB_STORE_BACKEND", "local").lower() == "gridfs":
+                backend = GridFSBlobBackend(database_getter)
+            else:
+                uploads = os.environ.get("UPLOADS_DIR", os.path.join(os.getcwd(), "uploads"))
+                backend = LocalBlobBackend(Path(os.getenv("BLOB_STORE_DIR", os.path.join(uploads, "blobs"))))
+        self.backend = backend
+        self.counters = {"stored": 0, "deduplicated": 0}
+
+    def _collection(self):
+        db = self._get_db()
+        if db is None:
+            raise RuntimeError("Database unavailable: blob store not accessible")
+        return db.blobs
+
+    async def put(self, data: bytes, content_type: Optional[str] = None,
+                  filename: Optional[str] = None, owner_id: Optional[str] = None) -> Dict[str, Any]:
+        """Store `data` unless an identical blob exists and return its reference"""
+        key = hashlib.sha256(data).hexdigest()
+        content_type = content_type or sniff_content_type(data)
+        if await self.backend.exists(key):
+            self.counters["deduplicated"] += 1
+        else:
+            await self.backend.write(key, data)
+            self.counters["stored"] += 1
+        now = datetime.utcnow()
+        update = {"$setOnInsert": {"size": len(data), "content_type": content_type, "created_at": now},
+                  "$set": {"last_uploaded_at": now}, "$inc": {"uploads": 1}}
+        if owner_id:
+            update["$addToSet"] = {"owners": owner_id}
+        await self._collection().update_one({"_id": key}, update, upsert=True)
+        return {"sha256": key, "size": len(data), "content_type": content_type, "filename": filename}
+
+    async def stat(self, key: str) -> Optional[Dict[str, Any]]:
+        if not SHA256_HEX.match(key or ""):
+            return None
+        return await self._collection().find_one({"_id": key})
+
+    @staticmethod
+    def is_owner(meta: Dict[str, Any], user_id: Optional[str]) -> bool:
+        return bool(user_id) and user_id in (meta.get("owners") or [])
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if not SHA256_HEX.match(key or ""):
+            return None
+        return await self.backend.read(key)
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Path of the blob on disk when the backend keeps one (for FileResponse)"""
+        if not SHA256_HEX.match(key or ""):
+            return None
+        return self.backend.path_for(key)
+
+    async def delete(self, key: str):
+        await self.backend.delete(key)
+        await self._collection().delete_one({"_id": key})
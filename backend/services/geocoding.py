@@ -0,0 +1,302 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+from pymongo import ReturnDocument
+
+try:
+    from ..utils.metrics import observe_outbound
+except ImportError:
+    from utils.metrics import observe_outbound
+
+logger = logging.getLogger(__name__)
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+
+# Sentinel for "nothing cached" (a cached miss is stored as None)
+_MISS = object()
+
+_NON_ALNUM = re.compile(r"[\W_]+")
+
+
+def normalize_location_text(s: Optional[str]) -> str:
+    """Lowercase, replace punctuation with spaces and collapse whitespace"""
+    return " ".join(_NON_ALNUM.sub(" ", (s or "").lower()).split())
+
+
+class TokenBucket:
+    """Token bucket rate limiter shared by all workers through one Mongo document.
+
+    Refill and consume happen in a single atomic pipeline update on the
+    `rate_limits` collection. When the database is unavailable the bucket is
+    kept in process instead.
+    """
+
+    def __init__(self, name: str, rate_per_min: float, capacity: float,
+                 database_getter: Callable[[], Any]):
+        self.name = name
+        self.rate_per_sec = float(rate_per_min) / 60.0
+        self.capacity = max(1.0, float(capacity))
+        self._get_db = database_getter
+        self._tokens = self.capacity
+        self._ts = time.time()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> bool:
+        """Take one token; returns False when the bucket is empty"""
+        db = self._get_db()
+        if db is not None:
+            try:
+                return await self._acquire_shared(db)
+            except Exception as e:
+                logger.warning(f"Shared rate limiter unavailable, using local bucket: {e}")
+        return await self._acquire_local()
+
+    async def wait(self, timeout: float) -> bool:
+        """Block until a token is available or `timeout` seconds have passed"""
+        deadline = time.time() + timeout
+        while True:
+            if await self.acquire():
+                return True
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(1.0 / max(self.rate_per_sec, 1e-3), remaining))
+
+    async def _acquire_shared(self, db) -> bool:
+        now = time.time()
+        elapsed = {"$max": [0, {"$subtract": [now, {"$ifNull": ["$ts", now]}]}]}
+        pipeline = [
+            {"$set": {
+                "tokens": {"$min": [
+                    self.capacity,
+                    {"$add": [{"$ifNull": ["$tokens", self.capacity]}, {"$multiply": [elapsed, self.rate_per_sec]}]},
+                ]},
+                "ts": now,
+            }},
+            {"$set": {"granted": {"$gte": ["$tokens", 1]}}},
+            {"$set": {"tokens": {"$cond": ["$granted", {"$subtract": ["$tokens", 1]}, "$tokens"]}}},
+        ]
+        doc = await db.rate_limits.find_one_and_update(
+            {"_id": self.name},
+            pipeline,
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return bool(doc and doc.get("granted"))
+
+    async def _acquire_local(self) -> bool:
+        async with self._lock:
+            now = time.time()
+            self._tokens = min(self.capacity, self._tokens + (now - self._ts) * self.rate_per_sec)
+            self._ts = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+class GeocodingService:
+    """Async Nominatim geocoder with a persistent cache and request coalescing.
+
+    - Pooled keep-alive httpx client, so lookups never block the event loop.
+    - Results (including misses) are cached in the `geocode_cache` collection,
+      expired by a TTL index, with a small in-process LRU in front of it.
+    - Concurrent lookups for the same normalized text share one request.
+    - Outbound requests go through a TokenBucket shared across workers.
+    """
+
+    def __init__(self, database_getter: Callable[[], Any],
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self._get_db = database_getter
+        self.base_url = os.getenv("GEOCODER_URL", NOMINATIM_URL)
+        self.user_agent = os.getenv("GEOCODER_UA", "ServiceHub/1.0")
+        self.timeout = float(os.getenv("GEOCODER_TIMEOUT_SEC", "5"))
+        self.ttl_days = int(os.getenv("GEOCODER_CACHE_TTL_DAYS", "7"))
+        self.negative_ttl_hours = int(os.getenv("GEOCODER_NEGATIVE_TTL_HOURS", "24"))
+        self.local_cache_size = int(os.getenv("GEOCODER_LOCAL_CACHE_SIZE", "2048"))
+        self.wait_timeout = float(os.getenv("GEOCODER_WAIT_TIMEOUT_SEC", "60"))
+        self.rate_limiter = TokenBucket(
+            "geocoder:nominatim",
+            rate_per_min=float(os.getenv("GEOCODER_RATE_LIMIT_PER_MIN", "30")),
+            capacity=float(os.getenv("GEOCODER_RATE_BURST", "1")),
+            database_getter=database_getter,
+        )
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._local: "OrderedDict[str, Tuple[float, Optional[Dict[str, float]]]]" = OrderedDict()
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                headers={"User-Agent": self.user_agent},
+                limits=httpx.Limits(max_connections=4, max_keepalive_connections=2),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def geocode(self, text: Optional[str], wait: bool = False) -> Optional[Dict[str, float]]:
+        """Resolve free-form Nigerian location text to {"latitude", "longitude"}.
+
+        By default a lookup that would exceed the rate limit returns None at
+        once; background jobs pass `wait=True` to queue for a token instead.
+        """
+        return (await self.lookup(text, wait=wait))[1]
+
+    async def lookup(self, text: Optional[str], wait: bool = False) -> Tuple[bool, Optional[Dict[str, float]]]:
+        """geocode() plus whether the answer is definitive.
+
+        `(True, None)` means the provider (or the cache) found nothing;
+        `(False, None)` means the lookup was refused by the rate limiter or
+        failed, and is worth retrying later.
+        """
+        key = normalize_location_text(text)
+        if not key:
+            return True, None
+        hit = self._local_get(key)
+        if hit is not _MISS:
+            return True, hit
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._resolve(key, text, wait))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+        try:
+            # Shield so one cancelled caller doesn't cancel the lookup for the others
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Geocoding failed for '{key}': {e}")
+            return False, None
+
+    async def _resolve(self, key: str, text: str, wait: bool = False) -> Tuple[bool, Optional[Dict[str, float]]]:
+        cached = await self._cache_get(key)
+        if cached is not _MISS:
+            self._local_put(key, cached, self._ttl_seconds(cached))
+            return True, cached
+        granted = await (self.rate_limiter.wait(self.wait_timeout) if wait else self.rate_limiter.acquire())
+        if not granted:
+            return False, None
+        ok, coords = await self._fetch(text)
+        if ok:
+            await self._cache_put(key, coords)
+            self._local_put(key, coords, self._ttl_seconds(coords))
+        return ok, coords
+
+    async def _fetch(self, text: str) -> Tuple[bool, Optional[Dict[str, float]]]:
+        """Query the provider; `ok` is False on transport/HTTP errors so they aren't cached"""
+        params = {"q": text, "format": "json", "limit": 1, "countrycodes": "ng"}
+        started = time.perf_counter()
+        try:
+            resp = await self._http().get(self.base_url, params=params)
+        except httpx.HTTPError as e:
+            observe_outbound("nominatim", started)
+            logger.warning(f"Geocoder request error: {e}")
+            return False, None
+        observe_outbound("nominatim", started, resp.status_code)
+        if resp.status_code != 200:
+            logger.warning(f"Geocoder HTTP {resp.status_code} for '{text}'")
+            return False, None
+        try:
+            data = resp.json()
+            if isinstance(data, list) and data:
+                item = data[0]
+                return True, {"latitude": float(item.get("lat")), "longitude": float(item.get("lon"))}
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Geocoder returned unexpected payload: {e}")
+            return False, None
+        return True, None
+
+    def _ttl_seconds(self, coords: Optional[Dict[str, float]]) -> float:
+        if coords is None:
+            return self.negative_ttl_hours * 3600.0
+        return self.ttl_days * 86400.0
+
+    def _local_get(self, key: str):
+        entry = self._local.get(key)
+        if entry is None:
+            return _MISS
+        expires, coords = entry
+        if expires < time.time():
+            self._local.pop(key, None)
+            return _MISS
+        self._local.move_to_end(key)
+        return coords
+
+    def _local_put(self, key: str, coords: Optional[Dict[str, float]], ttl_seconds: float):
+        self._local[key] = (time.time() + ttl_seconds, coords)
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_cache_size:
+            self._local.popitem(last=False)
+
+    async def _cache_get(self, key: str):
+        db = self._get_db()
+        if db is None:
+            return _MISS
+        try:
+            doc = await db.geocode_cache.find_one({"_id": key})
+        except Exception as e:
+            logger.warning(f"Geocode cache read failed: {e}")
+            return _MISS
+        # The TTL monitor runs once a minute, so re-check expiry here
+        if not doc or (doc.get("expires_at") and doc["expires_at"] < datetime.utcnow()):
+            return _MISS
+        if not doc.get("found"):
+            return None
+        return {"latitude": float(doc["latitude"]), "longitude": float(doc["longitude"])}
+
+    async def _cache_put(self, key: str, coords: Optional[Dict[str, float]]):
+        db = self._get_db()
+        if db is None:
+            return
+        now = datetime.utcnow()
+        doc = {
+            "found": coords is not None,
+            "latitude": coords["latitude"] if coords else None,
+            "longitude": coords["longitude"] if coords else None,
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=self._ttl_seconds(coords)),
+        }
+        try:
+            await db.geocode_cache.update_one({"_id": key}, {"$set": doc}, upsert=True)
+        except Exception as e:
+            logger.warning(f"Geocode cache write failed: {e}")
+
+
+class StubNominatimTransport(httpx.MockTransport):
+    """Local stand-in for the Nominatim search API, for tests and offline development.
+
+    `places` maps location text to (lat, lng); unknown queries return [].
+    Use as `GeocodingService(getter, transport=StubNominatimTransport({...}))`;
+    `calls` counts the requests that reached the stub.
+    """
+
+    def __init__(self, places: Dict[str, Tuple[float, float]], status_code: int = 200):
+        self.places = {normalize_location_text(k): v for k, v in places.items()}
+        self.status_code = status_code
+        self.calls = 0
+        super().__init__(self._handle)
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        if self.status_code != 200:
+            return httpx.Response(self.status_code, json={"error": "stub failure"})
+        q = normalize_location_text(request.url.params.get("q"))
+        if q in self.places:
+            lat, lng = self.places[q]
+            return httpx.Response(200, json=[{"lat": str(lat), "lon": str(lng), "display_name": q}])
+        return httpx.Response(200, json=[])
@@ -0,0 +1,152 @@
+import asyncio
+import io
+import logging
+import math
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Longest side of each rendition; "full" is capped per upload type by max_size
+RENDITION_SIZES = {"thumb": 320, "medium": 800, "full": 1200}
+FORMATS = {"jpeg": ("JPEG", ".jpg"), "webp": ("WEBP", ".webp")}
+MEDIA_TYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".webp": "image/webp",
+               ".gif": "image/gif", ".pdf": "application/pdf"}
+
+
+class ImageProcessingError(ValueError):
+    """The upload could not be decoded as an image"""
+
+
+def media_type_for(path: str) -> str:
+    return MEDIA_TYPES.get(os.path.splitext(path)[1].lower(), "application/octet-stream")
+
+
+def render_renditions(data: bytes, sizes: Dict[str, int], formats: Iterable[str] = ("jpeg", "webp"),
+                      quality: int = 85) -> Dict[str, Dict[str, Any]]:
+    """Decode once and encode every rendition; runs inside the worker pool.
+
+    JPEGs are decoded with draft() straight to the smallest DCT scale that is
+    still at least as large as the biggest rendition, which skips most of the
+    decode work for phone photos. Renditions are then resampled largest
+    first, each from the previous one.
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+        largest = max(sizes.values())
+        if image.format == "JPEG" and max(image.size) > largest:
+            scale = largest / max(image.size)
+            image.draft("RGB", (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.split()[-1])
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+    except Exception as e:
+        raise ImageProcessingError(f"Invalid image file: {e}") from e
+
+    renditions: Dict[str, Dict[str, Any]] = {}
+    for name, size in sorted(sizes.items(), key=lambda item: -item[1]):
+        if image.width > size or image.height > size:
+            image = image.copy()
+            image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        encoded = {}
+        for fmt in formats:
+            output = io.BytesIO()
+            pil_format = FORMATS[fmt][0]
+            if pil_format == "JPEG":
+                image.save(output, format=pil_format, quality=quality, optimize=True, progressive=True)
+            else:
+                image.save(output, format=pil_format, quality=quality, method=4)
+            encoded[fmt] = output.getvalue()
+        renditions[name] = {"width": image.width, "height": image.height, "data": encoded}
+    return renditions
+
+
+class ImagePipeline:
+    """Decode/resize/encode uploads off the event loop.
+
+    Work runs in a process pool (IMAGE_WORKERS processes, default up to 2) so a
+    large photo never blocks other requests on the worker, or in a thread pool
+    when IMAGE_POOL=thread. Every upload yields thumb/medium/full renditions in
+    JPEG and WebP from a single decode.
+    """
+
+    def __init__(self):
+        self.workers = int(os.getenv("IMAGE_WORKERS", str(min(2, os.cpu_count() or 1))))
+        self.pool_kind = os.getenv("IMAGE_POOL", "process").lower()
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.pool_kind == "thread":
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="image")
+            else:
+                # spawn: forking a process that runs an event loop and client threads is unsafe
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def render(self, data: bytes, max_size: int = RENDITION_SIZES["full"], quality: int = 85,
+                     renditions: Iterable[str] = RENDITION_SIZES,
+                     formats: Iterable[str] = ("jpeg", "webp")) -> Dict[str, Dict[str, Any]]:
+        sizes = {name: min(RENDITION_SIZES[name], max_size) if name != "full" else max_size for name in renditions}
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            return await loop.run_in_executor(executor, render_renditions, data, sizes, tuple(formats), quality)
+        except BrokenProcessPool as e:
+            # A worker died (e.g. killed for memory on a decompression bomb); start a fresh pool next time
+            logger.error(f"Image worker pool broke, recreating it: {e}")
+            if self._executor is executor:
+                self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise ImageProcessingError("Image could not be processed") from e
+
+    async def save(self, data: bytes, directory: Path, url_prefix: str, stem: str,
+                   max_size: int = RENDITION_SIZES["full"], quality: int = 85,
+                   renditions: Iterable[str] = RENDITION_SIZES) -> Dict[str, Any]:
+        """Render `data` and write every rendition next to each other in `directory`.
+
+        The full JPEG is written as `<stem>.jpg` so existing image URLs keep
+        working; the others as `<stem>_<rendition>.<ext>`. Returns the full
+        JPEG's filename, url and bytes plus the url and size of each rendition.
+        """
+        rendered = await self.render(data, max_size=max_size, quality=quality, renditions=renditions)
+        files: Dict[str, bytes] = {}
+        result: Dict[str, Any] = {"renditions": {}}
+        for name, rendition in rendered.items():
+            entry = {"width": rendition["width"], "height": rendition["height"]}
+            for fmt, encoded in rendition["data"].items():
+                filename = f"{stem}{FORMATS[fmt][1]}" if (name, fmt) == ("full", "jpeg") else f"{stem}_{name}{FORMATS[fmt][1]}"
+                files[filename] = encoded
+                entry[fmt] = f"{url_prefix}{filename}"
+            result["renditions"][name] = entry
+        if "full" in rendered:
+            result.update(filename=f"{stem}.jpg", url=f"{url_prefix}{stem}.jpg", bytes=rendered["full"]["data"]["jpeg"])
+        await asyncio.to_thread(_write_files, Path(directory), files)
+        return result
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def _write_files(directory: Path, files: Dict[str, bytes]):
+    directory.mkdir(parents=True, exist_ok=True)
+    for filename, data in files.items():
+        with open(directory / filename, "wb") as f:
+            f.write(data)
+
+
+image_pipeline = ImagePipeline()
@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import os
+import random
+import re
+import traceback
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..database import database
+from ..models.notifications import (
+    NotificationType, NotificationChannel, NotificationPreferences,
+    Notification, NotificationStatus
+)
+from .job_queue import QueuedTask
+from .notifications import notification_service
+
+logger = logging.getLogger(__name__)
+
+NEW_MATCHING_JOB_TASK = "new_matching_job"
+
+FANOUT_BATCH_SIZE = int(os.getenv("MATCHING_JOB_BATCH_SIZE", "200"))
+FANOUT_CONCURRENCY = int(os.getenv("MATCHING_JOB_SEND_CONCURRENCY", "20"))
+FANOUT_SEND_ATTEMPTS = int(os.getenv("MATCHING_JOB_SEND_ATTEMPTS", "3"))
+FANOUT_RETRY_BASE_SEC = float(os.getenv("MATCHING_JOB_RETRY_BASE_SEC", "1"))
+
+CATEGORY_SYNONYMS = {
+    "plumbing": ["plumber", "plumbing", "pipe", "leak", "sanitary"],
+    "electrical repairs": ["electrician", "electrical", "wiring", "power"],
+    "tiling": ["tiler", "tiling", "tiles"],
+    "painting": ["painter", "painting", "paint"],
+    "carpentry": ["carpenter", "carpentry"],
+    "furniture making": ["furniture", "furniture maker"],
+    "interior design": ["interior", "design", "interior designer"],
+    "air conditioning & refrigeration": ["air conditioning", "ac", "hvac", "refrigeration"],
+    "generator services": ["generator", "gen", "genset"],
+    "solar & inverter installation": ["solar", "inverter", "pv", "solar panel"],
+    "cctv & security systems": ["cctv", "security", "surveillance"],
+    "locksmithing": ["locksmith", "locks"],
+    "roofing": ["roofer", "roofing", "roof"],
+    "plastering/pop": ["plaster", "pop"],
+    "door & window installation": ["door", "window", "installer"],
+    "bathroom fitting": ["bathroom", "toilet", "sanitary"],
+    "flooring": ["floor", "flooring"],
+    "welding": ["welder", "welding"],
+    "cleaning": ["cleaner", "cleaning"],
+    "relocation/moving": ["relocation", "moving", "mover"],
+    "waste disposal": ["waste", "disposal", "trash"],
+    "recycling": ["recycle", "recycling"],
+    "building": ["builder", "building", "construction"],
+    "concrete works": ["concrete", "masonry", "cement"]
+}
+
+# Only the fields the fan-out reads are loaded for each recipient
+RECIPIENT_PROJECTION = {
+    "_id": 0, "id": 1, "name": 1, "business_name": 1, "email": 1, "phone": 1,
+    "location_point": 1, "travel_distance_km": 1,
+}
+
+
+def matching_tradespeople_filter(category: str) -> Dict[str, Any]:
+    """Users query for tradespeople whose trades or profession match `category`"""
+    synonyms = set([category])
+    synonyms.update(CATEGORY_SYNONYMS.get(category.strip().lower(), []))
+    alternation = "|".join(sorted({re.escape(s) for s in synonyms}))
+    pattern = f"({alternation})"
+    return {
+        "role": "tradesperson",
+        "status": {"$ne": "deleted"},
+        "$or": [
+            {"trade_categories": {"$regex": pattern, "$options": "i"}},
+            {"profession": {"$regex": pattern, "$options": "i"}},
+        ],
+    }
+
+
+async def enqueue_new_matching_job(job: dict) -> Optional[str]:
+    """Queue NEW_MATCHING_JOB alerts for a job; a queue worker does the fan-out"""
+    if not job.get("id") or not job.get("category"):
+        return None
+    task_id = await database.job_queue.enqueue(
+        NEW_MATCHING_JOB_TASK, {"job_id": job["id"]}, ref=job["id"]
+    )
+    logger.info(f"NEW_MATCHING_JOB: queued task {task_id} for job {job['id']}")
+    return task_id
+
+
+def _template_data(job: dict, tp: dict, miles: Optional[float]) -> Dict[str, Any]:
+    frontend_url = os.environ.get("FRONTEND_URL", "https://servicehub.ng")
+    return {
+        "Name": tp.get("business_name") or tp.get("name", "Tradesperson"),
+        "trade_title": job.get("title", "Job"),
+        "trade_category": job.get("category", ""),
+        "Location": job.get("location", ""),
+        "miles": f"{miles} miles" if miles is not None else "",
+        "logo_url": f"{frontend_url}/Logo-Icon-Green.png",
+        "see_more_url": f"{frontend_url}/browse-jobs",
+        "job_url": f"{frontend_url}/browse-jobs?job_id={job.get('id')}",
+        "support_url": f"{frontend_url}/help-faqs",
+        "preferences_url": f"{frontend_url}/notifications/preferences",
+        "privacy_url": f"{frontend_url}/policies/privacy",
+        "terms_url": f"{frontend_url}/policies/terms"
+    }
+
+
+def _distance_miles(job: dict, tp: dict) -> Tuple[bool, Optional[float]]:
+    """(within travel distance, miles); coordinates are resolved at write time"""
+    job_point = job.get("location_point") or {}
+    tp_point = tp.get("location_point") or {}
+    try:
+        if job_point.get("coordinates") and tp_point.get("coordinates"):
+            jlng, jlat = job_point["coordinates"]
+            tlng, tlat = tp_point["coordinates"]
+            km = database.calculate_distance(tlat, tlng, jlat, jlng)
+            max_km = float(tp.get("travel_distance_km", 25))
+            if km > max_km:
+                logger.info(
+                    "NEW_MATCHING_JOB: skipped tradesperson %s due to distance %.1f km > max %.1f km",
+                    tp.get("id"), km, max_km,
+                )
+                return False, None
+            return True, round(km * 0.621, 1)
+    except Exception:
+        pass
+    return True, None
+
+
+async def _send_with_retry(tp: dict, template_data: Dict[str, Any],
+                           preferences: NotificationPreferences) -> Notification:
+    for attempt in range(1, FANOUT_SEND_ATTEMPTS + 1):
+        try:
+            return await notification_service.send_notification(
+                user_id=tp["id"],
+                notification_type=NotificationType.NEW_MATCHING_JOB,
+                template_data=template_data,
+                user_preferences=preferences,
+                recipient_email=tp.get("email"),
+                recipient_phone=tp.get("phone")
+            )
+        except Exception:
+            if attempt == FANOUT_SEND_ATTEMPTS:
+                raise
+            await asyncio.sleep(FANOUT_RETRY_BASE_SEC * (2 ** (attempt - 1)) * random.uniform(0.8, 1.2))
+
+
+async def _notify_one(job: dict, tp: dict, preferences: NotificationPreferences,
+                      semaphore: asyncio.Semaphore) -> Tuple[str, Optional[Notification]]:
+    """Send to one tradesperson; returns (outcome, notification record to store)"""
+    tp_id = tp.get("id")
+    within, miles = _distance_miles(job, tp)
+    if not within:
+        return "skipped", None
+    if not tp.get("email") and not tp.get("phone"):
+        logger.info("Skipping tradesperson %s: no contact info for NEW_MATCHING_JOB", tp_id)
+        return "skipped", None
+    template_data = _template_data(job, tp, miles)
+    try:
+        async with semaphore:
+            notification = await _send_with_retry(tp, template_data, preferences)
+        return "sent", notification
+    except Exception as e:
+        logger.error(
+            "❌ FAILED to send matching job notification to tradesperson %s (email: %s, phone: %s) for job %s. "
+            "Preference channel: %s. Error: %s",
+            tp_id, tp.get("email"), tp.get("phone"), job.get("id"),
+            getattr(preferences, "new_matching_job", "unknown"), str(e)
+        )
+        logger.error(f"Error traceback:\n{traceback.format_exc()}")
+        # Store failed notification record for tracking
+        return "failed", Notification(
+            id=str(uuid.uuid4()),
+            user_id=tp_id,
+            type=NotificationType.NEW_MATCHING_JOB,
+            channel=getattr(preferences, "new_matching_job", NotificationChannel.EMAIL),
+            recipient_email=tp.get("email"),
+            recipient_phone=tp.get("phone"),
+            subject=f"New Job: {job.get('title', 'Job')}",
+            content=f"Failed to send: {str(e)}",
+            status=NotificationStatus.FAILED,
+            metadata={"error": str(e), "error_type": type(e).__name__, "job_id": job.get("id"), **template_data}
+        )
+
+
+async def fan_out_new_matching_job(task: QueuedTask):
+    """Queue handler: notify every matching tradesperson about a new job.
+
+    Recipients are read in keyset batches ordered by user id. Each batch gets
+    its preferences in one `$in` query, sends with bounded concurrency and
+    stores its notification records with one insert_many. The last finished
+    user id is saved as task progress, so a retry resumes after it.
+    """
+    job = await database.get_job_by_id(task.payload["job_id"])
+    if not job or not job.get("category"):
+        await task.save_progress(skipped_reason="job not found or has no category")
+        return
+    filters = matching_tradespeople_filter(job["category"])
+    semaphore = asyncio.Semaphore(FANOUT_CONCURRENCY)
+    last_id = task.progress.get("last_user_id")
+    while True:
+        query = {**filters, "id": {"$gt": last_id} if last_id else {"$type": "string"}}
+        batch = await database.users_collection.find(query, RECIPIENT_PROJECTION) \
+            .sort("id", 1).limit(FANOUT_BATCH_SIZE).to_list(length=FANOUT_BATCH_SIZE)
+        if not batch:
+            break
+        preferences = await database.get_notification_preferences_for_users([tp["id"] for tp in batch])
+        results = await asyncio.gather(*(
+            _notify_one(job, tp, preferences[tp["id"]], semaphore) for tp in batch
+        ))
+        records = [notification for _, notification in results if notification is not None]
+        try:
+            await database.create_notifications(records)
+        except Exception as e:
+            # Records are bookkeeping; the sends already happened, so don't retry the batch
+            logger.error(f"NEW_MATCHING_JOB: failed to store {len(records)} notification records: {e}")
+        outcomes = [outcome for outcome, _ in results]
+        last_id = batch[-1]["id"]
+        await task.save_progress(
+            inc={
+                "recipients": len(batch),
+                "sent": outcomes.count("sent"),
+                "failed": outcomes.count("failed"),
+                "skipped": outcomes.count("skipped"),
+            },
+            last_user_id=last_id,
+        )
+        logger.info(f"NEW_MATCHING_JOB: job {job.get('id')} progress {task.progress}")
+        if len(batch) < FANOUT_BATCH_SIZE:
+            break
+
+
+async def get_new_matching_job_progress(job_id: str) -> List[Dict[str, Any]]:
+    """Fan-out tasks for a job, newest first, with their progress counters"""
+    tasks = await database.job_queue.list_tasks(kind=NEW_MATCHING_JOB_TASK, ref=job_id)
+    return [
+        {
+            "task_id": t["_id"],
+            "status": t.get("status"),
+            "attempts": t.get("attempts", 0),
+            "progress": t.get("progress", {}),
+            "last_error": t.get("last_error"),
+            "created_at": t.get("created_at"),
+            "completed_at": t.get("completed_at"),
+        }
+        for t in tasks
+    ]
+
+
+database.job_queue.register(NEW_MATCHING_JOB_TASK, fan_out_new_matching_job)
@@ -0,0 +1,285 @@
+import asyncio
+import logging
+import os
+import random
+import socket
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueuedTask:
+    """Handle passed to task handlers for reading and saving progress.
+
+    `progress` holds whatever the handler saved on an earlier attempt, so a
+    retried task can resume (e.g. from the last completed batch). Saving
+    progress also renews the worker's lease on the task.
+    """
+
+    def __init__(self, queue: "JobQueue", doc: Dict[str, Any]):
+        self._queue = queue
+        self.id = doc["_id"]
+        self.kind = doc["kind"]
+        self.payload = doc.get("payload") or {}
+        self.attempts = doc.get("attempts", 0)
+        self.max_attempts = doc.get("max_attempts", 1)
+        self.progress: Dict[str, Any] = dict(doc.get("progress") or {})
+
+    async def save_progress(self, inc: Optional[Dict[str, int]] = None, **fields):
+        for key, value in (inc or {}).items():
+            self.progress[key] = self.progress.get(key, 0) + value
+        self.progress.update(fields)
+        await self._queue._save_progress(self.id, self.progress)
+
+
+class JobQueue:
+    """Durable background task queue stored in the `job_queue` collection.
+
+    Web workers `enqueue()` tasks; any number of queue workers claim them
+    with an atomic find_one_and_update and a time-limited lease, renewed
+    while the handler runs, so a task from a crashed worker is picked up
+    again once its lease expires.
+    Failed tasks are retried with exponential backoff up to `max_attempts`.
+    Delivery is at-least-once: handlers should save progress as they go.
+    """
+
+    def __init__(self, database_getter: Callable[[], Any]):
+        self._get_db = database_getter
+        self.lease_seconds = float(os.getenv("JOB_QUEUE_LEASE_SEC", "300"))
+        self.poll_interval = float(os.getenv("JOB_QUEUE_POLL_SEC", "2"))
+        self.max_attempts = int(os.getenv("JOB_QUEUE_MAX_ATTEMPTS", "5"))
+        self.retry_base_seconds = float(os.getenv("JOB_QUEUE_RETRY_BASE_SEC", "30"))
+        self.retry_max_seconds = float(os.getenv("JOB_QUEUE_RETRY_MAX_SEC", "3600"))
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._handlers: Dict[str, Callable[[QueuedTask], Awaitable[Any]]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def register(self, kind: str, handler: Callable[[QueuedTask], Awaitable[Any]]):
+        self._handlers[kind] = handler
+
+    @property
+    def kinds(self) -> List[str]:
+        return list(self._handlers)
+
+    def _collection(self):
+        db = self._get_db()
+        if db is None:
+            raise RuntimeError("Database unavailable: job queue not accessible")
+        return db.job_queue
+
+    async def enqueue(self, kind: str, payload: Dict[str, Any], ref: Optional[str] = None,
+                      delay_seconds: float = 0, max_attempts: Optional[int] = None) -> str:
+        """Persist a task and return its id; `ref` is a lookup key such as a job id"""
+        now = datetime.utcnow()
+        task_id = str(uuid.uuid4())
+        await self._collection().insert_one({
+            "_id": task_id,
+            "kind": kind,
+            "ref": ref,
+            "payload": payload,
+            "status": QUEUED,
+            "attempts": 0,
+            "max_attempts": max_attempts or self.max_attempts,
+            "run_at": now + timedelta(seconds=delay_seconds),
+            "locked_by": None,
+            "locked_until": None,
+            "progress": {},
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now,
+            "completed_at": None,
+        })
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return task_id
+
+    async def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        return await self._collection().find_one({"_id": task_id})
+
+    async def list_tasks(self, kind: Optional[str] = None, ref: Optional[str] = None,
+                         status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        query: Dict[str, Any] = {}
+        if kind:
+            query["kind"] = kind
+        if ref:
+            query["ref"] = ref
+        if status:
+            query["status"] = status
+        cursor = self._collection().find(query).sort("created_at", -1).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def claim(self, kinds: Optional[Iterable[str]] = None) -> Optional[QueuedTask]:
+        """Atomically take the next due task (or one whose lease has expired)"""
+        now = datetime.utcnow()
+        query: Dict[str, Any] = {
+            "$or": [
+                {"status": QUEUED, "run_at": {"$lte": now}},
+                {"status": RUNNING, "locked_until": {"$lt": now}},
+            ],
+            "$expr": {"$lt": ["$attempts", "$max_attempts"]},
+        }
+        kinds = list(kinds or self.kinds)
+        if kinds:
+            query["kind"] = {"$in": kinds}
+        doc = await self._collection().find_one_and_update(
+            query,
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "locked_by": self.worker_id,
+                    "locked_until": now + timedelta(seconds=self.lease_seconds),
+                    "started_at": now,
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is None:
+            await self._fail_abandoned(kinds, now)
+            return None
+        return QueuedTask(self, doc)
+
+    async def _fail_abandoned(self, kinds: List[str], now: datetime):
+        """Mark FAILED the tasks whose worker died during their last allowed attempt.
+
+        claim() skips them (no attempts left), so without this they would
+        stay RUNNING with an expired lease forever.
+        """
+        query: Dict[str, Any] = {
+            "status": RUNNING,
+            "locked_until": {"$lt": now},
+            "$expr": {"$gte": ["$attempts", "$max_attempts"]},
+        }
+        if kinds:
+            query["kind"] = {"$in": kinds}
+        result = await self._collection().update_many(query, {"$set": {
+            "status": FAILED,
+            "locked_by": None,
+            "locked_until": None,
+            "last_error": "Lease expired on the final attempt (worker stopped or crashed)",
+            "updated_at": now,
+        }})
+        if result.modified_count:
+            logger.warning(f"Marked {result.modified_count} abandoned job queue task(s) as failed")
+
+    async def _renew_lease(self, task: QueuedTask):
+        """Extend the lease every third of its length while the handler runs"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            now = datetime.utcnow()
+            try:
+                result = await self._collection().update_one(
+                    {"_id": task.id, "locked_by": self.worker_id},
+                    {"$set": {"locked_until": now + timedelta(seconds=self.lease_seconds), "updated_at": now}},
+                )
+                if not result.matched_count:
+                    logger.warning(f"Task {task.id} ({task.kind}) lease was taken over by another worker")
+            except Exception as e:
+                logger.warning(f"Lease renewal for task {task.id} failed: {e}")
+
+    async def _save_progress(self, task_id: str, progress: Dict[str, Any]):
+        now = datetime.utcnow()
+        await self._collection().update_one(
+            {"_id": task_id, "locked_by": self.worker_id},
+            {"$set": {
+                "progress": progress,
+                "locked_until": now + timedelta(seconds=self.lease_seconds),
+                "updated_at": now,
+            }},
+        )
+
+    async def _complete(self, task: QueuedTask):
+        now = datetime.utcnow()
+        await self._collection().update_one(
+            {"_id": task.id},
+            {"$set": {
+                "status": DONE,
+                "progress": task.progress,
+                "locked_by": None,
+                "locked_until": None,
+                "completed_at": now,
+                "updated_at": now,
+            }},
+        )
+
+    def _retry_delay(self, attempts: int) -> float:
+        delay = min(self.retry_max_seconds, self.retry_base_seconds * (2 ** max(0, attempts - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+    async def _fail(self, task: QueuedTask, error: Exception) -> bool:
+        now = datetime.utcnow()
+        final = task.attempts >= task.max_attempts
+        update = {
+            "status": FAILED if final else QUEUED,
+            "progress": task.progress,
+            "locked_by": None,
+            "locked_until": None,
+            "last_error": f"{type(error).__name__}: {error}",
+            "updated_at": now,
+        }
+        if not final:
+            update["run_at"] = now + timedelta(seconds=self._retry_delay(task.attempts))
+        await self._collection().update_one({"_id": task.id}, {"$set": update})
+        return final
+
+    async def run_task(self, task: QueuedTask):
+        handler = self._handlers.get(task.kind)
+        heartbeat = asyncio.ensure_future(self._renew_lease(task))
+        try:
+            if handler is None:
+                raise RuntimeError(f"No handler registered for task kind '{task.kind}'")
+            await handler(task)
+        except asyncio.CancelledError:
+            # Leave the task RUNNING; another worker picks it up when the lease expires
+            raise
+        except Exception as e:
+            final = await self._fail(task, e)
+            logger.error(
+                f"Task {task.id} ({task.kind}) failed on attempt {task.attempts}"
+                f"{' (giving up)' if final else ', will retry'}: {e}\n{traceback.format_exc()}"
+            )
+            return
+        finally:
+            heartbeat.cancel()
+        await self._complete(task)
+        logger.info(f"Task {task.id} ({task.kind}) completed: {task.progress}")
+
+    async def run_worker(self, stop_event: Optional[asyncio.Event] = None,
+                         kinds: Optional[Iterable[str]] = None, concurrency: int = 1):
+        """Claim and run tasks until `stop_event` is set"""
+        stop_event = stop_event or asyncio.Event()
+        self._wakeup = asyncio.Event()
+        kinds = list(kinds or self.kinds)
+        logger.info(f"Job queue worker {self.worker_id} started for {kinds} (concurrency {concurrency})")
+
+        async def loop():
+            while not stop_event.is_set():
+                try:
+                    task = await self.claim(kinds)
+                except Exception as e:
+                    logger.warning(f"Job queue claim failed: {e}")
+                    task = None
+                if task is not None:
+                    await self.run_task(task)
+                    continue
+                self._wakeup.clear()
+                waiters = [asyncio.ensure_future(stop_event.wait()), asyncio.ensure_future(self._wakeup.wait())]
+                try:
+                    await asyncio.wait(waiters, timeout=self.poll_interval, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    for w in waiters:
+                        w.cancel()
+
+        await asyncio.gather(*(loop() for _ in range(max(1, concurrency))))
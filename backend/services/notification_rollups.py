@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+HOUR = "hour"
+DAY = "day"
+
+REBUILD_LEASE_ID = "notification_rollups_rebuild"
+# A rebuild renews its lease after every batch; a crashed one frees it after this long
+REBUILD_LEASE_SEC = int(os.getenv("NOTIFICATION_ROLLUP_REBUILD_LEASE_SEC", "600"))
+
+# (created_at, type, channel, status, delta)
+Change = Tuple[Optional[datetime], Any, Any, Any, int]
+
+
+def _value(v: Any) -> Any:
+    return getattr(v, "value", v)
+
+
+def _utc(dt: Optional[datetime]) -> datetime:
+    """Naive UTC, the form datetimes come back from Mongo in"""
+    if dt is None:
+        return datetime.utcnow()
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def bucket_start(dt: datetime, granularity: str) -> datetime:
+    dt = _utc(dt)
+    if granularity == DAY:
+        return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def rollup_id(granularity: str, bucket: datetime, notification_type: Any, channel: Any, status: Any) -> str:
+    return f"{granularity}|{bucket.isoformat()}|{_value(notification_type)}|{_value(channel)}|{_value(status)}"
+
+
+class NotificationRollups:
+    """Notification counts per (hour or day, type, channel, status) in `notification_rollups`.
+
+    Every write that creates, deletes or changes the status of a
+    notification $inc's the hour and day buckets of its created_at, so the
+    analytics pages read a few hundred rollup rows instead of grouping the
+    whole notifications collection. Upserts go by a deterministic _id, so
+    concurrent first writes to a bucket don't duplicate it. rebuild()
+    recomputes every bucket from history; one runs at a time across all
+    workers (an asyncio lock plus a lease document in `locks`).
+    """
+
+    def __init__(self, database_getter: Callable[[], Any]):
+        self._get_db = database_getter
+        self._rebuild_lock = asyncio.Lock()
+
+    def _collection(self):
+        db = self._get_db()
+        if db is None:
+            raise RuntimeError("Database unavailable: notification rollups not accessible")
+        return db.notification_rollups
+
+    @staticmethod
+    def _updates(changes: Iterable[Change]) -> List[UpdateOne]:
+        totals: Dict[str, Tuple[Dict[str, Any], int]] = {}
+        for created_at, notification_type, channel, status, delta in changes:
+            if not delta:
+                continue
+            for granularity in (HOUR, DAY):
+                bucket = bucket_start(created_at, granularity)
+                key = rollup_id(granularity, bucket, notification_type, channel, status)
+                fields, count = totals.get(key, (None, 0))
+                if fields is None:
+                    fields = {
+                        "granularity": granularity, "bucket": bucket, "type": _value(notification_type),
+                        "channel": _value(channel), "status": _value(status),
+                    }
+                totals[key] = (fields, count + delta)
+        now = datetime.utcnow()
+        return [
+            UpdateOne({"_id": key}, {"$inc": {"count": count}, "$setOnInsert": {**fields, "created_at": now}}, upsert=True)
+            for key, (fields, count) in totals.items() if count
+        ]
+
+    async def record(self, changes: Iterable[Change]):
+        updates = self._updates(changes)
+        if not updates:
+            return
+        try:
+            await self._collection().bulk_write(updates, ordered=False)
+        except Exception as e:
+            # Rollups are derived data; rebuild() repairs a missed update
+            logger.warning(f"Notification rollup update failed: {e}")
+
+    async def status_changed(self, doc: Optional[Dict[str, Any]], old_status: Any, new_status: Any, count: int = 1):
+        """Move `count` notifications shaped like `doc` (created_at, type, channel) between statuses"""
+        if not doc or _value(old_status) == _value(new_status):
+            return
+        created_at, notification_type, channel = doc.get("created_at"), doc.get("type"), doc.get("channel")
+        changes: List[Change] = []
+        if old_status is not None:
+            changes.append((created_at, notification_type, channel, old_status, -count))
+        if new_status is not None:
+            changes.append((created_at, notification_type, channel, new_status, count))
+        await self.record(changes)
+
+    @staticmethod
+    def _segments(date_from: Optional[datetime], date_to: Optional[datetime]) -> List[Tuple[str, Optional[datetime], Optional[datetime]]]:
+        """(granularity, start, end) ranges covering [date_from, date_to], whole days from day buckets.
+
+        Bounds are widened to whole hours, the resolution of the rollups.
+        """
+        start = bucket_start(date_from, HOUR) if date_from else None
+        end = bucket_start(date_to, HOUR) + timedelta(hours=1) if date_to else None
+        first_day = bucket_start(start, DAY) if start else None
+        if first_day is not None and first_day < start:
+            first_day += timedelta(days=1)
+        last_day = bucket_start(end, DAY) if end else None
+        if first_day is not None and last_day is not None and first_day >= last_day:
+            return [(HOUR, start, end)]
+        segments = [(DAY, first_day, last_day)]
+        if start is not None and start < first_day:
+            segments.append((HOUR, start, first_day))
+        if end is not None and last_day < end:
+            segments.append((HOUR, last_day, end))
+        return segments
+
+    async def counts(self, group_by: Sequence[str], date_from: Optional[datetime] = None,
+                     date_to: Optional[datetime] = None, match: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Summed counts grouped by any of type/channel/status, e.g. [{"type": ..., "count": n}]"""
+        ranges = []
+        for granularity, start, end in self._segments(date_from, date_to):
+            bucket: Dict[str, Any] = {}
+            if start is not None:
+                bucket["$gte"] = start
+            if end is not None:
+                bucket["$lt"] = end
+            ranges.append({"granularity": granularity, **({"bucket": bucket} if bucket else {})})
+        query: Dict[str, Any] = {"$or": ranges} if len(ranges) > 1 else ranges[0]
+        if match:
+            query = {"$and": [query, match]}
+        rows = await self._collection().aggregate([
+            {"$match": query},
+            {"$group": {"_id": {field: f"${field}" for field in group_by}, "count": {"$sum": "$count"}}},
+        ]).to_list(length=None)
+        return [{**row["_id"], "count": row["count"]} for row in rows if row["count"]]
+
+    async def _take_lease(self, db, holder: str) -> bool:
+        now = datetime.utcnow()
+        try:
+            await db.locks.update_one(
+                {"_id": REBUILD_LEASE_ID, "$or": [{"holder": holder}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"holder": holder, "expires_at": now + timedelta(seconds=REBUILD_LEASE_SEC)}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # Held by another worker's rebuild that hasn't expired
+            return False
+        return True
+
+    async def rebuild(self, batch_size: int = 1000) -> Dict[str, Any]:
+        """Recompute every bucket from the notifications collection and its archive.
+
+        Buckets are written with this run's stamp and buckets the history no
+        longer produces are removed. Changes made while it runs may be lost
+        until the next rebuild. If another rebuild holds the lease this one
+        does nothing and returns {"in_progress": True}.
+        """
+        db = self._get_db()
+        if db is None:
+            raise RuntimeError("Database unavailable: notification rollups not accessible")
+        holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        async with self._rebuild_lock:
+            if not await self._take_lease(db, holder):
+                return {"buckets": 0, "removed": 0, "in_progress": True}
+            try:
+                return await self._rebuild(db, holder, batch_size)
+            finally:
+                await db.locks.delete_one({"_id": REBUILD_LEASE_ID, "holder": holder})
+
+    async def _rebuild(self, db, holder: str, batch_size: int) -> Dict[str, Any]:
+        stamp = datetime.utcnow()
+        by_hour = [
+            {"$group": {
+                "_id": {
+                    "hour": {"$dateToString": {"format": "%Y-%m-%dT%H", "date": {"$ifNull": ["$created_at", stamp]}}},
+                    "type": "$type", "channel": "$channel", "status": "$status",
+                },
+                "count": {"$sum": 1},
+            }},
+        ]
+        totals: Dict[str, Tuple[Dict[str, Any], int]] = {}
+        # Archived notifications (services/retention.py) still count in history
+        for source in (db.notifications, db.notifications_archive):
+            async for row in source.aggregate(by_hour):
+                key = row["_id"]
+                hour = datetime.strptime(key["hour"], "%Y-%m-%dT%H")
+                for granularity in (HOUR, DAY):
+                    bucket = bucket_start(hour, granularity)
+                    rid = rollup_id(granularity, bucket, key.get("type"), key.get("channel"), key.get("status"))
+                    fields, count = totals.get(rid, (None, 0))
+                    if fields is None:
+                        fields = {"granularity": granularity, "bucket": bucket, "type": key.get("type"),
+                                  "channel": key.get("channel"), "status": key.get("status")}
+                    totals[rid] = (fields, count + row["count"])
+        updates = [
+            UpdateOne({"_id": rid}, {"$set": {**fields, "count": count, "rebuilt_at": stamp}}, upsert=True)
+            for rid, (fields, count) in totals.items()
+        ]
+        for i in range(0, len(updates), batch_size):
+            if not await self._take_lease(db, holder):
+                raise RuntimeError("Notification rollup rebuild lost its lease")
+            await self._collection().bulk_write(updates[i:i + batch_size], ordered=False)
+        # Older than this run only: buckets a live write created meanwhile are kept
+        removed = await self._collection().delete_many({"$or": [
+            {"rebuilt_at": {"$lt": stamp}},
+            {"rebuilt_at": None, "created_at": {"$lt": stamp}},
+            {"rebuilt_at": None, "created_at": None},
+        ]})
+        return {"buckets": len(updates), "removed": removed.deleted_count}
@@ -0,0 +1,55 @@
+import hashlib
+import os
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import zstandard
+except Exception:
+    zstandard = None
+
+# Keep a compressed copy of the rendered body next to the template reference
+SNAPSHOTS_ENABLED = os.getenv("NOTIFICATION_SNAPSHOTS", "false").lower() in ("1", "true", "yes")
+ZSTD_LEVEL = int(os.getenv("NOTIFICATION_SNAPSHOT_ZSTD_LEVEL", "10"))
+
+
+def template_version(subject_template: str, content_template: str) -> str:
+    """Short content hash of a template's text; changes whenever an admin edits it"""
+    digest = hashlib.sha1()
+    digest.update(subject_template.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(content_template.encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def compress_snapshot(content: str) -> Tuple[bytes, str]:
+    """(compressed body, codec name); zstd when installed, zlib otherwise"""
+    raw = content.encode("utf-8")
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw), "zstd"
+    return zlib.compress(raw, 9), "zlib"
+
+
+def decompress_snapshot(data: bytes, codec: str) -> str:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd notification snapshots")
+        return zstandard.ZstdDecompressor().decompress(bytes(data)).decode("utf-8")
+    if codec == "zlib":
+        return zlib.decompress(bytes(data)).decode("utf-8")
+    raise ValueError(f"Unknown snapshot codec: {codec}")
+
+
+def compact_document(doc: Dict[str, Any], snapshot: Optional[bool] = None) -> Dict[str, Any]:
+    """Strip the rendered body from a notification document that references its template.
+
+    The body is re-rendered from (template_id, template_version, metadata)
+    when read. With snapshots on, a compressed copy is kept as well, for
+    exact replay even if the template version record is lost.
+    """
+    if not doc.get("template_id") or not doc.get("template_version"):
+        return doc
+    content = doc.pop("content", None)
+    if content and (SNAPSHOTS_ENABLED if snapshot is None else snapshot):
+        doc["content_snapshot"], doc["snapshot_codec"] = compress_snapshot(content)
+    return doc
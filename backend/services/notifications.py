@@ -4,25 +4,21 @@ from datetime import datetime, timezone
 import uuid
 import json
 import os
+import re
 from ..models.notifications import (
     NotificationType, NotificationChannel, NotificationStatus,
     Notification, NotificationTemplate, NotificationPreferences
 )
 
-# Third-party imports for real services
-from sendgrid import SendGridAPIClient
+from .transport import get_provider_client
+from .asset_cache import asset_cache
+from .notification_storage import template_version
+
+# SendGrid helpers are only used to build the v3 mail/send payload
 from sendgrid.helpers.mail import (
     Mail,
-    Attachment,
-    FileContent,
-    FileName,
-    FileType,
-    Disposition,
-    ContentId,
     CustomArg,
 )
-import requests
-import base64
 
 # Configure logging for notifications
 logging.basicConfig(level=logging.INFO)
@@ -65,7 +61,7 @@ class SendGridEmailService:
             logger.error("❌ SendGrid configuration missing: SENDGRID_API_KEY or SENDER_EMAIL")
             raise ValueError("Missing SendGrid configuration")
         
-        self.client = SendGridAPIClient(api_key=self.api_key)
+        self.client = get_provider_client("sendgrid")
         logger.info(f"🔧 {self.service_name} initialized - Production Mode")
     
     async def send_email(self, to: str, subject: str, content: str, metadata: Dict[str, Any] = None) -> bool:
@@ -91,37 +87,25 @@ class SendGridEmailService:
                 except Exception as e:
                     logger.debug(f"Custom args attachment failed: {e}")
             
-            # Inline CID logo support: attach image if template uses cid:logo
+            # Inline CID logo support: attach the cached logo if template uses cid:logo
             try:
                 needs_inline_logo = 'cid:logo' in content_html
                 logo_url = (metadata or {}).get('logo_url') if metadata else None
-                logo_bytes = None
-                if needs_inline_logo:
-                    if logo_url:
-                        try:
-                            resp = requests.get(logo_url, timeout=10)
-                            if resp.status_code == 200:
-                                logo_bytes = resp.content
-                            else:
-                                logger.warning(f"Inline logo fetch failed: HTTP {resp.status_code} for {logo_url}")
-                        except Exception as e:
-                            logger.warning(f"Inline logo fetch error from {logo_url}: {e}")
-                    # Fallback: if we couldn't fetch bytes but have a URL, swap cid with URL
-                    if logo_bytes is None and logo_url:
-                        message.html_content = content_html.replace('cid:logo', logo_url)
-                    elif logo_bytes is not None:
-                        encoded = base64.b64encode(logo_bytes).decode('ascii')
-                        attachment = Attachment()
-                        attachment.file_content = FileContent(encoded)
-                        attachment.file_type = FileType('image/png')
-                        attachment.file_name = FileName('logo.png')
-                        attachment.disposition = Disposition('inline')
-                        attachment.content_id = ContentId('logo')
+                if needs_inline_logo and logo_url:
+                    attachment = await asset_cache.get_inline_attachment(logo_url, content_id='logo')
+                    if attachment is not None:
                         message.add_attachment(attachment)
+                    else:
+                        # Fallback: couldn't load the bytes, so swap cid with the URL
+                        message.html_content = content_html.replace('cid:logo', logo_url)
             except Exception as e:
                 logger.warning(f"Inline CID processing failed: {e}")
 
-            response = self.client.send(message)
+            response = await self.client.post(
+                "/v3/mail/send",
+                json=message.get(),
+                headers={"Authorization": f"Bearer {self.api_key}"},
+            )
             
             # SendGrid returns 202 for successful queuing
             if response.status_code in [200, 202]:
@@ -130,9 +114,8 @@ class SendGridEmailService:
             else:
                 error_body = ""
                 try:
-                    if hasattr(response, 'body') and response.body:
-                        error_body = str(response.body)
-                except:
+                    error_body = response.text
+                except Exception:
                     pass
                 logger.error(f"❌ SendGrid failed: HTTP {response.status_code} - {error_body}")
                 if response.status_code == 401:
@@ -167,7 +150,30 @@ class TermiiSMSService:
             logger.error("❌ Termii configuration missing: TERMII_API_KEY or TERMII_SENDER_ID")
             raise ValueError("Missing Termii configuration")
             
+        self.client = get_provider_client("termii")
         logger.info(f"🔧 {self.service_name} initialized - Production Mode")
+
+    async def _send_with_channel(self, formatted_phone: str, message: str, channel: str) -> Dict[str, Any]:
+        """POST one message on one Termii channel; returns ok/status/channel/response"""
+        payload = {
+            "to": formatted_phone,
+            "from": (self.dnd_sender_id if channel == "dnd" and self.dnd_sender_id else self.sender_id),
+            "sms": message,
+            "type": "plain",
+            "api_key": self.api_key,
+            "channel": channel,
+        }
+        resp = await self.client.post(
+            f"{self.base_url}/api/sms/send",
+            json=payload,
+            headers={"Content-Type": "application/json"}
+        )
+        try:
+            data = resp.json()
+        except Exception:
+            data = {"raw": resp.text}
+        ok = resp.status_code == 200 and isinstance(data, dict) and data.get("code") == "ok"
+        return {"ok": ok, "status": resp.status_code, "channel": channel, "response": data}
     
     async def send_sms(self, to: str, message: str, metadata: Dict[str, Any] = None) -> bool:
         """Send real SMS using Termii API with deliverability fallback."""
@@ -175,36 +181,16 @@ class TermiiSMSService:
             # Format Nigerian phone number
             formatted_phone = self._format_nigerian_phone(to)
 
-            def _send_with_channel(channel: str) -> bool:
-                payload = {
-                    "to": formatted_phone,
-                    "from": (self.dnd_sender_id if channel == "dnd" and self.dnd_sender_id else self.sender_id),
-                    "sms": message,
-                    "type": "plain",
-                    "api_key": self.api_key,
-                    "channel": channel,
-                }
-                resp = requests.post(
-                    f"{self.base_url}/api/sms/send",
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-                try:
-                    data = resp.json()
-                except Exception:
-                    data = {"raw": resp.text}
-                if resp.status_code == 200 and isinstance(data, dict) and data.get("code") == "ok":
-                    logger.info(f"📱 SMS SENT: to={formatted_phone}, channel={channel}, message_id={data.get('message_id')}")
-                    return True
-                logger.debug(f"❌ Termii send failed (channel={channel}): status={resp.status_code}, body={data}")
-                return False
-
             # Choose first channel based on env override; default to dnd
             first_channel = self.force_channel or "dnd"
             second_channel = "generic" if first_channel != "generic" else "dnd"
-            if _send_with_channel(first_channel):
-                return True
-            return _send_with_channel(second_channel)
+            for channel in (first_channel, second_channel):
+                result = await self._send_with_channel(formatted_phone, message, channel)
+                if result["ok"]:
+                    logger.info(f"📱 SMS SENT: to={formatted_phone}, channel={channel}, message_id={result['response'].get('message_id')}")
+                    return True
+                logger.debug(f"❌ Termii send failed (channel={channel}): status={result['status']}, body={result['response']}")
+            return False
 
         except Exception as e:
             logger.error(f"❌ SMS sending failed: {str(e)}")
@@ -216,34 +202,13 @@ class TermiiSMSService:
         try:
             formatted_phone = self._format_nigerian_phone(to)
 
-            def _send_with_channel(channel: str) -> Dict[str, Any]:
-                payload = {
-                    "to": formatted_phone,
-                    "from": (self.dnd_sender_id if channel == "dnd" and self.dnd_sender_id else self.sender_id),
-                    "sms": message,
-                    "type": "plain",
-                    "api_key": self.api_key,
-                    "channel": channel,
-                }
-                resp = requests.post(
-                    f"{self.base_url}/api/sms/send",
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-                try:
-                    data = resp.json()
-                except Exception:
-                    data = {"raw": resp.text}
-                ok = resp.status_code == 200 and isinstance(data, dict) and data.get("code") == "ok"
-                return {"ok": ok, "status": resp.status_code, "channel": channel, "response": data}
-
             first_channel = self.force_channel or "dnd"
             second_channel = "generic" if first_channel != "generic" else "dnd"
-            first = _send_with_channel(first_channel)
+            first = await self._send_with_channel(formatted_phone, message, first_channel)
             if first.get("ok"):
                 logger.info(f"📱 SMS SENT: to={formatted_phone}, channel={first_channel}, message_id={first.get('response',{}).get('message_id')}")
                 return first
-            second = _send_with_channel(second_channel)
+            second = await self._send_with_channel(formatted_phone, message, second_channel)
             if second.get("ok"):
                 logger.info(f"📱 SMS SENT: to={formatted_phone}, channel={second_channel}, message_id={second.get('response',{}).get('message_id')}")
                 return second
@@ -274,11 +239,38 @@ class TermiiSMSService:
             logger.warning(f"⚠️ Unusual phone format: {phone}")
             return clean_phone
 
+# Stable template ids, so admin edits can refer to a template across restarts and workers
+_TEMPLATE_ID_NAMESPACE = uuid.UUID("6f1c2f4e-2d8b-4c1e-9a57-3f0e4b1d2a90")
+
+# HTML email templates carry CSS in <style> blocks whose braces must not reach str.format
+_STYLE_BLOCK = re.compile(r"(<style[^>]*>)(.*?)(</style>)", flags=re.DOTALL | re.IGNORECASE)
+
+
+class _SafeDict(dict):
+    """format_map mapping that renders unknown placeholders as empty strings"""
+
+    def __missing__(self, key):
+        return ""
+
+
+def _escape_style_blocks(content_template: str) -> str:
+    def _escape_style(match: re.Match) -> str:
+        css_body = match.group(2).replace('{', '{{').replace('}', '}}')
+        return f"{match.group(1)}{css_body}{match.group(3)}"
+
+    return _STYLE_BLOCK.sub(_escape_style, content_template)
+
+
 class NotificationTemplateService:
     """Service for managing notification templates"""
     
     def __init__(self):
         self.templates = self._initialize_templates()
+        for notification_type, channels in self.templates.items():
+            for channel, template in channels.items():
+                template.id = str(uuid.uuid5(_TEMPLATE_ID_NAMESPACE, f"{notification_type.value}:{channel.value}"))
+        # (type, channel) -> (template, subject format string, pre-escaped content format string)
+        self._compiled: Dict[tuple, tuple] = {}
         logger.info("🔧 NotificationTemplateService initialized with default templates")
     
     def _initialize_templates(self) -> Dict[str, Dict[str, NotificationTemplate]]:
@@ -943,37 +935,72 @@ serviceHub Team
     def get_template(self, notification_type: NotificationType, channel: NotificationChannel) -> Optional[NotificationTemplate]:
         """Get template for specific type and channel"""
         return self.templates.get(notification_type, {}).get(channel)
+
+    def get_template_by_id(self, template_id: str) -> Optional[NotificationTemplate]:
+        for channels in self.templates.values():
+            for template in channels.values():
+                if template.id == template_id:
+                    return template
+        return None
+
+    @staticmethod
+    def version_of(template: NotificationTemplate) -> str:
+        return template_version(template.subject_template, template.content_template)
+
+    def update_template(self, notification_type: NotificationType, channel: NotificationChannel,
+                        subject_template: str, content_template: str,
+                        variables: Optional[list] = None) -> Optional[NotificationTemplate]:
+        """Replace the text of a registered template and drop its compiled form"""
+        template = self.get_template(notification_type, channel)
+        if template is None:
+            return None
+        updated = NotificationTemplate(**{
+            **template.dict(),
+            "subject_template": subject_template,
+            "content_template": content_template,
+            "variables": variables if variables is not None else template.variables,
+        })
+        self.templates[template.type][template.channel] = updated
+        self.invalidate(template.type, template.channel)
+        return updated
+
+    def invalidate(self, notification_type: Optional[NotificationType] = None,
+                   channel: Optional[NotificationChannel] = None):
+        """Forget compiled templates (all of them when no type is given)"""
+        if notification_type is None:
+            self._compiled.clear()
+            return
+        for key in [k for k in self._compiled if k[0] == notification_type and (channel is None or k[1] == channel)]:
+            del self._compiled[key]
+
+    def _compile(self, template: NotificationTemplate) -> tuple:
+        """Compiled (subject, content) format strings for a template.
+
+        Registered templates are compiled once per (type, channel); ad-hoc
+        template objects (e.g. admin previews) are compiled without caching.
+        """
+        key = (template.type, template.channel)
+        entry = self._compiled.get(key)
+        if entry is not None and entry[0] is template:
+            return entry[1], entry[2]
+        compiled = (template.subject_template, _escape_style_blocks(template.content_template))
+        if self.get_template(template.type, template.channel) is template:
+            self._compiled[key] = (template, *compiled)
+        return compiled
     
     def render_template(self, template: NotificationTemplate, data: Dict[str, Any]) -> tuple[str, str]:
         """Render template with provided data.
 
         Note: HTML email templates may include CSS blocks inside <style> tags
         that use curly braces (e.g., `.container { font-family: ... }`). Since
-        Python's str.format also uses curly braces for placeholders, we must
-        escape literal braces within <style> blocks to avoid KeyError during
-        formatting.
+        Python's str.format also uses curly braces for placeholders, literal
+        braces within <style> blocks are escaped when the template is compiled.
         """
-        import re
         try:
-            class _SafeDict(dict):
-                def __missing__(self, key):
-                    return ""
-            subject = template.subject_template.format_map(_SafeDict(data))
-
-            content_template = template.content_template
-
-            # Escape curly braces inside <style> blocks to prevent str.format
-            # from treating CSS declarations as placeholders.
-            def _escape_style(match: re.Match) -> str:
-                start_tag = match.group(1)
-                css_body = match.group(2)
-                end_tag = match.group(3)
-                css_body = css_body.replace('{', '{{').replace('}', '}}')
-                return f"{start_tag}{css_body}{end_tag}"
-
-            content_template = re.sub(r"(<style[^>]*>)(.*?)(</style>)", _escape_style, content_template, flags=re.DOTALL|re.IGNORECASE)
-
-            content = content_template.format_map(_SafeDict(data))
+            subject_template, content_template = self._compile(template)
+            values = _SafeDict(data)
+            subject = subject_template.format_map(values)
+            content = content_template.format_map(values)
             return subject, content
         except KeyError as e:
             logger.error(f"❌ Template rendering failed - missing variable: {e}")
@@ -1142,6 +1169,9 @@ class NotificationService:
         subject, content = self.template_service.render_template(template, template_data)
         notification.subject = subject
         notification.content = content
+        # Stored as a template reference; the body is rendered again when read
+        notification.template_id = template.id
+        notification.template_version = self.template_service.version_of(template)
         
         success = await self.email_service.send_email(
             to=notification.recipient_email,
@@ -1172,6 +1202,9 @@ class NotificationService:
         subject, content = self.template_service.render_template(template, template_data)
         notification.subject = subject
         notification.content = content
+        # Stored as a template reference; the body is rendered again when read
+        notification.template_id = template.id
+        notification.template_version = self.template_service.version_of(template)
         
         success = await self.sms_service.send_sms(
             to=notification.recipient_phone,
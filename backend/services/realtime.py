@@ -0,0 +1,201 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+try:
+    import redis.asyncio as redis
+except Exception:
+    redis = None
+
+try:
+    from ..utils import metrics
+except ImportError:
+    from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Events waiting for one slow socket; past this the socket is closed and the client resyncs over REST
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("REALTIME_QUEUE_SIZE", "256"))
+REDIS_PREFIX = os.getenv("REALTIME_REDIS_PREFIX", "servicehub:rt:")
+RECONNECT_DELAY_SEC = 1.0
+RECONNECT_DELAY_MAX_SEC = 30.0
+
+connections = metrics.registry.gauge(
+    f"{metrics.PREFIX}_realtime_connections", "Open WebSocket connections on this worker")
+published_events = metrics.registry.counter(
+    f"{metrics.PREFIX}_realtime_published_events", "Events published to the realtime broker", ["type"])
+dropped_subscribers = metrics.registry.counter(
+    f"{metrics.PREFIX}_realtime_dropped_subscribers", "Sockets closed because they fell too far behind")
+
+
+def user_channel(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+class Subscription:
+    """Events (JSON text) for a set of channels, queued for one consumer"""
+
+    def __init__(self, broker: "Broker", channels: Iterable[str], maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self.broker = broker
+        self.channels = tuple(channels)
+        self.overflowed = False
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize)
+
+    def put(self, payload: str):
+        try:
+            self._queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            if not self.overflowed:
+                dropped_subscribers.inc()
+            self.overflowed = True
+
+    async def get(self) -> str:
+        return await self._queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """In-process pub/sub: publish() reaches the subscribers of this worker only.
+
+    Subclasses carry events between workers; each keeps one listener per
+    worker that hands received events to the local subscribers, so the
+    number of sockets doesn't multiply broker connections.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    async def subscribe(self, channels: Iterable[str]) -> Subscription:
+        subscription = Subscription(self, channels)
+        for channel in subscription.channels:
+            self._subscriptions.setdefault(channel, set()).add(subscription)
+        self._ensure_listener()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        for channel in subscription.channels:
+            subscribers = self._subscriptions.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[channel]
+
+    def deliver(self, channel: str, payload: str):
+        for subscription in list(self._subscriptions.get(channel, ())):
+            subscription.put(payload)
+
+    async def publish(self, channel: str, payload: str):
+        self.deliver(channel, payload)
+
+    async def notify_users(self, user_ids: Iterable[Optional[str]], event: Dict[str, Any]):
+        """Publish `event` (JSON-serialisable) to each user's channel; failures are logged, not raised"""
+        payload = json.dumps(event, default=str)
+        published_events.inc(type=event.get("type", ""))
+        for user_id in dict.fromkeys(u for u in user_ids if u):
+            try:
+                await self.publish(user_channel(user_id), payload)
+            except Exception as e:
+                logger.warning(f"Realtime publish to {user_id} failed ({self.name}): {e}")
+
+    def _ensure_listener(self):
+        if self._listener is None or self._listener.done():
+            listen = getattr(self, "_listen", None)
+            if listen is not None:
+                self._listener = asyncio.create_task(self._listen_forever(listen))
+
+    async def _listen_forever(self, listen: Callable[[], Any]):
+        delay = RECONNECT_DELAY_SEC
+        while True:
+            try:
+                await listen()
+                delay = RECONNECT_DELAY_SEC
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Realtime {self.name} listener failed, retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_DELAY_MAX_SEC)
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+
+
+class RedisBroker(Broker):
+    """Redis pub/sub; every worker pattern-subscribes to the channel prefix once"""
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = REDIS_PREFIX):
+        super().__init__()
+        self.prefix = prefix
+        self._client = redis.from_url(url, encoding="utf-8", decode_responses=True)
+
+    async def publish(self, channel: str, payload: str):
+        await self._client.publish(self.prefix + channel, payload)
+
+    async def _listen(self):
+        pubsub = self._client.pubsub()
+        try:
+            await pubsub.psubscribe(self.prefix + "*")
+            async for message in pubsub.listen():
+                if message.get("type") == "pmessage":
+                    self.deliver(message["channel"][len(self.prefix):], message["data"])
+        finally:
+            await pubsub.aclose()
+
+    async def close(self):
+        await super().close()
+        await self._client.aclose()
+
+
+class MongoBroker(Broker):
+    """Events inserted into `realtime_events` and read back by a change stream (needs a replica set).
+
+    The collection is only a conduit; a TTL index drops events after an hour.
+    """
+
+    name = "mongo"
+
+    def __init__(self, database_getter: Callable[[], Any]):
+        super().__init__()
+        self._get_db = database_getter
+
+    def _collection(self):
+        db = self._get_db()
+        if db is None:
+            raise RuntimeError("Database unavailable: realtime events not accessible")
+        return db.realtime_events
+
+    async def publish(self, channel: str, payload: str):
+        await self._collection().insert_one({"channel": channel, "payload": payload, "created_at": datetime.utcnow()})
+
+    async def _listen(self):
+        async with self._collection().watch([{"$match": {"operationType": "insert"}}]) as stream:
+            async for change in stream:
+                doc = change["fullDocument"]
+                self.deliver(doc["channel"], doc["payload"])
+
+
+def create_broker(database_getter: Callable[[], Any]) -> Broker:
+    """REALTIME_BROKER=memory|redis|mongo; by default redis when REDIS_URL is set, else in-process"""
+    redis_url = os.getenv("REDIS_URL")
+    kind = os.getenv("REALTIME_BROKER", "redis" if redis_url else "memory").lower()
+    if kind == "redis":
+        if redis is not None and redis_url:
+            return RedisBroker(redis_url)
+        logger.warning("REALTIME_BROKER=redis needs REDIS_URL and the redis package; using in-process pub/sub")
+    elif kind == "mongo":
+        return MongoBroker(database_getter)
+    elif kind != "memory":
+        logger.warning(f"Unknown REALTIME_BROKER '{kind}'; using in-process pub/sub")
+    return Broker()
@@ -0,0 +1,173 @@
+import asyncio
+import gzip
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from bson import json_util
+from pymongo import ReplaceOne
+
+try:
+    from ..utils import metrics
+except ImportError:
+    from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "collection"
+FILE = "file"
+
+ARCHIVE_DIR = Path(os.getenv("RETENTION_ARCHIVE_DIR", str(Path(__file__).resolve().parent.parent / "archive")))
+BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "500"))
+# Pause between batches so the mover doesn't monopolise the primary
+BATCH_PAUSE_SEC = float(os.getenv("RETENTION_BATCH_PAUSE_SEC", "0.2"))
+# Expired tokens/OTPs are kept this long past expires_at before the TTL monitor removes them
+TOKEN_GRACE_SEC = int(os.getenv("RETENTION_TOKEN_GRACE_HOURS", "24")) * 3600
+
+
+def _policy(collection: str, age_field: str, days: int, sink: str = COLLECTION,
+            match: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {"collection": collection, "age_field": age_field, "days": days, "sink": sink, "match": match or {}}
+
+
+# Data we must keep: documents older than `days` (by `age_field`) are moved
+# to `<collection>_archive` or to compressed JSONL files under ARCHIVE_DIR.
+# Disposable data (tokens, OTPs) expires through TTL indexes instead
+# (TTL_COLLECTIONS, registered in utils/index_registry.py).
+POLICIES: Dict[str, Dict[str, Any]] = {
+    "notifications": _policy("notifications", "created_at", int(os.getenv("NOTIFICATION_RETENTION_DAYS", "180"))),
+    # Unread messages stay, so conversation unread counts keep matching the messages;
+    # conversation history reads messages_archive too
+    "messages": _policy("messages", "created_at", int(os.getenv("MESSAGE_RETENTION_DAYS", "365")),
+                        match={"status": "read"}),
+    "admin_activities": _policy("admin_activities", "created_at",
+                                int(os.getenv("ADMIN_ACTIVITY_RETENTION_DAYS", "365")), sink=FILE),
+}
+
+TTL_COLLECTIONS = ("phone_verification_otps", "email_verification_otps",
+                   "password_reset_tokens", "email_verification_tokens")
+
+archived_documents = metrics.registry.counter(
+    f"{metrics.PREFIX}_retention_archived_documents", "Documents copied to archive storage", ["collection", "sink"])
+deleted_documents = metrics.registry.counter(
+    f"{metrics.PREFIX}_retention_deleted_documents", "Archived documents removed from the hot collection",
+    ["collection"])
+batch_duration = metrics.registry.histogram(
+    f"{metrics.PREFIX}_retention_batch_duration_seconds", "Time to archive and delete one batch", ["collection"])
+last_run = metrics.registry.gauge(
+    f"{metrics.PREFIX}_retention_last_run_timestamp_seconds", "Unix time the archiver last finished a collection",
+    ["collection"])
+
+
+def archive_file(collection: str, started: datetime) -> Path:
+    """One gzip JSONL file per collection and run; each batch appends a gzip member"""
+    return ARCHIVE_DIR / collection / f"{collection}-{started.strftime('%Y%m%dT%H%M%S')}.jsonl.gz"
+
+
+def _write_jsonl(path: Path, docs: List[Dict[str, Any]]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lines = "".join(json_util.dumps(doc, json_options=json_util.RELAXED_JSON_OPTIONS) + "\n" for doc in docs)
+    with open(path, "ab") as f:
+        f.write(gzip.compress(lines.encode("utf-8")))
+        f.flush()
+        # The batch is deleted from Mongo next; it has to be on disk first
+        os.fsync(f.fileno())
+
+
+class RetentionEngine:
+    """Moves cold documents out of hot collections in bounded batches.
+
+    Each batch is copied to its sink (an upsert by _id into
+    `<collection>_archive`, or appended to a gzip JSONL file) and only then
+    deleted by _id, so an interrupted run leaves at worst a document in both
+    places, never in neither; re-running picks up where it stopped.
+    `hooks[collection](docs)` runs after a batch is deleted, for derived
+    data such as unread counters.
+    """
+
+    def __init__(self, database_getter: Callable[[], Any],
+                 hooks: Optional[Dict[str, Callable[[List[Dict[str, Any]]], Awaitable[Any]]]] = None):
+        self._get_db = database_getter
+        self.hooks = hooks or {}
+
+    def _db(self):
+        db = self._get_db()
+        if db is None:
+            raise RuntimeError("Database unavailable: retention not possible")
+        return db
+
+    @staticmethod
+    def cold_filter(policy: Dict[str, Any], now: Optional[datetime] = None) -> Dict[str, Any]:
+        cutoff = (now or datetime.utcnow()) - timedelta(days=policy["days"])
+        return {**policy["match"], policy["age_field"]: {"$lt": cutoff}}
+
+    async def report(self) -> Dict[str, Any]:
+        """Documents each policy would move now, plus expired tokens awaiting the TTL monitor"""
+        db = self._db()
+        now = datetime.utcnow()
+        archive = {}
+        for name, policy in POLICIES.items():
+            archive[name] = {
+                "days": policy["days"],
+                "sink": policy["sink"],
+                "cold": await db[policy["collection"]].count_documents(self.cold_filter(policy, now)),
+            }
+        ttl = {}
+        for name in TTL_COLLECTIONS:
+            ttl[name] = {
+                "grace_seconds": TOKEN_GRACE_SEC,
+                "expired": await db[name].count_documents({"expires_at": {"$lt": now - timedelta(seconds=TOKEN_GRACE_SEC)}}),
+            }
+        return {"archive": archive, "ttl": ttl}
+
+    async def archive(self, name: str, dry_run: bool = False, batch_size: int = BATCH_SIZE,
+                      max_batches: Optional[int] = None, pause: float = BATCH_PAUSE_SEC) -> Dict[str, Any]:
+        """Move one policy's cold documents; dry_run only counts them"""
+        policy = POLICIES[name]
+        db = self._db()
+        source = db[policy["collection"]]
+        started = datetime.utcnow()
+        query = self.cold_filter(policy, started)
+        if dry_run:
+            return {"collection": name, "dry_run": True, "cold": await source.count_documents(query)}
+
+        path = archive_file(name, started) if policy["sink"] == FILE else None
+        moved = batches = 0
+        while max_batches is None or batches < max_batches:
+            batch_started = time.perf_counter()
+            # Each batch is deleted once copied, so the next find() starts on fresh documents
+            docs = await source.find(query).limit(batch_size).to_list(length=batch_size)
+            if not docs:
+                break
+            if path is not None:
+                await asyncio.to_thread(_write_jsonl, path, docs)
+            else:
+                await db[f"{name}_archive"].bulk_write(
+                    [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in docs], ordered=False
+                )
+            archived_documents.inc(len(docs), collection=name, sink=policy["sink"])
+            result = await source.delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+            deleted_documents.inc(result.deleted_count, collection=name)
+            hook = self.hooks.get(name)
+            if hook is not None:
+                try:
+                    await hook(docs)
+                except Exception as e:
+                    logger.warning(f"Retention hook for {name} failed: {e}")
+            moved += result.deleted_count
+            batches += 1
+            batch_duration.observe(time.perf_counter() - batch_started, collection=name)
+            if len(docs) < batch_size:
+                break
+            if pause:
+                await asyncio.sleep(pause)
+        last_run.set(time.time(), collection=name)
+        logger.info(f"Retention: moved {moved} {name} documents in {batches} batches")
+        return {"collection": name, "moved": moved, "batches": batches,
+                "sink": str(path) if path is not None else f"{name}_archive"}
+
+    async def run(self, names: Optional[List[str]] = None, dry_run: bool = False, **options) -> List[Dict[str, Any]]:
+        return [await self.archive(name, dry_run=dry_run, **options) for name in (names or list(POLICIES))]
@@ -0,0 +1,199 @@
+import os
+import re
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import anyio
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response, StreamingResponse
+
+from .image_pipeline import media_type_for
+
+# Upload names carry a random uuid and are never rewritten, so a cached copy never goes stale
+IMMUTABLE_PUBLIC = "public, max-age=31536000, immutable"
+IMMUTABLE_PRIVATE = "private, max-age=31536000, immutable"
+# Names chosen by the uploader can be overwritten; always revalidate with the ETag
+REVALIDATE_PRIVATE = "private, no-cache"
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _default_roots() -> List[str]:
+    """Upload directories across environments, in the order the routes used to probe them"""
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    roots = [
+        os.environ.get("UPLOADS_DIR", os.path.join(os.getcwd(), "uploads")),
+        os.path.join(project_root, "uploads"),
+        os.path.join(project_root, "backend", "uploads"),
+        os.path.join(os.getcwd(), "uploads"),
+        os.path.join("/app", "uploads"),
+    ]
+    return list(dict.fromkeys(os.path.abspath(r) for r in roots))
+
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _safe_name(filename: str) -> bool:
+    return bool(filename) and filename == os.path.basename(filename) and not filename.startswith(".")
+
+
+class StaticAssetService:
+    """Serves uploaded files with conditional and range request support.
+
+    The upload directory holding a file is found once and remembered (an LRU
+    of STATIC_FILES_PATH_CACHE entries), instead of probing every candidate
+    directory on each request. Responses carry a strong ETag and
+    Last-Modified, answer If-None-Match / If-Modified-Since with 304, and
+    honour a single `Range` so large documents and resumed downloads stream
+    only the requested bytes.
+    """
+
+    def __init__(self, roots: Optional[List[str]] = None):
+        self.roots = roots or _default_roots()
+        self.max_entries = int(os.getenv("STATIC_FILES_PATH_CACHE", "4096"))
+        self.chunk_size = 64 * 1024
+        self._paths: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self.counters = {"hits": 0, "misses": 0, "not_found": 0, "not_modified": 0, "partial": 0}
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.counters, "entries": len(self._paths)}
+
+    def resolve(self, category: str, filename: str) -> Optional[str]:
+        """Absolute path of `category/filename` in the first upload root holding it"""
+        if not _safe_name(filename):
+            return None
+        key = (category, filename)
+        path = self._paths.get(key)
+        if path is not None:
+            self._paths.move_to_end(key)
+            self.counters["hits"] += 1
+            return path
+        self.counters["misses"] += 1
+        for root in self.roots:
+            candidate = os.path.join(root, category, filename)
+            if os.path.isfile(candidate):
+                self._paths[key] = candidate
+                if len(self._paths) > self.max_entries:
+                    self._paths.popitem(last=False)
+                return candidate
+        self.counters["not_found"] += 1
+        return None
+
+    def forget(self, category: str, filename: str):
+        self._paths.pop((category, filename), None)
+
+    async def serve(self, request: Request, category: str, filename: str,
+                    cache_control: str = REVALIDATE_PRIVATE, media_type: Optional[str] = None) -> Optional[Response]:
+        """Response for an uploaded file, or None when it does not exist"""
+        path = self.resolve(category, filename)
+        if path is None:
+            return None
+        try:
+            stat_result = await anyio.to_thread.run_sync(os.stat, path)
+        except FileNotFoundError:
+            # Deleted or moved since it was cached; look again once
+            self.forget(category, filename)
+            path = self.resolve(category, filename)
+            if path is None:
+                return None
+            stat_result = await anyio.to_thread.run_sync(os.stat, path)
+        return self.file_response(request, path, stat_result, media_type or media_type_for(path), cache_control)
+
+    async def serve_file(self, request: Request, path: str, cache_control: str = REVALIDATE_PRIVATE,
+                         media_type: Optional[str] = None, etag: Optional[str] = None) -> Optional[Response]:
+        """Like serve() for a path the caller already knows"""
+        try:
+            stat_result = await anyio.to_thread.run_sync(os.stat, path)
+        except FileNotFoundError:
+            return None
+        return self.file_response(request, path, stat_result, media_type or media_type_for(path), cache_control, etag)
+
+    async def read(self, category: str, filename: str) -> Optional[bytes]:
+        """Whole contents of an uploaded file, read off the event loop"""
+        path = self.resolve(category, filename)
+        if path is None:
+            return None
+        try:
+            return await anyio.to_thread.run_sync(_read_bytes, path)
+        except FileNotFoundError:
+            self.forget(category, filename)
+            return None
+
+    def file_response(self, request: Request, path: str, stat_result: os.stat_result, media_type: str,
+                      cache_control: str, etag: Optional[str] = None) -> Response:
+        size = stat_result.st_size
+        etag = etag or f'"{stat_result.st_mtime_ns:x}-{size:x}"'
+        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        headers = {"ETag": etag, "Last-Modified": last_modified, "Cache-Control": cache_control, "Accept-Ranges": "bytes"}
+
+        if self._not_modified(request, etag, stat_result.st_mtime):
+            self.counters["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+
+        byte_range = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        if byte_range and (not if_range or if_range in (etag, last_modified)):
+            parsed = self._parse_range(byte_range, size)
+            if parsed == "unsatisfiable":
+                return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+            if parsed is not None:
+                start, end = parsed
+                self.counters["partial"] += 1
+                headers.update({"Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(end - start + 1)})
+                return StreamingResponse(self._iter_range(path, start, end - start + 1), status_code=206,
+                                         media_type=media_type, headers=headers)
+        return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat_result)
+
+    @staticmethod
+    def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    @staticmethod
+    def _parse_range(value: str, size: int):
+        """(start, end) of a single byte range, "unsatisfiable", or None to send the whole file.
+
+        Multiple ranges are answered with the whole file, which RFC 9110 allows.
+        """
+        match = _RANGE.match(value.strip())
+        if not match or (not match.group(1) and not match.group(2)):
+            return None
+        if not match.group(1):
+            suffix = int(match.group(2))
+            if suffix == 0:
+                return "unsatisfiable"
+            return max(0, size - suffix), size - 1
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else size - 1
+        if match.group(2) and end < start:
+            return None
+        if start >= size:
+            return "unsatisfiable"
+        return start, min(end, size - 1)
+
+    async def _iter_range(self, path: str, start: int, length: int) -> AsyncIterator[bytes]:
+        async with await anyio.open_file(path, "rb") as f:
+            await f.seek(start)
+            remaining = length
+            while remaining > 0:
+                chunk = await f.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+
+static_assets = StaticAssetService()
@@ -0,0 +1,183 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+try:
+    from ..utils.metrics import observe_outbound
+except ImportError:
+    from utils.metrics import observe_outbound
+
+logger = logging.getLogger(__name__)
+
+SENDGRID_BASE_URL = "https://api.sendgrid.com"
+
+# name -> (base url, default max concurrent requests, default timeout seconds)
+PROVIDERS = {
+    "sendgrid": (lambda: os.environ.get("SENDGRID_BASE_URL", SENDGRID_BASE_URL), 10, 10.0),
+    "termii": (lambda: os.environ.get("TERMII_BASE_URL", "https://api.ng.termii.com"), 5, 10.0),
+    # Absolute URLs (e.g. the email logo); no base url
+    "assets": (lambda: "", 4, 10.0),
+}
+
+
+class ProviderClient:
+    """Pooled keep-alive HTTP client for one outbound provider.
+
+    At most `max_concurrency` requests are in flight at once; callers past
+    the limit wait for a slot rather than opening more connections. Limits
+    and timeouts come from `<NAME>_MAX_CONCURRENCY` / `<NAME>_TIMEOUT_SEC`.
+    """
+
+    def __init__(self, name: str, base_url: str = "", max_concurrency: int = 10, timeout: float = 10.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.name = name
+        self.base_url = base_url
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.timeout = float(timeout)
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @classmethod
+    def from_env(cls, name: str, transport: Optional[httpx.AsyncBaseTransport] = None) -> "ProviderClient":
+        base_url, concurrency, timeout = PROVIDERS[name]
+        prefix = name.upper()
+        return cls(
+            name,
+            base_url=base_url(),
+            max_concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", str(concurrency))),
+            timeout=float(os.getenv(f"{prefix}_TIMEOUT_SEC", str(timeout))),
+            transport=transport,
+        )
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+                transport=self._transport,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        client = self._http()
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+            except Exception:
+                observe_outbound(self.name, started)
+                raise
+            observe_outbound(self.name, started, response.status_code)
+            return response
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# One client per provider per process, shared by every service instance
+_clients: Dict[str, ProviderClient] = {}
+_transport_override: Optional[httpx.AsyncBaseTransport] = None
+
+
+def get_provider_client(name: str) -> ProviderClient:
+    client = _clients.get(name)
+    if client is None:
+        client = ProviderClient.from_env(name, transport=_transport_override)
+        _clients[name] = client
+    return client
+
+
+async def use_transport(transport: Optional[httpx.AsyncBaseTransport]):
+    """Route all provider traffic through `transport` (e.g. FakeProviderTransport); None restores HTTP"""
+    global _transport_override
+    await close_provider_clients()
+    _transport_override = transport
+
+
+async def close_provider_clients():
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Failed to close {client.name} HTTP client: {e}")
+
+
+class FakeProviderTransport(httpx.AsyncBaseTransport):
+    """Local stand-in for the SendGrid v3 and Termii APIs, for tests and offline development.
+
+    Accepts `POST /v3/mail/send` (202) and `POST /api/sms/send` (Termii "ok"
+    payload) and serves a small PNG for any GET. Every request is recorded in
+    `requests` as (method, path, parsed JSON body). `status_code` forces a
+    failure status and `latency` adds a per-request delay in seconds; a delay
+    longer than the client's read timeout raises httpx.ReadTimeout, as a
+    slow provider would.
+    """
+
+    PNG = bytes.fromhex(
+        "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+        "1f15c4890000000d49444154789c6360000002000001e221bc330000000049454e44ae426082"
+    )
+
+    def __init__(self, status_code: Optional[int] = None, latency: float = 0.0):
+        self.status_code = status_code
+        self.latency = latency
+        self.requests: List[tuple] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                read_timeout = (request.extensions.get("timeout") or {}).get("read")
+                if read_timeout is not None and self.latency > read_timeout:
+                    await asyncio.sleep(read_timeout)
+                    raise httpx.ReadTimeout("fake provider timed out", request=request)
+                await asyncio.sleep(self.latency)
+            body: Any = None
+            content = await request.aread()
+            if content:
+                try:
+                    body = json.loads(content)
+                except ValueError:
+                    body = content
+            self.requests.append((request.method, request.url.path, body))
+            if self.status_code is not None:
+                return httpx.Response(self.status_code, json={"errors": [{"message": "fake provider failure"}]})
+            if request.method == "POST" and request.url.path == "/v3/mail/send":
+                return httpx.Response(202, headers={"X-Message-Id": uuid.uuid4().hex})
+            if request.method == "POST" and request.url.path == "/api/sms/send":
+                return httpx.Response(200, json={
+                    "code": "ok", "message_id": uuid.uuid4().hex, "message": "Successfully Sent", "balance": 100,
+                })
+            if request.method == "GET":
+                return httpx.Response(200, content=self.PNG, headers={"Content-Type": "image/png"})
+            return httpx.Response(404, json={"error": "not found"})
+        finally:
+            self.in_flight -= 1
+
+    def sent(self, path: str) -> List[Any]:
+        return [body for _, p, body in self.requests if p == path]
@@ -0,0 +1,127 @@
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("notifications", "messages")
+
+# One row per (participant, their unread count) of a conversation
+_CONVERSATION_UNREAD = [
+    {"$project": {"pairs": [
+        {"user_id": "$homeowner_id", "messages": {"$ifNull": ["$unread_count_homeowner", 0]}},
+        {"user_id": "$tradesperson_id", "messages": {"$ifNull": ["$unread_count_tradesperson", 0]}},
+    ]}},
+    {"$unwind": "$pairs"},
+    {"$match": {"pairs.user_id": {"$ne": None}, "pairs.messages": {"$gt": 0}}},
+]
+
+
+class UnreadCounters:
+    """Per-user badge counts of unread notifications and conversation messages.
+
+    One document per user in `unread_counters` ({_id: user_id,
+    notifications, messages}), adjusted with $inc by the writes that change
+    read state, so the badge is a single _id lookup. A user's document is
+    created from their data on first read; increments for users without one
+    are skipped rather than upserted, so a partial count is never created.
+    Per-conversation counts stay on the conversation (`unread_count_<role>`);
+    `messages` is their sum for the user. reconcile() recomputes everything
+    from the source collections to repair drift.
+    """
+
+    def __init__(self, database_getter: Callable[[], Any]):
+        self._get_db = database_getter
+
+    def _collection(self):
+        db = self._get_db()
+        if db is None:
+            raise RuntimeError("Database unavailable: unread counters not accessible")
+        return db.unread_counters
+
+    async def incr(self, user_id: Optional[str], notifications: int = 0, messages: int = 0):
+        inc = {k: v for k, v in (("notifications", notifications), ("messages", messages)) if v}
+        if not user_id or not inc:
+            return
+        try:
+            await self._collection().update_one({"_id": user_id}, {"$inc": inc})
+        except Exception as e:
+            # The counter is advisory; reconcile() repairs a missed update
+            logger.warning(f"Unread counter update failed for {user_id}: {e}")
+
+    async def incr_many(self, counts: Dict[str, int], field: str = "notifications"):
+        """$inc `field` for several users (e.g. a bulk notification insert)"""
+        for user_id, amount in counts.items():
+            await self.incr(user_id, **{field: amount})
+
+    async def get(self, user_id: str) -> Dict[str, int]:
+        doc = await self._collection().find_one({"_id": user_id})
+        if doc is None:
+            doc = await self._initialize(user_id)
+        counts = {field: max(0, int(doc.get(field) or 0)) for field in FIELDS}
+        counts["total"] = sum(counts.values())
+        return counts
+
+    async def _count_user(self, user_id: str) -> Dict[str, int]:
+        db = self._get_db()
+        notifications = await db.notifications.count_documents({"user_id": user_id, "status": {"$ne": "read"}})
+        rows = await db.conversations.aggregate([
+            {"$match": {"$or": [{"homeowner_id": user_id}, {"tradesperson_id": user_id}]}},
+            {"$group": {"_id": None, "messages": {"$sum": {"$add": [
+                {"$cond": [{"$eq": ["$homeowner_id", user_id]}, {"$ifNull": ["$unread_count_homeowner", 0]}, 0]},
+                {"$cond": [{"$eq": ["$tradesperson_id", user_id]}, {"$ifNull": ["$unread_count_tradesperson", 0]}, 0]},
+            ]}}}},
+        ]).to_list(length=1)
+        return {"notifications": notifications, "messages": rows[0]["messages"] if rows else 0}
+
+    async def _initialize(self, user_id: str) -> Dict[str, Any]:
+        counts = await self._count_user(user_id)
+        # $setOnInsert: a concurrent first read may have created it already
+        await self._collection().update_one(
+            {"_id": user_id},
+            {"$setOnInsert": {**counts, "reconciled_at": datetime.utcnow()}},
+            upsert=True,
+        )
+        return await self._collection().find_one({"_id": user_id}) or counts
+
+    async def reset(self, user_ids: Iterable[str]):
+        """Recount specific users, e.g. after a bulk change the $incs didn't cover"""
+        for user_id in dict.fromkeys(u for u in user_ids if u):
+            counts = await self._count_user(user_id)
+            await self._collection().update_one(
+                {"_id": user_id}, {"$set": {**counts, "reconciled_at": datetime.utcnow()}}, upsert=True
+            )
+
+    async def reconcile(self) -> Dict[str, int]:
+        """Rewrite every counter from one aggregation over notifications and conversations.
+
+        Counts are merged into `unread_counters` stamped with this run's
+        time; counters the aggregation didn't produce (nothing unread) are
+        then zeroed. Increments landing while it runs may be overwritten
+        until the next run.
+        """
+        db = self._get_db()
+        if db is None:
+            raise RuntimeError("Database unavailable: unread counters not accessible")
+        stamp = datetime.utcnow()
+        await db.notifications.aggregate([
+            {"$match": {"status": {"$ne": "read"}, "user_id": {"$ne": None}}},
+            {"$group": {"_id": "$user_id", "notifications": {"$sum": 1}}},
+            {"$unionWith": {"coll": "conversations", "pipeline": [
+                *_CONVERSATION_UNREAD,
+                {"$project": {"_id": "$pairs.user_id", "messages": "$pairs.messages"}},
+            ]}},
+            {"$group": {
+                "_id": "$_id",
+                "notifications": {"$sum": "$notifications"},
+                "messages": {"$sum": "$messages"},
+            }},
+            {"$set": {"reconciled_at": stamp}},
+            {"$merge": {"into": "unread_counters", "on": "_id", "whenMatched": "merge", "whenNotMatched": "insert"}},
+        ]).to_list(length=None)
+        zeroed = await self._collection().update_many(
+            {"reconciled_at": {"$ne": stamp}},
+            {"$set": {"notifications": 0, "messages": 0, "reconciled_at": stamp}},
+        )
+        users = await self._collection().count_documents({"reconciled_at": stamp})
+        return {"users": users, "zeroed": zeroed.modified_count}
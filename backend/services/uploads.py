@@ -0,0 +1,422 @@
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional
+
+import anyio
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+
+from .blob_store import sniff_content_type
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 256 * 1024
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+    "application/pdf": ".pdf",
+    "application/msword": ".doc",
+    DOCX: ".docx",
+    "video/mp4": ".mp4",
+}
+IMAGE_TYPES = frozenset({"image/jpeg", "image/png", "image/webp", "image/gif"})
+
+
+class UploadRejected(ValueError):
+    """An upload that must not be stored; `status_code` is the HTTP status to answer with"""
+    status_code = 400
+
+
+class UploadTooLarge(UploadRejected):
+    status_code = 413
+
+
+class UploadOffsetMismatch(UploadRejected):
+    """A resumable chunk that does not start where the stored upload ends"""
+    status_code = 409
+
+    def __init__(self, message: str, offset: int):
+        super().__init__(message)
+        self.offset = offset
+
+
+def sniff_upload_type(head: bytes, declared: Optional[str] = None, filename: Optional[str] = None) -> Optional[str]:
+    """Content type from the file's first bytes rather than the client's claim.
+
+    MP4 and Word documents are recognised by their container (an `ftyp` box,
+    a zip holding `[Content_Types].xml`). Returns None for unrecognised data.
+    """
+    sniffed = sniff_content_type(head, default=None)
+    if sniffed == "application/zip":
+        is_docx = b"[Content_Types].xml" in head[:4096] or b"word/" in head[:4096]
+        if is_docx and (declared == DOCX or (filename or "").lower().endswith(".docx")):
+            return DOCX
+        return None
+    if sniffed is None and head[4:8] == b"ftyp":
+        return "video/mp4"
+    return sniffed
+
+
+async def _chunks(source, chunk_size: int) -> AsyncIterator[bytes]:
+    if hasattr(source, "read"):
+        while True:
+            chunk = await source.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        async for chunk in source:
+            if chunk:
+                yield chunk
+
+
+async def read_upload(source, max_bytes: int, allowed_types: Optional[Iterable[str]] = None,
+                      declared_type: Optional[str] = None, filename: Optional[str] = None) -> Dict[str, Any]:
+    """Read an upload into memory in chunks, rejecting it as soon as it passes `max_bytes`.
+
+    For uploads that must be decoded whole anyway (images for the resize
+    pipeline). Returns {"data", "size", "content_type"}.
+    """
+    allowed = set(allowed_types) if allowed_types is not None else None
+    parts, size, content_type = [], 0, None
+    async for chunk in _chunks(source, UPLOAD_CHUNK_SIZE):
+        if content_type is None:
+            content_type = _check_type(chunk, allowed, declared_type, filename)
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge("File too large")
+        parts.append(chunk)
+    if not size:
+        raise UploadRejected("Empty file")
+    return {"data": b"".join(parts), "size": size, "content_type": content_type}
+
+
+async def stream_upload(source, directory: Path, stem: str, max_bytes: int,
+                        allowed_types: Optional[Iterable[str]] = None, declared_type: Optional[str] = None,
+                        filename: Optional[str] = None) -> Dict[str, Any]:
+    """Stream an upload to `directory/<stem><ext>` without holding it in memory.
+
+    Chunks go to a hidden temp file in the same directory while the bytes are
+    hashed and counted. The type is sniffed from the first chunk and the
+    extension follows from it. The upload is aborted as soon as it passes
+    `max_bytes`. A complete file is renamed into place atomically, so readers
+    never see a partial one. Returns {"path", "filename", "size", "sha256",
+    "content_type"}.
+    """
+    allowed = set(allowed_types) if allowed_types is not None else None
+    directory = Path(directory)
+    await anyio.to_thread.run_sync(lambda: directory.mkdir(parents=True, exist_ok=True))
+    tmp = directory / f".{stem}.{uuid.uuid4().hex}.part"
+    digest, size, content_type = hashlib.sha256(), 0, None
+    try:
+        async with await anyio.open_file(tmp, "wb") as out:
+            async for chunk in _chunks(source, UPLOAD_CHUNK_SIZE):
+                if content_type is None:
+                    content_type = _check_type(chunk, allowed, declared_type, filename)
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge("File too large")
+                digest.update(chunk)
+                await out.write(chunk)
+        if not size:
+            raise UploadRejected("Empty file")
+        dest = directory / f"{stem}{EXTENSIONS.get(content_type, '')}"
+        await anyio.to_thread.run_sync(os.replace, tmp, dest)
+    except BaseException:
+        await anyio.to_thread.run_sync(_unlink_quietly, tmp)
+        raise
+    return {"path": dest, "filename": dest.name, "size": size, "sha256": digest.hexdigest(), "content_type": content_type}
+
+
+def _check_type(head: bytes, allowed, declared_type: Optional[str], filename: Optional[str]) -> Optional[str]:
+    content_type = sniff_upload_type(head, declared_type, filename)
+    if allowed is not None and content_type not in allowed:
+        raise UploadRejected("Unsupported file type")
+    return content_type
+
+
+def _unlink_quietly(path: Path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+class UploadLimitMiddleware:
+    """Rejects oversized request bodies before they are parsed.
+
+    A declared Content-Length over the limit is answered with 413 without
+    reading the body. Chunked bodies are counted as they arrive and cut off
+    at the limit. Limits come from `limits` ({path prefix: bytes}, longest
+    prefix wins) or UPLOAD_MAX_REQUEST_BYTES. Multipart framing gets a
+    small allowance on top.
+    """
+
+    OVERHEAD = 64 * 1024
+
+    def __init__(self, app, limits: Optional[Dict[str, int]] = None, default_limit: Optional[int] = None):
+        self.app = app
+        self.limits = sorted((limits or {}).items(), key=lambda item: -len(item[0]))
+        self.default_limit = default_limit or int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(50 * 1024 * 1024)))
+
+    def limit_for(self, path: str) -> int:
+        for prefix, limit in self.limits:
+            if path.startswith(prefix):
+                return limit + self.OVERHEAD
+        return self.default_limit + self.OVERHEAD
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+            return await self.app(scope, receive, send)
+        limit = self.limit_for(scope["path"])
+        headers = dict(scope.get("headers") or [])
+        declared = headers.get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            return await self._reject(send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise HTTPException(status_code=413, detail="File too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    async def _reject(send):
+        body = json.dumps({"detail": "File too large"}).encode()
+        await send({"type": "http.response.start", "status": 413, "headers": [
+            (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), (b"connection", b"close"),
+        ]})
+        await send({"type": "http.response.body", "body": body})
+
+
+Finalizer = Callable[[Path, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+_CLOSED_MESSAGES = {
+    "complete": "Upload already completed",
+    "finalizing": "Upload already completed",
+    "failed": "Upload failed; start a new upload",
+}
+
+
+class ResumableUploads:
+    """Chunked uploads that survive dropped connections, for mobile clients.
+
+    A client opens a session for a registered purpose (e.g. a message
+    attachment) with the total size. It then PUTs the bytes in any number
+    of chunks, each starting at the session's current offset. After a
+    failure it asks for the offset and carries on from there. Session state
+    lives in the `upload_sessions` collection, so any worker can take the
+    next chunk. Bytes are kept in a part file under UPLOAD_SESSION_DIR. On
+    completion the type is sniffed, the file hashed and the purpose's
+    finalizer moves it into place. Sessions expire after UPLOAD_SESSION_TTL_SEC.
+    A chunk leases the session (`writer`) before touching the part file, so
+    concurrent PUTs at the same offset can't interleave their bytes.
+    """
+
+    def __init__(self, database_getter: Callable[[], Any]):
+        self._get_db = database_getter
+        uploads = os.environ.get("UPLOADS_DIR", os.path.join(os.getcwd(), "uploads"))
+        self.directory = Path(os.getenv("UPLOAD_SESSION_DIR", os.path.join(uploads, "sessions")))
+        self.ttl_seconds = int(os.getenv("UPLOAD_SESSION_TTL_SEC", str(24 * 3600)))
+        self.chunk_max_bytes = int(os.getenv("UPLOAD_CHUNK_MAX_BYTES", str(8 * 1024 * 1024)))
+        # How long one chunk request may hold the upload before another may take over
+        self.chunk_lease_seconds = int(os.getenv("UPLOAD_CHUNK_LEASE_SEC", "600"))
+        self._purposes: Dict[str, Dict[str, Any]] = {}
+        self._last_sweep = 0.0
+
+    def register(self, purpose: str, max_bytes: int, allowed_types: Iterable[str], finalize: Finalizer):
+        self._purposes[purpose] = {"max_bytes": max_bytes, "allowed_types": set(allowed_types), "finalize": finalize}
+
+    def _collection(self):
+        db = self._get_db()
+        if db is None:
+            raise RuntimeError("Database unavailable: upload sessions not accessible")
+        return db.upload_sessions
+
+    def part_path(self, session_id: str) -> Path:
+        return self.directory / f"{session_id}.part"
+
+    async def create(self, user_id: str, purpose: str, filename: Optional[str], size: int,
+                     content_type: Optional[str] = None) -> Dict[str, Any]:
+        spec = self._purposes.get(purpose)
+        if spec is None:
+            raise UploadRejected(f"Unknown upload purpose: {purpose}")
+        if size <= 0:
+            raise UploadRejected("Empty file")
+        if size > spec["max_bytes"]:
+            raise UploadTooLarge("File too large")
+        if content_type is not None and content_type not in spec["allowed_types"]:
+            raise UploadRejected("Unsupported file type")
+        await self._sweep_stale_parts()
+        now = datetime.utcnow()
+        session = {
+            "_id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "purpose": purpose,
+            "filename": os.path.basename(filename or "") or None,
+            "declared_type": content_type,
+            "size": size,
+            "offset": 0,
+            "status": "open",
+            "writer": None,
+            "result": None,
+            "created_at": now,
+            "updated_at": now,
+            "expires_at": now + timedelta(seconds=self.ttl_seconds),
+        }
+        await anyio.to_thread.run_sync(lambda: self.directory.mkdir(parents=True, exist_ok=True))
+        await anyio.to_thread.run_sync(self.part_path(session["_id"]).touch)
+        await self._collection().insert_one(session)
+        return session
+
+    async def get(self, session_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        session = await self._collection().find_one({"_id": session_id})
+        if not session or session["user_id"] != user_id:
+            return None
+        return session
+
+    async def append(self, session: Dict[str, Any], offset: int, chunks: AsyncIterator[bytes]) -> int:
+        """Write a chunk starting at `offset` and return the new offset"""
+        if session["status"] != "open":
+            raise UploadRejected(_CLOSED_MESSAGES.get(session["status"], "Upload already completed"))
+        if offset != session["offset"]:
+            raise UploadOffsetMismatch("Chunk does not start at the upload offset", session["offset"])
+        # Lease the offset first, so only one request writes into the part file at a time
+        lease = uuid.uuid4().hex
+        now = datetime.utcnow()
+        leased = await self._collection().find_one_and_update(
+            {"_id": session["_id"], "offset": offset, "status": "open",
+             "$or": [{"writer": None}, {"writer_until": {"$lt": now}}]},
+            {"$set": {"writer": lease, "writer_until": now + timedelta(seconds=self.chunk_lease_seconds)}},
+        )
+        if leased is None:
+            current = await self._collection().find_one({"_id": session["_id"]}, {"offset": 1})
+            raise UploadOffsetMismatch("Another chunk is being written to this upload", (current or {}).get("offset", 0))
+        limit = min(self.chunk_max_bytes, session["size"] - offset)
+        path = self.part_path(session["_id"])
+        written = 0
+        try:
+            async with await anyio.open_file(path, "r+b") as out:
+                # Drop bytes of an earlier attempt whose offset was never recorded
+                await out.truncate(offset)
+                await out.seek(offset)
+                async for chunk in chunks:
+                    written += len(chunk)
+                    if written > limit:
+                        raise UploadTooLarge("Chunk exceeds the upload size" if limit < self.chunk_max_bytes else "Chunk too large")
+                    await out.write(chunk)
+        except BaseException as e:
+            await self._collection().update_one({"_id": session["_id"], "writer": lease}, {"$set": {"writer": None}})
+            if isinstance(e, FileNotFoundError):
+                raise UploadRejected("Upload expired")
+            raise
+        updated = await self._collection().find_one_and_update(
+            {"_id": session["_id"], "writer": lease},
+            {"$set": {"offset": offset + written, "writer": None, "updated_at": datetime.utcnow(),
+                      "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds)}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if updated is None:
+            # The lease ran out and another request took over the upload
+            current = await self._collection().find_one({"_id": session["_id"]}, {"offset": 1})
+            raise UploadOffsetMismatch("Upload offset changed concurrently", (current or {}).get("offset", 0))
+        return updated["offset"]
+
+    async def complete(self, session: Dict[str, Any]) -> Dict[str, Any]:
+        """Verify the assembled file and hand it to the purpose's finalizer (idempotent)"""
+        if session["status"] == "complete":
+            return session["result"]
+        if session["status"] == "failed":
+            raise UploadRejected(_CLOSED_MESSAGES["failed"])
+        if session["offset"] != session["size"]:
+            raise UploadOffsetMismatch("Upload is incomplete", session["offset"])
+        claimed = await self._collection().find_one_and_update(
+            {"_id": session["_id"], "status": "open", "offset": session["size"], "writer": None},
+            {"$set": {"status": "finalizing", "updated_at": datetime.utcnow()}},
+        )
+        if claimed is None:
+            current = await self._collection().find_one({"_id": session["_id"]})
+            if current and current["status"] == "complete":
+                return current["result"]
+            raise UploadRejected("Upload is already being completed")
+        path = self.part_path(session["_id"])
+        try:
+            result = await self._finalize(session)
+        except BaseException:
+            # Retry only while the part file is still there; a finalizer that moved it away can't be re-run
+            exists = await anyio.to_thread.run_sync(path.exists)
+            await self._collection().update_one(
+                {"_id": session["_id"]},
+                {"$set": {"status": "open" if exists else "failed", "updated_at": datetime.utcnow()}},
+            )
+            raise
+        await self._collection().update_one(
+            {"_id": session["_id"]},
+            {"$set": {"status": "complete", "result": result, "updated_at": datetime.utcnow()}},
+        )
+        await anyio.to_thread.run_sync(_unlink_quietly, path)
+        return result
+
+    async def _finalize(self, session: Dict[str, Any]) -> Dict[str, Any]:
+        spec = self._purposes[session["purpose"]]
+        path = self.part_path(session["_id"])
+        try:
+            head, sha256 = await anyio.to_thread.run_sync(_head_and_digest, path)
+        except FileNotFoundError:
+            raise UploadRejected("Upload expired")
+        content_type = _check_type(head, spec["allowed_types"], session.get("declared_type"), session.get("filename"))
+        return await spec["finalize"](path, {
+            "filename": session.get("filename"), "size": session["size"],
+            "sha256": sha256, "content_type": content_type, "user_id": session["user_id"],
+        })
+
+    async def _sweep_stale_parts(self):
+        """Delete part files of sessions that expired (the TTL index removes their documents)"""
+        if time.time() - self._last_sweep < 600:
+            return
+        self._last_sweep = time.time()
+        cutoff = time.time() - self.ttl_seconds
+
+        def sweep():
+            if not self.directory.exists():
+                return 0
+            removed = 0
+            for path in self.directory.glob("*.part"):
+                try:
+                    if path.stat().st_mtime < cutoff:
+                        path.unlink()
+                        removed += 1
+                except FileNotFoundError:
+                    continue
+            return removed
+
+        removed = await anyio.to_thread.run_sync(sweep)
+        if removed:
+            logger.info(f"Removed {removed} stale upload part files")
+
+
+def _head_and_digest(path: Path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        head = f.read(UPLOAD_CHUNK_SIZE)
+        digest.update(head)
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return head, digest.hexdigest()
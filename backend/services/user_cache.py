@@ -0,0 +1,132 @@
+import copy
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+try:
+    from ..utils.cache import get_cache
+except ImportError:
+    from utils.cache import get_cache
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_KEY = "user_principal:{}"
+ALIAS_KEY = "user_principal_alias:{}"
+
+
+class UserCache:
+    """Short-lived cache of authenticated users, so a request doesn't reload its user.
+
+    Entries are keyed by the user's `id`. The short `user_id` and `public_id`
+    also accepted in tokens resolve to it through an alias map, so any of
+    them hits. The first tier is an in-process LRU of USER_CACHE_MAX_ENTRIES
+    built models. When REDIS_URL is set the user's fields are also kept
+    there, shared by every worker. Entries live USER_CACHE_TTL_SEC (default
+    30, 0 disables). Database drops them on user updates. Another worker's
+    in-process copy can still be up to the TTL old.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None):
+        self.ttl_seconds = float(os.getenv("USER_CACHE_TTL_SEC", "30")) if ttl_seconds is None else ttl_seconds
+        self.max_entries = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000")) if max_entries is None else max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._aliases: Dict[str, str] = {}
+        self.counters = {"hits": 0, "shared_hits": 0, "misses": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.counters, "entries": len(self._entries)}
+
+    @staticmethod
+    def _shared():
+        cache = get_cache()
+        return cache if cache.enabled and cache.redis_url else None
+
+    async def get(self, identifier: str, factory: Callable[..., Any]) -> Optional[Any]:
+        """Cached user for any of its identifiers; `factory(**fields)` rebuilds one from the shared tier"""
+        if not self.enabled or not identifier:
+            return None
+        user_id = self._aliases.get(identifier, identifier)
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.counters["hits"] += 1
+                # Routes may set attributes on current_user; keep the cached one clean
+                return copy.copy(entry[1])
+            self._drop(user_id)
+        shared = self._shared()
+        if shared is not None:
+            try:
+                user_id = await shared.get(ALIAS_KEY.format(identifier)) or identifier
+                fields = await shared.get_json(PRINCIPAL_KEY.format(user_id))
+                if fields:
+                    user = factory(**fields)
+                    self._store(user)
+                    self.counters["shared_hits"] += 1
+                    return copy.copy(user)
+            except Exception as e:
+                logger.warning(f"Shared user cache read failed: {e}")
+        self.counters["misses"] += 1
+        return None
+
+    async def put(self, user: Any):
+        """Cache a user model (anything with `id`, `user_id`, `public_id` and `json()`)"""
+        if not self.enabled:
+            return
+        aliases = self._store(user)
+        shared = self._shared()
+        if shared is not None:
+            try:
+                ttl = max(1, int(self.ttl_seconds))
+                await shared.set(PRINCIPAL_KEY.format(user.id), user.json(), ttl)
+                for alias in aliases:
+                    await shared.set(ALIAS_KEY.format(alias), user.id, ttl)
+            except Exception as e:
+                logger.warning(f"Shared user cache write failed: {e}")
+
+    async def invalidate(self, identifier: Optional[str]):
+        """Forget a user, by any of its identifiers"""
+        if not identifier:
+            return
+        self.counters["invalidations"] += 1
+        user_id = self._aliases.get(identifier, identifier)
+        self._drop(user_id)
+        shared = self._shared()
+        if shared is not None:
+            try:
+                user_id = await shared.get(ALIAS_KEY.format(identifier)) or user_id
+                await shared.delete(PRINCIPAL_KEY.format(user_id))
+            except Exception as e:
+                logger.warning(f"Shared user cache invalidation failed: {e}")
+
+    def clear(self):
+        self._entries.clear()
+        self._aliases.clear()
+
+    def _store(self, user: Any) -> Tuple[str, ...]:
+        aliases = self._alternate_ids(user)
+        self._drop(user.id)
+        self._entries[user.id] = (time.monotonic() + self.ttl_seconds, user, aliases)
+        for alias in aliases:
+            self._aliases[alias] = user.id
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+        return aliases
+
+    def _drop(self, user_id: str):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            for alias in entry[2]:
+                if self._aliases.get(alias) == user_id:
+                    del self._aliases[alias]
+
+    @staticmethod
+    def _alternate_ids(user: Any) -> Tuple[str, ...]:
+        ids: Iterable[Optional[str]] = (getattr(user, "user_id", None), getattr(user, "public_id", None))
+        return tuple(dict.fromkeys(i for i in ids if i and i != user.id))
@@ -89,6 +89,17 @@ class Cache:
         self._local[key] = (exp, value)
         return True
 
+    async def delete(self, key: str):
+        if not self.enabled:
+            return
+        await self._ensure_client()
+        if self._client is not None:
+            try:
+                await self._client.delete(key)
+            except Exception:
+                pass
+        self._local.pop(key, None)
+
     async def get_json(self, key: str):
         val = await self.get(key)
         if val is None:
@@ -0,0 +1,90 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+
+
+class DataLoader:
+    """Batches and de-duplicates per-item lookups made while building one response.
+
+    `load(key)` returns a future; every key requested in the same event loop
+    tick is resolved by a single call to `batch_fn(keys) -> {key: value}`.
+    Enrich each item of a page in its own coroutine under asyncio.gather and
+    the page costs one query per relation instead of one per item. Missing
+    keys resolve to None. Create a loader per request so results never go
+    stale.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+                 max_batch_size: int = 1000):
+        self._batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+        self._queue: List[Hashable] = []
+
+    def load(self, key: Hashable) -> "asyncio.Future":
+        future = self._futures.get(key)
+        if future is not None:
+            return future
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._futures[key] = future
+        self._queue.append(key)
+        if len(self._queue) == 1:
+            # Dispatch after the other coroutines scheduled in this tick have queued their keys
+            loop.call_soon(lambda: asyncio.ensure_future(self._dispatch()))
+        return future
+
+    async def load_many(self, keys: Iterable[Hashable]) -> List[Any]:
+        return list(await asyncio.gather(*(self.load(k) for k in keys)))
+
+    async def _dispatch(self):
+        keys, self._queue = self._queue, []
+        for start in range(0, len(keys), self.max_batch_size):
+            chunk = keys[start:start + self.max_batch_size]
+            try:
+                results = await self._batch_fn(chunk)
+            except Exception as e:
+                for key in chunk:
+                    if not self._futures[key].done():
+                        self._futures[key].set_exception(e)
+                continue
+            for key in chunk:
+                if not self._futures[key].done():
+                    self._futures[key].set_result(results.get(key))
+
+
+def documents_by(collection, field: str, projection: Optional[Dict[str, Any]] = None,
+                 query: Optional[Dict[str, Any]] = None) -> DataLoader:
+    """Loader of one document per `field` value, fetched with a single `$in` query"""
+    async def batch(keys):
+        found = {}
+        async for doc in collection.find({**(query or {}), field: {"$in": keys}}, projection):
+            found.setdefault(doc.get(field), doc)
+        return found
+    return DataLoader(batch)
+
+
+def counts_by(collection, fields: List[str], query: Optional[Dict[str, Any]] = None) -> DataLoader:
+    """Loader of document counts per key with a single `$group` aggregation.
+
+    With several `fields` a document counts once for each distinct key it
+    holds in any of them, matching `count_documents({"$or": [...]})` per key.
+    """
+    async def batch(keys):
+        if len(fields) == 1:
+            pipeline = [
+                {"$match": {**(query or {}), fields[0]: {"$in": keys}}},
+                {"$group": {"_id": f"${fields[0]}", "count": {"$sum": 1}}},
+            ]
+        else:
+            pipeline = [
+                {"$match": {"$and": [query or {}, {"$or": [{f: {"$in": keys}} for f in fields]}]}},
+                {"$project": {"_id": 0, "keys": {"$setUnion": [[f"${f}"] for f in fields]}}},
+                {"$unwind": "$keys"},
+                {"$match": {"keys": {"$in": keys}}},
+                {"$group": {"_id": "$keys", "count": {"$sum": 1}}},
+            ]
+        counts = {key: 0 for key in keys}
+        async for row in collection.aggregate(pipeline):
+            counts[row["_id"]] = row["count"]
+        return counts
+    return DataLoader(batch)
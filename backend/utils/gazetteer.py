@@ -0,0 +1,195 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from ..models.nigerian_states import NIGERIAN_STATES
+    from ..models.nigerian_lgas import NIGERIAN_LGAS
+    from ..models.nigerian_coordinates import (
+        STATE_COORDINATES, STATE_ALIASES, LGA_COORDINATES, CITY_COORDINATES
+    )
+    from ..services.geocoding import normalize_location_text
+except ImportError:
+    from models.nigerian_states import NIGERIAN_STATES
+    from models.nigerian_lgas import NIGERIAN_LGAS
+    from models.nigerian_coordinates import (
+        STATE_COORDINATES, STATE_ALIASES, LGA_COORDINATES, CITY_COORDINATES
+    )
+    from services.geocoding import normalize_location_text
+
+logger = logging.getLogger(__name__)
+
+# Higher rank wins when several places appear in the same text
+KIND_RANK = {"town": 4, "city": 3, "lga": 3, "state": 1}
+
+
+def _state_key(state: Optional[str]) -> str:
+    return normalize_location_text(state)
+
+
+class Gazetteer:
+    """Token n-gram index of Nigerian places for single-pass location matching.
+
+    Every place name and alias is stored under its normalized token phrase
+    ("Obio/Akpor" -> "obio akpor"). Matching walks the text once, trying the
+    longest phrase at each token position, so multi-word names such as
+    "Victoria Island" or "Lagos Island" beat their single-word prefixes.
+    Places without their own coordinates inherit them from their LGA, then
+    their state.
+    """
+
+    def __init__(self):
+        self._index: Dict[str, List[Dict[str, Any]]] = {}
+        # First token -> phrase lengths (longest first) that start with it
+        self._starts: Dict[str, List[int]] = {}
+        self._state_coords: Dict[str, Tuple[float, float]] = {}
+        self._lga_coords: Dict[Tuple[str, str], Tuple[float, float]] = {}
+
+    @classmethod
+    def from_static(cls) -> "Gazetteer":
+        """Build from the bundled state/LGA models and offline coordinate table"""
+        gaz = cls()
+        for state in set(NIGERIAN_STATES) | set(NIGERIAN_LGAS) | set(STATE_COORDINATES):
+            gaz.add_place(state, "state", state=state,
+                          coords=STATE_COORDINATES.get(state),
+                          aliases=STATE_ALIASES.get(state, ()))
+        for state, lgas in NIGERIAN_LGAS.items():
+            known = LGA_COORDINATES.get(state, {})
+            for lga in lgas:
+                gaz.add_place(lga, "lga", state=state, lga=lga, coords=known.get(lga))
+        for city, (state, lat, lng) in CITY_COORDINATES.items():
+            gaz.add_place(city, "city", state=state, coords=(lat, lng))
+        return gaz
+
+    def __len__(self) -> int:
+        return sum(len(places) for places in self._index.values())
+
+    def _aliases_for(self, name: str, aliases: Iterable[str]) -> List[str]:
+        phrases = [normalize_location_text(name)]
+        # "Municipal Area Council (AMAC)" is also known as "AMAC"
+        if "(" in name and ")" in name:
+            inner = name[name.index("(") + 1:name.index(")")]
+            phrases.append(normalize_location_text(inner))
+            phrases.append(normalize_location_text(name[:name.index("(")]))
+        phrases.extend(normalize_location_text(a) for a in aliases)
+        return [p for p in dict.fromkeys(phrases) if p]
+
+    def add_place(self, name: str, kind: str, state: Optional[str] = None, lga: Optional[str] = None,
+                  coords: Optional[Tuple[float, float]] = None, aliases: Iterable[str] = ()):
+        """Add (or replace) a place; safe to call incrementally at runtime"""
+        self.remove_place(name, kind, state=state, lga=lga)
+        place = {
+            "name": name,
+            "kind": kind,
+            "state": state,
+            "lga": lga,
+            "coords": tuple(coords) if coords else None,
+            "state_key": _state_key(state or (name if kind == "state" else None)),
+            "lga_key": normalize_location_text(lga or (name if kind == "lga" else None)),
+        }
+        if coords and kind == "state":
+            self._state_coords[place["state_key"]] = place["coords"]
+        if coords and kind == "lga":
+            self._lga_coords[(place["state_key"], place["lga_key"])] = place["coords"]
+        for phrase in self._aliases_for(name, aliases):
+            self._index.setdefault(phrase, []).append(place)
+            tokens = phrase.split()
+            lengths = self._starts.setdefault(tokens[0], [])
+            if len(tokens) not in lengths:
+                lengths.append(len(tokens))
+                lengths.sort(reverse=True)
+
+    def remove_place(self, name: str, kind: str, state: Optional[str] = None, lga: Optional[str] = None):
+        """Drop a place and all of its aliases"""
+        def same(p):
+            return p["name"] == name and p["kind"] == kind and p["state"] == state and p["lga"] == lga
+
+        for phrase in list(self._index):
+            places = [p for p in self._index[phrase] if not same(p)]
+            if places:
+                self._index[phrase] = places
+            else:
+                del self._index[phrase]
+                tokens = phrase.split()
+                lengths = self._starts.get(tokens[0], [])
+                if len(tokens) in lengths and not any(
+                    p.split()[0] == tokens[0] and len(p.split()) == len(tokens) for p in self._index
+                ):
+                    lengths.remove(len(tokens))
+                if not lengths:
+                    self._starts.pop(tokens[0], None)
+
+    async def load_custom_locations(self, db) -> int:
+        """Merge admin-managed states, LGAs and towns from `system_locations`"""
+        count = 0
+        async for doc in db.system_locations.find({"type": {"$in": ["state", "lga", "town"]}}):
+            name = doc.get("name")
+            if not name:
+                continue
+            kind = doc["type"]
+            if kind == "state":
+                self.add_place(name, "state", state=name, coords=STATE_COORDINATES.get(name))
+            elif kind == "lga":
+                state = doc.get("state")
+                self.add_place(name, "lga", state=state, lga=name,
+                               coords=LGA_COORDINATES.get(state, {}).get(name))
+            else:
+                self.add_place(name, "town", state=doc.get("state"), lga=doc.get("lga"))
+            count += 1
+        logger.info(f"Gazetteer loaded {count} custom locations ({len(self)} entries total)")
+        return count
+
+    def _coords_for(self, place: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+        if place["coords"]:
+            return place["coords"]
+        if place["lga_key"]:
+            coords = self._lga_coords.get((place["state_key"], place["lga_key"]))
+            if coords:
+                return coords
+        return self._state_coords.get(place["state_key"])
+
+    def matches(self, text: Optional[str]) -> List[Tuple[int, int, Dict[str, Any]]]:
+        """All (position, token_count, place) matches, leftmost-longest, in one pass"""
+        tokens = normalize_location_text(text).split()
+        found = []
+        i = 0
+        while i < len(tokens):
+            step = 1
+            # Tokens that start no place name cost a single dict probe
+            for n in self._starts.get(tokens[i], ()):
+                if i + n > len(tokens):
+                    continue
+                places = self._index.get(tokens[i] if n == 1 else " ".join(tokens[i:i + n]))
+                if places:
+                    found.extend((i, n, p) for p in places)
+                    step = n
+                    break
+            i += step
+        return found
+
+    def lookup(self, text: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Most specific place in `text` that has coordinates, or None"""
+        found = self.matches(text)
+        if not found:
+            return None
+        if len(found) == 1:
+            coords = self._coords_for(found[0][2])
+            return {**found[0][2], "coords": coords} if coords else None
+        mentioned_states = {p["state_key"] for _, _, p in found if p["kind"] == "state"}
+
+        def score(match):
+            pos, n, place = match
+            in_state = place["state_key"] in mentioned_states
+            return (KIND_RANK.get(place["kind"], 0), in_state, n, -pos)
+
+        for pos, n, place in sorted(found, key=score, reverse=True):
+            coords = self._coords_for(place)
+            if coords:
+                return {**place, "coords": coords}
+        return None
+
+    def resolve(self, text: Optional[str]) -> Optional[Dict[str, float]]:
+        place = self.lookup(text)
+        if not place:
+            return None
+        lat, lng = place["coords"]
+        return {"latitude": lat, "longitude": lng}
@@ -12,6 +12,7 @@ from typing import Dict, Any, List
 from fastapi import HTTPException
 from ..database import database
 from utils.logger import get_logger
+from ..utils import metrics
 
 logger = get_logger('health_monitor')
 
@@ -23,6 +24,8 @@ class HealthMonitor:
         self.last_health_check = None
         self.health_history = []
         self.max_history_size = 100
+        # First non-blocking cpu_percent() call only sets the baseline
+        psutil.cpu_percent(interval=None)
     
     async def get_system_health(self) -> Dict[str, Any]:
         """Get comprehensive system health status."""
@@ -136,8 +139,8 @@ class HealthMonitor:
     async def _get_system_metrics(self) -> Dict[str, Any]:
         """Get system resource metrics."""
         try:
-            # CPU metrics
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # CPU metrics (usage since the previous call; interval=1 would block the event loop for a second)
+            cpu_percent = psutil.cpu_percent(interval=None)
             cpu_count = psutil.cpu_count()
             
             # Memory metrics
@@ -226,15 +229,17 @@ class HealthMonitor:
         }
     
     async def _get_performance_metrics(self) -> Dict[str, Any]:
-        """Get performance-related metrics."""
+        """Get performance-related metrics from the request and database latency already recorded."""
         try:
-            # Database query performance test
-            start_time = time.time()
-            await database.database.users.find_one({})
-            db_query_time = (time.time() - start_time) * 1000
-            
+            mongo = metrics.mongo_command_duration.totals().values()
+            http = metrics.http_request_duration.totals().values()
+            mongo_count = sum(c for c, _ in mongo)
+            http_count = sum(c for c, _ in http)
             return {
-                "database_query_time_ms": round(db_query_time, 2),
+                "database_commands": mongo_count,
+                "database_command_avg_ms": round(sum(t for _, t in mongo) / mongo_count * 1000, 2) if mongo_count else None,
+                "http_requests": http_count,
+                "http_request_avg_ms": round(sum(t for _, t in http) / http_count * 1000, 2) if http_count else None,
                 "health_check_count": len(self.health_history),
                 "last_health_check": self.last_health_check.isoformat() if self.last_health_check else None
             }
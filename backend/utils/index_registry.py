@@ -0,0 +1,337 @@
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Kept in step with services/retention.py TOKEN_GRACE_SEC
+TOKEN_GRACE_SEC = int(os.getenv("RETENTION_TOKEN_GRACE_HOURS", "24")) * 3600
+
+
+def _index(keys, name: str, **options) -> Dict[str, Any]:
+    return {"keys": list(keys), "name": name, **options}
+
+
+# Every index the application relies on, per collection. Names of indexes
+# that already existed in production are kept as they were. Lists paged by
+# keyset (utils/pagination.py) end their sort index with the tie-breaker id.
+INDEXES: Dict[str, List[Dict[str, Any]]] = {
+    "users": [
+        _index([("email", 1)], "unique_email", unique=True,
+               partialFilterExpression={"email": {"$type": "string"}}),
+        _index([("public_id", 1)], "unique_public_id", unique=True,
+               partialFilterExpression={"public_id": {"$type": "string"}}),
+        _index([("user_id", 1)], "unique_user_id", unique=True,
+               partialFilterExpression={"user_id": {"$type": "string"}}),
+        _index([("id", 1)], "users_id"),
+        # role + id for batched (keyset) scans over tradespeople
+        _index([("role", 1), ("id", 1)], "users_role_id"),
+        _index([("role", 1), ("created_at", -1), ("id", -1)], "users_role_createdAt_id"),
+        _index([("created_at", -1), ("id", -1)], "users_createdAt_id"),
+        _index([("phone", 1)], "users_phone"),
+        # Ranked directory and admin search (utils/search.py builds the $search string)
+        _index([("name", "text"), ("business_name", "text"), ("profession", "text"), ("trade_categories", "text"),
+                ("skills", "text"), ("city", "text"), ("state", "text"), ("location", "text"), ("bio", "text"),
+                ("email", "text")], "users_text_search", default_language="english",
+               weights={"name": 10, "business_name": 8, "profession": 6, "trade_categories": 6, "skills": 4,
+                        "city": 2, "state": 2, "location": 2, "email": 2, "bio": 1}),
+    ],
+    "jobs": [
+        _index([("id", 1)], "jobs_id"),
+        _index([("status", 1), ("created_at", -1), ("id", -1)], "jobs_status_createdAt_id"),
+        _index([("homeowner_id", 1), ("created_at", -1)], "jobs_homeownerId_createdAt"),
+        _index([("homeowner.id", 1), ("created_at", -1)], "jobs_homeownerDotId_createdAt"),
+        _index([("category", 1), ("created_at", -1)], "jobs_category_createdAt"),
+        _index([("assigned_tradesperson_id", 1), ("status", 1)], "jobs_assignedTradesperson_status"),
+        _index([("title", "text"), ("category", "text"), ("description", "text")], "jobs_text_search",
+               default_language="english", weights={"title": 10, "category": 5, "description": 1}),
+        # GeoJSON point for server-side $geoNear distance queries
+        _index([("location_point", "2dsphere")], "jobs_locationPoint_2dsphere"),
+    ],
+    "quotes": [
+        _index([("id", 1)], "quotes_id"),
+        _index([("job_id", 1), ("created_at", -1)], "quotes_jobId_createdAt"),
+        _index([("tradesperson_id", 1), ("created_at", -1)], "quotes_tradespersonId_createdAt"),
+    ],
+    "interests": [
+        _index([("id", 1)], "interests_id"),
+        _index([("job_id", 1), ("tradesperson_id", 1)], "interests_jobId_tradespersonId"),
+        _index([("tradesperson_id", 1), ("created_at", -1)], "interests_tradespersonId_createdAt"),
+    ],
+    "conversations": [
+        _index([("id", 1)], "conversations_id"),
+        _index([("homeowner_id", 1), ("last_message_at", -1), ("id", -1)], "conversations_homeownerId_lastMessageAt_id"),
+        _index([("tradesperson_id", 1), ("last_message_at", -1), ("id", -1)], "conversations_tradespersonId_lastMessageAt_id"),
+        _index([("job_id", 1), ("homeowner_id", 1), ("tradesperson_id", 1)], "conversations_job_participants"),
+    ],
+    "messages": [
+        # conversation queries and read-status updates
+        _index([("conversation_id", 1), ("created_at", 1), ("id", 1)], "messages_conversation_createdAt_id"),
+        _index([("conversation_id", 1), ("sender_type", 1), ("status", 1)], "messages_conversation_sender_status"),
+        _index([("status", 1), ("created_at", 1)], "messages_status_createdAt"),
+    ],
+    "messages_archive": [
+        # Conversation history pages over the archive too (Database.get_conversation_messages)
+        _index([("conversation_id", 1), ("created_at", 1), ("id", 1)], "messages_archive_conversation_createdAt_id"),
+    ],
+    "reviews": [
+        _index([("id", 1)], "reviews_id"),
+        _index([("reviewee_id", 1), ("status", 1), ("created_at", -1)], "reviews_reviewee_status_createdAt"),
+        _index([("job_id", 1), ("status", 1)], "reviews_jobId_status"),
+        _index([("status", 1), ("created_at", -1)], "reviews_status_createdAt"),
+        _index([("reviewer_id", 1), ("created_at", -1)], "reviews_reviewerId_createdAt"),
+        _index([("created_at", -1), ("id", -1)], "reviews_createdAt_id"),
+    ],
+    "portfolio": [
+        _index([("id", 1)], "portfolio_id"),
+        _index([("tradesperson_id", 1), ("created_at", -1)], "portfolio_tradespersonId_createdAt"),
+    ],
+    "wallets": [
+        _index([("user_id", 1)], "wallets_userId"),
+    ],
+    "wallet_transactions": [
+        _index([("id", 1)], "wallet_transactions_id"),
+        _index([("user_id", 1), ("created_at", -1), ("id", -1)], "wallet_transactions_userId_createdAt_id"),
+        _index([("transaction_type", 1), ("status", 1), ("created_at", -1)], "wallet_transactions_type_status_createdAt"),
+        _index([("proof_image", 1)], "wallet_transactions_proofImage"),
+    ],
+    "notifications": [
+        _index([("user_id", 1), ("created_at", -1), ("_id", -1)], "notifications_userId_createdAt_id"),
+        _index([("status", 1), ("created_at", -1)], "notifications_status_createdAt"),
+        _index([("type", 1), ("created_at", -1)], "notifications_type_createdAt"),
+        # Retention scans for notifications older than the cutoff (services/retention.py)
+        _index([("created_at", 1)], "notifications_createdAt"),
+    ],
+    "notifications_archive": [
+        _index([("user_id", 1), ("created_at", -1)], "notifications_archive_userId_createdAt"),
+    ],
+    # Analytics read bucket ranges of one granularity (services/notification_rollups.py)
+    "notification_rollups": [
+        _index([("granularity", 1), ("bucket", 1)], "notification_rollups_granularity_bucket"),
+    ],
+    # looked up per user and in $in batches
+    "notification_preferences": [
+        _index([("user_id", 1)], "notification_preferences_userId"),
+    ],
+    "referrals": [
+        _index([("referrer_id", 1), ("created_at", -1)], "referrals_referrerId_createdAt"),
+        _index([("referred_user_id", 1)], "referrals_referredUserId"),
+    ],
+    "referral_codes": [
+        _index([("code", 1)], "referral_codes_code"),
+    ],
+    "user_verifications": [
+        _index([("id", 1)], "user_verifications_id"),
+        _index([("user_id", 1)], "user_verifications_userId"),
+        _index([("status", 1), ("submitted_at", -1)], "user_verifications_status_submittedAt"),
+        _index([("document_url", 1)], "user_verifications_documentUrl"),
+    ],
+    "tradespeople_verifications": [
+        _index([("id", 1)], "tradespeople_verifications_id"),
+        _index([("user_id", 1), ("submitted_at", -1)], "tradespeople_verifications_userId_submittedAt"),
+        _index([("status", 1), ("submitted_at", -1)], "tradespeople_verifications_status_submittedAt"),
+        # Admin file viewer looks a file up by name across the blob reference lists
+        _index([("documents_blobs.filename", 1)], "tradespeople_verifications_documentsBlobs_filename"),
+        _index([("work_photos_blobs.filename", 1)], "tradespeople_verifications_workPhotosBlobs_filename"),
+        _index([("partner_id_documents_blobs.filename", 1)], "tradespeople_verifications_partnerIdDocumentsBlobs_filename"),
+    ],
+    "upload_sessions": [
+        # TTL: resumable upload sessions disappear once expires_at passes
+        _index([("expires_at", 1)], "upload_sessions_expiresAt_ttl", expireAfterSeconds=0),
+    ],
+    "hiring_status": [
+        _index([("job_id", 1), ("tradesperson_id", 1)], "hiring_status_jobId_tradespersonId"),
+        _index([("tradesperson_id", 1)], "hiring_status_tradespersonId"),
+    ],
+    "job_applications": [
+        _index([("id", 1)], "job_applications_id"),
+        _index([("job_id", 1), ("applied_at", -1)], "job_applications_jobId_appliedAt"),
+    ],
+    "job_question_answers": [
+        _index([("job_id", 1)], "job_question_answers_jobId"),
+    ],
+    "pending_jobs": [
+        _index([("user_id", 1), ("created_at", -1)], "pending_jobs_user_createdAt"),
+        _index([("expires_at", 1)], "pending_jobs_expire", expireAfterSeconds=0),
+    ],
+    # Tokens and OTPs are disposable: TTL removes them a grace period after expires_at
+    "phone_verification_otps": [
+        _index([("user_id", 1), ("phone", 1), ("otp_code", 1)], "phone_verification_otps_user_phone_code"),
+        _index([("expires_at", 1)], "phone_verification_otps_expire", expireAfterSeconds=TOKEN_GRACE_SEC),
+    ],
+    "email_verification_otps": [
+        _index([("user_id", 1), ("email", 1), ("otp_code", 1)], "email_verification_otps_user_email_code"),
+        _index([("expires_at", 1)], "email_verification_otps_expire", expireAfterSeconds=TOKEN_GRACE_SEC),
+    ],
+    "password_reset_tokens": [
+        _index([("token", 1)], "password_reset_tokens_token"),
+        _index([("expires_at", 1)], "password_reset_tokens_expire", expireAfterSeconds=TOKEN_GRACE_SEC),
+    ],
+    "email_verification_tokens": [
+        _index([("token", 1)], "email_verification_tokens_token"),
+        _index([("expires_at", 1)], "email_verification_tokens_expire", expireAfterSeconds=TOKEN_GRACE_SEC),
+    ],
+    "admins": [
+        _index([("id", 1)], "admins_id"),
+        _index([("username", 1)], "admins_username"),
+        _index([("email", 1)], "admins_email"),
+    ],
+    "admin_activities": [
+        _index([("created_at", -1)], "admin_activities_createdAt"),
+        _index([("admin_id", 1), ("created_at", -1)], "admin_activities_adminId_createdAt"),
+    ],
+    "content_items": [
+        _index([("id", 1)], "content_items_id"),
+        _index([("content_type", 1), ("status", 1), ("created_at", -1)], "content_items_type_status_createdAt"),
+    ],
+    "policies": [
+        _index([("id", 1)], "policies_id"),
+        _index([("policy_type", 1), ("status", 1)], "policies_type_status"),
+    ],
+    "system_locations": [
+        _index([("type", 1), ("state", 1), ("name", 1)], "system_locations_type_state_name"),
+    ],
+    "newsletter_subscribers": [
+        _index([("email", 1)], "newsletter_unique_email", unique=True,
+               partialFilterExpression={"email": {"$type": "string"}}),
+    ],
+    # Geocoder cache entries expire on their own expires_at
+    "geocode_cache": [
+        _index([("expires_at", 1)], "geocode_cache_expire", expireAfterSeconds=0),
+    ],
+    # Conduit for the Mongo realtime broker (services/realtime.py); events are read within seconds
+    "realtime_events": [
+        _index([("created_at", 1)], "realtime_events_expire", expireAfterSeconds=3600),
+    ],
+    "job_queue": [
+        _index([("status", 1), ("run_at", 1)], "job_queue_status_runAt"),
+        _index([("kind", 1), ("ref", 1)], "job_queue_kind_ref"),
+        # Finished tasks are only kept around for inspection
+        _index([("completed_at", 1)], "job_queue_done_expire",
+               expireAfterSeconds=int(os.getenv("JOB_QUEUE_DONE_TTL_DAYS", "7")) * 86400,
+               partialFilterExpression={"status": "done"}),
+    ],
+}
+
+# Representative shapes of the hottest queries, checked with explain() in the report
+HOT_QUERIES: List[Dict[str, Any]] = [
+    {"name": "user by id", "collection": "users", "filter": {"id": "?"}},
+    {"name": "job by id", "collection": "jobs", "filter": {"id": "?"}},
+    {"name": "active jobs", "collection": "jobs", "filter": {"status": "active"}, "sort": {"created_at": -1, "id": -1}},
+    {"name": "quotes for job", "collection": "quotes", "filter": {"job_id": "?"}, "sort": {"created_at": -1}},
+    {"name": "interests for job", "collection": "interests", "filter": {"job_id": "?"}},
+    {"name": "interests by tradesperson", "collection": "interests", "filter": {"tradesperson_id": "?"}},
+    {"name": "homeowner conversations", "collection": "conversations",
+     "filter": {"homeowner_id": "?"}, "sort": {"last_message_at": -1, "id": -1}},
+    {"name": "tradesperson conversations", "collection": "conversations",
+     "filter": {"tradesperson_id": "?"}, "sort": {"last_message_at": -1, "id": -1}},
+    {"name": "conversation messages", "collection": "messages",
+     "filter": {"conversation_id": "?"}, "sort": {"created_at": 1, "id": 1}},
+    {"name": "wallet by user", "collection": "wallets", "filter": {"user_id": "?"}},
+    {"name": "wallet transactions", "collection": "wallet_transactions",
+     "filter": {"user_id": "?"}, "sort": {"created_at": -1, "id": -1}},
+    {"name": "user notifications", "collection": "notifications",
+     "filter": {"user_id": "?"}, "sort": {"created_at": -1, "_id": -1}},
+    {"name": "published reviews for user", "collection": "reviews",
+     "filter": {"reviewee_id": "?", "status": "published"}, "sort": {"created_at": -1}},
+    {"name": "tradesperson portfolio", "collection": "portfolio",
+     "filter": {"tradesperson_id": "?"}, "sort": {"created_at": -1}},
+    {"name": "pending funding requests", "collection": "wallet_transactions",
+     "filter": {"transaction_type": "wallet_funding", "status": "pending"}, "sort": {"created_at": -1}},
+    {"name": "tradesperson search", "collection": "users",
+     "filter": {"role": "tradesperson", "$text": {"$search": "plumber plumbing"}}},
+    {"name": "job search", "collection": "jobs",
+     "filter": {"status": "active", "$text": {"$search": "generator gen genset"}}},
+]
+
+
+async def apply_indexes(db, collections: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Create every registered index; failures are logged and reported, never raised"""
+    created, failed = [], []
+    for collection, specs in INDEXES.items():
+        if collections and collection not in collections:
+            continue
+        for spec in specs:
+            options = {k: v for k, v in spec.items() if k != "keys"}
+            try:
+                await db[collection].create_index(spec["keys"], **options)
+                created.append(f"{collection}.{spec['name']}")
+            except Exception as e:
+                failed.append({"index": f"{collection}.{spec['name']}", "error": str(e)})
+                logger.warning(f"Failed to ensure index {collection}.{spec['name']}: {e}")
+    logger.info(f"Database indexes ensured: {len(created)} ok, {len(failed)} failed")
+    return {"ensured": len(created), "failed": failed}
+
+
+def _plan_stages(plan: Any, stages: List[Dict[str, Any]]):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append({"stage": plan["stage"], "index": plan.get("indexName")})
+        for value in plan.values():
+            _plan_stages(value, stages)
+    elif isinstance(plan, list):
+        for item in plan:
+            _plan_stages(item, stages)
+
+
+async def explain_query(db, query: Dict[str, Any]) -> Dict[str, Any]:
+    command = {"find": query["collection"], "filter": query["filter"], "limit": 20}
+    if query.get("sort"):
+        command["sort"] = query["sort"]
+    result = await db.command({"explain": command, "verbosity": "queryPlanner"})
+    stages: List[Dict[str, Any]] = []
+    _plan_stages(result.get("queryPlanner", {}).get("winningPlan", {}), stages)
+    names = {s["stage"] for s in stages}
+    return {
+        "name": query["name"],
+        "collection": query["collection"],
+        "stages": [s["stage"] for s in stages],
+        "indexes": [s["index"] for s in stages if s["index"]],
+        "collection_scan": "COLLSCAN" in names,
+        "in_memory_sort": "SORT" in names,
+    }
+
+
+async def index_report(db, explain: bool = True) -> Dict[str, Any]:
+    """Registered indexes missing from the database, existing indexes that are
+    not registered or have never been used ($indexStats, since last restart),
+    and the winning plan of each hot query."""
+    existing_collections = set(await db.list_collection_names())
+    missing, unregistered, unused = [], [], []
+    for collection in sorted(existing_collections | set(INDEXES)):
+        registered = {spec["name"]: spec for spec in INDEXES.get(collection, [])}
+        registered_keys = {tuple(spec["keys"]) for spec in registered.values()}
+        existing: Dict[str, Any] = {}
+        if collection in existing_collections:
+            async for info in db[collection].list_indexes():
+                existing[info["name"]] = info
+        existing_keys = {tuple(info["key"].items()) for info in existing.values()}
+        for name, spec in registered.items():
+            if name not in existing and tuple(spec["keys"]) not in existing_keys:
+                missing.append({"collection": collection, "index": name, "keys": spec["keys"]})
+        for name, info in existing.items():
+            if name != "_id_" and name not in registered and tuple(info["key"].items()) not in registered_keys:
+                unregistered.append({"collection": collection, "index": name, "keys": list(info["key"].items())})
+        if not existing:
+            continue
+        try:
+            async for stat in db[collection].aggregate([{"$indexStats": {}}]):
+                ops = stat.get("accesses", {}).get("ops", 0)
+                if stat["name"] != "_id_" and ops == 0:
+                    unused.append({
+                        "collection": collection,
+                        "index": stat["name"],
+                        "since": stat.get("accesses", {}).get("since"),
+                    })
+        except Exception as e:
+            logger.warning(f"$indexStats unavailable for {collection}: {e}")
+    report: Dict[str, Any] = {"missing": missing, "unregistered": unregistered, "unused": unused}
+    if explain:
+        plans = []
+        for query in HOT_QUERIES:
+            try:
+                plans.append(await explain_query(db, query))
+            except Exception as e:
+                plans.append({"name": query["name"], "collection": query["collection"], "error": str(e)})
+        report["queries"] = plans
+    return report
@@ -0,0 +1,310 @@
+"""
+In-process metrics registry rendered in the Prometheus text exposition format.
+
+Counters, gauges and histograms are kept per process (each worker is scraped
+separately). Request latency is recorded by the HTTP middleware, MongoDB
+command latency by MongoCommandListener and outbound provider calls by
+observe_outbound(); /api/metrics renders them with render().
+"""
+
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+# Latency buckets in seconds
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+Labels = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Labels:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    @property
+    def exposed_name(self) -> str:
+        """Name the HELP/TYPE lines are written under; it must match the sample names"""
+        return self.name
+
+    def render(self) -> List[str]:
+        name = self.exposed_name
+        return [f"# HELP {name} {self.documentation}", f"# TYPE {name} {self.kind}", *self.samples()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    @property
+    def exposed_name(self) -> str:
+        # Samples are <name>_total, as prometheus_client writes them
+        return f"{self.name}_total"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.exposed_name}{_label_str(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Labels, float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_label_str(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = HTTP_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def totals(self) -> Dict[Labels, Tuple[int, float]]:
+        """(count, sum) per label set"""
+        with self._lock:
+            return {k: (int(sum(s[:-1])), s[-1]) for k, s in self._series.items()}
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, list(s)) for k, s in self._series.items())
+        for key, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), series[:-1]):
+                cumulative += count
+                le = ("le", _format_value(bound) if bound == math.inf else repr(float(bound)))
+                yield f"{self.name}_bucket{_label_str(self.labelnames, key, le)} {_format_value(cumulative)}"
+            labels = _label_str(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(series[-1])}"
+            yield f"{self.name}_count{labels} {_format_value(cumulative)}"
+
+
+class MetricsRegistry:
+    """Named metrics plus collectors that refresh gauges just before a scrape"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"Metric {metric.name} already registered as {existing.kind}")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = HTTP_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]):
+        """`collector()` runs at every render(); it must not block (no I/O)"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in list(self._collectors):
+            try:
+                collector()
+            except Exception:
+                # A broken collector must not take the whole scrape down
+                errors.inc(source="collector")
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = os.getenv("METRICS_PREFIX", "servicehub")
+
+registry = MetricsRegistry()
+
+errors = registry.counter(f"{PREFIX}_metrics_errors", "Failures while collecting metrics", ["source"])
+http_request_duration = registry.histogram(
+    f"{PREFIX}_http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"], HTTP_BUCKETS)
+http_requests_in_flight = registry.gauge(
+    f"{PREFIX}_http_requests_in_flight", "HTTP requests currently being served", ["method"])
+mongo_command_duration = registry.histogram(
+    f"{PREFIX}_mongo_command_duration_seconds", "MongoDB command latency",
+    ["command", "collection"], MONGO_BUCKETS)
+mongo_command_failures = registry.counter(
+    f"{PREFIX}_mongo_command_failures", "MongoDB commands that returned an error", ["command", "collection"])
+outbound_request_duration = registry.histogram(
+    f"{PREFIX}_outbound_request_duration_seconds", "Latency of calls to external providers",
+    ["provider", "outcome"], HTTP_BUCKETS)
+
+
+def route_label(scope) -> str:
+    """Path template of the matched route, so /api/jobs/{job_id} is one series rather than one per job"""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path if path else "unmatched"
+
+
+def observe_outbound(provider: str, started: float, status_code: Optional[int] = None):
+    """Record a call to `provider` that began at time.perf_counter() `started`; no status means it failed"""
+    outcome = f"{status_code // 100}xx" if status_code else "error"
+    outbound_request_duration.observe(time.perf_counter() - started, provider=provider, outcome=outcome)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Times every command the driver sends, labelled by command and collection.
+
+    Durations come from the driver (`duration_micros`); started() only notes
+    the collection name. Pass an instance in the client's `event_listeners`.
+    """
+
+    # Commands whose first field is not a collection name
+    _NO_COLLECTION = {"ping", "hello", "isMaster", "ismaster", "buildInfo", "endSessions",
+                      "saslStart", "saslContinue", "getMore", "killCursors", "dbStats"}
+
+    def __init__(self, max_pending: int = 10000):
+        self._pending: Dict[Tuple[object, int], str] = {}
+        self._max_pending = max_pending
+
+    def started(self, event):
+        collection = ""
+        if event.command_name not in self._NO_COLLECTION:
+            value = event.command.get(event.command_name)
+            collection = value if isinstance(value, str) else ""
+        elif event.command_name == "getMore":
+            collection = event.command.get("collection") or ""
+        if len(self._pending) >= self._max_pending:
+            # Events for dropped connections never finish; don't grow without bound
+            self._pending.clear()
+        self._pending[(event.connection_id, event.request_id)] = collection
+
+    def _finish(self, event) -> str:
+        return self._pending.pop((event.connection_id, event.request_id), "")
+
+    def succeeded(self, event):
+        collection = self._finish(event)
+        mongo_command_duration.observe(event.duration_micros / 1e6, command=event.command_name, collection=collection)
+
+    def failed(self, event):
+        collection = self._finish(event)
+        mongo_command_duration.observe(event.duration_micros / 1e6, command=event.command_name, collection=collection)
+        mongo_command_failures.inc(command=event.command_name, collection=collection)
+
+
+_process_started = time.time()
+system_cpu = registry.gauge(f"{PREFIX}_cpu_usage_percent", "Host CPU usage since the previous scrape")
+system_memory = registry.gauge(f"{PREFIX}_memory_usage_percent", "Host memory in use")
+process_memory = registry.gauge(f"{PREFIX}_process_resident_memory_bytes", "Resident memory of this worker")
+uptime = registry.gauge(f"{PREFIX}_uptime_seconds", "Seconds since this worker started")
+
+
+def _collect_system():
+    try:
+        import psutil
+    except ImportError:
+        return
+    # interval=None compares against the previous call instead of sleeping for a sample
+    system_cpu.set(psutil.cpu_percent(interval=None))
+    system_memory.set(psutil.virtual_memory().percent)
+    process_memory.set(psutil.Process().memory_info().rss)
+    uptime.set(time.time() - _process_started)
+
+
+registry.add_collector(_collect_system)
@@ -0,0 +1,162 @@
+import bisect
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+try:
+    from ..models.trade_categories import NIGERIAN_TRADE_CATEGORIES
+    from ..models.nigerian_states import NIGERIAN_STATES
+    from ..models.nigerian_lgas import NIGERIAN_LGAS
+    from ..models.nigerian_coordinates import CITY_COORDINATES
+except ImportError:
+    from models.trade_categories import NIGERIAN_TRADE_CATEGORIES
+    from models.nigerian_states import NIGERIAN_STATES
+    from models.nigerian_lgas import NIGERIAN_LGAS
+    from models.nigerian_coordinates import CITY_COORDINATES
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+# Shorthand written with punctuation, folded before tokenizing ("A/C" -> "ac", "P.O.P" -> "pop")
+_SHORTHAND = [
+    (re.compile(r"\ba\s*/\s*c\b"), "ac"),
+    (re.compile(r"\bp\.\s*o\.\s*p\b\.?"), "pop"),
+]
+
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "at", "by", "for", "from", "in", "is", "it", "me", "my", "near",
+    "need", "of", "on", "or", "the", "to", "with", "abeg", "pls", "please",
+})
+
+# Words searched as one another: Nigerian trade shorthand and British/American spellings.
+# Mongo's English stemmer already folds plurals and -ing forms of each word.
+SYNONYM_GROUPS: List[Sequence[str]] = [
+    ("plumber", "plumbing"),
+    ("electrician", "electrical", "wiring", "wireman"),
+    ("ac", "aircon", "hvac", "conditioning", "refrigeration"),
+    ("fridge", "refrigerator", "freezer"),
+    ("gen", "generator", "genset"),
+    ("solar", "inverter"),
+    ("tiler", "tiling", "tiles"),
+    ("painter", "painting"),
+    ("carpenter", "carpentry"),
+    ("welder", "welding", "fabricator"),
+    ("roofer", "roofing"),
+    ("pop", "plaster", "plastering"),
+    ("mason", "masonry", "bricklayer"),
+    ("builder", "building", "construction"),
+    ("locksmith", "locksmithing"),
+    ("cctv", "surveillance"),
+    ("cleaner", "cleaning"),
+    ("mover", "moving", "relocation"),
+    ("vulcaniser", "vulcanizer"),
+    ("tyre", "tire"),
+    ("aluminium", "aluminum"),
+    ("colour", "color"),
+    ("centre", "center"),
+    ("labour", "labor"),
+    ("nepa", "phcn"),
+]
+
+_SYNONYMS: Dict[str, List[str]] = {}
+for _group in SYNONYM_GROUPS:
+    for _word in _group:
+        _SYNONYMS.setdefault(_word, []).extend(w for w in _group if w != _word)
+
+
+def normalize_search_text(text: Optional[str]) -> str:
+    """Lowercase, strip accents and fold shorthand such as "A/C" and "P.O.P" """
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    for pattern, replacement in _SHORTHAND:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return [t for t in _TOKEN.findall(normalize_search_text(text)) if t not in STOPWORDS and (len(t) > 1 or t.isdigit())]
+
+
+def expand_terms(tokens: Iterable[str]) -> List[str]:
+    """Tokens followed by their synonyms, without duplicates"""
+    terms: Dict[str, None] = {}
+    for token in tokens:
+        terms[token] = None
+        for synonym in _SYNONYMS.get(token, ()):
+            terms[synonym] = None
+    return list(terms)
+
+
+def text_search_string(query: Optional[str]) -> str:
+    """Value for a Mongo `$text: {"$search": ...}`; terms are OR-ed and ranked by textScore"""
+    return " ".join(expand_terms(tokenize(query)))
+
+
+def regex_search_filter(query: str, fields: Iterable[str]) -> Dict[str, Any]:
+    """The unindexed substring match, used when no text index is available"""
+    pattern = {"$regex": re.escape(query.strip()), "$options": "i"}
+    return {"$or": [{field: pattern} for field in fields]}
+
+
+class SuggestionIndex:
+    """Sorted prefix index of known search terms for autocomplete.
+
+    Every term is stored under each of its word suffixes ("Air Conditioning &
+    Refrigeration" is also found by "cond" and "refr"), so a lookup is one
+    bisect plus a walk over the matching range. Matches at the start of a term
+    rank above mid-term matches, then by kind, then shorter terms first.
+    """
+
+    KIND_RANK = {"trade": 0, "state": 1, "city": 2, "lga": 3}
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._entries: List[Dict[str, Any]] = []
+        self._seen: set = set()
+
+    @classmethod
+    def from_static(cls) -> "SuggestionIndex":
+        index = cls()
+        for trade in NIGERIAN_TRADE_CATEGORIES:
+            index.add(trade, "trade")
+        for state in NIGERIAN_STATES:
+            index.add(state, "state")
+        for city in CITY_COORDINATES:
+            index.add(city, "city")
+        for state, lgas in NIGERIAN_LGAS.items():
+            for lga in lgas:
+                index.add(lga, "lga", state=state)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def add(self, text: str, kind: str, **extra):
+        tokens = _TOKEN.findall(normalize_search_text(text))
+        if not tokens or (text.lower(), kind) in self._seen:
+            return
+        self._seen.add((text.lower(), kind))
+        for start in range(len(tokens)):
+            key = " ".join(tokens[start:])
+            entry = {"text": text, "type": kind, **extra, "_leading": start == 0}
+            position = bisect.bisect_left(self._keys, key)
+            self._keys.insert(position, key)
+            self._entries.insert(position, entry)
+
+    def suggest(self, prefix: Optional[str], limit: int = 10) -> List[Dict[str, Any]]:
+        key = " ".join(_TOKEN.findall(normalize_search_text(prefix)))
+        if not key:
+            return []
+        matches: Dict[tuple, Dict[str, Any]] = {}
+        position = bisect.bisect_left(self._keys, key)
+        while position < len(self._keys) and self._keys[position].startswith(key):
+            entry = self._entries[position]
+            identity = (entry["text"], entry["type"])
+            if identity not in matches or entry["_leading"]:
+                matches[identity] = entry
+            position += 1
+        ranked = sorted(matches.values(), key=lambda e: (
+            not e["_leading"], self.KIND_RANK.get(e["type"], len(self.KIND_RANK)), len(e["text"]), e["text"]
+        ))
+        return [{k: v for k, v in e.items() if k != "_leading"} for e in ranked[:limit]]
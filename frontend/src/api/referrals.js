@@ -55,12 +55,17 @@ export const adminReferralsAPI = {
     return response.data;
   },
 
-  // Fetch base64 for a verification document (authorized via admin token)
+  // Fetch a verification document as a data URL (authorized via admin token)
   async getVerificationDocumentBase64(filename) {
-    const response = await apiClient.get(`/admin/verifications/document-base64/${filename}`);
-    const b64 = response.data?.image_base64;
-    if (!b64) return null;
-    return `data:image/jpeg;base64,${b64}`;
+    const response = await apiClient.get(`/admin/verifications/document/${encodeURIComponent(filename)}`, { responseType: 'blob' });
+    const blob = response.data;
+    if (!blob?.size) return null;
+    return new Promise((resolve, reject) => {
+      const reader = new FileReader();
+      reader.onload = () => resolve(reader.result);
+      reader.onerror = () => reject(reader.error);
+      reader.readAsDataURL(blob);
+    });
   },
 
   // Approve verification
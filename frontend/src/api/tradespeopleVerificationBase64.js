@@ -5,22 +5,7 @@ export async function getTradespeopleVerificationFileBase64(filename) {
     if (!filename) return '';
     if (typeof filename === 'string' && filename.startsWith('data:')) return filename;
 
-    // First try the base64 endpoint (prioritizes DB-stored base64)
-    try {
-      const b64Res = await apiClient.get(`/admin/tradespeople-verifications/document-base64/${encodeURIComponent(filename)}`);
-      const data = b64Res?.data || {};
-      if (data?.data_url) {
-        return data.data_url;
-      }
-      if (data?.image_base64) {
-        const ct = data?.content_type || 'application/octet-stream';
-        return `data:${ct};base64,${data.image_base64}`;
-      }
-    } catch (e) {
-      // Fall through to blob method if base64 endpoint fails
-    }
-
-    // Fallback: fetch the file as blob and convert client-side
+    // Fetch the file as binary and convert client-side
     const blobRes = await apiClient.get(`/admin/tradespeople-verifications/document/${encodeURIComponent(filename)}`, { responseType: 'blob' });
     const blob = blobRes?.data;
     const contentType = blob?.type || 'application/octet-stream';
@@ -19,18 +19,19 @@ const PaymentProofImage = ({ filename, isAdmin = false, className = '', alt = 'P
     }
 
     const url = isAdmin
-      ? adminAPI.getPaymentProofBase64Url(filename)
-      : walletAPI.getPaymentProofBase64Url(filename);
+      ? adminAPI.getPaymentProofUrl(filename)
+      : walletAPI.getPaymentProofUrl(filename);
 
+    let objectUrl = '';
     apiClient
-      .get(url)
+      .get(url, { responseType: 'blob' })
       .then((resp) => {
-        const b64 = resp?.data?.image_base64;
-        if (!b64) {
-          throw new Error('Base64 not returned');
+        if (!resp?.data?.size) {
+          throw new Error('Empty image returned');
         }
+        objectUrl = URL.createObjectURL(resp.data);
         if (isMounted) {
-          setSrc(`data:image/jpeg;base64,${b64}`);
+          setSrc(objectUrl);
         }
       })
       .catch((e) => {
@@ -40,7 +41,10 @@ const PaymentProofImage = ({ filename, isAdmin = false, className = '', alt = 'P
         console.warn('PaymentProofImage error:', e?.response?.data || e?.message);
       });
 
-    return () => { isMounted = false; };
+    return () => {
+      isMounted = false;
+      if (objectUrl) URL.revokeObjectURL(objectUrl);
+    };
   }, [filename, isAdmin]);
 
   if (error) {
@@ -0,0 +1,94 @@
+import asyncio
+
+from backend.services.geocoding import GeocodingService, StubNominatimTransport, TokenBucket
+
+LAGOS = (6.5244, 3.3792)
+
+
+def _service(transport, burst=10):
+    service = GeocodingService(lambda: None, transport=transport)
+    service.rate_limiter = TokenBucket("test", rate_per_min=0.001, capacity=burst, database_getter=lambda: None)
+    return service
+
+
+def test_cache_hit_skips_provider():
+    async def run():
+        stub = StubNominatimTransport({"Lagos": LAGOS})
+        service = _service(stub)
+        first = await service.geocode("Lagos")
+        second = await service.geocode("  LAGOS ")
+        await service.aclose()
+        return stub, first, second
+
+    stub, first, second = asyncio.run(run())
+    assert first == second == {"latitude": LAGOS[0], "longitude": LAGOS[1]}
+    assert stub.calls == 1
+
+
+def test_miss_is_cached_but_provider_error_is_not():
+    async def run():
+        stub = StubNominatimTransport({})
+        service = _service(stub)
+        assert await service.geocode("Nowhere") is None
+        assert await service.geocode("Nowhere") is None
+        failing = StubNominatimTransport({"Lagos": LAGOS}, status_code=503)
+        broken = _service(failing)
+        assert await broken.geocode("Lagos") is None
+        assert await broken.geocode("Lagos") is None
+        await service.aclose()
+        await broken.aclose()
+        return stub, failing
+
+    stub, failing = asyncio.run(run())
+    assert stub.calls == 1
+    assert failing.calls == 2
+
+
+def test_concurrent_lookups_share_one_request():
+    async def run():
+        stub = StubNominatimTransport({"Abuja": (9.0765, 7.3986)})
+        service = _service(stub)
+        results = await asyncio.gather(*(service.geocode("Abuja") for _ in range(20)))
+        await service.aclose()
+        return stub, results
+
+    stub, results = asyncio.run(run())
+    assert stub.calls == 1
+    assert all(r == {"latitude": 9.0765, "longitude": 7.3986} for r in results)
+
+
+def test_rate_limit_refuses_without_calling_provider():
+    async def run():
+        stub = StubNominatimTransport({"Lagos": LAGOS, "Kano": (12.0022, 8.5920)})
+        service = _service(stub, burst=1)
+        first = await service.geocode("Lagos")
+        second = await service.geocode("Kano")
+        await service.aclose()
+        return stub, first, second
+
+    stub, first, second = asyncio.run(run())
+    assert first is not None
+    assert second is None
+    assert stub.calls == 1
+
+
+def test_lookup_tells_definitive_misses_from_failures():
+    async def run():
+        service = _service(StubNominatimTransport({}))
+        broken = _service(StubNominatimTransport({}, status_code=429))
+        limited = _service(StubNominatimTransport({}), burst=1)
+        results = (
+            await service.lookup("Nowhere"),
+            await broken.lookup("Nowhere"),
+            await limited.lookup("Nowhere"),
+            await limited.lookup("Elsewhere"),
+        )
+        for s in (service, broken, limited):
+            await s.aclose()
+        return results
+
+    miss, error, granted, refused = asyncio.run(run())
+    assert miss == (True, None)
+    assert error == (False, None)
+    assert granted == (True, None)
+    assert refused == (False, None)
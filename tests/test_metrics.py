@@ -0,0 +1,34 @@
+from backend.utils.metrics import MetricsRegistry
+
+
+def _render():
+    registry = MetricsRegistry()
+    requests = registry.counter("app_requests", "Requests served", ["method"])
+    requests.inc(method="GET")
+    requests.inc(2, method="POST")
+    latency = registry.histogram("app_latency_seconds", "Request latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        latency.observe(value)
+    return registry.render().splitlines()
+
+
+def test_counter_metadata_matches_total_samples():
+    lines = _render()
+    assert "# HELP app_requests_total Requests served" in lines
+    assert "# TYPE app_requests_total counter" in lines
+    assert 'app_requests_total{method="GET"} 1' in lines
+    assert 'app_requests_total{method="POST"} 2' in lines
+    assert not any(line.split(" ")[0] == "app_requests" for line in lines if not line.startswith("#"))
+
+
+def test_histogram_buckets_are_cumulative():
+    lines = _render()
+    assert "# TYPE app_latency_seconds histogram" in lines
+    buckets = [line for line in lines if line.startswith("app_latency_seconds_bucket")]
+    assert buckets == [
+        'app_latency_seconds_bucket{le="0.1"} 1',
+        'app_latency_seconds_bucket{le="1.0"} 3',
+        'app_latency_seconds_bucket{le="+Inf"} 4',
+    ]
+    assert "app_latency_seconds_count 4" in lines
+    assert "app_latency_seconds_sum 4.25" in lines
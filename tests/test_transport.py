@@ -0,0 +1,83 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend.services.notifications import SendGridEmailService, TermiiSMSService
+from backend.services.transport import FakeProviderTransport, ProviderClient, use_transport
+
+
+@pytest.fixture
+def provider_env(monkeypatch):
+    monkeypatch.setenv("SENDGRID_API_KEY", "SG.test")
+    monkeypatch.setenv("SENDER_EMAIL", "noreply@example.com")
+    monkeypatch.setenv("TERMII_API_KEY", "termii-test")
+    monkeypatch.setenv("TERMII_SENDER_ID", "ServiceHub")
+    monkeypatch.setenv("TERMII_BASE_URL", "https://termii.test")
+    monkeypatch.setenv("SENDGRID_BASE_URL", "https://sendgrid.test")
+
+
+def _with_transport(transport, coro_fn):
+    async def run():
+        await use_transport(transport)
+        try:
+            return await coro_fn()
+        finally:
+            await use_transport(None)
+    return asyncio.run(run())
+
+
+def test_email_and_sms_are_sent_through_provider_clients(provider_env):
+    fake = FakeProviderTransport()
+
+    async def send():
+        email = await SendGridEmailService().send_email("user@example.com", "Hello", "<p>Hi</p>")
+        sms = await TermiiSMSService().send_sms("08031234567", "Your code is 1234")
+        return email, sms
+
+    email_ok, sms_ok = _with_transport(fake, send)
+    assert email_ok and sms_ok
+    [mail] = fake.sent("/v3/mail/send")
+    assert mail["personalizations"][0]["to"][0]["email"] == "user@example.com"
+    [sms] = fake.sent("/api/sms/send")
+    assert sms["to"] == "2348031234567"
+    assert sms["channel"] == "dnd"
+
+
+def test_provider_failure_and_timeout_report_not_sent(provider_env, monkeypatch):
+    monkeypatch.setenv("TERMII_TIMEOUT_SEC", "0.05")
+    failing = FakeProviderTransport(status_code=500)
+    assert _with_transport(failing, lambda: TermiiSMSService().send_sms("08031234567", "hi")) is False
+    # Both Termii channels are tried before giving up
+    assert len(failing.sent("/api/sms/send")) == 2
+
+    slow = FakeProviderTransport(latency=5.0)
+    assert _with_transport(slow, lambda: TermiiSMSService().send_sms("08031234567", "hi")) is False
+
+
+def test_client_caps_concurrent_requests():
+    fake = FakeProviderTransport(latency=0.01)
+
+    async def run():
+        client = ProviderClient("test", base_url="https://provider.test", max_concurrency=3, transport=fake)
+        try:
+            await asyncio.gather(*(client.post("/v3/mail/send", json={"n": i}) for i in range(12)))
+        finally:
+            await client.aclose()
+
+    asyncio.run(run())
+    assert len(fake.requests) == 12
+    assert fake.max_in_flight == 3
+
+
+def test_timeout_raises_read_timeout():
+    async def run():
+        client = ProviderClient("test", base_url="https://provider.test", timeout=0.05,
+                                transport=FakeProviderTransport(latency=5.0))
+        try:
+            await client.get("/logo.png")
+        finally:
+            await client.aclose()
+
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(run())